@@ -12,7 +12,7 @@ import os
 import re
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Awaitable
+from typing import Any, Callable, Awaitable, TypeVar
 
 # Cost per 1K tokens (USD) — model id → rate
 COST_PER_1K: dict[str, float] = {
@@ -51,6 +51,10 @@ class LoopConfig:
     max_messages_before_compress: int = field(
         default_factory=lambda: int(os.getenv("AGENTIC_LOOP_MAX_MESSAGES", "28"))
     )
+    # Token-budgeted context window (tools/context_window.py) instead of message-count compression
+    token_budget_context: bool = field(
+        default_factory=lambda: os.getenv("AGENTIC_TOKEN_BUDGET_CONTEXT", "true").lower() == "true"
+    )
 
 
 def get_loop_config() -> LoopConfig:
@@ -89,6 +93,7 @@ def compress_messages_if_needed(
     """
     Context Window Guard: if too many messages, keep system + last N and a summary placeholder.
     Does not call LLM; just truncates to stay under limit. Orchestrator/agent can inject a short summary later.
+    Legacy message-count guard, used only when token_budget_context is disabled.
     """
     cfg = config or get_loop_config()
     if len(messages) <= cfg.max_messages_before_compress:
@@ -104,6 +109,117 @@ def compress_messages_if_needed(
     return system_msgs + [summary_note] + keep
 
 
+# ---------------------------------------------------------------------------
+# Concurrent tool dispatch — bir LLM turunda dönen bağımsız tool çağrıları
+# ---------------------------------------------------------------------------
+
+# Tool name → concurrency class. Unlisted tools are "serial": each one is a
+# barrier — it runs alone, after every call requested before it and before any
+# call requested after it (workspace writes, memory writes, messaging, code
+# execution...), so a same-turn write → read keeps its order. "network" tools are
+# read-only I/O and can overlap between barriers; "compute" tools are heavier and
+# get a tighter limit.
+TOOL_CONCURRENCY_CLASSES: dict[str, str] = {
+    "web_search": "network",
+    "web_fetch": "network",
+    "rag_query": "network",
+    "rag_list_documents": "network",
+    "recall_memory": "network",
+    "list_memories": "network",
+    "memory_stats": "network",
+    "memory_advanced_search": "network",
+    "find_skill": "network",
+    "list_teachings": "network",
+    "search_thread_history": "network",
+    "fetch_transcript": "network",
+    "summarize_video": "network",
+    "get_shared_knowledge": "network",
+    "get_agent_baseline": "network",
+    "get_best_agent": "network",
+    "suggest_collaborator": "network",
+    "check_budget": "network",
+    "check_error_patterns": "network",
+    "mcp_list_tools": "network",
+    "workspace_list_skills": "network",
+    "ocr_status": "network",
+    "generate_image": "compute",
+    "generate_chart": "compute",
+    "ocr_extract": "compute",
+}
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+@dataclass
+class ToolDispatchConfig:
+    """Limits for running several tool calls from one LLM turn concurrently."""
+    enabled: bool = field(
+        default_factory=lambda: os.getenv("AGENTIC_PARALLEL_TOOLS", "true").lower() == "true"
+    )
+    max_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("AGENTIC_TOOL_MAX_CONCURRENCY", "4"))
+    )
+    class_limits: dict[str, int] = field(
+        default_factory=lambda: {
+            "network": int(os.getenv("AGENTIC_TOOL_NETWORK_CONCURRENCY", "4")),
+            "compute": int(os.getenv("AGENTIC_TOOL_COMPUTE_CONCURRENCY", "2")),
+        }
+    )
+
+
+def get_tool_dispatch_config() -> ToolDispatchConfig:
+    return ToolDispatchConfig()
+
+
+def tool_concurrency_class(tool_name: str) -> str:
+    return TOOL_CONCURRENCY_CLASSES.get(tool_name, "serial")
+
+
+async def dispatch_tool_calls(
+    calls: list[_T],
+    run: Callable[[_T], Awaitable[_R]],
+    name_of: Callable[[_T], str],
+    config: ToolDispatchConfig | None = None,
+) -> list[_R]:
+    """Run tool calls with per-class concurrency; results keep the input order.
+
+    Parallel-safe calls overlap only between serial-class calls: a serial call
+    waits for everything requested before it and blocks everything requested
+    after it (e.g. save_memory → recall_memory reads its own write). With
+    dispatch disabled (or a single call) everything runs sequentially,
+    exactly like the original loop.
+    """
+    cfg = config or get_tool_dispatch_config()
+    if not cfg.enabled or len(calls) <= 1:
+        return [await run(c) for c in calls]
+
+    results: list[Any] = [None] * len(calls)
+    overall = asyncio.Semaphore(max(1, cfg.max_concurrency))
+    class_sems = {
+        cls: asyncio.Semaphore(max(1, limit)) for cls, limit in cfg.class_limits.items()
+    }
+
+    async def _run_parallel(i: int, cls: str) -> None:
+        async with class_sems[cls], overall:
+            results[i] = await run(calls[i])
+
+    segment: list[Awaitable[None]] = []
+    for i, c in enumerate(calls):
+        cls = tool_concurrency_class(name_of(c))
+        if cls in class_sems:
+            segment.append(_run_parallel(i, cls))
+            continue
+        # Serial call = barrier
+        if segment:
+            await asyncio.gather(*segment)
+            segment = []
+        results[i] = await run(c)
+    if segment:
+        await asyncio.gather(*segment)
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Faz 14.6: Context Transformer — mesaj dizisini LLM'e göndermeden önce dönüştürme
 # ---------------------------------------------------------------------------
@@ -188,9 +304,16 @@ def inject_context_summary(messages: list[dict[str, Any]], config: LoopConfig) -
     return messages[:insert_idx] + [{"role": "user", "content": summary}] + messages[insert_idx:]
 
 
-def get_default_transformer() -> ContextTransformer:
-    """Create a transformer with default built-in transforms."""
+def get_default_transformer(context_window: Any = None) -> ContextTransformer:
+    """Create a transformer with default built-in transforms.
+
+    With a ContextWindowManager the token-budget fit replaces the
+    message-count / char-threshold trims below.
+    """
     ct = ContextTransformer()
+    if context_window is not None:
+        ct.add_transform(context_window.fit)
+        return ct
     ct.add_transform(trim_redundant_tool_results)
     ct.add_transform(inject_context_summary)
     # pi-mom inspired: aggressive old tool result trimming
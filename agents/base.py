@@ -14,14 +14,17 @@ import sys
 import time
 import uuid as uuid_module
 from abc import ABC, abstractmethod
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Any, Optional
 
 from openai import AsyncOpenAI
 
 from config import NVIDIA_API_KEY, NVIDIA_BASE_URL, DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, MODELS, PI_GATEWAY_URL, PI_GATEWAY_ENABLED, PI_GATEWAY_FALLBACK_ENABLED, PI_GATEWAY_STREAMING_ENABLED, GATEWAY_MODELS, RUNTIME_EVENT_SCHEMA_VERSION, get_feature_flags, get_model_capabilities, get_provider_registry_entry
-from core.models import AgentRole, EventType, Thread
+from core.models import AgentRole, EventType, TaskStatus, Thread
 from core.events import serialize_thread_for_llm
+from tools.llm_admission import estimate_tokens, get_admission_controller
+from tools.prompt_cache import cached_prompt_tokens, get_prompt_prefix_cache, record_prompt_usage
 
 # Ensure project root is in path for Streamlit compatibility
 _root = str(Path(__file__).parent.parent)
@@ -36,6 +39,51 @@ _THINK_OPEN_RE = re.compile(r"<think>.*", re.DOTALL | re.IGNORECASE)
 _TOOL_CALL_RE = re.compile(r"<tool_call>\s*(.*?)\s*</tool_call>", re.DOTALL | re.IGNORECASE)
 logger = logging.getLogger(__name__)
 
+# Anti-hallucination rules — injected into ALL agents
+_INTEGRITY_RULES = (
+    "\n\n## INTEGRITY RULES (MANDATORY — NEVER VIOLATE):\n"
+    "1. NEVER fabricate, invent, or hallucinate information. Only provide factual, verifiable data.\n"
+    "2. NEVER generate fake URLs, file paths, download links, or API endpoints that do not exist.\n"
+    "3. If you don't know something, say 'Bilmiyorum' or 'Bu bilgiye sahip değilim' — do NOT make up an answer.\n"
+    "4. NEVER invent statistics, percentages, market sizes, or quotes without a real source.\n"
+    "5. When citing sources, only cite URLs you actually found via web_search or web_fetch.\n"
+    "6. If a task fails or produces no result, report the failure honestly — do NOT fabricate a success response.\n"
+    "7. NEVER generate S3, CDN, cloud storage, or any external download URLs unless you created them.\n"
+    "8. Distinguish clearly between facts (verified) and opinions/estimates (labeled as such).\n"
+)
+
+# Visual capabilities — grafik çizme + Pollinations ile görsel üretme (injected into ALL agents)
+_IMAGE_CAPABILITY = (
+    "\n\n## VISUAL CAPABILITIES (use when tasks need visuals):\n"
+    "**1. generate_image** (Pollinations API — AI image generation):\n"
+    "- Use for: illustrations, diagrams, infographics, concept art, photos.\n"
+    "- Prompt in ENGLISH, descriptive and specific. Returns markdown image + download URL.\n"
+    "- Example: 'Professional diagram showing microservices architecture with API gateway'.\n"
+    "**2. generate_chart** (matplotlib — data visualization):\n"
+    "- Use for: bar/line/pie/scatter/histogram/area/heatmap from structured data.\n"
+    "- Pass chart_type, data (e.g. {labels, values} or {x, y}), title, optional width/height.\n"
+    "- Use when the user asks for a chart, graph, or when analysis results should be shown visually.\n"
+    "- In reports: add 1–3 relevant images (generate_image) and/or charts (generate_chart) when they add value.\n"
+    "- DO NOT skip these tools when the task would benefit from a visual.\n"
+)
+
+
+# Per-request time-to-first-agent-token probe — set by OrchestratorAgent.route_and_execute.
+# Holds {"t0": perf_counter}; the first non-orchestrator LLM output adds first_token_at/agent.
+first_token_probe: ContextVar[dict[str, Any] | None] = ContextVar("first_agent_token_probe", default=None)
+
+
+def _date_line() -> str:
+    """Current date/time line — goes into the final user turn, never the system prefix."""
+    from datetime import datetime, timezone
+
+    now = datetime.now(timezone.utc)
+    date_str = now.strftime("%d %B %Y, %A, %H:%M UTC")
+    return (
+        f"CURRENT DATE AND TIME: {date_str}. "
+        f"Year is {now.year}. Use this as the real current date and time for all responses."
+    )
+
 
 def _strip_thinking_tags(text: str) -> str:
     """Remove <think>...</think> blocks from LLM output.
@@ -162,57 +210,42 @@ class BaseAgent(ABC):
         """Override to provide function-calling tools."""
         return None
 
+    def _mark_first_token(self) -> None:
+        """Record the first specialist output of the current request (see first_token_probe)."""
+        probe = first_token_probe.get()
+        if probe is not None and "first_token_at" not in probe and self.role != AgentRole.ORCHESTRATOR:
+            probe["first_token_at"] = time.perf_counter()
+            probe["agent"] = self.role.value
+
+    def _static_prompt_prefix(self) -> str:
+        """Most-static part of the system prompt, memoized per agent class/role.
+
+        Order: SOUL identity → agent instructions → integrity → visual rules.
+        Kept byte-identical between calls so provider prefix caching can hit.
+        """
+        def build() -> str:
+            prefix = self.system_prompt() + _INTEGRITY_RULES + _IMAGE_CAPABILITY
+            # Faz 11.6 — SOUL.md identity injection
+            identity_ctx = self._identity_prompt()
+            if identity_ctx:
+                prefix = identity_ctx + "\n\n---\nAgent Task Instructions:\n" + prefix
+            return prefix
+
+        role = self.role.value if hasattr(self.role, "value") else str(self.role)
+        return get_prompt_prefix_cache().get_or_build(f"{type(self).__name__}:{role}", build)
+
     async def build_context(
         self, thread: Thread, task_input: str
     ) -> list[dict[str, Any]]:
         """
         12-Factor #3: Build context window.
         Default: system prompt + serialized thread + current task.
-        Injects current date + activated skills into system prompt.
-        """
-        from datetime import datetime, timezone
-
-        now = datetime.now(timezone.utc)
-        date_str = now.strftime("%d %B %Y, %A, %H:%M UTC")
-        date_injection = (
-            f"\n\nCURRENT DATE AND TIME: {date_str}. "
-            f"Year is {now.year}. Use this as the real current date and time for all responses."
-        )
-
-        # Anti-hallucination rules — injected into ALL agents
-        integrity_rules = (
-            "\n\n## INTEGRITY RULES (MANDATORY — NEVER VIOLATE):\n"
-            "1. NEVER fabricate, invent, or hallucinate information. Only provide factual, verifiable data.\n"
-            "2. NEVER generate fake URLs, file paths, download links, or API endpoints that do not exist.\n"
-            "3. If you don't know something, say 'Bilmiyorum' or 'Bu bilgiye sahip değilim' — do NOT make up an answer.\n"
-            "4. NEVER invent statistics, percentages, market sizes, or quotes without a real source.\n"
-            "5. When citing sources, only cite URLs you actually found via web_search or web_fetch.\n"
-            "6. If a task fails or produces no result, report the failure honestly — do NOT fabricate a success response.\n"
-            "7. NEVER generate S3, CDN, cloud storage, or any external download URLs unless you created them.\n"
-            "8. Distinguish clearly between facts (verified) and opinions/estimates (labeled as such).\n"
-        )
-
-        # Auto-inject activated skills from sub-task assignments
-        skill_injection = self._build_skill_injection(task_input, thread)
-
-        # Visual capabilities — grafik çizme + Pollinations ile görsel üretme (injected into ALL agents)
-        image_capability = (
-            "\n\n## VISUAL CAPABILITIES (use when tasks need visuals):\n"
-            "**1. generate_image** (Pollinations API — AI image generation):\n"
-            "- Use for: illustrations, diagrams, infographics, concept art, photos.\n"
-            "- Prompt in ENGLISH, descriptive and specific. Returns markdown image + download URL.\n"
-            "- Example: 'Professional diagram showing microservices architecture with API gateway'.\n"
-            "**2. generate_chart** (matplotlib — data visualization):\n"
-            "- Use for: bar/line/pie/scatter/histogram/area/heatmap from structured data.\n"
-            "- Pass chart_type, data (e.g. {labels, values} or {x, y}), title, optional width/height.\n"
-            "- Use when the user asks for a chart, graph, or when analysis results should be shown visually.\n"
-            "- In reports: add 1–3 relevant images (generate_image) and/or charts (generate_chart) when they add value.\n"
-            "- DO NOT skip these tools when the task would benefit from a visual.\n"
-        )
-
-        # Faz 11.6 — SOUL.md identity injection
-        identity_ctx = self._identity_prompt()
 
+        Segments go from most static to most volatile so the system prompt is a
+        stable prefix: memoized identity/instructions/rules, then skills and
+        strategy; thread history, prior results and the current date/time go
+        into the user turns.
+        """
         history = serialize_thread_for_llm(thread, max_events=30)
 
         # If thread has prior completed tasks, inject their summaries
@@ -238,9 +271,11 @@ class BaseAgent(ABC):
                 )
                 # Reduce raw event history when we have prior summaries
                 history = serialize_thread_for_llm(thread, max_events=10)
-        system_content = self.system_prompt() + date_injection + integrity_rules + image_capability
-        if identity_ctx:
-            system_content = identity_ctx + "\n\n---\nAgent Task Instructions:\n" + system_content
+
+        system_content = self._static_prompt_prefix()
+
+        # Auto-inject activated skills from sub-task assignments
+        skill_injection = self._build_skill_injection(task_input, thread)
         if skill_injection:
             system_content += skill_injection
 
@@ -278,7 +313,7 @@ class BaseAgent(ABC):
                 ctx += f"Thread history:\n{history}"
             messages.append({"role": "user", "content": ctx})
             messages.append({"role": "assistant", "content": "Understood. I have the context."})
-        messages.append({"role": "user", "content": task_input})
+        messages.append({"role": "user", "content": _date_line() + "\n\n" + task_input})
         return messages
 
     def _build_skill_injection(self, task_input: str, thread: Thread) -> str:
@@ -323,6 +358,14 @@ class BaseAgent(ABC):
             return self.gateway_client, gateway_model
         return self.client, effective["id"]
 
+    async def _create_completion(self, client: AsyncOpenAI, kwargs: dict[str, Any]) -> Any:
+        """chat.completions.create behind the per provider/model admission controller."""
+        tokens = estimate_tokens(kwargs["messages"], kwargs.get("max_tokens"))
+        async with get_admission_controller().admit(client.base_url, kwargs["model"], tokens) as ticket:
+            response = await client.chat.completions.create(**kwargs)
+            ticket.record_usage(getattr(getattr(response, "usage", None), "total_tokens", None))
+            return response
+
     def _build_runtime_metadata(
         self,
         *,
@@ -416,6 +459,7 @@ class BaseAgent(ABC):
                 "tokens_prompt": None,
                 "tokens_completion": None,
                 "tokens_total": None,
+                "tokens_cached": None,
                 "token_usage_status": "unknown",
                 "token_usage_reason": "provider_usage_missing",
             }
@@ -439,6 +483,8 @@ class BaseAgent(ABC):
             "tokens_prompt": int(prompt_tokens) if prompt_tokens is not None else None,
             "tokens_completion": int(completion_tokens) if completion_tokens is not None else None,
             "tokens_total": int(total_tokens) if total_tokens is not None else None,
+            # Provider prefix-cache hits (None if the provider does not report them)
+            "tokens_cached": cached_prompt_tokens(usage),
             "token_usage_status": status,
             "token_usage_reason": reason,
         }
@@ -494,7 +540,7 @@ class BaseAgent(ABC):
             used_gateway=used_gateway,
         )
         try:
-            response = await client.chat.completions.create(**kwargs)
+            response = await self._create_completion(client, kwargs)
         except Exception as primary_err:
             last_error = primary_err
             response = None
@@ -512,7 +558,7 @@ class BaseAgent(ABC):
                             fb_kwargs["extra_body"] = fb_extra
                         elif "extra_body" in fb_kwargs:
                             del fb_kwargs["extra_body"]
-                        response = await self.gateway_client.chat.completions.create(**fb_kwargs)
+                        response = await self._create_completion(self.gateway_client, fb_kwargs)
                         fallback_used = True
                         selected_model = fb_model
                         selected_provider, runtime_extra = self._resolve_runtime_provider_metadata(
@@ -538,7 +584,7 @@ class BaseAgent(ABC):
                         direct_kwargs["extra_body"] = direct_extra
                     elif "extra_body" in direct_kwargs:
                         del direct_kwargs["extra_body"]
-                    response = await self.client.chat.completions.create(**direct_kwargs)
+                    response = await self._create_completion(self.client, direct_kwargs)
                     fallback_used = True
                     selected_model = effective["id"]
                     selected_provider, runtime_extra = self._resolve_runtime_provider_metadata(
@@ -580,6 +626,8 @@ class BaseAgent(ABC):
         choice = response.choices[0]
         usage = response.usage
         usage_norm = self._normalize_token_usage(usage)
+        self._mark_first_token()
+        record_prompt_usage(selected_model, usage_norm["tokens_prompt"], usage_norm["tokens_cached"])
 
         # Extract thinking content from dedicated fields
         thinking = getattr(choice.message, "reasoning_content", None) \
@@ -639,6 +687,7 @@ class BaseAgent(ABC):
             "tokens_prompt": usage_norm["tokens_prompt"],
             "tokens_completion": usage_norm["tokens_completion"],
             "tokens_total": usage_norm["tokens_total"],
+            "tokens_cached": usage_norm["tokens_cached"],
             "token_usage_status": usage_norm["token_usage_status"],
             "token_usage_reason": usage_norm["token_usage_reason"],
             "latency_ms": latency_ms,
@@ -682,6 +731,7 @@ class BaseAgent(ABC):
                     "prompt_tokens": result.get("tokens_prompt"),
                     "completion_tokens": result.get("tokens_completion"),
                     "total_tokens": result.get("tokens_total"),
+                    "cached_tokens": result.get("tokens_cached"),
                     "token_usage_status": result.get("token_usage_status", "unknown"),
                     "token_usage_reason": result.get("token_usage_reason", "provider_usage_missing"),
                 },
@@ -728,6 +778,10 @@ class BaseAgent(ABC):
         fallback_used = False
         used_gateway = client is self.gateway_client
 
+        admission = get_admission_controller()
+        ticket = await admission.acquire(
+            client.base_url, model_id, estimate_tokens(messages, kwargs["max_tokens"]),
+        )
         try:
             stream = await client.chat.completions.create(**kwargs)
 
@@ -740,6 +794,8 @@ class BaseAgent(ABC):
 
                 # --- Text content delta ---
                 if delta.content:
+                    if not full_text:
+                        self._mark_first_token()
                     full_text += delta.content
                     yield {
                         "type": "text_delta",
@@ -865,6 +921,9 @@ class BaseAgent(ABC):
             }
             if chunk and hasattr(chunk, "usage"):
                 usage_data = self._normalize_token_usage(getattr(chunk, "usage", None))
+                record_prompt_usage(model_id, usage_data.get("tokens_prompt"), usage_data.get("tokens_cached"))
+            ticket.record_usage(usage_data.get("tokens_total"))
+            ticket.release()
 
             try:
                 if self.perf_collector:
@@ -909,6 +968,9 @@ class BaseAgent(ABC):
             }
 
         except Exception as e:
+            # Slot'u bırak — fallback call_llm kendi slotunu alır
+            admission.note_error(client.base_url, model_id, e)
+            ticket.release()
             # Fallback to non-streaming on any stream error
             import logging
             logging.getLogger(__name__).warning(
@@ -933,6 +995,7 @@ class BaseAgent(ABC):
                         "prompt_tokens": result.get("tokens_prompt"),
                         "completion_tokens": result.get("tokens_completion"),
                         "total_tokens": result.get("tokens_total"),
+                        "cached_tokens": result.get("tokens_cached"),
                         "token_usage_status": result.get("token_usage_status", "unknown"),
                         "token_usage_reason": result.get("token_usage_reason", "provider_usage_missing"),
                     },
@@ -957,6 +1020,8 @@ class BaseAgent(ABC):
                         extra=runtime_extra,
                     ),
                 }
+        finally:
+            ticket.release()
 
     def set_live_monitor(self, monitor):
         """Attach a LiveMonitor for realtime UI updates."""
@@ -1336,10 +1401,19 @@ class BaseAgent(ABC):
             cost_per_1k_for_model,
             get_default_transformer,
             get_followup_config,
+            get_tool_dispatch_config,
+            dispatch_tool_calls,
         )
 
         loop_config = get_loop_config()
-        context_transformer = get_default_transformer()
+        tool_dispatch_config = get_tool_dispatch_config()
+        context_window = None
+        if loop_config.token_budget_context:
+            from tools.context_window import ContextWindowManager
+            context_window = ContextWindowManager.for_model(
+                self.model_key, tools=tools, max_output_tokens=self.cfg.get("max_tokens"),
+            )
+        context_transformer = get_default_transformer(context_window)
         followup_config = get_followup_config()
         max_steps_loop = min(self.max_steps, loop_config.max_iterations)
         cumulative_tokens = 0
@@ -1371,8 +1445,10 @@ class BaseAgent(ABC):
                     pass
                 return "[Stopped] Kullanıcı tarafından durduruldu."
 
-            # Context Window Guard: compress if too many messages
-            messages = compress_messages_if_needed(messages, loop_config)
+            # Context Window Guard: token budget runs inside the transformer;
+            # message-count compression only in legacy mode
+            if context_window is None:
+                messages = compress_messages_if_needed(messages, loop_config)
 
             # Faz 14.6: Context Transformer — apply pluggable transforms before LLM call
             messages = context_transformer.apply(messages, loop_config)
@@ -1465,6 +1541,7 @@ class BaseAgent(ABC):
             # Handle tool calls
             if result["tool_calls"]:
                 _used_tools: list[str] = []
+                _prepared: list[dict[str, Any]] = []
                 for tc in result["tool_calls"]:
                     fn_name = tc.function.name
                     _used_tools.append(fn_name)
@@ -1518,8 +1595,8 @@ class BaseAgent(ABC):
                         tool_name=fn_name,
                     )
 
+                    early_result = None
                     if parse_error:
-                        _tool_latency_ms = 0.0
                         self._emit(
                             "tool_validation",
                             parse_error[:150],
@@ -1527,13 +1604,12 @@ class BaseAgent(ABC):
                             validation_status="failed",
                             validation_code="invalid_tool_arguments",
                         )
-                        tool_result = self._tool_error(
+                        early_result = self._tool_error(
                             "invalid_tool_arguments",
                             parse_error,
                             "Call the same tool again with valid JSON object arguments.",
                         )
                     elif validation_error_msg:
-                        _tool_latency_ms = 0.0
                         self._emit(
                             "tool_validation",
                             validation_error_msg[:150],
@@ -1541,7 +1617,7 @@ class BaseAgent(ABC):
                             validation_status="failed",
                             validation_code="schema_validation_failed",
                         )
-                        tool_result = self._tool_error(
+                        early_result = self._tool_error(
                             "schema_validation_failed",
                             validation_error_msg,
                             None,
@@ -1554,27 +1630,45 @@ class BaseAgent(ABC):
                             validation_status="passed",
                             validation_code="ok",
                         )
-                        try:
-                            _tool_t0 = time.monotonic()
-                            tool_result = await self.handle_tool_call(
-                                fn_name, fn_args, thread
-                            )
-                            _tool_latency_ms = (time.monotonic() - _tool_t0) * 1000
-                        except KeyError as e:
-                            _tool_latency_ms = (time.monotonic() - _tool_t0) * 1000
-                            tool_result = self._tool_error(
-                                "missing_required_argument",
-                                f"Missing required argument: {e}",
-                                "Check tool schema and provide all required fields.",
-                            )
-                        except Exception as e:
-                            _tool_latency_ms = (time.monotonic() - _tool_t0) * 1000
-                            tool_result = self._tool_error(
-                                "tool_execution_failed",
-                                f"{type(e).__name__}: {e}",
-                                "Try smaller input, adjust parameters, or use an alternative tool.",
-                            )
 
+                    _prepared.append({
+                        "tc": tc,
+                        "fn_name": fn_name,
+                        "fn_args": fn_args,
+                        "args_for_message": args_for_message,
+                        "early_result": early_result,
+                    })
+
+                async def _run_tool(call: dict[str, Any]) -> tuple[Any, float]:
+                    if call["early_result"] is not None:
+                        return call["early_result"], 0.0
+                    _tool_t0 = time.monotonic()
+                    try:
+                        tool_result = await self.handle_tool_call(
+                            call["fn_name"], call["fn_args"], thread
+                        )
+                    except KeyError as e:
+                        tool_result = self._tool_error(
+                            "missing_required_argument",
+                            f"Missing required argument: {e}",
+                            "Check tool schema and provide all required fields.",
+                        )
+                    except Exception as e:
+                        tool_result = self._tool_error(
+                            "tool_execution_failed",
+                            f"{type(e).__name__}: {e}",
+                            "Try smaller input, adjust parameters, or use an alternative tool.",
+                        )
+                    return tool_result, (time.monotonic() - _tool_t0) * 1000
+
+                # Independent calls run concurrently; results come back in tool_call order
+                _outcomes = await dispatch_tool_calls(
+                    _prepared, _run_tool, lambda c: c["fn_name"], tool_dispatch_config
+                )
+
+                for call, (tool_result, _tool_latency_ms) in zip(_prepared, _outcomes):
+                    tc = call["tc"]
+                    fn_name = call["fn_name"]
                     thread.add_event(
                         EventType.TOOL_RESULT,
                         str(tool_result)[:500],
@@ -1586,6 +1680,7 @@ class BaseAgent(ABC):
                         str(tool_result)[:150],
                         tool_name=fn_name,
                         tool_success=not _is_tool_error,
+                        latency_ms=round(_tool_latency_ms, 1),
                     )
 
                     # Adaptive Tool Selector: record tool usage
@@ -1603,9 +1698,15 @@ class BaseAgent(ABC):
                                     fn_name,
                                     task_input,
                                     str(error_message)[:200],
+                                    latency_ms=_tool_latency_ms,
                                 )
                             else:
-                                _ats.record_success(self.role.value, fn_name, task_input)
+                                _ats.record_success(
+                                    self.role.value,
+                                    fn_name,
+                                    task_input,
+                                    latency_ms=_tool_latency_ms,
+                                )
                         except Exception:
                             pass
 
@@ -1646,7 +1747,7 @@ class BaseAgent(ABC):
                                     "type": "function",
                                     "function": {
                                         "name": fn_name,
-                                        "arguments": args_for_message,
+                                        "arguments": call["args_for_message"],
                                     },
                                 }
                             ],
@@ -2020,8 +2121,8 @@ class BaseAgent(ABC):
         if fn_name == "find_skill":
             # Try dynamic registry first, fallback to static
             try:
-                from tools.dynamic_skills import search_skills
-                skills = search_skills(
+                from tools.dynamic_skills import asearch_skills
+                skills = await asearch_skills(
                     query=fn_args["query"],
                     max_results=fn_args.get("max_results", 3),
                 )
@@ -2074,6 +2175,7 @@ class BaseAgent(ABC):
             result = await execute_code(
                 code=fn_args["code"],
                 language=fn_args.get("language", "python"),
+                user_id=getattr(thread, "user_id", "system"),
             )
             return format_execution_result(result)
 
@@ -7,20 +7,24 @@ Deep Research mode: auto-detects complex queries and fans out to ALL agents in p
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import re
 import time
 import urllib.parse
+import uuid
+from collections import deque
 from typing import Any
 
-from agents.base import BaseAgent
+from agents.base import BaseAgent, first_token_probe
 from core.models import (
     AgentRole, EventType, PipelineType, SubTask, Task, TaskStatus, Thread,
 )
 from core.events import build_orchestrator_context
 from tools.registry import ORCHESTRATOR_TOOLS
-from tools.cache import get_cached_response, cache_response
+from tools.cache import get_cached_response, cache_response, single_flight
 
 # Keywords that trigger brainstorm mode (Turkish + English)
 _BRAINSTORM_PATTERNS = re.compile(
@@ -192,6 +196,90 @@ _LIST_TEACHINGS_PATTERNS = re.compile(
     re.IGNORECASE,
 )
 
+# ── Speculative pre-routing ──────────────────────────────────────
+# Intent analysis (+ skill pre-discovery), memory recall and teaching lookup run
+# concurrently instead of one after another.
+ORCHESTRATOR_SPECULATIVE_ROUTING = os.getenv("ORCHESTRATOR_SPECULATIVE_ROUTING", "true").lower() == "true"
+# Also start the deep-research researcher sub-task before intent analysis returns
+# (costs one wasted researcher run when the route turns out different)
+ORCHESTRATOR_SPECULATIVE_RESEARCH = os.getenv("ORCHESTRATOR_SPECULATIVE_RESEARCH", "false").lower() == "true"
+# Intent analysis waits at most this long for the (speculative) intent-pattern recall
+# before calling the LLM without the memory hint
+ORCHESTRATOR_INTENT_RECALL_WAIT_SEC = float(os.getenv("ORCHESTRATOR_INTENT_RECALL_WAIT_SEC", "0.15"))
+
+_routing_stats: dict[str, int] = {
+    "requests": 0,
+    "speculative_research_started": 0,
+    "speculative_research_adopted": 0,
+    "speculative_research_cancelled": 0,
+}
+_ttfat_samples: deque[float] = deque(maxlen=500)
+
+
+def get_routing_latency_stats() -> dict[str, Any]:
+    """Time-to-first-agent-token (ms) over recent requests + speculation hit counts."""
+    ordered = sorted(_ttfat_samples)
+    return {
+        **_routing_stats,
+        "speculative_routing": ORCHESTRATOR_SPECULATIVE_ROUTING,
+        "speculative_research": ORCHESTRATOR_SPECULATIVE_RESEARCH,
+        "ttfat_samples": len(ordered),
+        "ttfat_ms_p50": round(ordered[len(ordered) // 2], 1) if ordered else None,
+        "ttfat_ms_p95": round(ordered[int(len(ordered) * 0.95)], 1) if ordered else None,
+    }
+
+
+class _RoutingSpeculation:
+    """Pre-routing work of one request; whatever is not consumed is cancelled at the end."""
+
+    def __init__(self) -> None:
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.research: tuple[Any, SubTask, asyncio.Task] | None = None  # (engine, subtask, running)
+        self.research_adopted = False
+
+    def start(self, name: str, coro) -> asyncio.Task:
+        task = self.tasks[name] = asyncio.create_task(coro)
+        return task
+
+    async def result(self, name: str, default: Any = None) -> Any:
+        """Await a speculative task once; later calls (or failures) get the default."""
+        task = self.tasks.pop(name, None)
+        if task is None:
+            return default
+        try:
+            return await task
+        except Exception:
+            return default
+
+    def adopt_research(self, task: Task) -> Any:
+        """Hand the running researcher sub-task to a deep-research Task; returns its engine."""
+        if not self.research:
+            return None
+        engine, subtask, _ = self.research
+        for i, st in enumerate(task.sub_tasks):
+            if st.assigned_agent == subtask.assigned_agent:
+                task.sub_tasks[i] = subtask
+                self.research_adopted = True
+                return engine
+        return None
+
+    def cancel(self) -> list[str]:
+        """Cancel unconsumed work; returns names of what was still running."""
+        cancelled = []
+        for name, task in self.tasks.items():
+            if not task.done():
+                task.cancel()
+                cancelled.append(name)
+            elif not task.cancelled():
+                task.exception()  # mark retrieved (e.g. intent_recall awaited via shield)
+        self.tasks.clear()
+        if self.research and not self.research_adopted:
+            running = self.research[2]
+            if not running.done():
+                running.cancel()
+            cancelled.append("research")
+        return cancelled
+
 
 class OrchestratorAgent(BaseAgent):
     role = AgentRole.ORCHESTRATOR
@@ -291,15 +379,12 @@ class OrchestratorAgent(BaseAgent):
     async def build_context(
         self, thread: Thread, task_input: str
     ) -> list[dict[str, str]]:
-        """Orchestrator sees full context + relevant memories + current date."""
-        from datetime import datetime, timezone
-
-        now = datetime.now(timezone.utc)
-        date_str = now.strftime("%d %B %Y, %A, %H:%M UTC")
-        date_injection = (
-            f"\n\nCURRENT DATE AND TIME: {date_str}. "
-            f"Year is {now.year}. Use this as the real current date and time for all responses."
-        )
+        """Orchestrator sees full context + relevant memories + current date.
+
+        System prompt is kept static (prefix-cache friendly); teachings, memories
+        and the current date/time travel in the user turns.
+        """
+        from agents.base import _date_line
 
         history = build_orchestrator_context(thread)
 
@@ -327,12 +412,21 @@ class OrchestratorAgent(BaseAgent):
                     + "\n--- END PRIOR RESULTS ---\n"
                 )
 
+        # Speculative pre-routing may already have fetched memories/teachings (first call only)
+        speculation = getattr(self, "_speculation", None)
+        prefetched_memories = prefetched_teachings = None
+        if speculation:
+            prefetched_memories = await speculation.result("memory")
+            prefetched_teachings = await speculation.result("teachings")
+
         # Auto-recall relevant memories
         memory_context = ""
         try:
             from tools.memory import recall_memory, format_recall_results
 
-            memories = await recall_memory(query=task_input, max_results=3)
+            memories = prefetched_memories
+            if memories is None:
+                memories = await recall_memory(query=task_input, max_results=3)
             if memories:
                 memory_context = (
                     "\n\n--- RELEVANT MEMORIES ---\n"
@@ -345,20 +439,25 @@ class OrchestratorAgent(BaseAgent):
         # Auto-inject user teachings/preferences
         teaching_context = ""
         try:
-            from tools.teachability import get_relevant_teachings, format_teachings_for_context
-            teachings = get_relevant_teachings(task_input, max_results=5)
+            from tools.teachability import (
+                format_teachings_for_context, get_relevant_teachings, record_teaching_use,
+            )
+            teachings = prefetched_teachings
+            if teachings is None:
+                teachings = get_relevant_teachings(task_input, max_results=5)
+            elif teachings:
+                # Prefetched without counting — count now that they are injected
+                await asyncio.to_thread(record_teaching_use, [t.get("id") for t in teachings])
             if teachings:
                 teaching_context = "\n\n" + format_teachings_for_context(teachings) + "\n"
         except Exception:
             pass
 
-        system_content = self.system_prompt() + date_injection
-        if teaching_context:
-            system_content += teaching_context
-
-        messages = [{"role": "system", "content": system_content}]
-        if history.strip() or memory_context or prior_results_ctx:
+        messages = [{"role": "system", "content": self.system_prompt()}]
+        if history.strip() or memory_context or prior_results_ctx or teaching_context:
             ctx = ""
+            if teaching_context:
+                ctx += teaching_context.strip() + "\n\n"
             if prior_results_ctx:
                 ctx += prior_results_ctx + "\n"
             if history.strip():
@@ -367,7 +466,7 @@ class OrchestratorAgent(BaseAgent):
                 ctx += memory_context
             messages.append({"role": "user", "content": ctx})
             messages.append({"role": "assistant", "content": "I have the full context."})
-        messages.append({"role": "user", "content": task_input})
+        messages.append({"role": "user", "content": _date_line() + "\n\n" + task_input})
         return messages
 
     # Agent names that the model might call directly as tools
@@ -1114,7 +1213,16 @@ class OrchestratorAgent(BaseAgent):
             pass
 
         sub_tasks = []
-        for st_data in sub_tasks_data:
+        # depends_on may name another sub-task by its "id" label or 1-based position
+        st_ids = [uuid.uuid4().hex[:12] for _ in sub_tasks_data]
+        dep_labels: dict[str, str] = {}
+        for i, (st_data, st_id) in enumerate(zip(sub_tasks_data, st_ids), 1):
+            dep_labels[str(i)] = st_id
+            if st_data.get("id"):
+                dep_labels[str(st_data["id"])] = st_id
+
+        unresolved: list[str] = []
+        for st_data, st_id in zip(sub_tasks_data, st_ids):
             desc = st_data["description"]
             # Collect skill IDs for this sub-task
             injected_skills = skill_cache.get(desc[:50], [])
@@ -1134,14 +1242,28 @@ class OrchestratorAgent(BaseAgent):
                 desc = desc + skill_hints
 
             st = SubTask(
+                id=st_id,
                 description=desc,
                 assigned_agent=AgentRole(st_data["assigned_agent"]),
                 priority=st_data.get("priority", 1),
-                depends_on=st_data.get("depends_on", []),
+                depends_on=[
+                    dep_labels[str(d)] for d in st_data.get("depends_on", []) if str(d) in dep_labels
+                ],
                 skills=skill_ids,
             )
+            unresolved += [str(d) for d in st_data.get("depends_on", []) if str(d) not in dep_labels]
             sub_tasks.append(st)
 
+        if unresolved:
+            # Eksik önkoşulla paralel/DAG çalıştırmak sırayı bozar — plan sırasıyla çalıştır
+            logger.warning(f"Unresolved sub-task dependencies {unresolved}, falling back to sequential pipeline")
+            pipeline_type = PipelineType.SEQUENTIAL
+        # Bağımlılık varsa sıralı/paralel yerine DAG: her adım önkoşulları biter bitmez başlar
+        elif any(st.depends_on for st in sub_tasks) and pipeline_type in (
+            PipelineType.SEQUENTIAL, PipelineType.PARALLEL,
+        ):
+            pipeline_type = PipelineType.DAG
+
         task = Task(
             user_input=thread.events[-1].content if thread.events else "",
             pipeline_type=pipeline_type,
@@ -1207,9 +1329,12 @@ class OrchestratorAgent(BaseAgent):
 
         # ── Cache Check ──
         try:
-            cached = await get_cached_response(user_input)
+            cached = await get_cached_response(user_input, user_id=user_id)
             if cached:
-                self._emit("routing", f"⚡ Cache hit (güven: {cached.get('confidence', 0):.0%})")
+                if cached.get("match") == "semantic":
+                    self._emit("routing", f"⚡ Semantic cache hit (benzerlik: {cached.get('similarity', 0):.2f}, güven: {cached.get('confidence', 0):.0%})")
+                else:
+                    self._emit("routing", f"⚡ Cache hit (güven: {cached.get('confidence', 0):.0%})")
                 thread.add_event(
                     EventType.PIPELINE_COMPLETE,
                     f"Cache hit — returning cached response",
@@ -1219,6 +1344,151 @@ class OrchestratorAgent(BaseAgent):
         except Exception:
             pass
 
+        # ── Single-flight: identical in-flight request → share its result ──
+        result, shared = await single_flight(
+            user_input,
+            lambda: self._route_and_execute_uncached(user_input, thread, live_monitor, forced_pipeline, user_id),
+            pipeline_type=forced_pipeline.value if forced_pipeline else "auto",
+            user_id=user_id,
+        )
+        if shared:
+            self._emit("routing", "⚡ Aynı istek zaten işleniyor — sonucu paylaşıldı")
+            thread.add_event(
+                EventType.PIPELINE_COMPLETE,
+                "Single-flight — returning result of identical in-flight request",
+                agent_role=self.role,
+            )
+        return result
+
+    async def _route_and_execute_uncached(self, user_input: str, thread: Thread, live_monitor=None, forced_pipeline: PipelineType | None = None, user_id: str | None = None) -> str:
+        """Routing + pipeline execution behind route_and_execute's cache / single-flight layer.
+
+        Measures time-to-first-agent-token and cancels speculative pre-routing
+        work that the chosen route did not use.
+        """
+        probe: dict[str, Any] = {"t0": time.perf_counter()}
+        probe_token = first_token_probe.set(probe)
+        self._speculation = None
+        _routing_stats["requests"] += 1
+        try:
+            return await self._route(user_input, thread, live_monitor, forced_pipeline, user_id)
+        finally:
+            first_token_probe.reset(probe_token)
+            speculation, self._speculation = self._speculation, None
+            if speculation:
+                if "research" in speculation.cancel():
+                    _routing_stats["speculative_research_cancelled"] += 1
+                    self._emit("routing", "🛑 Spekülatif araştırma iptal edildi — seçilen rota farklı")
+                elif speculation.research_adopted:
+                    _routing_stats["speculative_research_adopted"] += 1
+            self._report_ttfat(probe, thread)
+
+    def _report_ttfat(self, probe: dict[str, Any], thread: Thread) -> None:
+        first = probe.get("first_token_at")
+        if first is None:
+            return  # No specialist agent ran (cache, clarification, direct tool...)
+        ttfat_ms = (first - probe["t0"]) * 1000
+        _ttfat_samples.append(ttfat_ms)
+        self._emit("routing", f"⏱️ İlk agent token'ı: {ttfat_ms:.0f} ms ({probe.get('agent')})")
+        thread.add_event(
+            EventType.PIPELINE_STEP,
+            f"Time to first agent token: {ttfat_ms:.0f} ms ({probe.get('agent')})",
+            agent_role=self.role,
+            ttfat_ms=round(ttfat_ms, 1),
+            first_agent=probe.get("agent"),
+        )
+
+    # ── Speculative Pre-Routing ──────────────────────────────────
+
+    def _start_speculation(self, user_input: str, thread: Thread, forced_pipeline: PipelineType | None) -> _RoutingSpeculation:
+        """Launch intent (+skills), memory recall and teaching lookup together;
+        optionally the researcher sub-task of the likely deep-research route."""
+        speculation = _RoutingSpeculation()
+        self._speculation = speculation
+        intent_recall = speculation.start("intent_recall", self._recall_intent_patterns(user_input))
+        speculation.start("intent", self._intent_with_skills(user_input, thread, intent_recall))
+        speculation.start("memory", self._recall_for_context(user_input))
+        speculation.start("teachings", asyncio.to_thread(self._relevant_teachings, user_input))
+        if ORCHESTRATOR_SPECULATIVE_RESEARCH and self._predict_deep_research(user_input, forced_pipeline):
+            self._start_speculative_research(user_input, thread, speculation)
+        return speculation
+
+    async def _intent_with_skills(
+        self, user_input: str, thread: Thread, intent_recall: asyncio.Task | None = None,
+    ) -> tuple[dict | None, list[dict]]:
+        intent_result = await self._analyze_intent(user_input, thread, intent_recall=intent_recall)
+        skills: list[dict] = []
+        if intent_result and intent_result.get("required_skills"):
+            try:
+                skills = await self._discover_skills_for_intent(intent_result)
+            except Exception:
+                pass
+        return intent_result, skills
+
+    @staticmethod
+    async def _recall_intent_patterns(user_input: str) -> list | None:
+        from tools.memory import recall_memory
+        return await recall_memory(query=f"intent pattern: {user_input[:100]}", max_results=2)
+
+    @staticmethod
+    async def _recall_for_context(query: str) -> list | None:
+        from tools.memory import recall_memory
+        return await recall_memory(query=query, max_results=3)
+
+    @staticmethod
+    def _relevant_teachings(query: str) -> list | None:
+        # Speculative: use_count is recorded only if build_context injects them
+        from tools.teachability import get_relevant_teachings
+        return get_relevant_teachings(query, max_results=5, count_use=False)
+
+    @staticmethod
+    def _auto_save_teaching(user_input: str) -> bool:
+        """Save the message as a user teaching/preference if it is one."""
+        from tools.teachability import is_teaching_message, save_teaching
+        if not is_teaching_message(user_input):
+            return False
+        save_teaching(
+            instruction=user_input,
+            trigger_text=user_input[:200],
+            category="preference",
+        )
+        return True
+
+    def _predict_deep_research(self, user_input: str, forced_pipeline: PipelineType | None) -> bool:
+        """Cheap guess (before intent analysis) that the route will be deep research."""
+        if forced_pipeline == PipelineType.DEEP_RESEARCH:
+            return True
+        if forced_pipeline not in (None, PipelineType.AUTO):
+            return False
+        if self._detect_direct_tool_intent(user_input) or self._detect_brainstorm(user_input):
+            return False
+        return self._detect_deep_research(user_input)
+
+    def _start_speculative_research(self, user_input: str, thread: Thread, speculation: _RoutingSpeculation) -> None:
+        from pipelines.engine import PipelineEngine
+
+        sub_tasks = [
+            SubTask(
+                description=t["description"],
+                assigned_agent=AgentRole(t["assigned_agent"]),
+                priority=t["priority"],
+            )
+            for t in self._build_deep_research_tasks(user_input)
+        ]
+        researcher = next((st for st in sub_tasks if st.assigned_agent == AgentRole.RESEARCHER), None)
+        if researcher is None:
+            return
+        provisional = Task(user_input=user_input, pipeline_type=PipelineType.DEEP_RESEARCH, sub_tasks=sub_tasks)
+
+        engine = PipelineEngine()
+        if self._live_monitor:
+            engine.set_live_monitor(self._live_monitor)
+        running = engine.prestart_subtask(researcher, engine.deep_research_context(provisional, researcher), thread)
+        speculation.research = (engine, researcher, running)
+        _routing_stats["speculative_research_started"] += 1
+        self._emit("routing", "🔮 Spekülatif araştırma başlatıldı — researcher intent analizini beklemiyor")
+
+    async def _route(self, user_input: str, thread: Thread, live_monitor=None, forced_pipeline: PipelineType | None = None, user_id: str | None = None) -> str:
         # ── Complexity Classification (Smart Routing) ──
         complexity = self._classify_complexity(user_input)
         
@@ -1233,16 +1503,25 @@ class OrchestratorAgent(BaseAgent):
             )
             result = await self.execute(user_input, thread)
             try:
-                await cache_response(user_input, result, confidence=0.7)
+                await cache_response(user_input, result, confidence=0.7, user_id=user_id)
             except Exception:
                 pass
             self._auto_save_memory(user_input, result, user_id=user_id)
             return result
 
         # ── Phase -1: Intent Analysis (5-Phase Pipeline: FAZ 1) ──
+        # Speculative mode: skills/memory/teachings (and maybe research) already run alongside
+        speculation = (
+            self._start_speculation(user_input, thread, forced_pipeline)
+            if ORCHESTRATOR_SPECULATIVE_ROUTING else None
+        )
         intent_result = None
+        pre_discovered_skills = []
         try:
-            intent_result = await self._analyze_intent(user_input, thread)
+            if speculation:
+                intent_result, pre_discovered_skills = await speculation.result("intent", (None, []))
+            else:
+                intent_result = await self._analyze_intent(user_input, thread)
 
             # Confidence check — if too low, ask clarification
             if intent_result.get("clarification_needed") and intent_result.get("confidence", 1.0) < 0.4:
@@ -1281,22 +1560,16 @@ class OrchestratorAgent(BaseAgent):
             pass  # Never break main flow
 
         # ── Phase -0.5: Skill Pre-Discovery (FAZ 3 — runs early) ──
-        pre_discovered_skills = []
-        if intent_result and intent_result.get("required_skills"):
+        if not speculation and intent_result and intent_result.get("required_skills"):
             try:
                 pre_discovered_skills = await self._discover_skills_for_intent(intent_result)
             except Exception:
                 pass
 
-        # ── Auto-save user teachings/preferences ──
+        # ── Auto-save user teachings/preferences (after the clarification exit) ──
         try:
-            from tools.teachability import is_teaching_message, save_teaching
-            if is_teaching_message(user_input):
-                save_teaching(
-                    instruction=user_input,
-                    trigger_text=user_input[:200],
-                    category="preference",
-                )
+            teaching_saved = await asyncio.to_thread(self._auto_save_teaching, user_input)
+            if teaching_saved:
                 thread.add_event(
                     EventType.TEACHING,
                     f"User teaching auto-saved: {user_input[:80]}",
@@ -1799,7 +2072,7 @@ class OrchestratorAgent(BaseAgent):
                     score_confidence(r, role, "general").get("confidence_score", 0.5)
                     for role, r in agent_results.items()
                 ) / max(len(agent_results), 1)
-                await cache_response(user_input, final, confidence=avg_conf)
+                await cache_response(user_input, final, confidence=avg_conf, user_id=user_id)
             except Exception:
                 pass
             # Quality Gate (Faz 5.5)
@@ -1831,6 +2104,8 @@ class OrchestratorAgent(BaseAgent):
                 pipeline_type=PipelineType.DEEP_RESEARCH,
                 sub_tasks=sub_tasks,
             )
+            # Researcher may already be running from speculative pre-routing
+            engine = speculation.adopt_research(task) if speculation else None
             thread.tasks.append(task)
 
             thread.add_event(
@@ -1838,6 +2113,8 @@ class OrchestratorAgent(BaseAgent):
                 f"Deep Research: parallel pipeline with {len(sub_tasks)} agents",
                 agent_role=self.role,
             )
+            if engine is not None:
+                self._emit("routing", "⚡ Spekülatif araştırma devralındı — researcher zaten çalışıyor")
 
             if live_monitor:
                 live_monitor.emit(
@@ -1846,8 +2123,9 @@ class OrchestratorAgent(BaseAgent):
                     f"🔬 Deep Research — {len(sub_tasks)} agent paralel çalışıyor",
                 )
 
-            from pipelines.engine import PipelineEngine
-            engine = PipelineEngine()
+            if engine is None:
+                from pipelines.engine import PipelineEngine
+                engine = PipelineEngine()
             if live_monitor:
                 engine.set_live_monitor(live_monitor)
 
@@ -1932,7 +2210,7 @@ class OrchestratorAgent(BaseAgent):
                     score_confidence(r, role, "general").get("confidence_score", 0.5)
                     for role, r in agent_results.items()
                 ) / max(len(agent_results), 1)
-                await cache_response(user_input, final, confidence=avg_conf)
+                await cache_response(user_input, final, confidence=avg_conf, user_id=user_id)
             except Exception:
                 pass
             # Quality Gate (Faz 5.5)
@@ -2124,7 +2402,7 @@ class OrchestratorAgent(BaseAgent):
                         score_confidence(r, role, "general").get("confidence_score", 0.5)
                         for role, r in agent_results.items()
                     ) / max(len(agent_results), 1)
-                    await cache_response(user_input, final, confidence=avg_conf)
+                    await cache_response(user_input, final, confidence=avg_conf, user_id=user_id)
                 except Exception:
                     pass
                 # Quality Gate (Faz 5.5)
@@ -2139,7 +2417,7 @@ class OrchestratorAgent(BaseAgent):
 
         # Cache direct orchestrator responses
         try:
-            await cache_response(user_input, decision, confidence=0.5)
+            await cache_response(user_input, decision, confidence=0.5, user_id=user_id)
         except Exception:
             pass
         self._auto_save_memory(user_input, decision, user_id=user_id)
@@ -2147,11 +2425,15 @@ class OrchestratorAgent(BaseAgent):
 
     # ── FAZ 1: Intent Analysis ─────────────────────────────────────
 
-    async def _analyze_intent(self, user_input: str, thread: Thread) -> dict:
+    async def _analyze_intent(
+        self, user_input: str, thread: Thread, intent_recall: asyncio.Task | None = None,
+    ) -> dict:
         """
         Phase 1 of 5-Phase Pipeline: Intent Analysis.
         Returns structured intent with confidence score.
         If confidence < 0.7, includes clarification question.
+        intent_recall: already running intent-pattern recall (speculative routing);
+        waited on for at most ORCHESTRATOR_INTENT_RECALL_WAIT_SEC.
         """
         # Trivial inputs — skip LLM call
         if len(user_input.strip()) < 10 or _SIMPLE_PATTERNS.match(user_input.strip()):
@@ -2170,8 +2452,16 @@ class OrchestratorAgent(BaseAgent):
         # Recall past intent patterns from memory
         memory_hint = ""
         try:
-            from tools.memory import recall_memory, format_recall_results
-            memories = await recall_memory(query=f"intent pattern: {user_input[:100]}", max_results=2)
+            from tools.memory import format_recall_results
+            if intent_recall is None:
+                memories = await self._recall_intent_patterns(user_input)
+            else:
+                try:
+                    memories = await asyncio.wait_for(
+                        asyncio.shield(intent_recall), ORCHESTRATOR_INTENT_RECALL_WAIT_SEC,
+                    )
+                except asyncio.TimeoutError:
+                    memories = None  # don't hold the LLM call for the hint
             if memories:
                 memory_hint = (
                     "\n\nPAST INTENT PATTERNS (from memory):\n"
@@ -2289,9 +2579,12 @@ class OrchestratorAgent(BaseAgent):
         seen_found: set[str] = set()
 
         try:
-            from tools.dynamic_skills import search_skills
-            for skill_id in unique_required[:5]:  # Max 5 skill lookups
-                results = search_skills(query=skill_id, max_results=1)
+            from tools.dynamic_skills import asearch_skills
+            lookups = unique_required[:5]  # Max 5 skill lookups, run concurrently
+            all_results = await asyncio.gather(
+                *(asearch_skills(query=skill_id, max_results=1) for skill_id in lookups)
+            )
+            for skill_id, results in zip(lookups, all_results):
                 if results:
                     sid = results[0].get("id", "")
                     if sid not in seen_found:
@@ -155,6 +155,15 @@ async def lifespan(app: FastAPI):
     else:
         print("[Backend] Analytics tables init skipped (PostgreSQL unavailable)")
 
+    # Seed builtin skills once + build the in-memory skill search index
+    if pg_available:
+        try:
+            from tools.dynamic_skills import rebuild_skill_index
+            n_skills = rebuild_skill_index()
+            print(f"[Backend] Skill index built ({n_skills} skills)")
+        except Exception as e:
+            print(f"[Backend] Skill index build failed (non-critical): {e}")
+
     # Seed default MCP servers for orchestration + discover tools
     try:
         from tools.mcp_client import seed_default_servers, list_servers, discover_tools
@@ -247,6 +256,24 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[Backend] Scheduled tasks init failed (non-critical): {e}")
 
+    # Outbound webhook delivery queue (background retry workers)
+    try:
+        from tools.webhook_system import start_webhook_queue
+        await start_webhook_queue()
+        print("[Backend] Webhook delivery queue started")
+    except Exception as e:
+        print(f"[Backend] Webhook delivery queue failed (non-critical): {e}")
+
+    # Warm code-execution workers (fork servers with pre-imported modules)
+    try:
+        from tools.code_executor import start_code_workers
+        if await start_code_workers():
+            print("[Backend] Code worker pool started")
+        else:
+            print("[Backend] Code worker pool disabled (subprocess mode)")
+    except Exception as e:
+        print(f"[Backend] Code worker pool start failed (non-critical): {e}")
+
     # Autonomous chat background scheduler (messaging module)
     # Auto-start disabled — manual trigger only via POST /api/agents/autonomous-chat/trigger
     try:
@@ -331,6 +358,55 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass
 
+    # Shutdown: stop webhook queue workers, flush status writes, close delivery client
+    try:
+        from tools.webhook_system import close_webhook_dispatch
+        await close_webhook_dispatch()
+    except Exception:
+        pass
+
+    # Shutdown: terminate warm MCP server sessions
+    try:
+        from tools.mcp_session_pool import get_mcp_session_pool
+        await get_mcp_session_pool().close_all()
+    except Exception:
+        pass
+
+    # Shutdown: close pooled web search provider clients
+    try:
+        from tools.search import close_search_clients
+        await close_search_clients()
+    except Exception:
+        pass
+
+    # Shutdown: close the shared page fetcher client
+    try:
+        from tools.http_fetch import get_fetcher
+        await get_fetcher().aclose()
+    except Exception:
+        pass
+
+    # Shutdown: write buffered skill use_count increments
+    try:
+        from tools.dynamic_skills import flush_skill_use_counts
+        flush_skill_use_counts()
+    except Exception:
+        pass
+
+    # Shutdown: kill warm code execution workers
+    try:
+        from tools.code_worker_pool import get_code_worker_pool
+        await get_code_worker_pool().close()
+    except Exception:
+        pass
+
+    # Shutdown: close async PostgreSQL pool
+    try:
+        from tools.pg_connection import close_async_pool
+        await close_async_pool()
+    except Exception:
+        pass
+
 
 # ── App Creation ─────────────────────────────────────────────────
 
@@ -24,6 +24,7 @@ from core.state import (
     save_thread,
     load_thread,
     list_threads,
+    list_threads_page,
     delete_thread,
     delete_all_threads,
 )
@@ -159,6 +160,19 @@ async def api_list_threads(user: dict = Depends(get_current_user), limit: int =
     return list_threads(limit=limit, user_id=user["user_id"])
 
 
+@router.get("/api/threads/page")
+async def api_list_threads_page(
+    user: dict = Depends(get_current_user),
+    limit: int = 20,
+    cursor: str | None = None,
+    offset: int = 0,
+):
+    """Cursor-paginated thread listing: pass ``next_cursor`` back as ``cursor``."""
+    return list_threads_page(
+        limit=limit, user_id=user["user_id"], cursor=cursor, offset=offset
+    )
+
+
 @router.post("/api/threads")
 async def api_create_thread(user: dict = Depends(get_current_user)):
     thread = Thread()
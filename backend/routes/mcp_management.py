@@ -13,7 +13,8 @@ if _parent not in sys.path:
     sys.path.insert(0, _parent)
 
 from deps import get_current_user, _audit
-from tools.mcp_client import list_servers, discover_tools, call_mcp_tool
+from tools.mcp_client import list_servers, discover_tools, call_mcp_tool, invalidate_server_config
+from tools.mcp_session_pool import get_mcp_session_pool
 from tools.pg_connection import get_conn, release_conn
 
 router = APIRouter(prefix="/api/mcp", tags=["mcp"])
@@ -157,6 +158,10 @@ async def mcp_toggle_server(
     finally:
         release_conn(conn)
 
+    invalidate_server_config(server_id)
+    if not new_active:
+        await get_mcp_session_pool().close_server(server_id)
+
     state = "enabled" if new_active else "disabled"
     _audit("mcp_server_toggle", user["user_id"], f"{server_id} → {state}")
     return {"server_id": server_id, "active": new_active, "state": state}
@@ -180,6 +185,7 @@ async def mcp_status(user: dict = Depends(get_current_user)):
             if last_check is None or ts > last_check:
                 last_check = ts
 
+    pool = get_mcp_session_pool().stats()
     return {
         "total_servers": len(servers),
         "active_servers": len(active_servers),
@@ -187,9 +193,29 @@ async def mcp_status(user: dict = Depends(get_current_user)):
         "unhealthy": len(active_servers) - healthy_count,
         "unchecked": len(active_servers) - len([s for s in active_servers if s["id"] in _health_cache]),
         "last_check_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(last_check)) if last_check else None,
+        "warm_sessions": pool["live_sessions"],
+        "in_flight": pool["in_flight"],
     }
 
 
+@router.get("/pool")
+async def mcp_pool_stats(user: dict = Depends(get_current_user)):
+    """Warm MCP session pool: per-server sessions, spawns, restarts, evictions."""
+    return get_mcp_session_pool().stats()
+
+
+@router.post("/pool/{server_id}/recycle")
+async def mcp_pool_recycle(
+    server_id: str,
+    user: dict = Depends(get_current_user),
+):
+    """Close a server's warm sessions; the next call spawns a fresh process."""
+    closed = await get_mcp_session_pool().close_server(server_id)
+    invalidate_server_config(server_id)
+    _audit("mcp_pool_recycle", user["user_id"], f"{server_id}: {closed} session(s)")
+    return {"server_id": server_id, "closed_sessions": closed}
+
+
 # ── MCP Usage Statistics ─────────────────────────────────────────
 
 
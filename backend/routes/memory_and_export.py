@@ -188,36 +188,41 @@ async def api_export_project(project_name: str, user: dict = Depends(get_current
 @router.get("/api/projects/{project_name}/export/pdf")
 async def api_export_project_pdf(project_name: str, user: dict = Depends(get_current_user)):
     """Export full project as a professional PDF with Turkish character support."""
-    from fastapi.responses import Response
     from tools.idea_to_project import PROJECTS_DIR, PHASES
-    from tools.export_service import generate_pdf
+    from tools.export_service import export_pdf_file
 
     project_dir = _resolve_project_path(project_name)
 
-    # Build markdown content
-    parts = [
-        f"# Proje Raporu\n",
-        f"Proje: {project_name.replace('_', ' ').title()}\n",
-        "---\n",
-    ]
-    for i, phase in enumerate(PHASES, 1):
-        filepath = project_dir / f"{phase['id']}.md"
-        parts.append(f"\n## {i}. {phase['name']}\n")
-        if filepath.exists():
-            parts.append(filepath.read_text(encoding="utf-8"))
-        else:
-            parts.append("*Bu faz henüz tamamlanmadı.*")
-        parts.append("\n---\n")
+    def iter_markdown():
+        # Faz dosyaları tek tek okunur — birleşik markdown bellekte tutulmaz
+        yield "# Proje Raporu\n\n"
+        yield f"Proje: {project_name.replace('_', ' ').title()}\n\n"
+        yield "---\n"
+        for i, phase in enumerate(PHASES, 1):
+            filepath = project_dir / f"{phase['id']}.md"
+            yield f"\n\n## {i}. {phase['name']}\n\n"
+            if filepath.exists():
+                yield filepath.read_text(encoding="utf-8")
+            else:
+                yield "*Bu faz henüz tamamlanmadı.*"
+            yield "\n\n---\n"
 
-    md_content = "\n".join(parts)
     title = project_name.replace("_", " ").title()
-    pdf_bytes = generate_pdf(md_content, title=f"Proje Raporu: {title}")
+    pdf_path = await asyncio.to_thread(export_pdf_file, iter_markdown(), f"Proje Raporu: {title}")
 
     safe_name = project_name[:40]
-    return Response(
-        content=pdf_bytes,
+    return _pdf_file_response(pdf_path, f"{safe_name}_rapor.pdf")
+
+
+def _pdf_file_response(pdf_path: Path, filename: str) -> FileResponse:
+    """Stream a temp PDF back in chunks and delete it once sent."""
+    from starlette.background import BackgroundTask
+
+    return FileResponse(
+        path=str(pdf_path),
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{safe_name}_rapor.pdf"'},
+        filename=filename,
+        background=BackgroundTask(pdf_path.unlink, missing_ok=True),
     )
 
 
@@ -622,17 +627,12 @@ class ExportPdfRequest(BaseModel):
 
 @router.post("/api/export/pdf")
 async def api_export_pdf(req: ExportPdfRequest, user: dict = Depends(get_current_user)):
-    """Convert any markdown content to professional PDF."""
-    from fastapi.responses import Response
-    from tools.export_service import generate_pdf
+    """Convert any markdown content to professional PDF (rendered off the event loop, streamed back)."""
+    from tools.export_service import export_pdf_file
 
-    pdf_bytes = generate_pdf(req.markdown, title=req.title)
+    pdf_path = await asyncio.to_thread(export_pdf_file, req.markdown, req.title)
     safe_name = re.sub(r'[^\w\-]', '_', req.title[:40].lower())
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{safe_name}.pdf"'},
-    )
+    return _pdf_file_response(pdf_path, f"{safe_name}.pdf")
 
 
 class ExportHtmlRequest(BaseModel):
@@ -642,14 +642,13 @@ class ExportHtmlRequest(BaseModel):
 
 @router.post("/api/export/html")
 async def api_export_html(req: ExportHtmlRequest, user: dict = Depends(get_current_user)):
-    """Convert any markdown content to a standalone styled HTML report."""
-    from fastapi.responses import Response
-    from tools.export_service import generate_html
+    """Convert any markdown content to a standalone styled HTML report (streamed)."""
+    from fastapi.responses import StreamingResponse
+    from tools.export_service import iter_html
 
-    html_content = generate_html(req.markdown, title=req.title)
     safe_name = re.sub(r'[^\w\-]', '_', req.title[:40].lower())
-    return Response(
-        content=html_content.encode("utf-8"),
+    return StreamingResponse(
+        iter_html(req.markdown, title=req.title),
         media_type="text/html; charset=utf-8",
         headers={"Content-Disposition": f'attachment; filename="{safe_name}.html"'},
     )
\ No newline at end of file
@@ -927,6 +927,65 @@ async def usage_stats(user: dict = Depends(get_current_user)):
     return cost_tracker.get_usage_stats()
 
 
+# ── Embedding Cache API ──────────────────────────────────────────
+
+
+@router.get("/api/embeddings/stats")
+async def embedding_stats(user: dict = Depends(get_current_user)):
+    """Embedding client batching stats plus cache hit/miss/bytes metrics."""
+    from tools.embedding_service import get_embedding_service
+
+    return await get_embedding_service().astats()
+
+
+@router.get("/api/llm/admission/stats")
+async def llm_admission_stats(user: dict = Depends(get_current_user)):
+    """LLM admission control: per provider/model slots, token window and per-lane queue times."""
+    from tools.llm_admission import get_admission_stats
+
+    return get_admission_stats()
+
+
+@router.get("/api/llm/prompt-cache/stats")
+async def llm_prompt_cache_stats(user: dict = Depends(get_current_user)):
+    """Provider prefix-cache hit ratio: cached vs. total prompt tokens per model."""
+    from tools.prompt_cache import get_prompt_cache_stats
+
+    return get_prompt_cache_stats()
+
+
+@router.get("/api/orchestrator/routing/stats")
+async def orchestrator_routing_stats(user: dict = Depends(get_current_user)):
+    """Time-to-first-agent-token percentiles and speculative pre-routing hit/cancel counts."""
+    from agents.orchestrator import get_routing_latency_stats
+
+    return get_routing_latency_stats()
+
+
+@router.get("/api/webhooks/dispatch/stats")
+async def webhook_dispatch_stats(user: dict = Depends(get_current_user)):
+    """Webhook subscription index, delivery pool, status writer and queue counters."""
+    from tools.webhook_system import get_dispatch_stats
+
+    return get_dispatch_stats()
+
+
+@router.get("/api/skills/context/stats")
+async def skill_context_stats(user: dict = Depends(get_current_user)):
+    """Skill context cache hits/misses and buffered use_count flushes."""
+    from tools.dynamic_skills import get_skill_context_stats
+
+    return get_skill_context_stats()
+
+
+@router.get("/api/search/stats")
+async def search_stats(user: dict = Depends(get_current_user)):
+    """Web search cache, single-flight, hedging and per-provider latency stats."""
+    from tools.search import get_search_stats
+
+    return get_search_stats()
+
+
 # ── Auto-Optimizer API ───────────────────────────────────────────
 
 try:
@@ -50,6 +50,7 @@ MODELS = {
         "role": "orchestrator",
         "description": "Orchestrator — intent analysis, pipeline selection, task routing, synthesis",
         "max_tokens": 4096,
+        "context_length": 65536,
         "temperature": 0.5,
         "top_p": 0.9,
         "has_thinking": False,
@@ -64,6 +65,7 @@ MODELS = {
         "role": "thinker",
         "description": "Deep Thinker — complex reasoning, analysis, planning",
         "max_tokens": 8192,
+        "context_length": 196608,
         "temperature": 0.7,
         "top_p": 0.95,
         "has_thinking": True,
@@ -77,6 +79,7 @@ MODELS = {
         "role": "speed",
         "description": "Speed Agent — quick responses, code generation, formatting",
         "max_tokens": 16384,
+        "context_length": 131072,
         "temperature": 1.0,
         "top_p": 0.9,
         "has_thinking": False,
@@ -90,6 +93,7 @@ MODELS = {
         "role": "researcher",
         "description": "Research Agent — web search, data gathering, summarization",
         "max_tokens": 4096,
+        "context_length": 131072,
         "temperature": 1.0,
         "top_p": 1.0,
         "has_thinking": False,
@@ -105,6 +109,7 @@ MODELS = {
         "role": "reasoner",
         "description": "Reasoner — chain-of-thought, math, logic, verification",
         "max_tokens": 16384,
+        "context_length": 131072,
         "temperature": 1.0,
         "top_p": 1.0,
         "has_thinking": True,
@@ -121,6 +126,7 @@ MODELS = {
         "role": "critic",
         "description": "Critic + Skill Creator — quality review, fact-checking, skill generation, improvement suggestions",
         "max_tokens": 8192,
+        "context_length": 131072,
         "temperature": 0.6,
         "top_p": 0.7,
         "has_thinking": False,
@@ -132,6 +138,9 @@ MODELS = {
 
 MODEL_KEYS = list(MODELS.keys())
 
+# Fallback window for models without an explicit "context_length"
+DEFAULT_CONTEXT_LENGTH = int(os.getenv("DEFAULT_CONTEXT_LENGTH", "32768"))
+
 # ── Gateway Multi-Provider Model Definitions ─────────────────────
 
 GATEWAY_MODELS = {
@@ -281,6 +290,12 @@ def get_model_capabilities(model_key_or_role: str) -> dict[str, bool | str]:
     return capabilities
 
 
+def get_model_context_length(model_key_or_role: str) -> int:
+    """Prompt + completion window of the model (tokens)."""
+    model_key = _resolve_model_key(model_key_or_role)
+    return int(MODELS[model_key].get("context_length") or DEFAULT_CONTEXT_LENGTH)
+
+
 def get_provider_registry_entry(model_key_or_role: str) -> dict[str, object]:
     model_key = _resolve_model_key(model_key_or_role)
     entry = dict(PROVIDER_REGISTRY.get(model_key, {}))
@@ -131,6 +131,7 @@ class PipelineType(str, Enum):
     DEEP_RESEARCH = "deep_research"  # Phase 1: parallel gather → Phase 2: synthesize
     IDEA_TO_PROJECT = "idea_to_project"  # Idea → PRD → Architecture → Tasks → Scaffold
     BRAINSTORM = "brainstorm"  # Multi-round debate: perspectives → cross-challenge → synthesis
+    DAG = "dag"  # Sub-tasks start as soon as their depends_on finish
     AUTO = "auto"  # Orchestrator decides
 
 
@@ -1,19 +1,62 @@
 """
 State management — 12-Factor #5 & #12: Unified state, stateless reducer.
 JSON file-based persistence for threads. User-isolated storage.
+
+Storage layout per thread:
+    <id>.json        — full snapshot (same format as before, plus a ``_log_base`` token)
+    <id>.log.jsonl   — append-only delta log written by ``save_thread``
+
+``save_thread`` only appends what changed since the last flush (new events,
+new/changed tasks, metadata). The log is folded back into a fresh snapshot
+once it grows larger than the snapshot itself, so the amortized write cost
+per save stays proportional to the delta, not to the thread size.
+``load_thread`` rebuilds state from snapshot + tail.
+
+Thread listing is served from ``core.thread_catalog`` (kept in sync on
+save/delete) instead of parsing every thread file.
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
 import os
+import sqlite3
+import threading
+import uuid
 from pathlib import Path
+from typing import Any
 
+from . import thread_catalog
 from .models import Thread
 
+logger = logging.getLogger(__name__)
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 THREADS_DIR = DATA_DIR / "threads"
 
+LOG_SUFFIX = ".log.jsonl"
+
+# Fold the log into a new snapshot once it exceeds the snapshot size
+# (geometric growth → amortized O(delta) writes) or this many records.
+_LOG_COMPACT_MIN_BYTES = 64 * 1024
+_LOG_COMPACT_MAX_RECORDS = 500
+
+_META_FIELDS = (
+    "created_at",
+    "parent_thread_id",
+    "root_thread_id",
+    "branch_label",
+    "compacted_summary",
+    "last_compacted_at",
+    "agent_metrics",
+)
+
+# (user_id, thread_id) → what has already been flushed to disk
+_cursors: dict[tuple[str, str], dict[str, Any]] = {}
+_cursor_lock = threading.Lock()
+
 
 def _threads_dir(user_id: str | None = None) -> Path:
     if user_id:
@@ -25,72 +68,281 @@ def _ensure_dirs(user_id: str | None = None) -> None:
     _threads_dir(user_id).mkdir(parents=True, exist_ok=True)
 
 
+def _log_path(snapshot_path: Path) -> Path:
+    return snapshot_path.with_name(snapshot_path.stem + LOG_SUFFIX)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _meta_payload(thread: Thread) -> dict[str, Any]:
+    return thread.model_dump(mode="json", include=set(_META_FIELDS))
+
+
+def _build_cursor(thread: Thread, base: str, log_records: int, log_bytes: int, snapshot_bytes: int) -> dict[str, Any]:
+    return {
+        "base": base,
+        "event_count": len(thread.events),
+        "last_event_id": thread.events[-1].id if thread.events else None,
+        "task_digests": {t.id: _digest(t.model_dump_json()) for t in thread.tasks},
+        "meta_digest": _digest(json.dumps(_meta_payload(thread), sort_keys=True)),
+        "log_records": log_records,
+        "log_bytes": log_bytes,
+        "snapshot_bytes": snapshot_bytes,
+    }
+
+
+def _write_snapshot(thread: Thread, path: Path) -> dict[str, Any]:
+    """Atomically write a full snapshot and drop the (now folded) log."""
+    base = uuid.uuid4().hex
+    data = thread.model_dump(mode="json")
+    data["_log_base"] = base
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+    # Stale log lines carry the old base token and are ignored on replay,
+    # so a crash between these two steps cannot corrupt state.
+    try:
+        _log_path(path).unlink()
+    except FileNotFoundError:
+        pass
+    return _build_cursor(thread, base, 0, 0, len(text))
+
+
+def _append_delta(thread: Thread, path: Path, cursor: dict[str, Any]) -> dict[str, Any] | None:
+    """Append changes since ``cursor``. Returns updated cursor, or None if a snapshot is required."""
+    n = cursor["event_count"]
+    if len(thread.events) < n:
+        return None
+    if n and thread.events[n - 1].id != cursor["last_event_id"]:
+        return None  # events were rewritten, not appended
+
+    base = cursor["base"]
+    records: list[dict[str, Any]] = []
+
+    new_events = thread.events[n:]
+    if new_events:
+        records.append({"base": base, "op": "events", "items": [e.model_dump(mode="json") for e in new_events]})
+
+    task_digests = dict(cursor["task_digests"])
+    changed_tasks = []
+    for task in thread.tasks:
+        raw = task.model_dump_json()
+        d = _digest(raw)
+        if task_digests.get(task.id) != d:
+            task_digests[task.id] = d
+            changed_tasks.append(json.loads(raw))
+    if len(task_digests) != len(thread.tasks):
+        return None  # tasks were removed
+    if changed_tasks:
+        records.append({"base": base, "op": "tasks", "items": changed_tasks})
+
+    meta = _meta_payload(thread)
+    meta_digest = _digest(json.dumps(meta, sort_keys=True))
+    if meta_digest != cursor["meta_digest"]:
+        records.append({"base": base, "op": "meta", "data": meta})
+
+    written = 0
+    if records:
+        payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        with _log_path(path).open("a", encoding="utf-8") as fh:
+            fh.write(payload)
+        written = len(payload.encode("utf-8"))
+
+    return {
+        **cursor,
+        "event_count": len(thread.events),
+        "last_event_id": thread.events[-1].id if thread.events else None,
+        "task_digests": task_digests,
+        "meta_digest": meta_digest,
+        "log_records": cursor["log_records"] + len(records),
+        "log_bytes": cursor["log_bytes"] + written,
+    }
+
+
+def _replay_log(data: dict[str, Any], log_path: Path) -> tuple[int, int]:
+    """Apply log records matching the snapshot's base token. Returns (records, bytes)."""
+    base = data.get("_log_base")
+    if not base:
+        return 0, 0
+    try:
+        raw = log_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return 0, 0
+
+    events = data.setdefault("events", [])
+    tasks = data.setdefault("tasks", [])
+    seen_events = {e.get("id") for e in events}
+    task_index = {t.get("id"): i for i, t in enumerate(tasks)}
+    applied = 0
+
+    for line in raw.splitlines():
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # torn trailing write
+        if rec.get("base") != base:
+            continue
+        op = rec.get("op")
+        if op == "events":
+            for ev in rec.get("items", []):
+                if ev.get("id") not in seen_events:
+                    seen_events.add(ev.get("id"))
+                    events.append(ev)
+        elif op == "tasks":
+            for task in rec.get("items", []):
+                idx = task_index.get(task.get("id"))
+                if idx is None:
+                    task_index[task.get("id")] = len(tasks)
+                    tasks.append(task)
+                else:
+                    tasks[idx] = task
+        elif op == "meta":
+            data.update(rec.get("data", {}))
+        else:
+            continue
+        applied += 1
+    return applied, len(raw.encode("utf-8"))
+
+
+def _read_thread_data(path: Path) -> tuple[dict[str, Any], int, int, int]:
+    """Read snapshot + log tail as a raw dict. Returns (data, log_records, log_bytes, snapshot_bytes)."""
+    text = path.read_text(encoding="utf-8")
+    data = json.loads(text)
+    records, log_bytes = _replay_log(data, _log_path(path))
+    return data, records, log_bytes, len(text)
+
+
+def _last_modified(path: Path) -> float:
+    mtime = os.path.getmtime(path)
+    try:
+        return max(mtime, os.path.getmtime(_log_path(path)))
+    except OSError:
+        return mtime
+
+
 def save_thread(thread: Thread, user_id: str | None = None) -> str:
-    """Persist thread to JSON file. Returns thread id."""
+    """Persist thread changes (delta append, periodic snapshot). Returns thread id."""
     _ensure_dirs(user_id)
     path = _threads_dir(user_id) / f"{thread.id}.json"
-    path.write_text(thread.model_dump_json(indent=2), encoding="utf-8")
-    return thread.id
+    key = (user_id or "", thread.id)
 
+    with _cursor_lock:
+        cursor = _cursors.get(key)
+        new_cursor = None
+        if cursor is not None and path.exists():
+            new_cursor = _append_delta(thread, path, cursor)
+            if new_cursor is not None and (
+                new_cursor["log_records"] >= _LOG_COMPACT_MAX_RECORDS
+                or new_cursor["log_bytes"] > max(new_cursor["snapshot_bytes"], _LOG_COMPACT_MIN_BYTES)
+            ):
+                new_cursor = None
+        if new_cursor is None:
+            new_cursor = _write_snapshot(thread, path)
+        _cursors[key] = new_cursor
 
-def load_thread(thread_id: str, user_id: str | None = None) -> Thread | None:
-    """Load thread from JSON file."""
-    path = _threads_dir(user_id) / f"{thread_id}.json"
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        return Thread.model_validate(data)
-    except (FileNotFoundError, json.JSONDecodeError):
-        pass
+        thread_catalog.upsert(THREADS_DIR, user_id or "", thread_catalog.entry_from_thread(thread))
+    except sqlite3.Error:
+        pass  # catalog is rebuildable from disk; never fail a save on it
+    return thread.id
 
-    # Fallback: try root threads dir (backward compat)
-    path = THREADS_DIR / f"{thread_id}.json"
+
+def _load_from(path: Path, user_id: str | None) -> Thread | None:
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        return Thread.model_validate(data)
+        data, records, log_bytes, snapshot_bytes = _read_thread_data(path)
+        thread = Thread.model_validate(data)
     except (FileNotFoundError, json.JSONDecodeError):
         return None
+    base = data.get("_log_base")
+    with _cursor_lock:
+        if base:
+            _cursors[(user_id or "", thread.id)] = _build_cursor(
+                thread, base, records, log_bytes, snapshot_bytes
+            )
+        else:
+            # Legacy snapshot without a base token — next save rewrites it.
+            _cursors.pop((user_id or "", thread.id), None)
+    return thread
 
 
-def list_threads(limit: int = 50, user_id: str | None = None) -> list[dict]:
-    """List recent threads with basic info."""
-    _ensure_dirs(user_id)
-    threads = []
-    files = sorted(_threads_dir(user_id).glob("*.json"), key=os.path.getmtime, reverse=True)
-    for f in files[:limit]:
+def load_thread(thread_id: str, user_id: str | None = None) -> Thread | None:
+    """Load thread from snapshot + append log."""
+    thread = _load_from(_threads_dir(user_id) / f"{thread_id}.json", user_id)
+    if thread is not None:
+        return thread
+
+    # Fallback: try root threads dir (backward compat)
+    return _load_from(THREADS_DIR / f"{thread_id}.json", None)
+
+
+def _scan_catalog_entries(user_id: str | None) -> list[dict]:
+    """Read every thread file for a user (slow path, used to seed the catalog)."""
+    entries = []
+    for f in _threads_dir(user_id).glob("*.json"):
         try:
-            data = json.loads(f.read_text(encoding="utf-8")) 
-            first_msg = ""
-            for ev in data.get("events", []):
-                if ev.get("event_type") == "user_message":
-                    first_msg = ev.get("content", "")[:80]
-                    break
-            threads.append({
-                "id": data["id"],
-                "preview": first_msg,
-                "created_at": data.get("created_at", ""),
-                "task_count": len(data.get("tasks", [])),
-                "event_count": len(data.get("events", [])),
-                "parent_thread_id": data.get("parent_thread_id"),
-                "root_thread_id": data.get("root_thread_id"),
-                "branch_label": data.get("branch_label"),
-                "compacted_summary": data.get("compacted_summary"),
-                "last_compacted_at": data.get("last_compacted_at"),
-            })
-        except (json.JSONDecodeError, KeyError):
+            data = _read_thread_data(f)[0]
+            entries.append(thread_catalog.entry_from_data(data, _last_modified(f)))
+        except (json.JSONDecodeError, KeyError, FileNotFoundError):
             continue
-    return threads
+    return entries
+
+
+def rebuild_thread_catalog(user_id: str | None = None) -> int:
+    """Re-index a user's threads from disk. Returns indexed thread count."""
+    _ensure_dirs(user_id)
+    return thread_catalog.rebuild(THREADS_DIR, user_id or "", _scan_catalog_entries(user_id))
+
+
+def list_threads_page(
+    limit: int = 50,
+    user_id: str | None = None,
+    cursor: str | None = None,
+    offset: int = 0,
+) -> dict:
+    """Paginated thread listing. Returns ``{"threads", "next_cursor", "total"}``."""
+    _ensure_dirs(user_id)
+    thread_catalog.ensure_indexed(THREADS_DIR, user_id or "", lambda: _scan_catalog_entries(user_id))
+    return thread_catalog.page(THREADS_DIR, user_id or "", limit=limit, cursor=cursor, offset=offset)
+
+
+def list_threads(limit: int = 50, user_id: str | None = None) -> list[dict]:
+    """List recent threads with basic info (served from the catalog index)."""
+    return list_threads_page(limit=limit, user_id=user_id)["threads"]
+
+
+def _unlink_thread_files(path: Path) -> bool:
+    if not path.exists():
+        return False
+    path.unlink()
+    try:
+        _log_path(path).unlink()
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def _catalog_remove(user_key: str, thread_id: str) -> None:
+    try:
+        thread_catalog.remove(THREADS_DIR, user_key, thread_id)
+    except sqlite3.Error as e:
+        # Files are already gone; the stale row is dropped on the next catalog rebuild
+        logger.warning("Thread catalog remove failed for %s: %s", thread_id, e)
 
 
 def delete_thread(thread_id: str, user_id: str | None = None) -> bool:
-    """Delete a thread file."""
-    path = _threads_dir(user_id) / f"{thread_id}.json"
-    if path.exists():
-        path.unlink()
+    """Delete a thread snapshot and its log."""
+    with _cursor_lock:
+        _cursors.pop((user_id or "", thread_id), None)
+        _cursors.pop(("", thread_id), None)
+    if _unlink_thread_files(_threads_dir(user_id) / f"{thread_id}.json"):
+        _catalog_remove(user_id or "", thread_id)
         return True
     # Fallback: root dir
-    path = THREADS_DIR / f"{thread_id}.json"
-    if path.exists():
-        path.unlink()
+    if _unlink_thread_files(THREADS_DIR / f"{thread_id}.json"):
+        _catalog_remove("", thread_id)
         return True
     return False
 
@@ -99,10 +351,23 @@ def delete_all_threads(user_id: str | None = None) -> int:
     """Delete all thread files for a user. Returns count of deleted threads."""
     _ensure_dirs(user_id)
     count = 0
+    prefix = user_id or ""
+    with _cursor_lock:
+        for key in [k for k in _cursors if k[0] == prefix]:
+            del _cursors[key]
     for f in _threads_dir(user_id).glob("*.json"):
         try:
             f.unlink()
             count += 1
         except OSError:
             continue
+    for f in _threads_dir(user_id).glob(f"*{LOG_SUFFIX}"):
+        try:
+            f.unlink()
+        except OSError:
+            continue
+    try:
+        thread_catalog.clear(THREADS_DIR, prefix)
+    except sqlite3.Error as e:
+        logger.warning("Thread catalog clear failed: %s", e)
     return count
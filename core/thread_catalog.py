@@ -0,0 +1,262 @@
+"""
+Thread catalog — per-user index of thread summaries for sidebar listing.
+
+Kept in a single SQLite file next to the thread snapshots and updated by
+``core.state.save_thread`` / ``delete_thread``, so listing threads never has
+to open or parse thread bodies. Users whose threads predate the catalog are
+indexed once from disk on first listing.
+"""
+
+from __future__ import annotations
+
+import base64
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+CATALOG_FILENAME = "catalog.db"
+
+_COLUMNS = (
+    "id",
+    "preview",
+    "created_at",
+    "updated_at",
+    "task_count",
+    "event_count",
+    "parent_thread_id",
+    "root_thread_id",
+    "branch_label",
+    "compacted_summary",
+    "last_compacted_at",
+)
+
+_conns: dict[str, sqlite3.Connection] = {}
+_lock = threading.RLock()
+
+
+def _get_conn(threads_dir: Path) -> sqlite3.Connection:
+    """Return a reusable SQLite connection for the catalog under ``threads_dir``."""
+    path = threads_dir / CATALOG_FILENAME
+    key = str(path)
+    conn = _conns.get(key)
+    if conn is None:
+        threads_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(key, check_same_thread=False, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS thread_catalog (
+                user_id             TEXT NOT NULL,
+                id                  TEXT NOT NULL,
+                preview             TEXT NOT NULL DEFAULT '',
+                created_at          TEXT NOT NULL DEFAULT '',
+                updated_at          REAL NOT NULL,
+                task_count          INTEGER NOT NULL DEFAULT 0,
+                event_count         INTEGER NOT NULL DEFAULT 0,
+                parent_thread_id    TEXT,
+                root_thread_id      TEXT,
+                branch_label        TEXT,
+                compacted_summary   TEXT,
+                last_compacted_at   TEXT,
+                PRIMARY KEY (user_id, id)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_catalog_user_updated
+                ON thread_catalog(user_id, updated_at DESC, id DESC);
+
+            CREATE TABLE IF NOT EXISTS catalog_users (
+                user_id     TEXT PRIMARY KEY,
+                indexed_at  REAL NOT NULL
+            );
+        """)
+        conn.commit()
+        _conns[key] = conn
+    return conn
+
+
+def _iso(value: Any) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def entry_from_data(data: dict[str, Any], updated_at: float | None = None) -> dict[str, Any]:
+    """Build a catalog entry from a raw thread dict (snapshot + replayed log)."""
+    events = data.get("events", [])
+    preview = ""
+    for ev in events:
+        if ev.get("event_type") == "user_message":
+            preview = (ev.get("content") or "")[:80]
+            break
+    return {
+        "id": data["id"],
+        "preview": preview,
+        "created_at": _iso(data.get("created_at")) or "",
+        "updated_at": updated_at if updated_at is not None else time.time(),
+        "task_count": len(data.get("tasks", [])),
+        "event_count": len(events),
+        "parent_thread_id": data.get("parent_thread_id"),
+        "root_thread_id": data.get("root_thread_id"),
+        "branch_label": data.get("branch_label"),
+        "compacted_summary": data.get("compacted_summary"),
+        "last_compacted_at": _iso(data.get("last_compacted_at")),
+    }
+
+
+def entry_from_thread(thread: Any, updated_at: float | None = None) -> dict[str, Any]:
+    """Build a catalog entry from a ``Thread`` model without serializing it."""
+    preview = ""
+    for ev in thread.events:
+        if ev.event_type.value == "user_message":
+            preview = (ev.content or "")[:80]
+            break
+    return {
+        "id": thread.id,
+        "preview": preview,
+        "created_at": _iso(thread.created_at) or "",
+        "updated_at": updated_at if updated_at is not None else time.time(),
+        "task_count": len(thread.tasks),
+        "event_count": len(thread.events),
+        "parent_thread_id": thread.parent_thread_id,
+        "root_thread_id": thread.root_thread_id,
+        "branch_label": thread.branch_label,
+        "compacted_summary": thread.compacted_summary,
+        "last_compacted_at": _iso(thread.last_compacted_at),
+    }
+
+
+def upsert(threads_dir: Path, user_id: str, entry: dict[str, Any]) -> None:
+    """Insert or update a catalog entry."""
+    placeholders = ", ".join("?" for _ in range(len(_COLUMNS) + 1))
+    updates = ", ".join(f"{c} = excluded.{c}" for c in _COLUMNS[1:])
+    with _lock:
+        conn = _get_conn(threads_dir)
+        conn.execute(
+            f"INSERT INTO thread_catalog (user_id, {', '.join(_COLUMNS)}) "
+            f"VALUES ({placeholders}) "
+            f"ON CONFLICT(user_id, id) DO UPDATE SET {updates}",
+            (user_id, *(entry[c] for c in _COLUMNS)),
+        )
+        conn.commit()
+
+
+def remove(threads_dir: Path, user_id: str, thread_id: str) -> None:
+    with _lock:
+        conn = _get_conn(threads_dir)
+        conn.execute(
+            "DELETE FROM thread_catalog WHERE user_id = ? AND id = ?",
+            (user_id, thread_id),
+        )
+        conn.commit()
+
+
+def clear(threads_dir: Path, user_id: str) -> None:
+    with _lock:
+        conn = _get_conn(threads_dir)
+        conn.execute("DELETE FROM thread_catalog WHERE user_id = ?", (user_id,))
+        conn.commit()
+
+
+def rebuild(
+    threads_dir: Path,
+    user_id: str,
+    entries: Iterable[dict[str, Any]],
+) -> int:
+    """Replace all catalog entries for a user. Returns entry count."""
+    rows = [(user_id, *(e[c] for c in _COLUMNS)) for e in entries]
+    placeholders = ", ".join("?" for _ in range(len(_COLUMNS) + 1))
+    with _lock:
+        conn = _get_conn(threads_dir)
+        conn.execute("DELETE FROM thread_catalog WHERE user_id = ?", (user_id,))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO thread_catalog (user_id, {', '.join(_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO catalog_users (user_id, indexed_at) VALUES (?, ?)",
+            (user_id, time.time()),
+        )
+        conn.commit()
+    return len(rows)
+
+
+def ensure_indexed(
+    threads_dir: Path,
+    user_id: str,
+    scan: Callable[[], Iterable[dict[str, Any]]],
+) -> None:
+    """Index a user's existing threads once, using ``scan`` to read them from disk."""
+    with _lock:
+        conn = _get_conn(threads_dir)
+        row = conn.execute(
+            "SELECT 1 FROM catalog_users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            rebuild(threads_dir, user_id, scan())
+
+
+def _encode_cursor(updated_at: float, thread_id: str) -> str:
+    raw = f"{updated_at!r}|{thread_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[float, str] | None:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        ts, thread_id = raw.split("|", 1)
+        return float(ts), thread_id
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    item = {c: row[c] for c in _COLUMNS}
+    item["updated_at"] = datetime.fromtimestamp(row["updated_at"], timezone.utc).isoformat()
+    return item
+
+
+def page(
+    threads_dir: Path,
+    user_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+    offset: int = 0,
+) -> dict[str, Any]:
+    """Most-recently-updated first. Returns ``{"threads", "next_cursor", "total"}``."""
+    limit = max(1, min(int(limit), 500))
+    params: list[Any] = [user_id]
+    where = "user_id = ?"
+    decoded = _decode_cursor(cursor) if cursor else None
+    if decoded is not None:
+        where += " AND (updated_at < ? OR (updated_at = ? AND id < ?))"
+        params.extend([decoded[0], decoded[0], decoded[1]])
+        offset = 0
+
+    with _lock:
+        conn = _get_conn(threads_dir)
+        rows = conn.execute(
+            f"SELECT * FROM thread_catalog WHERE {where} "
+            "ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+            (*params, limit + 1, max(0, int(offset))),
+        ).fetchall()
+        total = conn.execute(
+            "SELECT COUNT(*) FROM thread_catalog WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = (
+        _encode_cursor(rows[-1]["updated_at"], rows[-1]["id"]) if has_more and rows else None
+    )
+    return {
+        "threads": [_row_to_dict(r) for r in rows],
+        "next_cursor": next_cursor,
+        "total": total,
+    }
@@ -53,6 +53,7 @@ export function PipelineFlow({ task }: Props) {
     "consensus",
     "deep_research",
     "idea_to_project",
+    "dag",
   ].includes(task.pipeline_type);
   const isIterative = task.pipeline_type === "iterative";
 
@@ -59,6 +59,7 @@ export type PipelineType =
   | "deep_research"
   | "idea_to_project"
   | "brainstorm"
+  | "dag"
   | "auto";
 
 export interface AgentEvent {
@@ -10,12 +10,15 @@ import asyncio
 import json
 import logging
 import time
+from collections import defaultdict
 from typing import Any
 
 # Max seconds for one sub-agent run; prevents one stuck agent from blocking the pipeline
 SUBTASK_TIMEOUT = 45
 # Max seconds for entire parallel/consensus gather
 PIPELINE_GATHER_TIMEOUT = 90
+# Max sub-tasks running at once in the DAG pipeline
+DAG_MAX_CONCURRENCY = 4
 
 # ── Adaptive Timeout per Pipeline Phase ──────────────────────────
 # Complex phases (PRD, architecture) need more time than simple ones
@@ -183,6 +186,41 @@ def _summarize_phase_output(phase_id: str, content: str, max_chars: int = 3000)
     return f"[SUMMARIZED from {phase_id} phase — {len(content)} chars → {len(result)} chars]\n\n{result}"
 
 
+def _topological_order(sub_tasks: list[SubTask]) -> list[SubTask]:
+    """Order sub-tasks so every one comes after its depends_on (Kahn, ties by priority).
+
+    Raises ValueError on unknown dependency IDs or cycles.
+    """
+    by_id = {st.id: st for st in sub_tasks}
+    for st in sub_tasks:
+        unknown = [d for d in st.depends_on if d not in by_id]
+        if unknown:
+            raise ValueError(f"Sub-task {st.id} depends on unknown sub-task(s): {', '.join(unknown)}")
+
+    position = {st.id: i for i, st in enumerate(sub_tasks)}
+    indegree = {st.id: len(set(st.depends_on)) for st in sub_tasks}
+    dependents: dict[str, list[str]] = defaultdict(list)
+    for st in sub_tasks:
+        for dep in set(st.depends_on):
+            dependents[dep].append(st.id)
+
+    ready = [st for st in sub_tasks if indegree[st.id] == 0]
+    order: list[SubTask] = []
+    while ready:
+        ready.sort(key=lambda s: (s.priority, position[s.id]))
+        st = ready.pop(0)
+        order.append(st)
+        for child in dependents[st.id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(by_id[child])
+
+    if len(order) != len(sub_tasks):
+        cyclic = [st.id for st in sub_tasks if indegree[st.id] > 0]
+        raise ValueError(f"Dependency cycle between sub-tasks: {', '.join(cyclic)}")
+    return order
+
+
 async def _run_with_retry(
     coro_factory,
     max_retries: int = PHASE_MAX_RETRIES,
@@ -218,6 +256,8 @@ class PipelineEngine:
             AgentRole.REASONER: ReasonerAgent(),
         }
         self._live_monitor = None
+        # Sub-tasks started before the pipeline (speculative pre-routing), by SubTask.id
+        self._prestarted: dict[str, asyncio.Task] = {}
 
         # Agent Communication Protocol (Faz 15) — bus entegrasyonu
         self._bus_initialized = False
@@ -417,6 +457,8 @@ class PipelineEngine:
                     result = await self._idea_to_project(task, thread)
                 case PipelineType.BRAINSTORM:
                     result = await self._brainstorm(task, thread)
+                case PipelineType.DAG:
+                    result = await self._dag(task, thread)
                 case _:
                     result = await self._parallel(task, thread) if len(task.sub_tasks) >= 2 else await self._sequential(task, thread)
 
@@ -717,6 +759,95 @@ class PipelineEngine:
 
         return "\n\n---\n\n".join(parts)
 
+    # ── DAG Pipeline ─────────────────────────────────────────────
+
+    async def _dag(self, task: Task, thread: Thread) -> str:
+        """Dependency-aware: each sub-task starts as soon as its depends_on finish.
+
+        Only the prerequisites' outputs are passed as context, so independent
+        branches run side by side and total latency follows the critical path.
+        A failed sub-task skips everything downstream of it; unrelated
+        branches keep running. A cyclic or unresolvable plan falls back to
+        the sequential pipeline.
+        """
+        try:
+            order = _topological_order(task.sub_tasks)
+        except ValueError as e:
+            logger.warning(f"DAG plan rejected, running sequentially: {e}")
+            thread.add_event(
+                EventType.PIPELINE_STEP,
+                f"⚠️ Invalid dependency graph ({e}) — falling back to sequential pipeline",
+            )
+            return await self._sequential(task, thread)
+        by_id = {st.id: st for st in order}
+        waiting = {st.id: set(st.depends_on) for st in order}
+        dependents: dict[str, list[str]] = defaultdict(list)
+        for st in order:
+            for dep in set(st.depends_on):
+                dependents[dep].append(st.id)
+
+        slots = asyncio.Semaphore(DAG_MAX_CONCURRENCY)
+        running: dict[asyncio.Task, str] = {}
+
+        async def run(st: SubTask) -> str:
+            async with slots:
+                return await self._run_subtask(st, self._dag_context(task, st, by_id), thread)
+
+        def launch_ready() -> None:
+            for st in order:
+                if st.id in waiting and not waiting[st.id]:
+                    del waiting[st.id]
+                    running[asyncio.create_task(run(st))] = st.id
+
+        def skip_downstream(failed: SubTask) -> None:
+            stack = list(dependents[failed.id])
+            while stack:
+                child = by_id[stack.pop()]
+                if waiting.pop(child.id, None) is None:
+                    continue
+                child.status = TaskStatus.FAILED
+                child.result = f"[Skipped] Dependency failed: [{failed.assigned_agent.value}] {failed.description[:80]}"
+                thread.add_event(
+                    EventType.PIPELINE_STEP,
+                    f"[{child.assigned_agent.value}] skipped — dependency {failed.assigned_agent.value} failed",
+                    agent_role=child.assigned_agent,
+                )
+                stack.extend(dependents[child.id])
+
+        launch_ready()
+        try:
+            while running:
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for fut in finished:
+                    st = by_id[running.pop(fut)]
+                    if fut.exception() is not None:
+                        st.status = TaskStatus.FAILED
+                        st.result = f"[Error] {fut.exception()}"
+                    if st.status == TaskStatus.COMPLETED:
+                        for child in dependents[st.id]:
+                            if child in waiting:
+                                waiting[child].discard(st.id)
+                    else:
+                        skip_downstream(st)
+                launch_ready()
+        finally:
+            for fut in running:
+                fut.cancel()
+
+        return "\n\n---\n\n".join(f"[{st.assigned_agent.value}] {st.result}" for st in order)
+
+    @staticmethod
+    def _dag_context(task: Task, subtask: SubTask, by_id: dict[str, SubTask]) -> str:
+        parts = [f"Original request: {task.user_input}"]
+        if subtask.depends_on:
+            parts.append("Outputs of the steps this task depends on:")
+            for dep_id in dict.fromkeys(subtask.depends_on):
+                dep = by_id[dep_id]
+                output = _summarize_phase_output(dep.id, dep.result or "", max_chars=2500)
+                parts.append(f"[{dep.assigned_agent.value}] {dep.description[:120]}\n{output}")
+        parts.append(f"Your task: {subtask.description}")
+        return "\n\n".join(parts)
+
     # ── Consensus Pipeline ───────────────────────────────────────
 
     async def _consensus(self, task: Task, thread: Thread) -> str:
@@ -1069,6 +1200,22 @@ class PipelineEngine:
 
     # ── Deep Research Pipeline ───────────────────────────────────
 
+    @staticmethod
+    def deep_research_context(task: Task, subtask: SubTask) -> str:
+        return (
+            f"DEEP RESEARCH MODE — You are one of {len(task.sub_tasks)} specialist agents "
+            f"working in parallel on this request.\n\n"
+            f"Original request: {task.user_input}\n\n"
+            f"Your specific task: {subtask.description}\n\n"
+            f"Be thorough. Your output will be combined with other agents' work."
+        )
+
+    def prestart_subtask(self, subtask: SubTask, context: str, thread: Thread) -> asyncio.Task:
+        """Start a sub-task before its pipeline runs; _deep_research joins it by SubTask.id."""
+        running = asyncio.create_task(self._run_subtask(subtask, context, thread))
+        self._prestarted[subtask.id] = running
+        return running
+
     async def _deep_research(self, task: Task, thread: Thread) -> str:
         """
         Deep Research: All agents work in parallel on the same query,
@@ -1085,15 +1232,14 @@ class PipelineEngine:
         )
 
         # Phase 1: All agents run simultaneously with extended timeout
+        # (sub-tasks already started speculatively are joined, not re-run)
         coros = []
         for subtask in task.sub_tasks:
-            enriched = (
-                f"DEEP RESEARCH MODE — You are one of {len(task.sub_tasks)} specialist agents "
-                f"working in parallel on this request.\n\n"
-                f"Original request: {task.user_input}\n\n"
-                f"Your specific task: {subtask.description}\n\n"
-                f"Be thorough. Your output will be combined with other agents' work."
-            )
+            prestarted = self._prestarted.pop(subtask.id, None)
+            if prestarted is not None:
+                coros.append(prestarted)
+                continue
+            enriched = self.deep_research_context(task, subtask)
             coros.append(self._run_subtask(subtask, enriched, thread))
 
         # Deep research gets 2x the normal gather timeout
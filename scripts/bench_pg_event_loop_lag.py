@@ -0,0 +1,102 @@
+"""
+Event-loop lag benchmark — sync get_conn() vs async_db_conn() under concurrent recall load.
+
+Her modda N eşzamanlı "recall" sorgusu çalışırken bir ticker her 10ms'de uyanır;
+planlanan ile gerçek uyanma arasındaki fark = event loop gecikmesi (WebSocket'lerin
+hissettiği stall). Sync modda sorgular loop'u bloklar, async modda bloklamaz.
+
+Kullanım (PostgreSQL gerekir, DATABASE_URL):
+  python scripts/bench_pg_event_loop_lag.py --concurrency 32 --rounds 5
+  python scripts/bench_pg_event_loop_lag.py --query "SELECT pg_sleep(0.02)"
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.pg_connection import async_db_conn, close_async_pool, get_conn, release_conn  # noqa: E402
+
+_DEFAULT_QUERY = """
+SELECT id, content FROM memories
+WHERE embedding IS NOT NULL
+ORDER BY embedding <=> (SELECT embedding FROM memories WHERE embedding IS NOT NULL LIMIT 1)
+LIMIT 5
+"""
+_TICK_SEC = 0.01
+
+
+async def _sync_recall(sql: str) -> None:
+    # Eski davranış: async def içinde senkron psycopg2 çağrısı
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+            cur.fetchall()
+        conn.commit()
+    finally:
+        release_conn(conn)
+
+
+async def _async_recall(sql: str) -> None:
+    async with async_db_conn() as db:
+        await db.fetch_all(sql)
+
+
+async def _measure(mode: str, sql: str, concurrency: int, rounds: int) -> dict[str, float]:
+    recall = _sync_recall if mode == "sync" else _async_recall
+    lags: list[float] = []
+    stop = asyncio.Event()
+
+    async def ticker() -> None:
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            expected = loop.time() + _TICK_SEC
+            await asyncio.sleep(_TICK_SEC)
+            lags.append(max(0.0, loop.time() - expected) * 1000)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(_TICK_SEC * 2)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(recall(sql) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick_task
+
+    lags.sort()
+    return {
+        "queries": concurrency * rounds,
+        "wall_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(lags), 2) if lags else 0.0,
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1], 2) if lags else 0.0,
+        "lag_max_ms": round(lags[-1], 2) if lags else 0.0,
+        "ticks": len(lags),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--query", default=_DEFAULT_QUERY)
+    args = parser.parse_args()
+
+    # Warm both pools so connection setup is not measured
+    await _sync_recall("SELECT 1")
+    await _async_recall("SELECT 1")
+
+    for mode in ("sync", "async"):
+        result = await _measure(mode, args.query, args.concurrency, args.rounds)
+        print(f"{mode:>5}: " + "  ".join(f"{k}={v}" for k, v in result.items()))
+
+    await close_async_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
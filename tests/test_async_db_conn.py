@@ -0,0 +1,99 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from tools import pg_connection
+
+
+class _FakeCursor:
+    def __init__(self, conn: "_FakeConn") -> None:
+        self._conn = conn
+        self.rowcount = 0
+
+    def __enter__(self) -> "_FakeCursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, sql, params=None) -> None:
+        self._conn.statements.append((sql, params))
+        if "pg_sleep" in sql:
+            time.sleep(0.05)  # blocking driver call
+        self.rowcount = 1
+
+    def fetchall(self):
+        return [{"id": 1}]
+
+    def fetchone(self):
+        return {"id": 1}
+
+
+class _FakeConn:
+    def __init__(self) -> None:
+        self.statements: list = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+
+class AsyncDbConnTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.conn = _FakeConn()
+        for target, value in (
+            ("_ASYNC_DRIVER", "thread"),
+            ("_can_attempt_postgres", lambda: True),
+            ("get_conn", lambda: self.conn),
+            ("release_conn", lambda conn: None),
+        ):
+            patcher = patch.object(pg_connection, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_threaded_session_commits_and_sets_statement_timeout(self) -> None:
+        async with pg_connection.async_db_conn(statement_timeout_ms=250) as db:
+            rows = await db.fetch_all("SELECT id FROM memories WHERE id = %s", (1,))
+
+        self.assertEqual(rows, [{"id": 1}])
+        self.assertEqual(self.conn.statements[0][1], ("250",))
+        self.assertIn("statement_timeout", self.conn.statements[0][0])
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (1, 0))
+
+    async def test_error_rolls_back(self) -> None:
+        with self.assertRaises(RuntimeError):
+            async with pg_connection.async_db_conn() as db:
+                await db.execute("UPDATE memories SET access_count = 0")
+                raise RuntimeError("boom")
+        self.assertEqual((self.conn.commits, self.conn.rollbacks), (0, 1))
+
+    async def test_slow_queries_do_not_stall_the_event_loop(self) -> None:
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while not stop.is_set():
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*(
+            pg_connection.afetch_all("SELECT pg_sleep(0.05)", statement_timeout_ms=0)
+            for _ in range(4)
+        ))
+        stop.set()
+        await task
+        self.assertGreaterEqual(ticks, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
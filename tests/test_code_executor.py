@@ -0,0 +1,102 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from tools import code_executor
+from tools.code_worker_pool import CodeWorkerPool
+
+
+class CodeWorkerPoolTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.pool = CodeWorkerPool(size=1, max_jobs_per_worker=10)
+
+    async def asyncTearDown(self) -> None:
+        await self.pool.close()
+
+    async def test_warm_worker_forks_a_fresh_process_per_job(self) -> None:
+        first = await self.pool.run("import os\nx = 41\nprint(x + 1, os.getpid(), os.getppid())", timeout=10)
+        second = await self.pool.run("import os\nprint('x' in globals(), os.getpid(), os.getppid())", timeout=10)
+
+        self.assertTrue(first["success"])
+        value, first_pid, first_parent = first["stdout"].split()
+        leaked, second_pid, second_parent = second["stdout"].split()
+        self.assertEqual((value, leaked), ("42", "False"))
+        self.assertNotEqual(first_pid, second_pid)
+        self.assertEqual(first_parent, second_parent)  # same warm fork server
+        self.assertEqual(self.pool.stats()["spawns"], 1)
+
+    async def test_state_does_not_leak_between_users(self) -> None:
+        await self.pool.run(
+            "import os, sys, builtins, json\n"
+            "os.environ['SECRET'] = 'u1-token'\n"
+            "sys.modules['json'].dumps = lambda *a, **k: 'pwned'\n"
+            "builtins.print = lambda *a, **k: None\n"
+            "f = open('notes.txt', 'w'); f.write('u1 data'); f.flush()\n",
+            timeout=10, user_id="u1",
+        )
+        result = await self.pool.run(
+            "import os, json\n"
+            "print(os.environ.get('SECRET'), json.dumps([1]), os.listdir('.'))",
+            timeout=10, user_id="u2",
+        )
+
+        self.assertEqual(result["stdout"].strip(), "None [1] []")
+
+    async def test_errors_and_exit_codes(self) -> None:
+        failed = await self.pool.run("raise ValueError('boom')", timeout=10)
+        exited = await self.pool.run("import sys\nsys.exit(3)", timeout=10)
+
+        self.assertFalse(failed["success"])
+        self.assertIn("ValueError: boom", failed["stderr"])
+        self.assertEqual(exited["return_code"], 3)
+
+    async def test_timeout_kills_worker_and_pool_recovers(self) -> None:
+        slow = await self.pool.run("while True:\n    pass", timeout=0.5)
+        after = await self.pool.run("print('ok')", timeout=10)
+
+        self.assertIn("timed out", slow["stderr"])
+        self.assertEqual(after["stdout"].strip(), "ok")
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+        self.assertEqual(self.pool.stats()["spawns"], 1)  # only the job child was killed
+
+    async def test_queue_is_round_robin_across_users(self) -> None:
+        order: list[str] = []
+
+        async def submit(user: str, tag: str) -> None:
+            result = await self.pool.run(f"print('{tag}')", timeout=10, user_id=user)
+            order.append(result["stdout"].strip())
+
+        await asyncio.gather(
+            submit("busy", "a1"), submit("busy", "a2"), submit("busy", "a3"), submit("other", "b1"),
+        )
+
+        # a1 worker'ı hemen alır; kuyrukta a2, a3, b1 → b1 a3'ten önce çalışır
+        self.assertLess(order.index("b1"), order.index("a3"))
+
+
+class ExecuteCodeTests(unittest.IsolatedAsyncioTestCase):
+    async def test_sandbox_patterns_still_apply(self) -> None:
+        result = await code_executor.execute_code("open('out.txt', 'w')")
+        self.assertFalse(result["success"])
+        self.assertIn("Security check failed", result["stderr"])
+
+    async def test_subprocess_fallback_does_not_block_the_loop(self) -> None:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        with patch.object(code_executor, "CODE_EXECUTOR_MODE", "subprocess"):
+            result = await code_executor.execute_code("import time\ntime.sleep(0.3)\nprint('done')")
+        task.cancel()
+
+        self.assertEqual(result["stdout"].strip(), "done")
+        self.assertGreaterEqual(ticks, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
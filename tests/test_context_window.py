@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+from agents.agentic_loop import get_default_transformer
+from tools import context_window
+from tools.context_window import ContextWindowManager, count_message_tokens
+
+
+def _conversation(tool_results: list[str]) -> list[dict]:
+    messages = [
+        {"role": "system", "content": "You are a researcher."},
+        {"role": "user", "content": "Araştır: kuantum bilgisayarlar"},
+    ]
+    for i, result in enumerate(tool_results):
+        messages.append({
+            "role": "assistant", "content": None,
+            "tool_calls": [{"id": f"c{i}", "type": "function",
+                            "function": {"name": "web_fetch", "arguments": f'{{"url": "https://x/{i}"}}'}}],
+        })
+        messages.append({"role": "tool", "tool_call_id": f"c{i}", "content": result})
+    return messages
+
+
+class ContextWindowTests(unittest.TestCase):
+    def test_many_small_messages_are_left_alone(self) -> None:
+        window = ContextWindowManager(context_length=32_000, max_output_tokens=4096)
+        messages = _conversation(["ok"] * 40)  # 82 messages, far over the old count threshold
+        self.assertIs(window.fit(messages), messages)
+        self.assertEqual(window.stats["compactions"], 0)
+
+    def test_giant_tool_result_is_capped_to_budget_share(self) -> None:
+        window = ContextWindowManager(context_length=16_000, max_output_tokens=2000, safety_margin=0)
+        messages = _conversation(["x" * 400_000])
+        fitted = window.fit(messages)
+
+        self.assertLessEqual(window.count(fitted), window.budget)
+        self.assertLessEqual(count_message_tokens(fitted[-1]), window.budget * 0.25 + 50)
+        self.assertIn("truncated to fit context window", fitted[-1]["content"])
+        self.assertEqual(len(fitted), len(messages))
+
+    def test_over_budget_stubs_then_evicts_old_turns_keeping_pairs(self) -> None:
+        window = ContextWindowManager(context_length=12_000, max_output_tokens=2000, safety_margin=0, keep_recent=4)
+        messages = _conversation(["sonuç " * 1000 for _ in range(40)])
+        fitted = window.fit(messages)
+
+        self.assertLessEqual(window.count(fitted), window.target)
+        self.assertEqual(fitted[0]["role"], "system")
+        self.assertTrue(fitted[1]["content"].startswith("[CONTEXT COMPACTED"))
+        self.assertIn("web_fetch", fitted[1]["content"])
+        self.assertEqual(fitted[-4:], messages[-4:])
+        self.assertIn({"role": "user", "content": "Araştır: kuantum bilgisayarlar"}, fitted)
+        for i, msg in enumerate(fitted):
+            if msg["role"] == "tool":
+                self.assertEqual(fitted[i - 1]["tool_calls"][0]["id"], msg["tool_call_id"])
+
+    def test_token_counts_are_cached_per_message(self) -> None:
+        window = ContextWindowManager(context_length=64_000)
+        messages = _conversation(["a" * 1000] * 5)
+        with patch.object(context_window, "count_message_tokens", wraps=count_message_tokens) as counter:
+            window.fit(messages)
+            first = counter.call_count
+            messages.append({"role": "assistant", "content": "done"})
+            window.fit(messages)
+        self.assertEqual(first, len(messages) - 1)
+        self.assertEqual(counter.call_count, first + 1)
+
+    def test_for_model_uses_config_context_length_and_tool_schemas(self) -> None:
+        tools = [{"type": "function", "function": {"name": "web_fetch", "description": "d" * 4000}}]
+        bare = ContextWindowManager.for_model("orchestrator")
+        with_tools = ContextWindowManager.for_model("orchestrator", tools=tools)
+
+        self.assertEqual(bare.context_length, 65536)
+        self.assertGreater(with_tools.tool_tokens, 900)
+        self.assertEqual(bare.budget - with_tools.budget, with_tools.tool_tokens)
+
+        transformer = get_default_transformer(with_tools)
+        self.assertEqual(transformer._transforms, [with_tools.fit])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from tools import embedding_cache
+from tools.embedding_cache import EmbeddingCache
+from tools.embedding_service import EmbeddingService
+
+
+class EmbeddingServiceTests(unittest.IsolatedAsyncioTestCase):
+    def _service(self, **kwargs) -> tuple[EmbeddingService, list[list[str]]]:
+        svc = EmbeddingService(cache=EmbeddingCache(db_path=None), **kwargs)
+        sent: list[list[str]] = []
+
+        async def fake_post_batch(texts, input_type):
+            sent.append(list(texts))
+            await asyncio.sleep(0)
+            return [[float(len(t))] for t in texts]
+
+        svc._post_batch = fake_post_batch  # type: ignore[method-assign]
+        return svc, sent
+
+    async def test_concurrent_single_requests_are_coalesced(self) -> None:
+        svc, sent = self._service(coalesce_ms=5)
+
+        results = await asyncio.gather(
+            svc.embed("a"), svc.embed("bb"), svc.embed("a"), svc.embed("  "), svc.embed("ccc")
+        )
+
+        self.assertEqual(results, [[1.0], [2.0], [1.0], None, [3.0]])
+        self.assertEqual(sent, [["a", "bb", "ccc"]])
+        await asyncio.sleep(0)
+        self.assertEqual(svc._tasks, set())  # resolve task held until done, then released
+
+    async def test_full_queue_flushes_without_waiting(self) -> None:
+        svc, sent = self._service(batch_size=2, coalesce_ms=10_000)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(svc.embed("x"), svc.embed("yy")), timeout=1
+        )
+
+        self.assertEqual(results, [[1.0], [2.0]])
+        self.assertEqual(sent, [["x", "yy"]])
+
+    def test_throwaway_loop_client_is_closed(self) -> None:
+        svc, _ = self._service()
+
+        async def once():
+            try:
+                await svc.embed_many(["a"])
+                state = svc._state()
+                return state.client
+            finally:
+                await svc.aclose()
+
+        client = asyncio.run(once())
+        self.assertTrue(client.is_closed)
+        self.assertEqual(len(svc._states), 0)
+
+    async def test_embed_many_splits_into_batches_and_keeps_order(self) -> None:
+        svc, sent = self._service(batch_size=32)
+        texts = [f"text-{i}" for i in range(70)]
+        texts[5] = ""
+
+        results = await svc.embed_many(texts)
+
+        self.assertEqual([len(b) for b in sent], [32, 32, 5])
+        self.assertIsNone(results[5])
+        self.assertEqual(results[6], [float(len(texts[6]))])
+        self.assertEqual(len(results), 70)
+
+    async def test_cache_short_circuits_repeat_embeddings(self) -> None:
+        svc, sent = self._service()
+
+        first = await svc.embed_many(["alpha", "beta", "alpha"])
+        second = await svc.embed("beta")
+        third = await svc.embed_many(["alpha", "gamma"])
+
+        self.assertEqual(first, [[5.0], [4.0], [5.0]])
+        self.assertEqual(second, [4.0])
+        self.assertEqual(third, [[5.0], [5.0]])
+        self.assertEqual(sent, [["alpha", "beta"], ["gamma"]])
+        stats = svc.cache.stats()
+        self.assertEqual(stats["memory_hits"], 2)
+        self.assertEqual(stats["memory_entries"], 3)
+
+
+
+class EmbeddingDiskCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_path = Path(tmp.name) / "emb.db"
+
+    async def test_disk_tier_runs_off_the_event_loop(self) -> None:
+        cache = EmbeddingCache(db_path=self.db_path)
+        with patch.object(embedding_cache.asyncio, "to_thread", wraps=asyncio.to_thread) as to_thread:
+            await cache.aput_many({"k1": [1.0, 2.0]})
+            fresh = EmbeddingCache(db_path=self.db_path)
+            hits = await fresh.aget_many(["k1", "k2"])
+            again = await fresh.aget_many(["k1"])  # memory hit, no thread hop
+
+        self.assertEqual(hits, {"k1": [1.0, 2.0]})
+        self.assertEqual(again, {"k1": [1.0, 2.0]})
+        self.assertEqual(to_thread.call_count, 2)
+        stats = fresh.stats()
+        self.assertEqual((stats["disk_hits"], stats["memory_hits"], stats["misses"]), (1, 1, 1))
+
+    async def test_disk_tier_is_pruned_by_age_and_row_cap(self) -> None:
+        cache = EmbeddingCache(db_path=self.db_path, max_rows=3, ttl_days=1)
+        with patch.object(embedding_cache, "EMBED_CACHE_PRUNE_EVERY", 1):
+            await cache.aput_many({"old": [0.0]})
+            cache._conn.execute("UPDATE embeddings SET created_at = ?", (time.time() - 2 * 86400,))
+            for i in range(5):
+                await cache.aput_many({f"k{i}": [float(i)]})
+
+        rows = {k for (k,) in cache._conn.execute("SELECT key FROM embeddings")}
+        self.assertEqual(rows, {"k2", "k3", "k4"})
+        self.assertEqual(cache.stats()["disk_pruned"], 3)
+
+    async def test_stats_and_clear_run_off_the_event_loop(self) -> None:
+        cache = EmbeddingCache(db_path=self.db_path)
+        await cache.aput_many({"k1": [1.0, 2.0]})
+        with patch.object(embedding_cache.asyncio, "to_thread", wraps=asyncio.to_thread) as to_thread:
+            stats = await cache.astats()
+            dropped = await cache.aclear()
+            after = await cache.astats()
+
+        self.assertEqual((stats["disk_entries"], stats["disk_bytes"]), (1, 8))
+        self.assertEqual(dropped, 1)
+        self.assertEqual(after["disk_entries"], 0)
+        self.assertEqual(to_thread.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import io
+import unittest
+
+from tools import export_service
+
+_SECTION = (
+    "## Bölüm\n"
+    + "Uzun paragraf metni, Türkçe karakterler: ş ğ ı ç ö ü. " * 20
+    + "\n- madde **kalın**\n```\nx = 1 < 2\n```\n| a | b |\n|---|---|\n| 1 | 2 |\n"
+)
+
+
+def _chunks(text: str, size: int = 1000) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StreamingExportTests(unittest.TestCase):
+    def test_pdf_is_built_from_a_bounded_window(self) -> None:
+        styles = export_service._get_styles()
+        self.assertIs(styles, export_service._get_styles())
+
+        peak = 0
+        source = export_service._iter_md_flowables(_SECTION * 300, styles)
+
+        class Probe(export_service._FlowableFeed):
+            def __len__(self) -> int:
+                nonlocal peak
+                n = super().__len__()
+                peak = max(peak, n)
+                return n
+
+        buffer = io.BytesIO()
+        doc = export_service.SimpleDocTemplate(buffer, pagesize=export_service.A4)
+        doc.build(Probe(source, window=16))
+
+        self.assertTrue(buffer.getvalue().startswith(b"%PDF"))
+        self.assertGreater(doc.page, 20)
+        self.assertLessEqual(peak, 40)
+
+    def test_chunked_pdf_file_matches_in_memory_pdf(self) -> None:
+        md = _SECTION * 20
+        in_memory = export_service.generate_pdf(md, title="Rapor")
+        path = export_service.export_pdf_file(iter(_chunks(md)), title="Rapor")
+        self.addCleanup(path.unlink, missing_ok=True)
+        self.assertEqual(path.read_bytes().count(b"/Type /Page\n"), in_memory.count(b"/Type /Page\n"))
+
+    def test_html_stream_matches_full_render(self) -> None:
+        md = _SECTION * 5 + "| trailing |"
+        full = export_service.generate_html(md, title="Rapor <1>")
+        streamed = list(export_service.iter_html(iter(_chunks(md, 37)), title="Rapor <1>"))
+        self.assertGreater(len(streamed), 10)
+        self.assertEqual("".join(streamed), full)
+        self.assertIn("<title>Rapor &lt;1&gt;</title>", full)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+import tempfile
+import unittest
+
+import httpx
+
+from tools.http_fetch import HttpFetcher, _FetchLoopState
+
+_HTML = "<html><head><title>Doc</title></head><body><script>x()</script><p>Hello world</p></body></html>"
+
+
+class HttpFetcherTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.requests: list[httpx.Request] = []
+        self.cache_control = ""
+        self.cache_dir = tempfile.mkdtemp()
+        self.fetcher = self._fetcher(ttl_sec=0)
+
+    def _fetcher(self, ttl_sec: float) -> HttpFetcher:
+        fetcher = HttpFetcher(cache_dir=self.cache_dir, ttl_sec=ttl_sec, max_per_host=2)
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            await asyncio.sleep(0.05)
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"etag": '"v1"'})
+            headers = {"etag": '"v1"', "cache-control": self.cache_control}
+            return httpx.Response(200, text=_HTML, headers=headers)
+
+        fetcher._states[asyncio.get_running_loop()] = _FetchLoopState(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            slots=asyncio.Semaphore(4),
+        )
+        return fetcher
+
+    async def asyncTearDown(self) -> None:
+        await self.fetcher.aclose()
+
+    async def test_concurrent_fetches_share_one_request(self) -> None:
+        pages = await asyncio.gather(*(self.fetcher.fetch("https://a.test/x") for _ in range(5)))
+
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual({p.title for p in pages}, {"Doc"})
+        self.assertTrue(pages[0].text.endswith("Hello world"))
+
+    async def test_idle_host_slots_are_evicted(self) -> None:
+        await asyncio.gather(*(self.fetcher.fetch(f"https://h{i}.test/x") for i in range(3)))
+
+        state = self.fetcher._state()
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual((state.host_slots, state.host_users), ({}, {}))
+
+    async def test_stale_entry_is_revalidated_with_etag(self) -> None:
+        await self.fetcher.fetch("https://a.test/x")
+        page = await self.fetcher.fetch("https://a.test/x")
+
+        self.assertEqual(page.cache, "revalidated")
+        self.assertTrue(page.text.endswith("Hello world"))
+        self.assertEqual(self.requests[1].headers["if-none-match"], '"v1"')
+
+    async def test_fresh_disk_cache_survives_new_fetcher(self) -> None:
+        warm = self._fetcher(ttl_sec=60)
+        await warm.fetch("https://a.test/x")
+        cold = self._fetcher(ttl_sec=60)
+        page = await cold.fetch("https://a.test/x")
+
+        self.assertEqual(page.cache, "hit")
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_no_store_is_not_cached(self) -> None:
+        self.cache_control = "no-store"
+        await self.fetcher.fetch("https://a.test/x")
+        await self.fetcher.fetch("https://a.test/x")
+
+        self.assertNotIn("if-none-match", self.requests[1].headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from agents.base import BaseAgent
+from tools import llm_admission
+from tools.llm_admission import BACKGROUND, INTERACTIVE, AdmissionController, AdmissionTimeout, llm_lane
+
+_URL = "https://integrate.api.nvidia.com/v1"
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str) -> None:
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after})
+
+
+class AdmissionControllerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_is_bounded_per_provider_and_model(self) -> None:
+        ctl = AdmissionController(concurrency=2, tpm=0)
+        active = peak = 0
+
+        async def call(model: str) -> None:
+            nonlocal active, peak
+            async with ctl.admit(_URL, model, 100):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.05)
+                active -= 1
+
+        await asyncio.gather(*(call("m1") for _ in range(6)))
+        self.assertEqual(peak, 2)
+
+        peak = 0
+        await asyncio.gather(call("m1"), call("m1"), call("m2"), call("m2"))
+        self.assertEqual(peak, 4)  # separate keys, separate slots
+        self.assertEqual(ctl.stats()["keys"][f"integrate.api.nvidia.com|m1"]["admitted"], 8)
+
+    async def test_interactive_lane_goes_first_and_background_ages(self) -> None:
+        ctl = AdmissionController(concurrency=1, tpm=0, aging_sec=60)
+        order: list[str] = []
+        holder = await ctl.acquire(_URL, "m", 10)
+
+        async def call(name: str, lane: str) -> None:
+            with llm_lane(lane):
+                async with ctl.admit(_URL, "m", 10):
+                    order.append(name)
+
+        waiters = [asyncio.create_task(call("bg", BACKGROUND))]
+        await asyncio.sleep(0.01)
+        waiters.append(asyncio.create_task(call("chat", INTERACTIVE)))
+        await asyncio.sleep(0.01)
+        holder.release()
+        await asyncio.gather(*waiters)
+        self.assertEqual(order, ["chat", "bg"])
+
+        lanes = ctl.stats()["lanes"]
+        self.assertGreater(lanes[BACKGROUND]["queue_ms_max"], lanes[INTERACTIVE]["queue_ms_p50"])
+
+        ctl = AdmissionController(concurrency=1, tpm=0, aging_sec=0.0)
+        order.clear()
+        holder = await ctl.acquire(_URL, "m", 10)
+        waiters = [asyncio.create_task(call("bg", BACKGROUND))]
+        await asyncio.sleep(0.01)
+        waiters.append(asyncio.create_task(call("chat", INTERACTIVE)))
+        await asyncio.sleep(0.01)
+        holder.release()
+        await asyncio.gather(*waiters)
+        self.assertEqual(order, ["bg", "chat"])
+
+    async def test_tpm_reservation_is_corrected_by_actual_usage(self) -> None:
+        ctl = AdmissionController(concurrency=0, tpm=1000)
+        first = await ctl.acquire(_URL, "m", 800)
+        second = asyncio.create_task(ctl.acquire(_URL, "m", 400))
+        await asyncio.sleep(0.02)
+        self.assertFalse(second.done())
+
+        first.record_usage(300)
+        first.release()
+        ticket = await asyncio.wait_for(second, timeout=1)
+        ticket.release()
+        self.assertEqual(ctl.stats()["keys"]["integrate.api.nvidia.com|m"]["tokens_last_minute"], 700)
+
+    async def test_rate_limit_pauses_key_and_timeout_is_raised(self) -> None:
+        ctl = AdmissionController(concurrency=4, tpm=0, timeout_sec=1)
+        with self.assertRaises(_RateLimited):
+            async with ctl.admit(_URL, "m", 10):
+                raise _RateLimited("0.2")
+
+        t0 = time.monotonic()
+        (await ctl.acquire(_URL, "m", 10)).release()
+        self.assertGreaterEqual(time.monotonic() - t0, 0.15)
+        self.assertEqual(ctl.stats()["keys"]["integrate.api.nvidia.com|m"]["rate_limited"], 1)
+
+        ctl = AdmissionController(concurrency=1, tpm=0, timeout_sec=0.05)
+        holder = await ctl.acquire(_URL, "m", 10)
+        with self.assertRaises(AdmissionTimeout):
+            await ctl.acquire(_URL, "m", 10)
+        holder.release()
+        (await ctl.acquire(_URL, "m", 10)).release()
+
+
+class _FakeRedis:
+    """Just the sorted-set / counter commands the admission gate uses."""
+
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.counters: dict[str, int] = {}
+
+    def zremrangebyscore(self, key: str, lo: float, hi: float) -> int:
+        zset = self.zsets.get(key, {})
+        stale = [m for m, score in zset.items() if lo <= score <= hi]
+        for m in stale:
+            del zset[m]
+        return len(stale)
+
+    def zadd(self, key: str, mapping: dict[str, float]) -> int:
+        self.zsets.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def zcard(self, key: str) -> int:
+        return len(self.zsets.get(key, {}))
+
+    def zrem(self, key: str, member: str) -> int:
+        return int(self.zsets.get(key, {}).pop(member, None) is not None)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        return True
+
+    def incrby(self, key: str, n: int) -> int:
+        self.counters[key] = self.counters.get(key, 0) + n
+        return self.counters[key]
+
+    def decrby(self, key: str, n: int) -> int:
+        return self.incrby(key, -n)
+
+
+class RedisGateTests(unittest.IsolatedAsyncioTestCase):
+    async def test_leaked_inflight_slots_age_out(self) -> None:
+        fake = _FakeRedis()
+        gate = llm_admission._RedisGate(lease_sec=600)
+        limits = llm_admission._Limits(1, 0)
+        inflight_key, _ = gate._keys("k")
+        fake.zadd(inflight_key, {"dead-worker:1": time.time() - 700})
+
+        with patch.object(llm_admission._RedisGate, "_client", staticmethod(lambda: fake)):
+            member = await gate.wait("k", 10, limits, time.monotonic() + 1)
+            with self.assertRaises(AdmissionTimeout):
+                await gate.wait("k", 10, limits, time.monotonic() + 0.1)
+            gate._release("k", 0, member)
+            again = await gate.wait("k", 10, limits, time.monotonic() + 1)
+
+        self.assertNotEqual(member, again)
+        self.assertEqual(list(fake.zsets[inflight_key]), [again])
+
+
+class BaseAgentAdmissionTests(unittest.IsolatedAsyncioTestCase):
+    async def test_completion_goes_through_admission_with_usage(self) -> None:
+        ctl = AdmissionController(concurrency=1, tpm=10_000)
+        response = SimpleNamespace(usage=SimpleNamespace(total_tokens=42))
+
+        async def create(**kwargs):
+            self.assertEqual(ctl.stats()["keys"]["gateway.local|gpt"]["in_flight"], 1)
+            return response
+
+        client = MagicMock(base_url="http://gateway.local:8080/v1")
+        client.chat.completions.create = create
+        kwargs = {"model": "gpt", "messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 500}
+
+        with patch.object(llm_admission, "_controller", ctl):
+            result = await BaseAgent._create_completion(MagicMock(), client, kwargs)
+
+        self.assertIs(result, response)
+        key = ctl.stats()["keys"]["gateway.local|gpt"]
+        self.assertEqual((key["in_flight"], key["tokens_last_minute"]), (0, 42))
+
+
+if __name__ == "__main__":
+    unittest.main()
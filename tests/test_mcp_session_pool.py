@@ -0,0 +1,90 @@
+import asyncio
+import sys
+import textwrap
+import unittest
+
+from tools.mcp_session_pool import MCPServerConfig, MCPSessionClosed, MCPSessionPool
+
+# Minimal stdio MCP server: answers out of order (sleep arg), can crash on demand
+_FAKE_SERVER = textwrap.dedent("""
+    import json, os, sys, threading, time
+
+    lock = threading.Lock()
+
+    def reply(msg_id, result):
+        with lock:
+            sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": msg_id, "result": result}) + "\\n")
+            sys.stdout.flush()
+
+    def call(msg):
+        args = msg["params"].get("arguments", {})
+        if args.get("crash"):
+            os._exit(1)
+        time.sleep(args.get("sleep", 0))
+        reply(msg["id"], {"content": [{"type": "text", "text": f"{os.getpid()}:{args.get('tag')}"}]})
+
+    print("server booting (log line on stdout)", flush=True)
+    for line in sys.stdin:
+        msg = json.loads(line)
+        method = msg.get("method")
+        if method == "initialize":
+            reply(msg["id"], {"protocolVersion": "2024-11-05", "capabilities": {}})
+        elif method == "tools/list":
+            reply(msg["id"], {"tools": [{"name": "echo"}]})
+        elif method == "tools/call":
+            threading.Thread(target=call, args=(msg,)).start()
+""")
+
+
+def _config() -> MCPServerConfig:
+    return MCPServerConfig("fake", sys.executable, ("-c", _FAKE_SERVER))
+
+
+def _text(response: dict) -> str:
+    return response["result"]["content"][0]["text"]
+
+
+class MCPSessionPoolTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.pool = MCPSessionPool(sessions_per_server=1, idle_ttl_sec=0)
+
+    async def asyncTearDown(self) -> None:
+        await self.pool.close_all()
+
+    async def _call(self, tag: str, sleep: float = 0, **extra) -> dict:
+        arguments = {"tag": tag, "sleep": sleep, **extra}
+        return await self.pool.request(_config(), "tools/call", {"name": "echo", "arguments": arguments}, timeout=5)
+
+    async def test_concurrent_calls_multiplex_over_one_process(self) -> None:
+        slow, fast = await asyncio.gather(self._call("slow", sleep=0.3), self._call("fast"))
+
+        slow_pid, slow_tag = _text(slow).split(":")
+        fast_pid, fast_tag = _text(fast).split(":")
+        self.assertEqual((slow_tag, fast_tag), ("slow", "fast"))
+        self.assertEqual(slow_pid, fast_pid)
+        stats = self.pool.stats()["servers"]["fake"]
+        self.assertEqual(stats["spawns"], 1)
+        self.assertTrue(stats["sessions"][0]["handshake_ok"])
+
+    async def test_crashed_server_is_restarted(self) -> None:
+        first_pid = _text(await self._call("a")).split(":")[0]
+
+        with self.assertRaises(MCPSessionClosed):
+            await self._call("boom", crash=True)
+        second_pid = _text(await self._call("b")).split(":")[0]
+
+        self.assertNotEqual(first_pid, second_pid)
+        self.assertEqual(self.pool.stats()["servers"]["fake"]["restarts"], 1)
+
+    async def test_idle_sessions_are_evicted(self) -> None:
+        await self.pool.request(_config(), "tools/list", timeout=5)
+        self.assertEqual(self.pool.stats()["live_sessions"], 1)
+
+        self.assertEqual(await self.pool.evict_idle(), 1)
+        self.assertEqual(self.pool.stats()["live_sessions"], 0)
+        await self.pool.request(_config(), "tools/list", timeout=5)
+        self.assertEqual(self.pool.stats()["servers"]["fake"]["spawns"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
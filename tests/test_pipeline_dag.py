@@ -0,0 +1,106 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from core.models import AgentRole, PipelineType, SubTask, Task, TaskStatus, Thread
+from pipelines import engine as engine_module
+from pipelines.engine import PipelineEngine, _topological_order
+
+
+def _plan() -> Task:
+    research = SubTask(id="research", description="research", assigned_agent=AgentRole.RESEARCHER)
+    analysis = SubTask(id="analysis", description="analysis", assigned_agent=AgentRole.REASONER,
+                       depends_on=["research"])
+    code = SubTask(id="code", description="code", assigned_agent=AgentRole.SPEED, depends_on=["research"])
+    critique = SubTask(id="critique", description="critique", assigned_agent=AgentRole.THINKER,
+                       depends_on=["analysis", "code"])
+    return Task(user_input="build it", pipeline_type=PipelineType.DAG,
+                sub_tasks=[critique, code, analysis, research])
+
+
+class DagPipelineTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = PipelineEngine.__new__(PipelineEngine)
+        self.engine._live_monitor = None
+        self.contexts: dict[str, str] = {}
+        self.fail: set[str] = set()
+        self.active = 0
+        self.peak = 0
+
+        async def fake_run(subtask: SubTask, context: str, thread: Thread) -> str:
+            self.contexts[subtask.id] = context
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.2)
+            self.active -= 1
+            if subtask.id in self.fail:
+                subtask.status = TaskStatus.FAILED
+                subtask.result = f"[Error] {subtask.id} failed"
+            else:
+                subtask.status = TaskStatus.COMPLETED
+                subtask.result = f"{subtask.id}-output"
+            return subtask.result
+
+        self.engine._run_subtask = fake_run
+
+    async def test_runs_at_critical_path_with_dependency_context(self) -> None:
+        task = _plan()
+        t0 = time.perf_counter()
+        result = await self.engine._dag(task, Thread())
+        elapsed = time.perf_counter() - t0
+
+        self.assertLess(elapsed, 0.75)  # 3 levels, not 4 steps
+        self.assertEqual(self.peak, 2)
+        self.assertTrue(result.startswith("[researcher] research-output"))
+        self.assertIn("research-output", self.contexts["analysis"])
+        self.assertIn("analysis-output", self.contexts["critique"])
+        self.assertIn("code-output", self.contexts["critique"])
+        self.assertNotIn("research-output", self.contexts["critique"])
+
+    async def test_failure_skips_only_downstream(self) -> None:
+        self.fail.add("analysis")
+        task = _plan()
+        await self.engine._dag(task, Thread())
+
+        status = {st.id: st for st in task.sub_tasks}
+        self.assertEqual(status["code"].status, TaskStatus.COMPLETED)
+        self.assertEqual(status["critique"].status, TaskStatus.FAILED)
+        self.assertTrue(status["critique"].result.startswith("[Skipped]"))
+        self.assertNotIn("critique", self.contexts)
+
+    async def test_concurrency_is_bounded(self) -> None:
+        subtasks = [SubTask(description=f"s{i}", assigned_agent=AgentRole.SPEED) for i in range(6)]
+        task = Task(user_input="x", pipeline_type=PipelineType.DAG, sub_tasks=subtasks)
+        with patch.object(engine_module, "DAG_MAX_CONCURRENCY", 3):
+            await self.engine._dag(task, Thread())
+        self.assertEqual(self.peak, 3)
+
+    async def test_cycle_falls_back_to_sequential(self) -> None:
+        a = SubTask(id="a", description="a", assigned_agent=AgentRole.RESEARCHER, depends_on=["b"])
+        b = SubTask(id="b", description="b", assigned_agent=AgentRole.SPEED, depends_on=["a"])
+        thread = Thread()
+        result = await self.engine._dag(Task(user_input="x", pipeline_type=PipelineType.DAG, sub_tasks=[a, b]), thread)
+
+        self.assertEqual(result, "[researcher] a-output\n\n---\n\n[speed] b-output")
+        self.assertIn("a-output", self.contexts["b"])
+        self.assertTrue(any("sequential" in e.content for e in thread.events))
+
+
+class TopologicalOrderTests(unittest.TestCase):
+    def test_rejects_cycles_and_unknown_dependencies(self) -> None:
+        a = SubTask(id="a", description="a", assigned_agent=AgentRole.SPEED, depends_on=["b"])
+        b = SubTask(id="b", description="b", assigned_agent=AgentRole.SPEED, depends_on=["a"])
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            _topological_order([a, b])
+        with self.assertRaisesRegex(ValueError, "unknown"):
+            _topological_order([SubTask(description="c", assigned_agent=AgentRole.SPEED, depends_on=["zzz"])])
+
+    def test_orders_by_dependency_then_priority(self) -> None:
+        order = [st.id for st in _topological_order(_plan().sub_tasks)]
+        self.assertEqual(order[0], "research")
+        self.assertEqual(order[-1], "critique")
+
+
+if __name__ == "__main__":
+    unittest.main()
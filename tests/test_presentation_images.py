@@ -0,0 +1,73 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from tools import presentation_service
+
+_PNG = b"\x89PNG" + b"0" * 2000
+
+
+def _slides(n: int) -> list[dict]:
+    return [
+        {"title": f"Slayt {i}", "bullets": ["a", "b"], "image_prompt": f"chart {i}"}
+        for i in range(n)
+    ]
+
+
+class SlideImageTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.downloads: list[str] = []
+        self.active = 0
+        self.peak = 0
+
+        self.original_prompt_ok = True
+
+        async def fake_download(prompt: str, width: int, height: int) -> tuple[bytes, bool]:
+            self.downloads.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.2)
+            self.active -= 1
+            return _PNG, self.original_prompt_ok
+
+        patches = [
+            patch.object(presentation_service, "_download_image", fake_download),
+            patch.object(presentation_service, "IMAGE_CACHE_DIR", Path(tempfile.mkdtemp())),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def test_images_download_concurrently(self) -> None:
+        slides = _slides(8) + [{"title": "Bölüm", "is_section": True}]
+        t0 = time.perf_counter()
+        pptx = await presentation_service.generate_presentation(slides, "Deck")
+        elapsed = time.perf_counter() - t0
+
+        self.assertTrue(pptx.startswith(b"PK"))
+        self.assertEqual(len(self.downloads), 8)
+        self.assertEqual(self.peak, presentation_service.PRESENTATION_IMAGE_CONCURRENCY)
+        self.assertLess(elapsed, 8 * 0.2 / 2)
+
+    async def test_regeneration_hits_disk_cache(self) -> None:
+        slides = _slides(3) + [{"title": "Tekrar", "image_prompt": "chart 0"}]
+        await presentation_service.generate_presentation(slides, "Deck")
+        self.assertEqual(len(self.downloads), 3)  # aynı prompt tek indirme
+
+        await presentation_service.generate_presentation(slides, "Deck v2")
+        self.assertEqual(len(self.downloads), 3)
+
+    async def test_fallback_prompt_images_are_not_cached(self) -> None:
+        self.original_prompt_ok = False
+        first = await presentation_service.generate_image("chart 0")
+        second = await presentation_service.generate_image("chart 0")
+
+        self.assertEqual((first, second), (_PNG, _PNG))
+        self.assertEqual(len(self.downloads), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
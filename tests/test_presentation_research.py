@@ -0,0 +1,58 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from tools import presentation_service, search
+
+
+def _item(n: int) -> dict[str, str]:
+    return {"title": f"T{n}", "url": f"https://site{n}.test/", "snippet": f"Snippet number {n} " + "x" * 40}
+
+
+class DeepResearchStreamingTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fetched: list[str] = []
+        self.slow_urls: set[str] = set()
+
+        async def fake_search(query: str, max_results: int = 5) -> list[dict[str, str]]:
+            if query.endswith("trends") or query.endswith("trendler"):
+                await asyncio.sleep(0.3)  # geç gelen sorgu
+                return [_item(1), _item(9)]
+            return [_item(1), _item(2), _item(3)]
+
+        async def fake_fetch(url: str, max_chars: int = 3000) -> str:
+            self.fetched.append(url)
+            await asyncio.sleep(5 if url in self.slow_urls else 0.01)
+            return f"content of {url} " + "y" * 1200
+
+        patches = [
+            patch.object(search, "web_search", fake_search),
+            patch.object(presentation_service, "_fetch_page_content", fake_fetch),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def test_urls_are_deduplicated_across_queries(self) -> None:
+        research = await presentation_service.deep_research_for_presentation("AI", mode="midi", char_budget=10**6)
+
+        urls = [s["url"] for s in research["sources"]]
+        self.assertEqual(len(urls), len(set(urls)))
+        self.assertEqual(set(urls), {f"https://site{n}.test/" for n in (1, 2, 3, 9)})
+        self.assertEqual(len(self.fetched), len(set(self.fetched)))
+
+    async def test_budget_met_does_not_wait_for_slow_tail(self) -> None:
+        self.slow_urls.add("https://site3.test/")
+        t0 = time.monotonic()
+        research = await presentation_service.deep_research_for_presentation("AI", mode="midi", char_budget=2000)
+        elapsed = time.monotonic() - t0
+
+        self.assertLess(elapsed, 1.0)
+        self.assertTrue(research["fetch_stats"]["budget_met"])
+        self.assertEqual(len(research["detailed_content"]), 2)
+        self.assertIn("Detaylı İçerik", presentation_service.format_research_for_prompt(research))
+
+
+if __name__ == "__main__":
+    unittest.main()
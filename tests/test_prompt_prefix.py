@@ -0,0 +1,89 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from agents.base import BaseAgent
+from core.models import AgentRole, Task, TaskStatus, Thread
+from tools import prompt_cache
+from tools.prompt_cache import PromptCacheStats, PromptPrefixCache
+
+
+class _Agent(BaseAgent):
+    def system_prompt(self) -> str:
+        return "You are a test agent."
+
+
+def _agent() -> _Agent:
+    agent = _Agent.__new__(_Agent)
+    agent.role = AgentRole.SPEED
+    agent._identity_prompt = MagicMock(return_value="# SOUL\nI am speed.")
+    return agent
+
+
+class _Clock(datetime):
+    now_value = datetime(2026, 10, 15, 9, 0, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.now_value
+
+
+class PrefixStableContextTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        p = patch.object(prompt_cache, "_prefix_cache", PromptPrefixCache(ttl_sec=300))
+        p.start()
+        self.addCleanup(p.stop)
+
+    async def test_system_prompt_is_stable_and_date_moves_to_last_turn(self) -> None:
+        agent = _agent()
+        thread = Thread()
+        thread.tasks.append(Task(user_input="önceki", status=TaskStatus.COMPLETED, final_result="sonuç"))
+
+        with patch("datetime.datetime", _Clock):
+            first = await agent.build_context(thread, "görev 1")
+            _Clock.now_value = datetime(2026, 10, 15, 9, 7, tzinfo=timezone.utc)
+            second = await agent.build_context(thread, "görev 2")
+
+        self.assertEqual(first[0], second[0])
+        self.assertTrue(first[0]["content"].startswith("# SOUL"))
+        self.assertNotIn("CURRENT DATE", first[0]["content"])
+        self.assertIn("INTEGRITY RULES", first[0]["content"])
+        self.assertIn("09:00 UTC", first[-1]["content"])
+        self.assertIn("09:07 UTC", second[-1]["content"])
+        self.assertTrue(second[-1]["content"].endswith("görev 2"))
+        agent._identity_prompt.assert_called_once()
+
+    async def test_identity_edit_invalidates_prefix(self) -> None:
+        agent = _agent()
+        await agent.build_context(Thread(), "x")
+        prompt_cache.get_prompt_prefix_cache().invalidate()
+        await agent.build_context(Thread(), "x")
+        self.assertEqual(agent._identity_prompt.call_count, 2)
+
+
+class CachedTokenUsageTests(unittest.TestCase):
+    def test_cached_tokens_from_openai_and_deepseek_usage(self) -> None:
+        openai_usage = SimpleNamespace(
+            prompt_tokens=1200, completion_tokens=50, total_tokens=1250,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+        )
+        deepseek_usage = SimpleNamespace(
+            prompt_tokens=900, completion_tokens=10, total_tokens=910, prompt_cache_hit_tokens=640,
+        )
+        plain_usage = SimpleNamespace(prompt_tokens=10, completion_tokens=1, total_tokens=11)
+
+        self.assertEqual(BaseAgent._normalize_token_usage(openai_usage)["tokens_cached"], 1024)
+        self.assertEqual(BaseAgent._normalize_token_usage(deepseek_usage)["tokens_cached"], 640)
+        self.assertIsNone(BaseAgent._normalize_token_usage(plain_usage)["tokens_cached"])
+
+        stats = PromptCacheStats()
+        stats.record("deepseek-chat", 900, 640)
+        stats.record("deepseek-chat", 100, None)
+        model = stats.stats()["models"]["deepseek-chat"]
+        self.assertEqual((model["calls"], model["calls_reporting_cache"]), (2, 1))
+        self.assertEqual(model["hit_ratio"], 0.64)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import unittest
+
+from tools.cache import RedisCacheBackend, ResponseCache, SingleFlight
+from tools.redis_client import _MemoryFallback
+
+
+_VECTORS = {
+    "python nedir": [1.0, 0.0, 0.0],
+    "python ne demek": [0.98, 0.2, 0.0],
+    "rust nedir": [0.0, 1.0, 0.0],
+}
+
+
+async def _fake_embedder(text: str) -> list[float] | None:
+    return _VECTORS.get(text)
+
+
+class ResponseCacheTests(unittest.IsolatedAsyncioTestCase):
+    def _cache(self, **kwargs) -> ResponseCache:
+        return ResponseCache(embedder=_fake_embedder, semantic_threshold=0.95, **kwargs)
+
+    async def test_semantic_near_hit_within_scope(self) -> None:
+        cache = self._cache()
+        await cache.set("Python nedir?", "Bir programlama dili.", user_id="u1")
+
+        exact = await cache.get("python   NEDIR", user_id="u1")
+        near = await cache.get("Python ne demek?", user_id="u1")
+        unrelated = await cache.get("Rust nedir?", user_id="u1")
+
+        assert exact is not None and near is not None
+        self.assertEqual(exact["match"], "exact")
+        self.assertEqual(near["match"], "semantic")
+        self.assertEqual(near["response"], "Bir programlama dili.")
+        self.assertGreaterEqual(near["similarity"], 0.95)
+        self.assertIsNone(unrelated)
+
+        stats = cache.stats()
+        self.assertEqual((stats["exact_hits"], stats["semantic_hits"], stats["misses"]), (1, 1, 1))
+        self.assertEqual(stats["semantic"]["entries"], 1)
+
+    async def test_scopes_do_not_leak_between_users_or_pipelines(self) -> None:
+        cache = self._cache()
+        await cache.set("Python nedir?", "cevap", pipeline_type="research", user_id="u1")
+
+        self.assertIsNone(await cache.get("Python ne demek?", "research", user_id="u2"))
+        self.assertIsNone(await cache.get("Python ne demek?", "auto", user_id="u1"))
+        self.assertIsNotNone(await cache.get("Python ne demek?", "research", user_id="u1"))
+
+    async def test_eviction_and_invalidate_drop_vectors(self) -> None:
+        cache = self._cache(max_size=1)
+        await cache.set("Python nedir?", "a")
+        await cache.set("Rust nedir?", "b")
+        self.assertIsNone(await cache.get("Python ne demek?"))
+        self.assertEqual(cache.stats()["semantic"]["entries"], 1)
+
+        self.assertTrue(await cache.invalidate("Rust nedir?"))
+        self.assertEqual(cache.stats()["semantic"]["entries"], 0)
+
+
+class SharedBackendTests(unittest.IsolatedAsyncioTestCase):
+    async def test_workers_share_entries_through_redis_backend(self) -> None:
+        client = _MemoryFallback()
+        backend = RedisCacheBackend(client_factory=lambda: client)
+        worker_a = ResponseCache(backend=backend, semantic_enabled=False)
+        worker_b = ResponseCache(backend=RedisCacheBackend(client_factory=lambda: client), semantic_enabled=False)
+
+        await worker_a.set("Python nedir?", "dil", user_id="u1")
+        cached = await worker_b.get("python nedir", user_id="u1")
+
+        assert cached is not None
+        self.assertEqual(cached["response"], "dil")
+        self.assertEqual(worker_b.stats()["backend"], "redis")
+        self.assertEqual(await worker_b.clear(), 1)
+        self.assertIsNone(await worker_a.get("Python nedir?", user_id="u1"))
+
+    async def test_expired_redis_entry_is_a_miss(self) -> None:
+        client = _MemoryFallback()  # ignores EX, so expires_at must be honoured
+        cache = ResponseCache(backend=RedisCacheBackend(client_factory=lambda: client), semantic_enabled=False)
+        await cache.set("q", "a", ttl=1)
+        key = next(iter(client._store))
+        client._store[key] = client._store[key].replace('"expires_at": ', '"expires_at": -')
+
+        self.assertIsNone(await cache.get("q"))
+
+
+class SingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_identical_calls_run_once(self) -> None:
+        flights = SingleFlight()
+        runs = 0
+
+        async def pipeline() -> str:
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "sonuç"
+
+        results = await asyncio.gather(*(flights.do("k", pipeline) for _ in range(5)))
+
+        self.assertEqual(runs, 1)
+        self.assertEqual([r for r, _ in results], ["sonuç"] * 5)
+        self.assertEqual(sum(shared for _, shared in results), 4)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    async def test_follower_takes_over_when_leader_is_cancelled(self) -> None:
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def slow() -> str:
+            started.set()
+            await asyncio.sleep(10)
+            return "never"
+
+        async def fast() -> str:
+            return "follower"
+
+        leader = asyncio.create_task(flights.do("k", slow))
+        await started.wait()
+        follower = asyncio.create_task(flights.do("k", fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await follower, ("follower", False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from agents.orchestrator import OrchestratorAgent
+from tools import dynamic_skills, embedding_service
+from tools.skill_finder import find_skills
+from tools.skill_index import SkillIndex
+
+
+def _skill(skill_id: str, name: str, description: str, keywords: list[str], use_count: int = 0) -> dict:
+    return {
+        "id": skill_id, "name": name, "category": "test", "description": description,
+        "keywords": keywords, "source": "user", "use_count": use_count,
+    }
+
+
+_SKILLS = [
+    _skill("deep-research", "Deep Research", "Multi-source research with fact verification",
+           ["research", "deep dive", "araştırma"]),
+    _skill("code-review", "Code Review", "Review code for bugs and style", ["review", "kod", "bug"]),
+    _skill("data-viz", "Data Visualization", "Charts and dashboards from data", ["chart", "grafik"]),
+]
+
+
+class SkillIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = SkillIndex(semantic_weight=0.5)
+        self.index.build(_SKILLS)
+
+    def test_ranks_by_bm25_and_expands_prefixes(self) -> None:
+        top = self.index.search("bir konuda derin araştır ve rapor yaz", max_results=3)
+        self.assertEqual([s["id"] for _, s in top], ["deep-research"])
+
+        hits = self.index.search("İNCELEME kod review", max_results=3)
+        self.assertEqual(hits[0][1]["id"], "code-review")
+        self.assertEqual(self.index.search("xyz qqq"), [])
+
+    def test_phrase_keyword_bonus(self) -> None:
+        with_phrase = self.index.search("let's deep dive", max_results=1)[0][0]
+        without = self.index.search("deep", max_results=1)[0][0]
+        self.assertGreater(with_phrase, without)
+
+    def test_incremental_upsert_and_remove(self) -> None:
+        self.index.upsert(_skill("sql-tuning", "SQL Tuning", "Optimize slow queries", ["sql", "index"]))
+        self.assertEqual(self.index.search("slow sql")[0][1]["id"], "sql-tuning")
+
+        self.index.upsert(_skill("sql-tuning", "Query Tuning", "Optimize slow queries", ["postgres"]))
+        self.assertEqual(self.index.search("index"), [])
+
+        self.assertTrue(self.index.remove("sql-tuning"))
+        self.assertEqual(self.index.search("slow queries"), [])
+        self.assertEqual(self.index.stats()["skills"], 3)
+
+    def test_semantic_blend_only_with_vectors(self) -> None:
+        self.index.set_vector("data-viz", [1.0, 0.0])
+        self.index.set_vector("code-review", [0.0, 1.0])
+        hits = self.index.search("görselleştirme", query_vector=[0.9, 0.1])
+        self.assertEqual(hits[0][1]["id"], "data-viz")
+        self.assertEqual(self.index.search("görselleştirme"), [])
+
+
+class SkillFinderTests(unittest.TestCase):
+    def test_find_skills_keeps_result_shape(self) -> None:
+        results = find_skills("derin araştırma yap", max_results=2)
+        self.assertEqual(results[0]["id"], "deep-research")
+        self.assertEqual(
+            set(results[0]), {"id", "name", "category", "description", "relevance_score"},
+        )
+
+
+class DynamicSkillsIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rows: dict[str, dict] = {}
+        self.selects = 0
+
+        def execute(sql, params=None):
+            if sql.startswith("SELECT * FROM skills WHERE active"):
+                self.selects += 1
+                cursor.fetchall.return_value = [r for r in self.rows.values() if r["active"]]
+            elif sql.startswith("SELECT * FROM skills WHERE id"):
+                cursor.fetchone.return_value = self.rows.get(params[0])
+            elif sql.startswith("UPDATE skills SET active"):
+                self.rows[params[1]]["active"] = params[0]
+                cursor.rowcount = 1
+
+        cursor = MagicMock()
+        cursor.execute.side_effect = execute
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cursor
+
+        for s in _SKILLS:
+            self.rows[s["id"]] = {**s, "knowledge": "", "avg_score": 0, "active": True, "created_at": ""}
+
+        self.index = SkillIndex()
+        patches = [
+            patch.object(dynamic_skills, "get_conn", return_value=conn),
+            patch.object(dynamic_skills, "release_conn"),
+            patch.object(dynamic_skills, "seed_builtin_skills", return_value=0),
+            patch.object(dynamic_skills, "_index", self.index),
+            patch.object(dynamic_skills, "_index_loaded_at", 0.0),
+            patch.object(dynamic_skills, "_index_refreshing", False),
+            patch.object(dynamic_skills, "_seeded", False),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_search_loads_once_and_delete_updates_index(self) -> None:
+        first = dynamic_skills.search_skills("chart grafik")
+        dynamic_skills.search_skills("research")
+        self.assertEqual(first[0]["id"], "data-viz")
+        self.assertEqual(first[0]["source"], "user")
+        self.assertEqual(self.selects, 1)
+
+        self.assertTrue(dynamic_skills.delete_skill("data-viz"))
+        self.assertEqual(dynamic_skills.search_skills("chart grafik"), [])
+        self.assertEqual(self.selects, 1)
+
+    def test_stale_index_is_served_while_one_refresh_runs(self) -> None:
+        dynamic_skills.search_skills("chart grafik")
+        release, done = threading.Event(), threading.Event()
+        rebuilds = []
+
+        def slow_rebuild() -> int:
+            rebuilds.append(1)
+            release.wait(5)
+            dynamic_skills._index_loaded_at = time.monotonic()
+            done.set()
+            return 0
+
+        dynamic_skills._index_loaded_at = time.monotonic() - dynamic_skills.SKILL_INDEX_TTL_SEC - 1
+        with patch.object(dynamic_skills, "rebuild_skill_index", side_effect=slow_rebuild):
+            first = dynamic_skills.search_skills("chart grafik")
+            second = dynamic_skills.search_skills("chart grafik")
+            release.set()
+            self.assertTrue(done.wait(5))
+
+        self.assertEqual(first[0]["id"], "data-viz")
+        self.assertEqual(second[0]["id"], "data-viz")
+        self.assertEqual(len(rebuilds), 1)
+
+
+class SemanticSkillSearchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.index = SkillIndex(semantic_weight=0.5)
+        self.index.build(_SKILLS)
+        self.passage_batches: list[int] = []
+        test = self
+
+        class _FakeEmbeddings:
+            async def embed_many(self, texts, input_type="query"):
+                test.passage_batches.append(len(texts))
+                await asyncio.sleep(0.01)
+                return [[1.0, 0.0] if "Chart" in t else [0.0, 1.0] for t in texts]
+
+            async def embed(self, text, input_type="query"):
+                return [0.9, 0.1] if "görsel" in text else [0.1, 0.9]
+
+        patches = [
+            patch.object(dynamic_skills, "get_skill_index", return_value=self.index),
+            patch.object(embedding_service, "get_embedding_service", return_value=_FakeEmbeddings()),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def test_concurrent_searches_embed_skills_once(self) -> None:
+        results = await asyncio.gather(
+            dynamic_skills.asearch_skills("görselleştirme", max_results=1),
+            dynamic_skills.asearch_skills("görsel rapor", max_results=1),
+        )
+        self.assertEqual([r[0]["id"] for r in results], ["data-viz", "data-viz"])
+        self.assertEqual(self.passage_batches, [3])
+
+    async def test_intent_skill_discovery_uses_semantic_search(self) -> None:
+        orch = OrchestratorAgent.__new__(OrchestratorAgent)
+        orch._emit = MagicMock()
+        found = await orch._discover_skills_for_intent(
+            {"required_skills": ["görselleştirme", "Görselleştirme", "kod review"]}
+        )
+        self.assertEqual([s["id"] for s in found], ["data-viz", "code-review"])
+
+
+class SkillContextCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        refs = self.tmp / "deep-research" / "references"
+        refs.mkdir(parents=True)
+        self.ref = refs / "guide.md"
+        self.ref.write_text("v1", encoding="utf-8")
+
+        self.get_skill = MagicMock(return_value={"knowledge": "PROTOCOL"})
+        self.conn = MagicMock()
+        patches = [
+            patch.object(dynamic_skills, "SKILLS_DIR", self.tmp),
+            patch.object(dynamic_skills, "get_skill", self.get_skill),
+            patch.object(dynamic_skills, "get_conn", return_value=self.conn),
+            patch.object(dynamic_skills, "release_conn"),
+            patch.object(dynamic_skills, "_use_counts", dynamic_skills._UseCountBuffer(flush_sec=60)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        dynamic_skills.invalidate_skill_context()
+
+    def test_cached_until_reference_changes(self) -> None:
+        first = dynamic_skills.get_full_skill_context("deep-research")
+        second = dynamic_skills.get_full_skill_context("deep-research")
+        self.assertEqual(first, second)
+        self.assertIn("## Reference: guide.md\nv1", first)
+        self.assertEqual(self.get_skill.call_count, 1)
+
+        self.ref.write_text("version two", encoding="utf-8")
+        third = dynamic_skills.get_full_skill_context("deep-research")
+        self.assertIn("version two", third)
+        self.assertEqual(self.get_skill.call_count, 2)
+
+    def test_use_counts_are_batched(self) -> None:
+        for _ in range(3):
+            dynamic_skills.get_full_skill_context("deep-research")
+        self.conn.cursor.assert_not_called()
+
+        self.assertEqual(dynamic_skills.flush_skill_use_counts(), 3)
+        cur = self.conn.cursor.return_value.__enter__.return_value
+        cur.executemany.assert_called_once()
+        self.assertEqual(cur.executemany.call_args.args[1], [(3, "deep-research")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from agents import orchestrator as orchestrator_module
+from agents.base import BaseAgent
+from agents.orchestrator import OrchestratorAgent
+from core.models import AgentRole, PipelineType, SubTask, Task, TaskStatus, Thread
+from pipelines import engine as engine_module
+from tools import teachability
+
+_QUERY = "Elektrikli araç bataryaları için kapsamlı araştırma yap ve maliyetleri karşılaştır"
+
+
+def _orchestrator() -> OrchestratorAgent:
+    orch = OrchestratorAgent.__new__(OrchestratorAgent)
+    orch._live_monitor = None
+    orch._speculation = None
+    return orch
+
+
+class SpeculativeRoutingTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.orch = _orchestrator()
+        self.research_runs: list[str] = []
+
+        async def analyze_intent(user_input, thread, intent_recall=None):
+            await asyncio.sleep(0.2)
+            return {"intent": "x", "confidence": 0.9, "complexity": "complex",
+                    "suggested_pipeline": "deep_research", "required_skills": ["ev"]}
+
+        async def discover_skills(intent_result):
+            return [{"id": "ev-battery"}]
+
+        async def recall(query):
+            await asyncio.sleep(0.2)
+            return ["memory"]
+
+        def teachings(query):
+            time.sleep(0.2)
+            return ["teaching"]
+
+        async def run_subtask(engine, subtask, context, thread):
+            self.research_runs.append(subtask.assigned_agent.value)
+            await asyncio.sleep(0.3 if subtask.assigned_agent == AgentRole.RESEARCHER else 0.05)
+            BaseAgent._mark_first_token(SimpleNamespace(role=subtask.assigned_agent))
+            subtask.status = TaskStatus.COMPLETED
+            subtask.result = f"{subtask.assigned_agent.value}-output"
+            return subtask.result
+
+        def engine_init(engine):
+            engine._live_monitor = None
+            engine._prestarted = {}
+
+        patches = [
+            patch.object(self.orch, "_analyze_intent", analyze_intent),
+            patch.object(self.orch, "_discover_skills_for_intent", discover_skills),
+            patch.object(self.orch, "_recall_for_context", recall),
+            patch.object(self.orch, "_relevant_teachings", teachings),
+            patch.object(self.orch, "_recall_intent_patterns", recall),
+            patch.object(engine_module.PipelineEngine, "__init__", engine_init),
+            patch.object(engine_module.PipelineEngine, "_run_subtask", run_subtask),
+            patch.object(orchestrator_module, "ORCHESTRATOR_SPECULATIVE_RESEARCH", True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def test_pre_routing_stages_run_concurrently(self) -> None:
+        t0 = time.perf_counter()
+        speculation = self.orch._start_speculation("kısa bir soru hakkında bilgi ver", Thread(), None)
+        intent, skills = await speculation.result("intent")
+        memories = await speculation.result("memory")
+        teachings = await speculation.result("teachings")
+        elapsed = time.perf_counter() - t0
+
+        self.assertLess(elapsed, 0.35)  # not 0.6 in series
+        self.assertEqual(intent["suggested_pipeline"], "deep_research")
+        self.assertEqual((skills, memories, teachings), ([{"id": "ev-battery"}], ["memory"], ["teaching"]))
+        self.assertIsNone(speculation.research)  # no deep-research signal → no speculative run
+        self.assertIsNone(await speculation.result("memory"))  # consumed once
+
+    async def test_prefetched_teachings_count_use_only_when_injected(self) -> None:
+        used: list[list] = []
+        teachings = [{"id": 7, "instruction": "Kısa yanıt ver", "category": "preference"}]
+
+        def lookup(query, max_results=5, count_use=True):
+            self.assertFalse(count_use)
+            return teachings
+
+        with patch.object(teachability, "get_relevant_teachings", lookup), \
+                patch.object(teachability, "record_teaching_use", used.append), \
+                patch.object(orchestrator_module, "build_orchestrator_context", lambda thread: ""), \
+                patch.object(OrchestratorAgent, "system_prompt", lambda self: "sys"):
+            discarded = OrchestratorAgent._relevant_teachings("soru")
+            self.assertEqual(used, [])  # lookup alone does not count
+
+            self.orch._speculation = orchestrator_module._RoutingSpeculation()
+            self.orch._speculation.start("memory", asyncio.sleep(0, result=[]))
+            self.orch._speculation.start("teachings", asyncio.sleep(0, result=discarded))
+            messages = await self.orch.build_context(Thread(), "soru")
+
+        self.assertEqual(used, [[7]])
+        self.assertIn("Kısa yanıt ver", messages[1]["content"])
+
+    async def test_intent_does_not_wait_long_for_pattern_recall(self) -> None:
+        self.orch._speculation = None
+        prompts: list[str] = []
+
+        async def slow_recall(user_input):
+            await asyncio.sleep(1)
+            return ["old pattern"]
+
+        async def call_llm(messages, **kwargs):
+            prompts.append(messages[-1]["content"])
+            return {"content": '{"intent": "x", "confidence": 0.9}'}
+
+        recall_task = asyncio.create_task(slow_recall(_QUERY))
+        self.addCleanup(recall_task.cancel)
+        with patch.object(self.orch, "call_llm", call_llm, create=True), \
+                patch.object(orchestrator_module, "ORCHESTRATOR_INTENT_RECALL_WAIT_SEC", 0.05):
+            t0 = time.perf_counter()
+            await OrchestratorAgent._analyze_intent(self.orch, _QUERY, Thread(), intent_recall=recall_task)
+
+        self.assertLess(time.perf_counter() - t0, 0.5)
+        self.assertFalse(recall_task.done())
+        self.assertTrue(prompts and "PAST INTENT PATTERNS" not in prompts[0])
+
+    async def test_deep_research_route_adopts_running_researcher(self) -> None:
+        thread = Thread()
+        t0 = time.perf_counter()
+        speculation = self.orch._start_speculation(_QUERY, thread, None)
+        self.assertIsNotNone(speculation.research)
+        await speculation.result("intent")
+
+        sub_tasks = [
+            SubTask(description=t["description"], assigned_agent=AgentRole(t["assigned_agent"]), priority=t["priority"])
+            for t in self.orch._build_deep_research_tasks(_QUERY)
+        ]
+        task = Task(user_input=_QUERY, pipeline_type=PipelineType.DEEP_RESEARCH, sub_tasks=sub_tasks)
+        engine = speculation.adopt_research(task)
+        self.assertIs(engine, speculation.research[0])
+
+        await engine._deep_research(task, thread)
+        self.assertLess(time.perf_counter() - t0, 0.42)  # in series: intent 0.2s + researcher 0.3s
+        self.assertEqual(self.research_runs.count("researcher"), 1)
+        self.assertEqual(speculation.cancel(), [])
+
+    async def test_mismatched_route_cancels_research_and_reports_ttfat(self) -> None:
+        thread = Thread()
+        holder: dict = {}
+
+        async def route(user_input, thread, live_monitor, forced_pipeline, user_id):
+            holder["speculation"] = self.orch._start_speculation(user_input, thread, forced_pipeline)
+            await holder["speculation"].result("intent")
+            return "🤔 clarification"
+
+        before = dict(orchestrator_module._routing_stats)
+        with patch.object(self.orch, "_route", route):
+            result = await self.orch._route_and_execute_uncached(_QUERY, thread)
+
+        self.assertEqual(result, "🤔 clarification")
+        running = holder["speculation"].research[2]
+        await asyncio.sleep(0)
+        self.assertTrue(running.cancelled())
+        stats = orchestrator_module._routing_stats
+        self.assertEqual(stats["speculative_research_cancelled"], before["speculative_research_cancelled"] + 1)
+        self.assertFalse(any("first agent token" in e.content for e in thread.events))
+
+    async def test_first_specialist_token_is_reported_per_request(self) -> None:
+        thread = Thread()
+
+        async def route(user_input, thread, live_monitor, forced_pipeline, user_id):
+            await asyncio.sleep(0.05)
+            BaseAgent._mark_first_token(SimpleNamespace(role=AgentRole.ORCHESTRATOR))  # ignored
+            BaseAgent._mark_first_token(SimpleNamespace(role=AgentRole.SPEED))
+            BaseAgent._mark_first_token(SimpleNamespace(role=AgentRole.THINKER))  # not first
+            return "ok"
+
+        with patch.object(self.orch, "_route", route):
+            await self.orch._route_and_execute_uncached("x", thread)
+
+        event = next(e for e in thread.events if "first agent token" in e.content)
+        self.assertEqual(event.metadata["first_agent"], "speed")
+        self.assertGreaterEqual(event.metadata["ttfat_ms"], 50)
+        self.assertIsNotNone(orchestrator_module.get_routing_latency_stats()["ttfat_ms_p50"])
+
+
+if __name__ == "__main__":
+    unittest.main()
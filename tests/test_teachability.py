@@ -0,0 +1,87 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from tools import teachability
+from tools.teachability_local import LocalTeachingStore
+
+_TOPICS = ["python", "react", "docker", "postgres", "rapor", "sunum", "grafik", "kubernetes"]
+
+
+class LocalTeachingSearchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = Path(tempfile.mkdtemp())
+        self.store = LocalTeachingStore(tmp / "teachings.db")
+        self.addCleanup(self.store.close)
+        patches = [
+            patch.object(teachability, "postgres_available", return_value=False),
+            patch.object(teachability, "get_local_teaching_store", return_value=self.store),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_save_search_and_deactivate(self) -> None:
+        saved = teachability.save_teaching("Raporlarda her zaman kaynak göster", category="rule")
+        teachability.save_teaching("Kod örneklerinde type hint kullan")
+
+        hits = teachability.get_relevant_teachings("rapor hazırla ve kaynakları ekle")
+        self.assertEqual([h["id"] for h in hits], [saved["id"]])
+        self.assertEqual(hits[0]["category"], "rule")
+        self.assertEqual(teachability.get_all_teachings()[0]["use_count"], 1)
+
+        self.assertTrue(teachability.deactivate_teaching(saved["id"]))
+        self.assertEqual(teachability.get_relevant_teachings("rapor kaynak"), [])
+
+    def test_recall_and_latency_at_10k_teachings(self) -> None:
+        # En eski kayıtlar hedef — eski yol yalnızca son 100'e bakıyordu
+        targets = [
+            ("correction", "", "Flask yerine FastAPI kullan, async endpoint tercih et", None),
+            ("rule", "", "Excel çıktılarında tarih formatı gün.ay.yıl olsun", None),
+        ]
+        filler = [
+            ("preference", "", f"{_TOPICS[i % len(_TOPICS)]} konusunda kısa cevap ver #{i}", None)
+            for i in range(12_000)
+        ]
+        self.store.save_many(targets + filler)
+
+        queries = {"fastapi ile async servis yaz": 1, "excel tarih formatı": 2}
+        t0 = time.perf_counter()
+        for query, expected_id in queries.items():
+            hits = teachability.get_relevant_teachings(query, max_results=3)
+            self.assertEqual(hits[0]["id"], expected_id)
+        per_query_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+
+        self.assertLess(per_query_ms, 100)
+        self.assertEqual(len(teachability.get_relevant_teachings("docker", max_results=5)), 5)
+
+
+class PostgresTeachingSearchTests(unittest.TestCase):
+    def test_ranked_sql_uses_prefix_tsquery_and_trigram(self) -> None:
+        cur = MagicMock()
+        cur.fetchone.return_value = {"?column?": 1}
+        cur.fetchall.return_value = [
+            {"id": 7, "category": "preference", "instruction": "a", "use_count": 0, "text_score": 1.0},
+            {"id": 9, "category": "correction", "instruction": "b", "use_count": 0, "text_score": 0.9},
+        ]
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cur
+
+        with patch.object(teachability, "postgres_available", return_value=True), \
+                patch.object(teachability, "get_conn", return_value=conn), \
+                patch.object(teachability, "release_conn"), \
+                patch.object(teachability, "_trgm_available", None):
+            hits = teachability.get_relevant_teachings("Docker compose kurulumu", max_results=2)
+
+        search_sql, params = cur.execute.call_args_list[1].args
+        self.assertIn("search_tsv @@", search_sql)
+        self.assertIn("<%% t.instruction", search_sql)
+        self.assertEqual(params["tsq"], "docker:* | compose:* | kurulumu:*")
+        # correction boost (0.9 * 1.3) outranks the plain preference
+        self.assertEqual([h["id"] for h in hits], [9, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
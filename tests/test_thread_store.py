@@ -0,0 +1,148 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from core import state
+from core.models import EventType, Task, TaskStatus, Thread
+
+
+class ThreadStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        patcher = patch.object(state, "THREADS_DIR", Path(self._tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        state._cursors.clear()
+        self.addCleanup(state._cursors.clear)
+
+    def _paths(self, thread_id: str) -> tuple[Path, Path]:
+        snapshot = state.THREADS_DIR / "u1" / f"{thread_id}.json"
+        return snapshot, state._log_path(snapshot)
+
+    def test_save_appends_delta_instead_of_rewriting_snapshot(self) -> None:
+        thread = Thread()
+        thread.add_event(EventType.USER_MESSAGE, "merhaba")
+        state.save_thread(thread, user_id="u1")
+        snapshot, log = self._paths(thread.id)
+        snapshot_text = snapshot.read_text(encoding="utf-8")
+        self.assertFalse(log.exists())
+
+        thread.add_event(EventType.AGENT_RESPONSE, "selam")
+        task = Task(user_input="merhaba")
+        thread.tasks.append(task)
+        state.save_thread(thread, user_id="u1")
+
+        self.assertEqual(snapshot.read_text(encoding="utf-8"), snapshot_text)
+        records = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([r["op"] for r in records], ["events", "tasks"])
+        self.assertEqual(len(records[0]["items"]), 1)
+
+        task.status = TaskStatus.COMPLETED
+        state.save_thread(thread, user_id="u1")
+        state._cursors.clear()
+
+        loaded = state.load_thread(thread.id, user_id="u1")
+        assert loaded is not None
+        self.assertEqual([e.content for e in loaded.events], ["merhaba", "selam"])
+        self.assertEqual(len(loaded.tasks), 1)
+        self.assertEqual(loaded.tasks[0].status, TaskStatus.COMPLETED)
+
+        listed = state.list_threads(user_id="u1")
+        self.assertEqual(listed[0]["event_count"], 2)
+        self.assertEqual(listed[0]["preview"], "merhaba")
+
+    def test_log_is_folded_into_snapshot_when_it_outgrows_it(self) -> None:
+        thread = Thread()
+        state.save_thread(thread, user_id="u1")
+        snapshot, log = self._paths(thread.id)
+
+        with patch.object(state, "_LOG_COMPACT_MIN_BYTES", 0):
+            for i in range(20):
+                thread.add_event(EventType.AGENT_RESPONSE, "x" * 200 + str(i))
+                state.save_thread(thread, user_id="u1")
+
+        self.assertLess(
+            log.stat().st_size if log.exists() else 0,
+            snapshot.stat().st_size,
+        )
+        state._cursors.clear()
+        loaded = state.load_thread(thread.id, user_id="u1")
+        assert loaded is not None
+        self.assertEqual(len(loaded.events), 20)
+
+    def test_stale_log_lines_are_ignored_after_snapshot(self) -> None:
+        thread = Thread()
+        thread.add_event(EventType.USER_MESSAGE, "a")
+        state.save_thread(thread, user_id="u1")
+        snapshot, log = self._paths(thread.id)
+        log.write_text(
+            json.dumps({"base": "old", "op": "meta", "data": {"branch_label": "stale"}}) + "\n",
+            encoding="utf-8",
+        )
+
+        loaded = state.load_thread(thread.id, user_id="u1")
+        assert loaded is not None
+        self.assertIsNone(loaded.branch_label)
+
+    def test_delete_removes_log(self) -> None:
+        thread = Thread()
+        state.save_thread(thread, user_id="u1")
+        thread.add_event(EventType.USER_MESSAGE, "a")
+        state.save_thread(thread, user_id="u1")
+        snapshot, log = self._paths(thread.id)
+        self.assertTrue(log.exists())
+
+        self.assertTrue(state.delete_thread(thread.id, user_id="u1"))
+        self.assertFalse(snapshot.exists())
+        self.assertFalse(log.exists())
+
+    def test_delete_survives_locked_catalog(self) -> None:
+        thread = Thread()
+        state.save_thread(thread, user_id="u1")
+        snapshot, _ = self._paths(thread.id)
+
+        with patch("core.thread_catalog.remove", side_effect=state.sqlite3.OperationalError("database is locked")):
+            self.assertTrue(state.delete_thread(thread.id, user_id="u1"))
+        self.assertFalse(snapshot.exists())
+
+    def test_catalog_pages_with_cursor_without_reading_bodies(self) -> None:
+        state.list_threads(user_id="u1")  # one-time index of pre-existing files
+        ids = []
+        for i in range(5):
+            thread = Thread()
+            thread.add_event(EventType.USER_MESSAGE, f"soru {i}")
+            with patch("core.thread_catalog.time.time", return_value=1000.0 + i):
+                state.save_thread(thread, user_id="u1")
+            ids.append(thread.id)
+
+        with patch.object(state, "_read_thread_data", side_effect=AssertionError("body read")):
+            first = state.list_threads_page(limit=2, user_id="u1")
+            second = state.list_threads_page(limit=2, user_id="u1", cursor=first["next_cursor"])
+            third = state.list_threads_page(limit=2, user_id="u1", cursor=second["next_cursor"])
+
+        listed = [t["id"] for page in (first, second, third) for t in page["threads"]]
+        self.assertEqual(listed, list(reversed(ids)))
+        self.assertEqual(first["total"], 5)
+        self.assertIsNone(third["next_cursor"])
+        self.assertEqual(first["threads"][0]["preview"], "soru 4")
+
+        state.delete_thread(ids[0], user_id="u1")
+        self.assertEqual(state.list_threads_page(user_id="u1")["total"], 4)
+
+    def test_catalog_indexes_legacy_files_once(self) -> None:
+        legacy = Thread()
+        legacy.add_event(EventType.USER_MESSAGE, "eski")
+        user_dir = state.THREADS_DIR / "u2"
+        user_dir.mkdir(parents=True)
+        (user_dir / f"{legacy.id}.json").write_text(legacy.model_dump_json(indent=2), encoding="utf-8")
+
+        listed = state.list_threads(user_id="u2")
+        self.assertEqual([t["id"] for t in listed], [legacy.id])
+        self.assertEqual(listed[0]["event_count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+
+from agents import agentic_loop
+
+
+class ToolDispatchTests(unittest.IsolatedAsyncioTestCase):
+    async def test_network_calls_overlap_and_keep_request_order(self) -> None:
+        calls = [("web_search", 0.05), ("web_fetch", 0.01), ("web_search", 0.03)]
+        in_flight = 0
+        peak = 0
+
+        async def run(call):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(call[1])
+            in_flight -= 1
+            return f"{call[0]}:{call[1]}"
+
+        results = await agentic_loop.dispatch_tool_calls(
+            calls, run, lambda c: c[0], agentic_loop.ToolDispatchConfig(enabled=True)
+        )
+
+        self.assertEqual(results, ["web_search:0.05", "web_fetch:0.01", "web_search:0.03"])
+        self.assertEqual(peak, 3)
+
+    async def test_serial_tools_run_in_order_one_at_a_time(self) -> None:
+        calls = ["workspace_scratch_write", "web_search", "workspace_scratch_read", "save_memory"]
+        order: list[str] = []
+        serial_in_flight = 0
+
+        async def run(name):
+            nonlocal serial_in_flight
+            serial = agentic_loop.tool_concurrency_class(name) == "serial"
+            if serial:
+                serial_in_flight += 1
+                self.assertEqual(serial_in_flight, 1)
+            await asyncio.sleep(0.01)
+            order.append(name)
+            if serial:
+                serial_in_flight -= 1
+            return name
+
+        results = await agentic_loop.dispatch_tool_calls(
+            calls, run, lambda c: c, agentic_loop.ToolDispatchConfig(enabled=True)
+        )
+
+        self.assertEqual(results, calls)
+        serial_order = [n for n in order if n != "web_search"]
+        self.assertEqual(
+            serial_order, ["workspace_scratch_write", "workspace_scratch_read", "save_memory"]
+        )
+
+    async def test_serial_write_is_a_barrier_for_later_reads(self) -> None:
+        calls = [("web_search", 0.03), ("save_memory", 0.05), ("recall_memory", 0.0),
+                 ("rag_ingest", 0.02), ("rag_query", 0.0), ("web_fetch", 0.0)]
+        store: set[str] = set()
+        log: list[str] = []
+
+        async def run(call):
+            name, delay = call
+            log.append(f"start:{name}")
+            await asyncio.sleep(delay)
+            if name == "save_memory":
+                store.add("memory")
+            elif name == "rag_ingest":
+                store.add("doc")
+            log.append(f"end:{name}")
+            if name == "recall_memory":
+                return "hit" if "memory" in store else "miss"
+            if name == "rag_query":
+                return "hit" if "doc" in store else "miss"
+            return name
+
+        results = await agentic_loop.dispatch_tool_calls(
+            calls, run, lambda c: c[0], agentic_loop.ToolDispatchConfig(enabled=True)
+        )
+
+        self.assertEqual((results[2], results[4]), ("hit", "hit"))
+        # A write waits for the reads requested before it
+        self.assertLess(log.index("end:web_search"), log.index("start:save_memory"))
+        # Reads between two barriers still overlap
+        self.assertLess(log.index("start:web_fetch"), log.index("end:rag_query"))
+
+    async def test_disabled_dispatch_is_sequential(self) -> None:
+        in_flight = 0
+        peak = 0
+
+        async def run(name):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.005)
+            in_flight -= 1
+            return name
+
+        await agentic_loop.dispatch_tool_calls(
+            ["web_search", "web_fetch"],
+            run,
+            lambda c: c,
+            agentic_loop.ToolDispatchConfig(enabled=False),
+        )
+        self.assertEqual(peak, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
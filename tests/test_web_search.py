@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+
+from tools import search
+
+
+def _hit(tag: str) -> list[dict[str, str]]:
+    return [{"title": tag, "url": f"https://example.com/{tag}", "snippet": tag}]
+
+
+class WebSearchTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.calls: list[str] = []
+        self.delays = {"tavily": 0.0, "exa": 0.0, "whoogle": 0.0}
+        self.empty: set[str] = set()
+
+        def provider(name: str):
+            async def fake(query: str, max_results: int = 5) -> list[dict[str, str]]:
+                self.calls.append(name)
+                await asyncio.sleep(self.delays[name])
+                return [] if name in self.empty else _hit(name)
+            return fake
+
+        patches = [
+            patch.object(search, "_search_tavily", provider("tavily")),
+            patch.object(search, "_search_exa", provider("exa")),
+            patch.object(search, "_search_whoogle", provider("whoogle")),
+            patch.object(search, "_search_cache", search._SearchCache()),
+            patch.object(search, "_latency", {n: search._ProviderLatency() for n in ("tavily", "exa", "whoogle")}),
+            patch.dict(search._hedge_counters, {"hedged": 0, "backup_won": 0}),
+            patch.dict("os.environ", {"TAVILY_API_KEY": "test"}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def test_identical_queries_hit_providers_once(self) -> None:
+        self.delays["tavily"] = 0.05
+        first, second = await asyncio.gather(
+            search.web_search("Python asyncio", 5), search.web_search("python   ASYNCIO", 5),
+        )
+        third = await search.web_search("python asyncio", 5)
+        third[0]["title"] = "mutated"
+
+        self.assertEqual(self.calls, ["tavily"])
+        self.assertEqual(first, second)
+        self.assertEqual((await search.web_search("python asyncio", 5))[0]["title"], "tavily")
+        await search.web_search("python asyncio", 3)
+        self.assertEqual(self.calls, ["tavily", "tavily"])
+
+    async def test_news_queries_use_short_ttl(self) -> None:
+        with patch.object(search, "SEARCH_CACHE_NEWS_TTL_SEC", 0):
+            await search.web_search("latest news", 5)
+            await search.web_search("latest news", 5)
+        self.assertEqual(self.calls, ["tavily", "tavily"])
+
+    async def test_fallback_race_when_primary_is_empty(self) -> None:
+        self.empty.add("tavily")
+        self.delays["exa"] = 0.2
+        results = await search.web_search("rare query", 5)
+        self.assertEqual(results[0]["title"], "whoogle")
+
+    async def test_hedged_request_fires_backup_after_delay(self) -> None:
+        self.delays.update(tavily=1.0, exa=0.01, whoogle=0.5)
+        with patch.object(search, "SEARCH_HEDGE_ENABLED", True), \
+                patch.object(search, "SEARCH_HEDGE_DEFAULT_DELAY_SEC", 0.05):
+            results = await search.web_search("slow primary", 5)
+
+        self.assertEqual(results[0]["title"], "exa")
+        self.assertEqual(search.get_search_stats()["hedge"]["backup_won"], 1)
+
+    async def test_hedge_delay_follows_observed_percentile(self) -> None:
+        for ms in range(100, 1100, 100):
+            search._latency["tavily"].record(ms / 1000, ok=True)
+        with patch.object(search, "SEARCH_HEDGE_MIN_DELAY_SEC", 0.1):
+            self.assertAlmostEqual(search._hedge_delay(), 1.0)
+
+
+
+class SearchClientTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.requests: list[str] = []
+        self.session = "s1"
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request.url.path)
+            if request.url.path == "/":
+                self.session = "s2"
+                return httpx.Response(200, text="home", headers={"set-cookie": f"session={self.session}"})
+            if request.headers.get("cookie") != "session=s2":
+                return httpx.Response(302, headers={"location": "http://whoogle.test/"})
+            return httpx.Response(200, json={"results": [{"href": "https://r.example", "title": "R"}]})
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True)
+        self.client.cookies.set("session", "stale", domain="whoogle.test")
+        self.loop_clients = search._clients.setdefault(asyncio.get_running_loop(), {})
+        self.loop_clients["whoogle"] = self.client
+        p = patch.object(search, "WHOOGLE_URL", "http://whoogle.test")
+        p.start()
+        self.addCleanup(p.stop)
+
+    async def asyncTearDown(self) -> None:
+        await search.close_search_clients()
+
+    async def test_whoogle_refreshes_expired_session_once(self) -> None:
+        results = await search._search_whoogle("q", 5)
+
+        self.assertEqual([r["url"] for r in results], ["https://r.example"])
+        self.assertEqual(self.requests, ["/search", "/", "/", "/search"])
+
+    async def test_close_also_closes_pooled_exa_clients(self) -> None:
+        exa_http = httpx.AsyncClient()
+        self.loop_clients["exa:key"] = SimpleNamespace(_client=exa_http)
+
+        await search.close_search_clients()
+
+        self.assertTrue(exa_http.is_closed)
+        self.assertTrue(self.client.is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
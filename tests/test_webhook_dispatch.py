@@ -0,0 +1,203 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from tools import webhook_system as ws
+
+
+def _sub(sub_id: str, url: str, events: list[str], **kwargs) -> ws.WebhookSubscription:
+    return ws.WebhookSubscription(id=sub_id, name=sub_id, url=url, secret="s", events=events, **kwargs)
+
+
+def _job(sub: ws.WebhookSubscription, attempt_count: int = 0) -> ws._QueuedDelivery:
+    delivery = ws.WebhookDelivery(
+        id=f"del-{sub.id}-{attempt_count}",
+        subscription_id=sub.id,
+        event_type="agent.message",
+        payload={},
+        status=ws.WebhookStatus.PENDING,
+        attempt_count=attempt_count,
+    )
+    return ws._QueuedDelivery(delivery=delivery, subscription=sub)
+
+
+class _WebhookTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.subscriptions = [
+            _sub("sub-a", "https://a.example/hook", ["agent.message"]),
+            _sub("sub-b", "https://a.example/other", ["*"]),
+            _sub("sub-c", "https://c.example/hook", ["agent.message"], filters={"agent": "thinker"}),
+            _sub("sub-d", "https://d.example/hook", ["memory.saved"]),
+        ]
+        self.list_calls = 0
+        self.sent: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self.batches: list[tuple[list, list]] = []
+
+        async def fake_list(status=None, event_type=None):
+            self.list_calls += 1
+            return list(self.subscriptions)
+
+        async def fake_send(url, payload, secret, headers=None, client=None, **kwargs):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.02)
+            self.active -= 1
+            self.sent.append(url)
+            ok = "c.example" not in url
+            return {"success": ok, "response_code": 200 if ok else 500, "attempts": 1,
+                    "error_message": None if ok else "HTTP 500"}
+
+        writer = ws._DeliveryStatusWriter(flush_ms=5)
+
+        async def fake_write(inserts, updates):
+            self.batches.append((list(inserts), list(updates)))
+
+        writer._write = fake_write  # type: ignore[method-assign]
+        self.queue = ws.WebhookDeliveryQueue(
+            workers=2, max_attempts=3, backoff_base_sec=10, rate_per_sec=1, rate_burst=2,
+            breaker_failures=2, breaker_recovery_sec=60,
+        )
+
+        for target, value in (
+            ("alist_subscriptions", fake_list),
+            ("send_webhook", fake_send),
+            ("_subscription_index", ws._SubscriptionIndex(ttl_sec=0)),
+            ("_delivery_pool", ws._DeliveryPool(max_concurrency=8, max_per_host=1)),
+            ("_status_writer", writer),
+            ("_delivery_queue", self.queue),
+        ):
+            patcher = patch.object(ws, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        await self.queue.stop()
+        await ws._delivery_pool.aclose()
+
+    def _updates(self) -> list[tuple[ws.WebhookDelivery, bool | None]]:
+        return [u for batch in self.batches for u in batch[1]]
+
+
+class WebhookDispatchTests(_WebhookTestCase):
+    async def test_index_matches_events_and_wildcards_in_db_order(self) -> None:
+        results = await ws.dispatch_event("agent.message", {"agent": "thinker"})
+        memory = await ws.dispatch_event("memory.saved", {})
+
+        self.assertEqual([r["subscription_id"] for r in results], ["sub-a", "sub-b", "sub-c"])
+        self.assertEqual([r["subscription_id"] for r in memory], ["sub-b", "sub-d"])
+        self.assertEqual(self.list_calls, 1)
+
+    async def test_invalidate_reloads_subscriptions(self) -> None:
+        await ws.dispatch_event("memory.saved", {})
+        self.subscriptions.append(_sub("sub-e", "https://e.example/hook", ["memory.saved"]))
+        self.assertEqual(len(await ws.dispatch_event("memory.saved", {})), 2)  # index cache: sub-e görünmez
+
+        ws.invalidate_subscription_index()
+        results = await ws.dispatch_event("memory.saved", {})
+
+        self.assertEqual({r["subscription_id"] for r in results}, {"sub-b", "sub-d", "sub-e"})
+        self.assertEqual(self.list_calls, 2)
+
+    async def test_dispatch_enqueues_without_sending(self) -> None:
+        self.queue._claim = lambda limit: asyncio.sleep(0, result=[])  # type: ignore[method-assign]
+
+        results = await ws.dispatch_event("agent.message", {"agent": "thinker"})
+
+        self.assertTrue(all(r["queued"] and r["persisted"] and r["status"] == "pending" for r in results))
+        self.assertEqual(self.sent, [])
+        self.assertTrue(self.queue.running)
+        await ws._status_writer.flush()
+        inserts = [d for batch in self.batches for d in batch[0]]
+        self.assertEqual([d.attempt_count for d in inserts], [0, 0, 0])
+        self.assertEqual(len(self.batches), 1)
+
+    async def test_failed_insert_is_retried_and_delivery_still_attempted(self) -> None:
+        committed: list[ws.WebhookDelivery] = []
+        writes = 0
+
+        async def flaky_write(inserts, updates):
+            nonlocal writes
+            writes += 1
+            if writes == 1:
+                raise ConnectionError("db down")
+            committed.extend(inserts)
+
+        async def claim(limit):
+            taken = committed[:limit]
+            del committed[:limit]
+            subs = {s.id: s for s in self.subscriptions}
+            return [ws._QueuedDelivery(delivery=d, subscription=subs[d.subscription_id]) for d in taken]
+
+        writer = ws._DeliveryStatusWriter(
+            flush_ms=5, retry_base_sec=0.01, on_inserted=lambda: ws._delivery_queue.wake(),
+        )
+        writer._write = flaky_write  # type: ignore[method-assign]
+        self.queue._claim = claim  # type: ignore[method-assign]
+
+        with patch.object(ws, "_status_writer", writer):
+            results = await ws.dispatch_event("memory.saved", {})
+            self.assertEqual([r["persisted"] for r in results], [False, False])
+            for _ in range(50):
+                if len(self.sent) == 2:
+                    break
+                await asyncio.sleep(0.01)
+
+        self.assertEqual(sorted(self.sent), ["https://a.example/other", "https://d.example/hook"])
+        self.assertEqual(writer.stats()["requeued_inserts"], 2)
+
+    async def test_pool_limits_concurrency_per_host(self) -> None:
+        await asyncio.gather(*(ws._delivery_pool.send(s, {}) for s in self.subscriptions[:3]))
+
+        # sub-a ve sub-b aynı host (max_per_host=1), sub-c ayrı host → en fazla 2 paralel
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(len(self.sent), 3)
+
+
+class WebhookQueueTests(_WebhookTestCase):
+    async def test_success_and_failure_outcomes(self) -> None:
+        ok, failing = self.subscriptions[0], self.subscriptions[2]
+
+        await self.queue.process(_job(ok))
+        await self.queue.process(_job(failing))
+        await self.queue.process(_job(failing, attempt_count=2))
+
+        (delivered, d_outcome), (retrying, r_outcome), (failed, f_outcome) = self._updates()
+        self.assertEqual((delivered.status, d_outcome), (ws.WebhookStatus.DELIVERED, True))
+        self.assertEqual((retrying.status, r_outcome, retrying.attempt_count), (ws.WebhookStatus.RETRYING, None, 1))
+        self.assertIsNotNone(retrying.next_attempt_at)
+        self.assertEqual((failed.status, f_outcome, failed.attempt_count), (ws.WebhookStatus.FAILED, False, 3))
+
+    async def test_backoff_grows_exponentially(self) -> None:
+        delays = [self.queue.backoff(n) for n in (1, 2, 3)]
+        self.assertTrue(8 <= delays[0] <= 12 and 16 <= delays[1] <= 24 and 32 <= delays[2] <= 48)
+
+    async def test_open_circuit_defers_without_sending(self) -> None:
+        failing = self.subscriptions[2]
+        await self.queue.process(_job(failing))
+        await self.queue.process(_job(failing))
+        sent_before = len(self.sent)
+
+        await self.queue.process(_job(failing, attempt_count=1))
+
+        deferred, outcome = self._updates()[-1]
+        self.assertEqual(len(self.sent), sent_before)
+        self.assertEqual((deferred.attempt_count, outcome), (1, None))
+        self.assertEqual(self.queue.stats()["circuit_open"], 1)
+        self.assertEqual(self.queue.stats()["open_circuits"], ["sub-c"])
+
+    async def test_rate_limit_defers_excess_deliveries(self) -> None:
+        queue = ws.WebhookDeliveryQueue(rate_per_sec=0.5, rate_burst=2)
+        sub = self.subscriptions[0]
+
+        for i in range(4):
+            await queue.process(_job(sub, attempt_count=i))
+
+        self.assertEqual(len(self.sent), 2)  # burst 2; sonraki token 2s sonra → ertelenir
+        self.assertEqual(queue.stats()["rate_limited"], 2)
+        self.assertEqual([outcome for _, outcome in self._updates()], [True, True, None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
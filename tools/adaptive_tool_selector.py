@@ -33,13 +33,25 @@ class UsagePatternAnalyzer:
         self.task_type_patterns: dict[str, list[str]] = defaultdict(list)
         self.success_by_tool: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
         self.total_by_tool: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
-
-    def record_usage(self, agent_role: str, tool_name: str, success: bool, task_context: str) -> None:
+        self.latency_by_tool: dict[str, dict[str, list[float]]] = defaultdict(lambda: defaultdict(lambda: [0.0, 0]))
+
+    def record_usage(
+        self,
+        agent_role: str,
+        tool_name: str,
+        success: bool,
+        task_context: str,
+        latency_ms: float | None = None,
+    ) -> None:
         """Record a tool usage event."""
         self.tool_usage[agent_role][tool_name] += 1
         self.total_by_tool[agent_role][tool_name] += 1
         if success:
             self.success_by_tool[agent_role][tool_name] += 1
+        if latency_ms is not None:
+            acc = self.latency_by_tool[agent_role][tool_name]
+            acc[0] += latency_ms
+            acc[1] += 1
 
         # Learn task context patterns
         task_type = self._categorize_task(task_context)
@@ -69,11 +81,13 @@ class UsagePatternAnalyzer:
         for tool, total in self.total_by_tool[agent_role].items():
             success = self.success_by_tool[agent_role].get(tool, 0)
             rate = success / total if total > 0 else 0
+            lat_total, lat_count = self.latency_by_tool[agent_role].get(tool, (0.0, 0))
             tool_scores.append({
                 "tool": tool,
                 "count": total,
                 "success": success,
                 "success_rate": round(rate * 100, 1),
+                "avg_latency_ms": round(lat_total / lat_count, 1) if lat_count else None,
             })
         tool_scores.sort(key=lambda x: x["success_rate"], reverse=True)
         return tool_scores[:limit]
@@ -362,15 +376,17 @@ class AdaptiveToolSelector:
         return min(100.0, top_score)
 
     def record_success(self, agent_role: str, tool_name: str,
-                       task_input: str, context: dict[str, Any] | None = None) -> None:
+                       task_input: str, context: dict[str, Any] | None = None,
+                       latency_ms: float | None = None) -> None:
         """Record a successful tool usage for learning."""
-        self.pattern_analyzer.record_usage(agent_role, tool_name, True, task_input)
+        self.pattern_analyzer.record_usage(agent_role, tool_name, True, task_input, latency_ms)
         self.user_behavior.record_task(task_input, tool_name, agent_role, True)
 
     def record_failure(self, agent_role: str, tool_name: str,
-                       task_input: str, feedback: str, context: dict[str, Any] | None = None) -> None:
+                       task_input: str, feedback: str, context: dict[str, Any] | None = None,
+                       latency_ms: float | None = None) -> None:
         """Record a failed tool usage for learning."""
-        self.pattern_analyzer.record_usage(agent_role, tool_name, False, task_input)
+        self.pattern_analyzer.record_usage(agent_role, tool_name, False, task_input, latency_ms)
         self.user_behavior.record_task(task_input, tool_name, agent_role, False, feedback)
 
     def get_statistics(self) -> dict[str, Any]:
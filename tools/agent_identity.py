@@ -12,6 +12,15 @@ IDENTITY_DIR = Path(__file__).parent.parent / "data" / "agents"
 IDENTITY_FILES = ("SOUL.md", "user.md", "memory.md", "bootstrap.md")
 
 
+def _invalidate_prompt_prefix() -> None:
+    """Identity is part of the memoized system-prompt prefix — drop it after edits."""
+    try:
+        from tools.prompt_cache import get_prompt_prefix_cache
+        get_prompt_prefix_cache().invalidate()
+    except Exception:
+        pass
+
+
 @dataclass
 class AgentIdentity:
     role: str
@@ -56,6 +65,7 @@ class IdentityManager:
         agent_dir = self.base_dir / role
         agent_dir.mkdir(parents=True, exist_ok=True)
         (agent_dir / fname).write_text(content, encoding="utf-8")
+        _invalidate_prompt_prefix()
 
     def update_memory(self, role: str, entry: str) -> None:
         agent_dir = self.base_dir / role
@@ -78,6 +88,7 @@ class IdentityManager:
             content,
         )
         memory_path.write_text(content, encoding="utf-8")
+        _invalidate_prompt_prefix()
 
     # ── System Prompt Integration ────────────────────────────
 
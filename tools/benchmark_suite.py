@@ -360,6 +360,7 @@ class BenchmarkRunner:
         """Run one scenario against one agent and return the scored result."""
         from agents import create_agent
         from core.state import Thread
+        from tools.llm_admission import BACKGROUND, llm_lane
 
         scenario = next(
             (s for s in BENCHMARK_SCENARIOS if s["id"] == scenario_id), None
@@ -374,10 +375,12 @@ class BenchmarkRunner:
         tokens_used = 0
         start = time.perf_counter()
         try:
-            result_raw = await asyncio.wait_for(
-                agent.execute(scenario["prompt"], thread),
-                timeout=scenario["timeout_sec"],
-            )
+            # Benchmark çağrıları interaktif sohbetin önüne geçmesin
+            with llm_lane(BACKGROUND):
+                result_raw = await asyncio.wait_for(
+                    agent.execute(scenario["prompt"], thread),
+                    timeout=scenario["timeout_sec"],
+                )
             latency_ms = (time.perf_counter() - start) * 1000
 
             if isinstance(result_raw, dict):
@@ -1,8 +1,23 @@
 """
-In-memory LRU response cache with TTL for multi-agent pipeline.
+LRU response cache with TTL for multi-agent pipeline.
 
-Thread-safe via asyncio.Lock. Keyed on normalized query + pipeline type.
-No external dependencies — pure stdlib implementation.
+Keyed on normalized query + pipeline type (+ user).
+No external dependencies — pure stdlib implementation (Redis backend optional).
+
+Two tiers:
+- exact: sha256 of the normalized query — "Python nedir?" == "python nedir"
+- semantic: on exact miss the query is embedded (tools.embedding_service) and
+  compared against cached queries of the same pipeline/user scope; a cosine
+  similarity >= RESPONSE_CACHE_SEMANTIC_THRESHOLD returns that entry
+  ("Python nedir?" ~ "python ne demek"). Bounded per scope, LRU + TTL.
+
+Exact entries live in a pluggable backend (RESPONSE_CACHE_BACKEND):
+- memory: per-process OrderedDict LRU (default)
+- redis:  shared across uvicorn workers via tools.redis_client.get_redis()
+          (falls back to its in-memory client when Redis is unavailable)
+
+single_flight() de-duplicates concurrent identical requests: followers await
+the leader's result instead of running the pipeline again.
 
 Usage:
     from tools.cache import get_cached_response, cache_response, cache_stats
@@ -16,11 +31,40 @@ Usage:
 from __future__ import annotations
 
 import hashlib
+import json
+import logging
+import math
+import os
 import re
 import time
 import asyncio
 from collections import OrderedDict
-from typing import Any
+from typing import Any, Awaitable, Callable, Protocol, TypeVar
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").strip().lower()  # memory | redis
+REDIS_KEY_PREFIX = os.getenv("RESPONSE_CACHE_REDIS_PREFIX", "respcache:")
+
+SEMANTIC_ENABLED = os.getenv("RESPONSE_CACHE_SEMANTIC_ENABLED", "true").lower() == "true"
+SEMANTIC_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SEMANTIC_THRESHOLD", "0.92"))
+SEMANTIC_MAX_PER_SCOPE = int(os.getenv("RESPONSE_CACHE_SEMANTIC_MAX_PER_SCOPE", "256"))
+SEMANTIC_EMBED_TIMEOUT = float(os.getenv("RESPONSE_CACHE_SEMANTIC_EMBED_TIMEOUT", "2.0"))
+
+Embedder = Callable[[str], Awaitable["list[float] | None"]]
+T = TypeVar("T")
+
+
+async def _default_embedder(text: str) -> list[float] | None:
+    from tools.embedding_service import get_embedding_service
+    return await get_embedding_service().embed(text, input_type="query")
+
+
+def _unit(vector: list[float]) -> list[float] | None:
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return None
+    return [x / norm for x in vector]
 
 
 # Precompiled regex for query normalization
@@ -28,25 +72,190 @@ _PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
 _WHITESPACE_RE = re.compile(r"\s+")
 
 
+# ── Backends ─────────────────────────────────────────────────────
+
+class CacheBackend(Protocol):
+    """Storage for exact-tier entries. Implementations handle TTL expiry themselves."""
+
+    name: str
+
+    async def get(self, key: str) -> dict[str, Any] | None: ...
+
+    async def set(self, key: str, entry: dict[str, Any]) -> list[tuple[str, dict[str, Any]]]:
+        """Store entry; return entries evicted to make room."""
+        ...
+
+    async def delete(self, key: str) -> dict[str, Any] | None: ...
+
+    async def clear(self) -> int: ...
+
+    def size(self) -> int | None: ...
+
+
+class MemoryCacheBackend:
+    """Per-process LRU. No awaits inside — each call is atomic on the event loop."""
+
+    name = "memory"
+
+    def __init__(self, max_size: int = 500) -> None:
+        self._data: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._max_size = max(1, max_size)
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        # TTL check (monotonic clock — immune to wall-clock drift)
+        if time.monotonic() - entry["cached_at"] > entry["ttl"]:
+            del self._data[key]
+            return None
+        # LRU: move to end on access
+        self._data.move_to_end(key)
+        entry["hits"] += 1
+        return entry
+
+    async def set(self, key: str, entry: dict[str, Any]) -> list[tuple[str, dict[str, Any]]]:
+        self._data[key] = {**entry, "cached_at": time.monotonic()}
+        self._data.move_to_end(key)
+        evicted = []
+        # Evict oldest entries if over capacity
+        while len(self._data) > self._max_size:
+            evicted.append(self._data.popitem(last=False))
+        return evicted
+
+    async def delete(self, key: str) -> dict[str, Any] | None:
+        return self._data.pop(key, None)
+
+    async def clear(self) -> int:
+        count = len(self._data)
+        self._data.clear()
+        return count
+
+    def size(self) -> int | None:
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    """Shared backend on tools.redis_client (JSON values, Redis EX for TTL)."""
+
+    name = "redis"
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any] | None = None,
+        prefix: str = REDIS_KEY_PREFIX,
+    ) -> None:
+        self._client_factory = client_factory
+        self._prefix = prefix
+        self._errors = 0
+
+    def _client(self) -> Any:
+        if self._client_factory is not None:
+            return self._client_factory()
+        from tools.redis_client import get_redis
+        return get_redis()
+
+    async def _call(self, op: Callable[[Any], T], default: T) -> T:
+        # redis-py is synchronous — keep it off the event loop
+        try:
+            return await asyncio.to_thread(lambda: op(self._client()))
+        except Exception as e:
+            self._errors += 1
+            logger.warning("Response cache redis op failed: %s", e)
+            return default
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        raw = await self._call(lambda r: r.get(self._prefix + key), None)
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        # _MemoryFallback ignores EX, so expiry is also checked here
+        if time.time() > entry.get("expires_at", 0):
+            await self.delete(key)
+            return None
+        return entry
+
+    async def set(self, key: str, entry: dict[str, Any]) -> list[tuple[str, dict[str, Any]]]:
+        now = time.time()
+        stored = {**entry, "cached_at": now, "expires_at": now + entry["ttl"]}
+        payload = json.dumps(stored, ensure_ascii=False)
+        await self._call(lambda r: r.set(self._prefix + key, payload, ex=int(entry["ttl"])), False)
+        return []  # Redis evicts on its own (maxmemory policy)
+
+    async def delete(self, key: str) -> dict[str, Any] | None:
+        deleted = await self._call(lambda r: r.delete(self._prefix + key), 0)
+        return {} if deleted else None
+
+    async def clear(self) -> int:
+        def _clear(r: Any) -> int:
+            keys = list(r.scan_iter(match=self._prefix + "*", count=500))
+            return sum(r.delete(*keys[i:i + 500]) for i in range(0, len(keys), 500))
+        return await self._call(_clear, 0)
+
+    def size(self) -> int | None:
+        return None  # would need a SCAN; not worth it for stats
+
+    @property
+    def errors(self) -> int:
+        return self._errors
+
+
+def _build_backend(max_size: int) -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        return RedisCacheBackend()
+    return MemoryCacheBackend(max_size)
+
+
 class ResponseCache:
-    """In-memory LRU cache with TTL for agent responses."""
+    """LRU cache with TTL for agent responses (exact backend + semantic index)."""
 
     __slots__ = (
-        "_cache",
-        "_lock",
+        "_backend",
         "_max_size",
         "_default_ttl",
         "_hits",
         "_misses",
+        "_semantic_hits",
+        "_semantic_lookups",
+        "_semantic_enabled",
+        "_semantic_threshold",
+        "_semantic_max_per_scope",
+        "_vectors",
+        "_embedder",
     )
 
-    def __init__(self, max_size: int = 500, default_ttl: int = 300) -> None:
-        self._cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        max_size: int = 500,
+        default_ttl: int = 300,
+        semantic_enabled: bool = SEMANTIC_ENABLED,
+        semantic_threshold: float = SEMANTIC_THRESHOLD,
+        semantic_max_per_scope: int = SEMANTIC_MAX_PER_SCOPE,
+        embedder: Embedder | None = None,
+        backend: CacheBackend | None = None,
+    ) -> None:
         self._max_size = max(1, max_size)
+        self._backend: CacheBackend = backend or MemoryCacheBackend(self._max_size)
         self._default_ttl = max(1, default_ttl)
         self._hits: int = 0
         self._misses: int = 0
+        # Semantic tier: scope → (exact key → unit vector), LRU-ordered.
+        # Per process; vectors only point at backend keys, so a vector whose
+        # entry expired or was evicted is dropped lazily on lookup.
+        self._semantic_hits: int = 0
+        self._semantic_lookups: int = 0
+        self._semantic_enabled = semantic_enabled
+        self._semantic_threshold = semantic_threshold
+        self._semantic_max_per_scope = max(1, semantic_max_per_scope)
+        self._vectors: dict[str, OrderedDict[str, list[float]]] = {}
+        self._embedder: Embedder = embedder or _default_embedder
+
+    @property
+    def backend(self) -> CacheBackend:
+        return self._backend
 
     # ── Key Generation ───────────────────────────────────────────
 
@@ -58,44 +267,86 @@ class ResponseCache:
         text = _WHITESPACE_RE.sub(" ", text).strip()
         return text
 
-    def _make_key(self, query: str, pipeline_type: str = "auto") -> str:
+    @staticmethod
+    def _scope(pipeline_type: str = "auto", user_id: str | None = None) -> str:
+        """Pipeline + user scope; entries never match across scopes."""
+        scope = pipeline_type.lower().strip()
+        return f"{scope}::{user_id}" if user_id else scope
+
+    def _make_key(self, query: str, pipeline_type: str = "auto", user_id: str | None = None) -> str:
         """Normalize query and create a deterministic cache key."""
         normalized = self._normalize_query(query)
-        raw = f"{normalized}::{pipeline_type.lower().strip()}"
+        raw = f"{normalized}::{self._scope(pipeline_type, user_id)}"
         return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
+    async def _embed(self, query: str) -> list[float] | None:
+        normalized = self._normalize_query(query)
+        if not normalized:
+            return None
+        try:
+            vector = await asyncio.wait_for(self._embedder(normalized), SEMANTIC_EMBED_TIMEOUT)
+        except Exception as e:
+            logger.debug("Semantic cache embedding skipped: %s", e)
+            return None
+        return _unit(vector) if vector else None
+
+    def _drop_vector(self, key: str, scope: str | None) -> None:
+        bucket = self._vectors.get(scope or "")
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                self._vectors.pop(scope or "", None)
+
+    @staticmethod
+    def _result(entry: dict[str, Any], match: str, similarity: float) -> dict[str, Any]:
+        return {
+            "response": entry["response"],
+            "confidence": entry["confidence"],
+            "cached_at": entry["cached_at"],
+            "ttl": entry["ttl"],
+            "hits": entry.get("hits", 0),
+            "metadata": entry.get("metadata", {}),
+            "match": match,
+            "similarity": round(similarity, 4),
+        }
+
     # ── Core Operations ──────────────────────────────────────────
 
-    async def get(self, query: str, pipeline_type: str = "auto") -> dict[str, Any] | None:
-        """Get cached response. Returns None on miss or expiry."""
-        key = self._make_key(query, pipeline_type)
-
-        async with self._lock:
-            entry = self._cache.get(key)
-            if entry is None:
-                self._misses += 1
-                return None
-
-            # TTL check (monotonic clock — immune to wall-clock drift)
-            elapsed = time.monotonic() - entry["cached_at"]
-            if elapsed > entry["ttl"]:
-                del self._cache[key]
-                self._misses += 1
-                return None
-
-            # LRU: move to end on access
-            self._cache.move_to_end(key)
-            entry["hits"] += 1
-            self._hits += 1
+    async def get(
+        self, query: str, pipeline_type: str = "auto", user_id: str | None = None
+    ) -> dict[str, Any] | None:
+        """Get cached response (exact, then semantic). Returns None on miss or expiry."""
+        key = self._make_key(query, pipeline_type, user_id)
+        scope = self._scope(pipeline_type, user_id)
 
-            return {
-                "response": entry["response"],
-                "confidence": entry["confidence"],
-                "cached_at": entry["cached_at"],
-                "ttl": entry["ttl"],
-                "hits": entry["hits"],
-                "metadata": entry.get("metadata", {}),
-            }
+        entry = await self._backend.get(key)
+        if entry is not None:
+            self._hits += 1
+            return self._result(entry, "exact", 1.0)
+        self._drop_vector(key, scope)
+
+        if self._semantic_enabled and self._vectors.get(scope):
+            # May be an HTTP call on embedding-cache miss
+            vector = await self._embed(query)
+            if vector is not None:
+                self._semantic_lookups += 1
+                best_key, best_sim = None, -1.0
+                for cand_key, cand_vec in list(self._vectors.get(scope, {}).items()):
+                    sim = sum(a * b for a, b in zip(vector, cand_vec))
+                    if sim > best_sim:
+                        best_key, best_sim = cand_key, sim
+                if best_key is not None and best_sim >= self._semantic_threshold:
+                    entry = await self._backend.get(best_key)
+                    if entry is not None:
+                        bucket = self._vectors.get(scope)
+                        if bucket is not None and best_key in bucket:
+                            bucket.move_to_end(best_key)
+                        self._semantic_hits += 1
+                        return self._result(entry, "semantic", best_sim)
+                    self._drop_vector(best_key, scope)
+
+        self._misses += 1
+        return None
 
     async def set(
         self,
@@ -105,71 +356,137 @@ class ResponseCache:
         confidence: float = 0.0,
         ttl: int | None = None,
         metadata: dict[str, Any] | None = None,
+        user_id: str | None = None,
     ) -> None:
         """Cache a response with metadata. Skips error responses."""
         # Never cache error/timeout responses
         if isinstance(response, str) and response.lstrip().startswith(("[Error]", "[Timeout]")):
             return
 
-        key = self._make_key(query, pipeline_type)
+        key = self._make_key(query, pipeline_type, user_id)
+        scope = self._scope(pipeline_type, user_id)
         effective_ttl = ttl if ttl is not None and ttl > 0 else self._default_ttl
-
-        async with self._lock:
-            # Update existing or insert new
-            self._cache[key] = {
-                "response": response,
-                "confidence": confidence,
-                "cached_at": time.monotonic(),
-                "ttl": effective_ttl,
-                "hits": 0,
-                "metadata": metadata or {},
-            }
-            self._cache.move_to_end(key)
-
-            # Evict oldest entries if over capacity
-            while len(self._cache) > self._max_size:
-                self._cache.popitem(last=False)
-
-    async def invalidate(self, query: str, pipeline_type: str = "auto") -> bool:
+        # Usually an embedding-cache hit: get() embedded the same query on its miss
+        vector = await self._embed(query) if self._semantic_enabled else None
+
+        evicted = await self._backend.set(key, {
+            "response": response,
+            "confidence": confidence,
+            "ttl": effective_ttl,
+            "hits": 0,
+            "metadata": metadata or {},
+            "scope": scope,
+        })
+        for old_key, old_entry in evicted:
+            self._drop_vector(old_key, old_entry.get("scope"))
+
+        if vector is not None:
+            bucket = self._vectors.setdefault(scope, OrderedDict())
+            bucket[key] = vector
+            bucket.move_to_end(key)
+            # Bounded per scope: drop the least recently used vector (exact entry stays)
+            while len(bucket) > self._semantic_max_per_scope:
+                bucket.popitem(last=False)
+
+    async def invalidate(
+        self, query: str, pipeline_type: str = "auto", user_id: str | None = None
+    ) -> bool:
         """Remove a specific cache entry. Returns True if found."""
-        key = self._make_key(query, pipeline_type)
-
-        async with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                return True
-            return False
+        key = self._make_key(query, pipeline_type, user_id)
+        self._drop_vector(key, self._scope(pipeline_type, user_id))
+        return await self._backend.delete(key) is not None
 
     async def clear(self) -> int:
         """Clear all cache entries. Returns count cleared."""
-        async with self._lock:
-            count = len(self._cache)
-            self._cache.clear()
-            return count
+        self._vectors.clear()
+        return await self._backend.clear()
 
     def stats(self) -> dict[str, Any]:
-        """Return cache statistics."""
-        total = self._hits + self._misses
+        """Return cache statistics (exact vs semantic near-hits)."""
+        hits = self._hits + self._semantic_hits
+        total = hits + self._misses
         return {
-            "size": len(self._cache),
+            "backend": self._backend.name,
+            "size": self._backend.size(),
             "max_size": self._max_size,
-            "hits": self._hits,
+            "hits": hits,
+            "exact_hits": self._hits,
+            "semantic_hits": self._semantic_hits,
             "misses": self._misses,
-            "hit_rate": round(self._hits / total, 4) if total > 0 else 0.0,
+            "hit_rate": round(hits / total, 4) if total > 0 else 0.0,
             "default_ttl": self._default_ttl,
+            "semantic": {
+                "enabled": self._semantic_enabled,
+                "threshold": self._semantic_threshold,
+                "max_per_scope": self._semantic_max_per_scope,
+                "entries": sum(len(b) for b in self._vectors.values()),
+                "scopes": len(self._vectors),
+                "lookups": self._semantic_lookups,
+                "near_hit_rate": round(self._semantic_hits / self._semantic_lookups, 4)
+                if self._semantic_lookups > 0 else 0.0,
+            },
         }
 
 
+# ── Single-flight ────────────────────────────────────────────────
+
+class _LeaderCancelled(Exception):
+    """The leading call was cancelled — a follower should take over."""
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._leaders = 0
+        self._shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Run fn() once per key at a time. Returns (result, shared)."""
+        while (fut := self._inflight.get(key)) is not None:
+            try:
+                result = await asyncio.shield(fut)
+            except _LeaderCancelled:
+                continue  # leader went away (e.g. client disconnect) — retry / take over
+            self._shared += 1
+            return result, True
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self._leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result, False
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+            if fut.done() and not fut.cancelled():
+                fut.exception()  # mark retrieved when nobody was waiting
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": len(self._inflight), "leaders": self._leaders, "shared": self._shared}
+
+
 # ── Module-level Singleton ───────────────────────────────────────
 
-_cache = ResponseCache()
+_cache = ResponseCache(backend=_build_backend(500))
+_flights = SingleFlight()
 
 
 async def get_cached_response(
-    query: str, pipeline_type: str = "auto"
+    query: str, pipeline_type: str = "auto", user_id: str | None = None
 ) -> dict[str, Any] | None:
-    """Retrieve a cached response or None."""
-    return await _cache.get(query, pipeline_type)
+    """Retrieve a cached response (exact or semantic near-hit) or None."""
+    return await _cache.get(query, pipeline_type, user_id)
 
 
 async def cache_response(
@@ -178,14 +495,17 @@ async def cache_response(
     pipeline_type: str = "auto",
     confidence: float = 0.0,
     ttl: int | None = None,
+    user_id: str | None = None,
 ) -> None:
     """Store a response in cache."""
-    await _cache.set(query, response, pipeline_type, confidence, ttl)
+    await _cache.set(query, response, pipeline_type, confidence, ttl, user_id=user_id)
 
 
-async def invalidate_cache(query: str, pipeline_type: str = "auto") -> bool:
+async def invalidate_cache(
+    query: str, pipeline_type: str = "auto", user_id: str | None = None
+) -> bool:
     """Invalidate a specific cached entry."""
-    return await _cache.invalidate(query, pipeline_type)
+    return await _cache.invalidate(query, pipeline_type, user_id)
 
 
 async def clear_cache() -> int:
@@ -193,6 +513,19 @@ async def clear_cache() -> int:
     return await _cache.clear()
 
 
+async def single_flight(
+    query: str,
+    fn: Callable[[], Awaitable[T]],
+    pipeline_type: str = "auto",
+    user_id: str | None = None,
+) -> tuple[T, bool]:
+    """Run fn() unless an identical request (same cache key) is already in flight.
+
+    Returns (result, shared) — shared=True when the result came from another caller.
+    """
+    return await _flights.do(_cache._make_key(query, pipeline_type, user_id), fn)
+
+
 def cache_stats() -> dict[str, Any]:
     """Get current cache statistics."""
-    return _cache.stats()
+    return {**_cache.stats(), "single_flight": _flights.stats()}
@@ -2,20 +2,26 @@
 Code Executor — Sandboxed code execution for agents.
 Inspired by Autogen's code generation + execution + debug loop.
 
-Supports Python execution in a subprocess sandbox.
+Python runs on a pool of warm, rlimited workers (tools.code_worker_pool)
+with a per-user fair queue; JavaScript/Bash — and Python when the pool is
+disabled or unavailable — run as one-shot async subprocesses.
 Captures stdout, stderr, and return values.
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
-import subprocess
+import os
+import sys
 import tempfile
 import time
 from pathlib import Path
 from typing import Any
 
+from tools.code_worker_pool import CodeQueueFull, get_code_worker_pool
+from tools.sandbox import SandboxViolation, _validate_code_execute
+
 logger = logging.getLogger(__name__)
 
 # Safety limits
@@ -23,6 +29,14 @@ MAX_EXECUTION_TIME = 30  # seconds
 MAX_OUTPUT_SIZE = 50_000  # characters
 ALLOWED_LANGUAGES = {"python", "javascript", "bash"}
 
+# "pool" (warm workers, Python only) | "subprocess" (one-shot per run)
+CODE_EXECUTOR_MODE = os.getenv("CODE_EXECUTOR_MODE", "pool").lower()
+try:
+    import resource  # noqa: F401 — worker rlimit'leri için gerekli (POSIX)
+    _POOL_SUPPORTED = True
+except ImportError:
+    _POOL_SUPPORTED = False
+
 # Dangerous patterns to block
 _DANGEROUS_PATTERNS = [
     "os.system",
@@ -47,10 +61,12 @@ _DANGEROUS_PATTERNS = [
 
 def get_executor_capabilities() -> dict[str, Any]:
     """Describe the current execution backend and safety envelope."""
+    pooled = _pool_enabled()
     return {
-        "mode": "host_subprocess",
-        "isolation_level": "basic",
-        "workspace_isolation": False,
+        "mode": "warm_worker_pool" if pooled else "host_subprocess",
+        "pool": get_code_worker_pool().stats() if pooled else None,
+        "isolation_level": "process_per_job" if pooled else "basic",
+        "workspace_isolation": pooled,
         "docker_backed": False,
         "allowed_languages": sorted(ALLOWED_LANGUAGES),
         "max_execution_time_seconds": MAX_EXECUTION_TIME,
@@ -59,11 +75,28 @@ def get_executor_capabilities() -> dict[str, Any]:
     }
 
 
+def _pool_enabled() -> bool:
+    return CODE_EXECUTOR_MODE == "pool" and _POOL_SUPPORTED
+
+
+async def start_code_workers() -> bool:
+    """Warm up the worker pool at app startup. Returns False when the pool is disabled."""
+    if not _pool_enabled():
+        return False
+    await get_code_worker_pool().prestart()
+    return True
+
+
 def _check_safety(code: str) -> tuple[bool, str]:
     """Check code for dangerous patterns. Returns (is_safe, reason)."""
     for pattern in _DANGEROUS_PATTERNS:
         if pattern in code:
             return False, f"Blocked dangerous pattern: {pattern}"
+    # Sandbox code_execute kuralları (workflow_engine gibi validate_tool_call'dan geçmeyen yollar için de)
+    try:
+        _validate_code_execute({"code": code})
+    except SandboxViolation as e:
+        return False, e.reason
     return True, "OK"
 
 
@@ -71,9 +104,10 @@ async def execute_code(
     code: str,
     language: str = "python",
     timeout: int = MAX_EXECUTION_TIME,
+    user_id: str = "anonymous",
 ) -> dict[str, Any]:
     """
-    Execute code in a sandboxed subprocess.
+    Execute code in a sandboxed worker (Python) or one-shot subprocess.
     Returns dict with stdout, stderr, return_code, execution_time.
     """
     language = language.lower()
@@ -97,9 +131,29 @@ async def execute_code(
             "execution_time_ms": 0,
         }
 
+    if language == "python" and _pool_enabled():
+        try:
+            return await get_code_worker_pool().run(code, timeout=timeout, user_id=user_id)
+        except CodeQueueFull as e:
+            return {
+                "success": False,
+                "stdout": "",
+                "stderr": f"Execution rejected: {e}",
+                "return_code": -1,
+                "execution_time_ms": 0,
+            }
+        except Exception as e:
+            logger.warning("Code worker pool unavailable, falling back to subprocess: %s", e)
+
+    return await _execute_subprocess(code, language, timeout)
+
+
+async def _execute_subprocess(code: str, language: str, timeout: int) -> dict[str, Any]:
+    """One-shot mode: temp file + fresh interpreter per run (async, does not block the loop)."""
     # Write code to temp file
     suffix_map = {"python": ".py", "javascript": ".js", "bash": ".sh"}
     suffix = suffix_map.get(language, ".py")
+    temp_path: str | None = None
 
     try:
         with tempfile.NamedTemporaryFile(
@@ -110,7 +164,7 @@ async def execute_code(
 
         # Build command
         cmd_map = {
-            "python": ["python", "-u", temp_path],
+            "python": [sys.executable, "-u", temp_path],
             "javascript": ["node", temp_path],
             "bash": ["bash", temp_path],
         }
@@ -118,29 +172,21 @@ async def execute_code(
 
         # Execute
         t0 = time.monotonic()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=tempfile.gettempdir(),
+            env={"PATH": "/usr/bin:/usr/local/bin", "HOME": tempfile.gettempdir()},
+        )
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=tempfile.gettempdir(),
-                env={"PATH": "/usr/bin:/usr/local/bin", "HOME": tempfile.gettempdir()},
-            )
-            execution_time = (time.monotonic() - t0) * 1000
-
-            stdout = result.stdout[:MAX_OUTPUT_SIZE]
-            stderr = result.stderr[:MAX_OUTPUT_SIZE]
-
-            return {
-                "success": result.returncode == 0,
-                "stdout": stdout,
-                "stderr": stderr,
-                "return_code": result.returncode,
-                "execution_time_ms": round(execution_time, 1),
-            }
-
-        except subprocess.TimeoutExpired:
+            stdout_b, stderr_b = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            try:
+                proc.kill()
+                await proc.wait()
+            except ProcessLookupError:
+                pass
             return {
                 "success": False,
                 "stdout": "",
@@ -148,6 +194,18 @@ async def execute_code(
                 "return_code": -1,
                 "execution_time_ms": timeout * 1000,
             }
+        execution_time = (time.monotonic() - t0) * 1000
+
+        stdout = stdout_b.decode(errors="replace")[:MAX_OUTPUT_SIZE]
+        stderr = stderr_b.decode(errors="replace")[:MAX_OUTPUT_SIZE]
+
+        return {
+            "success": proc.returncode == 0,
+            "stdout": stdout,
+            "stderr": stderr,
+            "return_code": proc.returncode,
+            "execution_time_ms": round(execution_time, 1),
+        }
 
     except Exception as e:
         return {
@@ -159,10 +217,11 @@ async def execute_code(
         }
     finally:
         # Cleanup temp file
-        try:
-            Path(temp_path).unlink(missing_ok=True)
-        except Exception:
-            pass
+        if temp_path:
+            try:
+                Path(temp_path).unlink(missing_ok=True)
+            except Exception:
+                pass
 
 
 def format_execution_result(result: dict[str, Any]) -> str:
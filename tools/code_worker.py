@@ -0,0 +1,205 @@
+"""
+Code worker — long-lived fork server used by tools.code_worker_pool.
+
+Protocol: one JSON job per line on stdin ({"id", "code", "timeout"}), one
+JSON result per line on the protocol fd ({"id", "stdout", "stderr",
+"return_code"}, plus "error": "timeout" | "crashed" when the job process
+did not finish). The original stdout fd is reserved for the protocol; user
+code's print()/sys.stderr go to per-job buffers and fd 1/2 point at
+/dev/null, so stray output cannot corrupt the stream.
+
+The warm parent never runs user code. It pre-imports CODE_WORKER_PREIMPORT
+once, then forks a fresh child per job: each job gets a copy-on-write
+interpreter with the imports already loaded, its own empty temp cwd and a
+fresh ``__main__`` namespace, and everything it changes (sys.modules,
+builtins, os.environ, cwd, open files) dies with the child — nothing leaks
+to the next job or user. Resource limits (address space, open files, file
+size, no core dumps) are applied once in the parent and inherited; the CPU
+limit is armed per child and the parent SIGKILLs a child that exceeds the
+wall-clock timeout.
+
+Run with the stdlib only (``python -u -I code_worker.py``) — the worker
+must not import project modules.
+"""
+
+from __future__ import annotations
+
+import builtins
+import importlib
+import io
+import json
+import os
+import select
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows — rlimit yok, pool subprocess moduna düşer
+    resource = None  # type: ignore[assignment]
+
+MAX_OUTPUT_SIZE = int(os.environ.get("CODE_WORKER_MAX_OUTPUT", "50000"))
+PREIMPORT = os.environ.get(
+    "CODE_WORKER_PREIMPORT",
+    "collections,datetime,decimal,fractions,functools,itertools,json,math,random,re,statistics,numpy,pandas",
+)
+
+
+def _preimport() -> None:
+    """Import common modules once in the parent so forked jobs start warm."""
+    for name in filter(None, (n.strip() for n in PREIMPORT.split(","))):
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass  # opsiyonel paket kurulu değil
+
+
+def _apply_limits() -> None:
+    if resource is None:
+        return
+    memory_mb = int(os.environ.get("CODE_WORKER_MEMORY_MB", "1024"))
+    limits = [
+        (resource.RLIMIT_CORE, 0),
+        (resource.RLIMIT_NOFILE, int(os.environ.get("CODE_WORKER_MAX_FILES", "64"))),
+        (resource.RLIMIT_FSIZE, int(os.environ.get("CODE_WORKER_MAX_FILE_MB", "16")) * 1024 * 1024),
+    ]
+    if memory_mb > 0:
+        limits.append((resource.RLIMIT_AS, memory_mb * 1024 * 1024))
+    for name, value in limits:
+        try:
+            _, hard = resource.getrlimit(name)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(name, (value, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def _arm_cpu_limit(timeout: float) -> None:
+    """CPU time is cumulative per process, so the soft limit is moved per job."""
+    if resource is None:
+        return
+    try:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = int(usage.ru_utime + usage.ru_stime)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = used + int(timeout) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _run(code: str) -> tuple[str, str, int]:
+    out, err = io.StringIO(), io.StringIO()
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    return_code = 0
+    sys.stdout, sys.stderr = out, err
+    try:
+        exec(compile(code, "<code>", "exec"), namespace)
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            return_code = e.code
+        elif e.code is not None:
+            err.write(f"{e.code}\n")
+            return_code = 1
+    except BaseException:
+        traceback.print_exc(file=err)
+        return_code = 1
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    return out.getvalue()[:MAX_OUTPUT_SIZE], err.getvalue()[:MAX_OUTPUT_SIZE], return_code
+
+
+def _child(job: dict, workdir: str, result_fd: int, proto_fd: int) -> None:
+    """Forked job process: never returns."""
+    try:
+        os.close(proto_fd)
+        stdin = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(stdin, 0)  # kullanıcı kodu protokol satırlarını okuyamasın
+        os.chdir(workdir)
+        _arm_cpu_limit(float(job.get("timeout", 30)))
+        stdout, stderr, return_code = _run(job.get("code", ""))
+        data = json.dumps({"stdout": stdout, "stderr": stderr, "return_code": return_code}).encode()
+        with os.fdopen(result_fd, "wb") as f:
+            f.write(data)
+    finally:
+        os._exit(0)
+
+
+def _run_forked(job: dict, proto_fd: int) -> dict:
+    timeout = float(job.get("timeout", 30))
+    workdir = tempfile.mkdtemp(prefix="code-job-")
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        _child(job, workdir, w, proto_fd)
+    os.close(w)
+
+    chunks: list[bytes] = []
+    deadline = time.monotonic() + timeout
+    timed_out = False
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([r], [], [], remaining)[0]:
+                timed_out = True
+                break
+            chunk = os.read(r, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(r)
+        if timed_out:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        _, status = os.waitpid(pid, 0)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if timed_out:
+        return {"error": "timeout", "stdout": "", "stderr": "", "return_code": -1}
+    try:
+        return json.loads(b"".join(chunks))
+    except ValueError:
+        # rlimit (SIGXCPU/SIGKILL), MemoryError during output, os._exit ...
+        return {"error": "crashed", "stdout": "", "stderr": "", "return_code": os.waitstatus_to_exitcode(status)}
+
+
+def _run_inline(job: dict) -> dict:
+    # fork yok (Windows) — pool bu platformda zaten kapalı
+    _arm_cpu_limit(float(job.get("timeout", 30)))
+    stdout, stderr, return_code = _run(job.get("code", ""))
+    return {"stdout": stdout, "stderr": stderr, "return_code": return_code}
+
+
+def main() -> None:
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    sys.__stdout__ = sys.__stderr__ = open(os.devnull, "w")  # type: ignore[misc]
+    _apply_limits()
+    _preimport()
+    forking = hasattr(os, "fork")
+
+    proto.write(json.dumps({"ready": True, "pid": os.getpid(), "fork": forking}) + "\n")
+    for line in sys.stdin:
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        result = _run_forked(job, proto.fileno()) if forking else _run_inline(job)
+        proto.write(json.dumps({"id": job.get("id"), **result}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Code worker pool — pre-forked, resource-limited Python workers for execute_code.
+
+Each worker (tools/code_worker.py) is a warm fork server: common modules are
+imported once, and every job runs in a freshly forked child, so a job pays
+neither interpreter startup nor imports, and no state (modules, builtins,
+env, cwd, files) carries over between jobs or users.
+Jobs are queued per user and handed out round-robin (one user's burst cannot
+starve others); concurrency is bounded by the number of workers.
+
+- Wall-clock timeout → the worker kills the job child; the warm parent stays
+- Job crash (rlimit hit, os._exit, ...) → error result, worker stays warm
+- Unresponsive worker → its whole process group is killed and respawned
+- Workers are recycled after CODE_WORKER_MAX_JOBS jobs
+
+Usage:
+    from tools.code_worker_pool import get_code_worker_pool
+
+    result = await get_code_worker_pool().run("print(1 + 1)", timeout=10, user_id="u1")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = Path(__file__).with_name("code_worker.py")
+
+CODE_WORKERS = int(os.getenv("CODE_WORKERS", "2"))
+CODE_WORKER_MAX_JOBS = int(os.getenv("CODE_WORKER_MAX_JOBS", "50"))
+CODE_WORKER_MEMORY_MB = int(os.getenv("CODE_WORKER_MEMORY_MB", "1024"))
+CODE_QUEUE_MAX = int(os.getenv("CODE_QUEUE_MAX", "100"))
+_SPAWN_TIMEOUT_SEC = 30.0  # pre-import (numpy/pandas) dahil
+# Extra wait on top of the job timeout before the worker itself is considered hung
+_WORKER_GRACE_SEC = 5.0
+_STDIO_LIMIT = 8 * 1024 * 1024
+
+
+class CodeQueueFull(RuntimeError):
+    """Raised when CODE_QUEUE_MAX jobs are already waiting."""
+
+
+@dataclass
+class _Job:
+    code: str
+    timeout: float
+    user_id: str
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _FairQueue:
+    """Per-user FIFO queues served round-robin."""
+
+    def __init__(self) -> None:
+        self._by_user: OrderedDict[str, deque[_Job]] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, job: _Job) -> None:
+        self._by_user.setdefault(job.user_id, deque()).append(job)
+        self._size += 1
+
+    def pop(self) -> _Job | None:
+        while self._by_user:
+            user_id, jobs = next(iter(self._by_user.items()))
+            job = jobs.popleft()
+            if jobs:
+                self._by_user.move_to_end(user_id)  # sıradaki kullanıcıya geç
+            else:
+                del self._by_user[user_id]
+            self._size -= 1
+            if not job.future.done():  # iptal edilen işler atlanır
+                return job
+        return None
+
+    def users(self) -> int:
+        return len(self._by_user)
+
+
+class _Worker:
+    """One warm interpreter; runs jobs sequentially over its pipes."""
+
+    def __init__(self, memory_mb: int) -> None:
+        self._memory_mb = memory_mb
+        self.proc: asyncio.subprocess.Process | None = None
+        self.jobs_done = 0
+        self.spawns = 0
+        self.last_error: str | None = None  # "timeout" | "crashed" for the last job
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.returncode is None
+
+    async def start(self) -> None:
+        tmp = tempfile.gettempdir()
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-u", "-I", str(WORKER_SCRIPT),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            cwd=tmp,
+            start_new_session=True,  # kill() reaches forked job children too
+            env={
+                "PATH": "/usr/bin:/usr/local/bin",
+                "HOME": tmp,
+                "CODE_WORKER_MEMORY_MB": str(self._memory_mb),
+                "OPENBLAS_NUM_THREADS": "1",  # RLIMIT_AS altında thread havuzları patlamasın
+                "OMP_NUM_THREADS": "1",
+                **({"CODE_WORKER_PREIMPORT": os.environ["CODE_WORKER_PREIMPORT"]}
+                   if "CODE_WORKER_PREIMPORT" in os.environ else {}),
+            },
+            limit=_STDIO_LIMIT,
+        )
+        self.jobs_done = 0
+        self.spawns += 1
+        assert self.proc.stdout is not None
+        line = await asyncio.wait_for(self.proc.stdout.readline(), timeout=_SPAWN_TIMEOUT_SEC)
+        if not line or not json.loads(line).get("ready"):
+            await self.kill()
+            raise RuntimeError("code worker failed to start")
+
+    async def kill(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+            await proc.wait()
+        except ProcessLookupError:
+            pass
+
+    async def run(self, job: _Job) -> dict[str, Any]:
+        if not self.alive:
+            await self.start()
+        assert self.proc is not None and self.proc.stdin is not None and self.proc.stdout is not None
+        job_id = next(self._ids)
+        self.last_error = None
+        t0 = time.monotonic()
+        self.proc.stdin.write((json.dumps({"id": job_id, "code": job.code, "timeout": job.timeout}) + "\n").encode())
+        try:
+            await self.proc.stdin.drain()
+            line = await asyncio.wait_for(self.proc.stdout.readline(), timeout=job.timeout + _WORKER_GRACE_SEC)
+        except asyncio.TimeoutError:
+            await self.kill()
+            self.last_error = "timeout"
+            return _result(False, "", f"Execution timed out after {job.timeout:g}s", -1, job.timeout * 1000)
+        except (BrokenPipeError, ConnectionResetError):
+            line = b""
+        elapsed_ms = (time.monotonic() - t0) * 1000
+
+        if not line:
+            code = self.proc.returncode if self.proc is not None else None
+            await self.kill()
+            self.last_error = "crashed"
+            return _result(
+                False, "",
+                f"Execution aborted: worker exited (code={code}); memory/CPU limit or hard exit",
+                code if isinstance(code, int) else -1, elapsed_ms,
+            )
+        self.jobs_done += 1
+        payload = json.loads(line)
+        self.last_error = payload.get("error")
+        if self.last_error == "timeout":
+            return _result(False, "", f"Execution timed out after {job.timeout:g}s", -1, elapsed_ms)
+        if self.last_error == "crashed":
+            code = payload["return_code"]
+            return _result(
+                False, "",
+                f"Execution aborted: job process exited (code={code}); memory/CPU limit or hard exit",
+                code, elapsed_ms,
+            )
+        return _result(
+            payload["return_code"] == 0,
+            payload.get("stdout", ""),
+            payload.get("stderr", ""),
+            payload["return_code"],
+            elapsed_ms,
+        )
+
+
+def _result(success: bool, stdout: str, stderr: str, return_code: int, elapsed_ms: float) -> dict[str, Any]:
+    return {
+        "success": success,
+        "stdout": stdout,
+        "stderr": stderr,
+        "return_code": return_code,
+        "execution_time_ms": round(elapsed_ms, 1),
+    }
+
+
+class CodeWorkerPool:
+    """Bounded, per-user-fair queue in front of warm Python workers."""
+
+    def __init__(
+        self,
+        size: int = CODE_WORKERS,
+        max_jobs_per_worker: int = CODE_WORKER_MAX_JOBS,
+        memory_mb: int = CODE_WORKER_MEMORY_MB,
+        queue_max: int = CODE_QUEUE_MAX,
+    ) -> None:
+        self._size = max(1, size)
+        self._max_jobs = max(1, max_jobs_per_worker)
+        self._memory_mb = memory_mb
+        self._queue_max = max(1, queue_max)
+        self._queue = _FairQueue()
+        self._idle: list[_Worker] = []
+        self._workers: list[_Worker] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._counters = {"jobs": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "rejected": 0}
+        self._wait_ms_total = 0.0
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Subprocess pipe'ları loop'a bağlı — yeni loop'ta yeni worker seti
+            self._loop = loop
+            self._workers = [_Worker(self._memory_mb) for _ in range(self._size)]
+            self._idle = list(self._workers)
+            self._queue = _FairQueue()
+
+    async def prestart(self) -> None:
+        """Start all workers and their pre-imports (called from app startup; workers also start on first use)."""
+        self._bind_loop()
+        await asyncio.gather(*(w.start() for w in self._idle if not w.alive))
+
+    async def run(self, code: str, timeout: float, user_id: str = "anonymous") -> dict[str, Any]:
+        self._bind_loop()
+        if len(self._queue) >= self._queue_max:
+            self._counters["rejected"] += 1
+            raise CodeQueueFull(f"Execution queue full ({self._queue_max} jobs waiting)")
+        job = _Job(code=code, timeout=timeout, user_id=user_id or "anonymous",
+                   future=asyncio.get_running_loop().create_future())
+        self._queue.put(job)
+        self._pump()
+        return await job.future
+
+    def _pump(self) -> None:
+        while self._idle and len(self._queue):
+            job = self._queue.pop()
+            if job is None:
+                break
+            worker = self._idle.pop()
+            task = asyncio.get_running_loop().create_task(self._execute(worker, job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, worker: _Worker, job: _Job) -> None:
+        self._wait_ms_total += (time.monotonic() - job.enqueued_at) * 1000
+        self._counters["jobs"] += 1
+        try:
+            result = await worker.run(job)
+            if worker.last_error:
+                self._counters["timeouts" if worker.last_error == "timeout" else "crashes"] += 1
+            if worker.alive and worker.jobs_done >= self._max_jobs:
+                self._counters["recycled"] += 1
+                await worker.kill()
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            await worker.kill()
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self._idle.append(worker)
+            self._pump()
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            await worker.kill()
+
+    def stats(self) -> dict[str, Any]:
+        jobs = self._counters["jobs"]
+        return {
+            "workers": self._size,
+            "busy": self._size - len(self._idle),
+            "warm": sum(1 for w in self._workers if w.alive),
+            "queued": len(self._queue),
+            "queued_users": self._queue.users(),
+            "spawns": sum(w.spawns for w in self._workers),
+            **self._counters,
+            "avg_queue_wait_ms": round(self._wait_ms_total / jobs, 1) if jobs else 0.0,
+        }
+
+
+# ── Module-level Singleton ───────────────────────────────────────
+
+_pool: CodeWorkerPool | None = None
+
+
+def get_code_worker_pool() -> CodeWorkerPool:
+    """Get or create the global code worker pool."""
+    global _pool
+    if _pool is None:
+        _pool = CodeWorkerPool()
+    return _pool
@@ -50,8 +50,15 @@ COMPACTION_SUMMARY_TEMPLATE = """[CONTEXT COMPACTED — {msg_count} messages sum
 
 # ── Compaction Engine ────────────────────────────────────────────
 
-def should_compact(messages: list[dict[str, Any]]) -> bool:
-    """Check if context needs compaction."""
+def should_compact(messages: list[dict[str, Any]], max_tokens: int | None = None) -> bool:
+    """Check if context needs compaction.
+
+    With max_tokens the decision is by token count (see tools/context_window.py);
+    otherwise by the legacy message-count threshold.
+    """
+    if max_tokens is not None:
+        from tools.context_window import count_message_tokens
+        return sum(count_message_tokens(m) for m in messages) > max_tokens
     non_system = [m for m in messages if m.get("role") != "system"]
     return len(non_system) > COMPACTION_THRESHOLD
 
@@ -59,6 +66,7 @@ def should_compact(messages: list[dict[str, Any]]) -> bool:
 def compact_context(
     messages: list[dict[str, Any]],
     keep_recent: int = KEEP_RECENT,
+    max_tokens: int | None = None,
 ) -> list[dict[str, Any]]:
     """
     Compact message context, keeping system + recent messages.
@@ -67,7 +75,7 @@ def compact_context(
     This is a deterministic compaction (no LLM call).
     For LLM-powered summarization, use compact_context_with_llm().
     """
-    if not should_compact(messages):
+    if not should_compact(messages, max_tokens):
         return messages
 
     system_msgs = [m for m in messages if m.get("role") == "system"]
@@ -0,0 +1,332 @@
+"""
+Token-budgeted context window manager for the agentic loop.
+
+Replaces message-count compression (compress_messages_if_needed /
+should_compact / char-threshold trims): the budget is the model's
+`context_length` from config.MODELS minus the completion budget, the
+tool schemas sent with every request and a safety margin.
+
+Token counts use tiktoken when installed, otherwise a calibrated
+estimator; counts are cached per message object so each loop step only
+counts the messages appended since the previous step.
+
+Priority rules when over budget (cheapest loss first):
+  1. Any single tool result above MAX_SINGLE_RESULT_SHARE of the budget is
+     cut to head + tail (a giant web_fetch never overflows the window).
+  2. Old tool results (outside the recent window) shrink to short stubs, oldest first.
+  3. Oldest turns are evicted into one deterministic summary note
+     (an assistant tool_call and its tool result are evicted together).
+  4. Last resort: the largest remaining non-system message is cut.
+System messages, the latest user message and the last KEEP_RECENT messages
+are never evicted.
+
+Usage:
+    from tools.context_window import ContextWindowManager
+
+    window = ContextWindowManager.for_model("thinker", tools=tools)
+    messages = window.fit(messages)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# ── Configuration ────────────────────────────────────────────────
+
+# Tokens kept free on top of the completion budget (estimator error, provider framing)
+CONTEXT_SAFETY_MARGIN = int(os.getenv("CONTEXT_SAFETY_MARGIN", "1024"))
+
+# After compaction the prompt is brought down to this share of the budget,
+# so compaction does not re-run (and break the prompt prefix) on every step
+CONTEXT_TARGET_RATIO = float(os.getenv("AGENTIC_LOOP_CONTEXT_THRESHOLD", "0.75"))
+
+# A single tool result may use at most this share of the budget
+MAX_SINGLE_RESULT_SHARE = float(os.getenv("CONTEXT_MAX_SINGLE_RESULT_SHARE", "0.25"))
+
+# Most recent messages that are never stubbed or evicted
+KEEP_RECENT = int(os.getenv("CONTEXT_KEEP_RECENT", "6"))
+
+# Stub size for old tool results
+STUB_CHARS = 600
+
+# Per-message framing tokens (role, separators) in chat templates
+_MESSAGE_OVERHEAD = 4
+
+_SUMMARY_MARKER = "[CONTEXT COMPACTED"
+_SUMMARY_COUNT_RE = re.compile(r"— (\d+) messages summarized")
+# Room left for the summary note itself (template caps it at a few hundred tokens)
+_SUMMARY_RESERVE = 400
+
+
+# ── Token counting ───────────────────────────────────────────────
+
+_encoder: Any = None
+_encoder_loaded = False
+
+
+def _get_encoder() -> Any:
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        _encoder_loaded = True
+        try:
+            import tiktoken
+
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None  # Calibrated estimator fallback
+    return _encoder
+
+
+def count_text_tokens(text: str) -> int:
+    """Token count of a string (tiktoken if available, otherwise estimated).
+
+    Estimator: ~4 chars per token for ASCII, each extra UTF-8 byte adds half a
+    token — Turkish letters (2 bytes) ≈ 0.75, CJK (3 bytes) ≈ 1.25 tokens per char.
+    Slightly pessimistic on purpose.
+    """
+    if not text:
+        return 0
+    enc = _get_encoder()
+    if enc is not None:
+        try:
+            return len(enc.encode(text, disallowed_special=()))
+        except Exception:
+            pass
+    extra_bytes = len(text.encode("utf-8", "ignore")) - len(text)
+    return len(text) // 4 + (extra_bytes + 1) // 2 + 1
+
+
+def count_message_tokens(message: dict[str, Any]) -> int:
+    tokens = _MESSAGE_OVERHEAD
+    content = message.get("content")
+    if isinstance(content, str):
+        tokens += count_text_tokens(content)
+    elif isinstance(content, list):
+        tokens += sum(
+            count_text_tokens(p.get("text") or "") for p in content if isinstance(p, dict)
+        )
+    for tc in message.get("tool_calls") or []:
+        fn = tc.get("function", {}) if isinstance(tc, dict) else {}
+        tokens += 8 + count_text_tokens(str(fn.get("name", ""))) + count_text_tokens(
+            str(fn.get("arguments", ""))
+        )
+    return tokens
+
+
+def _cut(text: str, max_tokens: int, note: str) -> str:
+    """Keep head + tail of text within roughly max_tokens."""
+    total = count_text_tokens(text)
+    if total <= max_tokens:
+        return text
+    keep_chars = max(200, int(len(text) * max_tokens / total))
+    head = keep_chars * 3 // 4
+    tail = keep_chars - head
+    return f"{text[:head]}\n...[{note}]...\n{text[-tail:] if tail else ''}"
+
+
+# ── Manager ──────────────────────────────────────────────────────
+
+class ContextWindowManager:
+    """Keeps the message list inside the model's token budget."""
+
+    def __init__(
+        self,
+        context_length: int,
+        max_output_tokens: int = 0,
+        tools: list[dict] | None = None,
+        safety_margin: int = CONTEXT_SAFETY_MARGIN,
+        target_ratio: float = CONTEXT_TARGET_RATIO,
+        keep_recent: int = KEEP_RECENT,
+    ) -> None:
+        self.context_length = context_length
+        self.tool_tokens = count_text_tokens(json.dumps(tools, ensure_ascii=False)) if tools else 0
+        self.budget = max(1024, context_length - max_output_tokens - self.tool_tokens - safety_margin)
+        self.target = int(self.budget * target_ratio)
+        self.keep_recent = keep_recent
+        # id(message) → (message, content object, tokens); entry valid while content is the same object
+        self._counts: dict[int, tuple[dict, Any, int]] = {}
+        self.stats: dict[str, int] = {
+            "last_tokens": 0, "compactions": 0, "truncated": 0, "stubbed": 0, "evicted": 0,
+        }
+
+    @classmethod
+    def for_model(
+        cls,
+        model_key: str,
+        tools: list[dict] | None = None,
+        max_output_tokens: int | None = None,
+        **kwargs: Any,
+    ) -> "ContextWindowManager":
+        from config import MODELS, get_model_context_length
+
+        if max_output_tokens is None:
+            max_output_tokens = int(MODELS.get(model_key, {}).get("max_tokens") or 0)
+        return cls(get_model_context_length(model_key), max_output_tokens, tools, **kwargs)
+
+    # ── Counting ─────────────────────────────────────────────────
+
+    def tokens_of(self, message: dict[str, Any]) -> int:
+        key = id(message)
+        entry = self._counts.get(key)
+        content = message.get("content")
+        if entry and entry[0] is message and entry[1] is content:
+            return entry[2]
+        tokens = count_message_tokens(message)
+        self._counts[key] = (message, content, tokens)
+        return tokens
+
+    def count(self, messages: list[dict[str, Any]]) -> int:
+        return sum(self.tokens_of(m) for m in messages)
+
+    def _prune(self, messages: list[dict[str, Any]]) -> None:
+        if len(self._counts) > 2 * len(messages) + 32:
+            live = {id(m) for m in messages}
+            self._counts = {k: v for k, v in self._counts.items() if k in live}
+
+    # ── Fitting ──────────────────────────────────────────────────
+
+    def fit(self, messages: list[dict[str, Any]], config: Any = None) -> list[dict[str, Any]]:
+        """Return messages within budget. Usable as a ContextTransformer transform."""
+        messages = self._cap_single_results(messages)
+        total = self.count(messages)
+        self.stats["last_tokens"] = total
+        if total <= self.budget:
+            self._prune(messages)
+            return messages
+
+        self.stats["compactions"] += 1
+        before = total
+        protected = self._protected(messages)
+
+        messages, total = self._stub_old_tool_results(messages, protected, total)
+        if total > self.target:
+            messages, total = self._evict_oldest(messages, total)
+        if total > self.budget:
+            messages, total = self._cut_largest(messages, total)
+
+        self.stats["last_tokens"] = total
+        self._prune(messages)
+        logger.info(
+            "[ContextWindow] %d → %d tokens (budget %d, window %d)",
+            before, total, self.budget, self.context_length,
+        )
+        return messages
+
+    def _cap_single_results(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        cap = int(self.budget * MAX_SINGLE_RESULT_SHARE)
+        out = messages
+        for i, msg in enumerate(messages):
+            if msg.get("role") != "tool" or self.tokens_of(msg) <= cap:
+                continue
+            if out is messages:
+                out = list(messages)
+            out[i] = {**msg, "content": _cut(str(msg.get("content") or ""), cap, "truncated to fit context window")}
+            self.stats["truncated"] += 1
+        return out
+
+    def _protected(self, messages: list[dict[str, Any]]) -> set[int]:
+        """Indices never stubbed/evicted: system, latest user message, recent tail (whole tool pairs)."""
+        protected = {i for i, m in enumerate(messages) if m.get("role") == "system"}
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].get("role") == "user":
+                protected.add(i)
+                break
+        start = max(0, len(messages) - self.keep_recent)
+        # Do not split an assistant tool_call from its tool results
+        while start > 0 and messages[start].get("role") == "tool":
+            start -= 1
+        protected.update(range(start, len(messages)))
+        return protected
+
+    def _stub_old_tool_results(
+        self, messages: list[dict[str, Any]], protected: set[int], total: int,
+    ) -> tuple[list[dict[str, Any]], int]:
+        out = list(messages)
+        for i, msg in enumerate(out):
+            if total <= self.target:
+                break
+            if i in protected or msg.get("role") != "tool":
+                continue
+            content = str(msg.get("content") or "")
+            if len(content) <= STUB_CHARS:
+                continue
+            old = self.tokens_of(msg)
+            out[i] = {**msg, "content": content[:STUB_CHARS] + "\n...[compacted — old tool result]"}
+            total += self.tokens_of(out[i]) - old
+            self.stats["stubbed"] += 1
+        return out, total
+
+    def _evict_oldest(
+        self, messages: list[dict[str, Any]], total: int,
+    ) -> tuple[list[dict[str, Any]], int]:
+        from tools.context_compaction import COMPACTION_SUMMARY_TEMPLATE, _extract_summary
+
+        protected = self._protected(messages)
+        system = [m for m in messages if m.get("role") == "system"]
+
+        # Turn groups: an assistant tool_call travels with the tool results after it
+        groups: list[list[int]] = []
+        for i, msg in enumerate(messages):
+            if msg.get("role") == "system":
+                continue
+            if msg.get("role") == "tool" and groups and messages[groups[-1][0]].get("tool_calls"):
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+
+        evicted: list[dict[str, Any]] = []
+        evicted_idx: set[int] = set()
+        prior_count = 0
+        for group in groups:
+            if total + _SUMMARY_RESERVE <= self.target:
+                break
+            if protected.intersection(group):
+                continue
+            for i in group:
+                msg = messages[i]
+                content = msg.get("content")
+                if isinstance(content, str) and content.startswith(_SUMMARY_MARKER):
+                    m = _SUMMARY_COUNT_RE.search(content)
+                    prior_count += int(m.group(1)) if m else 0
+                else:
+                    evicted.append(msg)
+                evicted_idx.add(i)
+                total -= self.tokens_of(msg)
+
+        if not evicted_idx:
+            return messages, total
+
+        parts = _extract_summary(evicted)
+        parts["msg_count"] = str(len(evicted) + prior_count)
+        summary = {"role": "user", "content": COMPACTION_SUMMARY_TEMPLATE.format(**parts)}
+        total += self.tokens_of(summary)
+        self.stats["evicted"] += len(evicted)
+
+        rest = [m for i, m in enumerate(messages) if m.get("role") != "system" and i not in evicted_idx]
+        return system + [summary] + rest, total
+
+    def _cut_largest(
+        self, messages: list[dict[str, Any]], total: int,
+    ) -> tuple[list[dict[str, Any]], int]:
+        out = list(messages)
+        candidates = sorted(
+            (i for i, m in enumerate(out) if m.get("role") != "system" and isinstance(m.get("content"), str)),
+            key=lambda i: self.tokens_of(out[i]),
+            reverse=True,
+        )
+        for i in candidates:
+            if total <= self.budget:
+                break
+            msg = out[i]
+            old = self.tokens_of(msg)
+            keep = max(256, old - (total - self.budget))
+            out[i] = {**msg, "content": _cut(msg["content"], keep, "truncated to fit context window")}
+            total += self.tokens_of(out[i]) - old
+            self.stats["truncated"] += 1
+        return out, total
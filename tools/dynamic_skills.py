@@ -14,20 +14,47 @@ Kiro Skill Format:
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from tools.cache import SingleFlight
 from tools.pg_connection import get_conn, release_conn
+from tools.skill_index import SkillIndex, skill_vector_text
 
 logger = logging.getLogger(__name__)
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 SKILLS_DIR = DATA_DIR / "skills"
 
+# Full reload interval — picks up skills written by other workers / processes
+SKILL_INDEX_TTL_SEC = float(os.getenv("SKILL_INDEX_TTL_SEC", "300"))
+
+_index = SkillIndex()
+_index_lock = threading.Lock()
+_index_loaded_at = 0.0
+_index_refreshing = False
+_refresh_tasks: set[asyncio.Task] = set()
+_seeded = False
+# Concurrent asearch_skills calls share one embedding pass over unindexed skills
+_vector_flight = SingleFlight()
+
+# Skill context cache — DB değişiklikleri başka process'ten gelirse TTL ile düşer
+SKILL_CONTEXT_TTL_SEC = float(os.getenv("SKILL_CONTEXT_TTL_SEC", "300"))
+# use_count artışları toplanıp tek transaction'da yazılır
+SKILL_USE_FLUSH_SEC = float(os.getenv("SKILL_USE_FLUSH_SEC", "5"))
+_REF_SUFFIXES = (".md", ".txt", ".json")
+_REF_MAX_CHARS = 5000
+
 
 # ── Seed ─────────────────────────────────────────────────────────
 
@@ -106,6 +133,8 @@ def create_skill(
     finally:
         release_conn(conn)
 
+    _reindex_skill(clean_id)
+
     # Write Kiro-format SKILL.md to disk
     _write_skill_to_disk(clean_id, name, description, knowledge, category, keywords)
 
@@ -132,10 +161,13 @@ def update_skill(skill_id: str, **updates) -> bool:
             cur.execute(f"UPDATE skills SET {set_clause} WHERE id = %s", values)
             updated = cur.rowcount > 0
         conn.commit()
-        return updated
     finally:
         release_conn(conn)
 
+    if updated:
+        _reindex_skill(skill_id)
+    return updated
+
 
 def delete_skill(skill_id: str) -> bool:
     """Soft-delete a skill."""
@@ -190,43 +222,46 @@ def list_skills(
 
 
 def search_skills(query: str, max_results: int = 3) -> list[dict[str, Any]]:
-    """Search skills by keyword matching."""
-    seed_builtin_skills()
-
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM skills WHERE active = TRUE")
-            rows = cur.fetchall()
-    finally:
-        release_conn(conn)
-
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
-
-    scored: list[tuple[float, dict]] = []
-    for row in rows:
-        skill = _row_to_dict(dict(row))
-        score = 0.0
-
-        for kw in skill["keywords"]:
-            kw_lower = kw.lower()
-            if kw_lower in query_lower:
-                score += 3.0
-            elif any(w in kw_lower for w in query_words):
-                score += 1.5
+    """Search skills via the in-memory BM25 index (no DB round-trip per query)."""
+    hits = get_skill_index().search(query, max_results=max_results)
+    # NOTE: use_count is NOT incremented on search — only on actual skill usage
+    # (get_skill_knowledge / get_full_skill_context). This prevents search-inflation
+    # of popularity scores in optimization_engine.rank_skills().
+    return _format_hits(hits)
 
-        if any(w in skill["name"].lower() for w in query_words):
-            score += 2.0
-        if any(w in skill["description"].lower() for w in query_words):
-            score += 1.0
-        score += skill["use_count"] * 0.05
 
-        if score > 0:
-            scored.append((score, skill))
+async def asearch_skills(query: str, max_results: int = 3) -> list[dict[str, Any]]:
+    """Like search_skills, blended with embedding similarity when available.
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    results = [
+    Skill vectors are embedded lazily (cached by tools.embedding_cache); if the
+    embedding service is down this degrades to plain BM25.
+    """
+    if not _index_loaded_at:
+        # İlk yükleme (seed + full SELECT) event loop'u bloklamasın
+        await asyncio.to_thread(get_skill_index)
+    index = get_skill_index()
+    query_vector = None
+    try:
+        from tools.embedding_service import get_embedding_service
+        svc = get_embedding_service()
+
+        async def embed_missing() -> None:
+            missing = index.missing_vectors()
+            if missing:
+                vectors = await svc.embed_many([skill_vector_text(m) for m in missing], input_type="passage")
+                for skill, vector in zip(missing, vectors):
+                    index.set_vector(skill["id"], vector)
+
+        if index.missing_vectors():
+            await _vector_flight.do("skill-vectors", embed_missing)
+        query_vector = await svc.embed(query)
+    except Exception as e:
+        logger.debug(f"Skill semantic search unavailable, using BM25 only: {e}")
+    return _format_hits(index.search(query, max_results=max_results, query_vector=query_vector))
+
+
+def _format_hits(hits: list[tuple[float, dict[str, Any]]]) -> list[dict[str, Any]]:
+    return [
         {
             "id": s["id"],
             "name": s["name"],
@@ -235,32 +270,167 @@ def search_skills(query: str, max_results: int = 3) -> list[dict[str, Any]]:
             "source": s["source"],
             "relevance_score": round(sc, 1),
         }
-        for sc, s in scored[:max_results]
+        for sc, s in hits
     ]
 
-    # NOTE: use_count is NOT incremented on search — only on actual skill usage
-    # (get_skill_knowledge / get_full_skill_context). This prevents search-inflation
-    # of popularity scores in optimization_engine.rank_skills().
-    return results
 
+# ── Search Index ─────────────────────────────────────────────────
 
-def _increment_use_count(skill_id: str) -> None:
-    """Increment use_count when a skill is actually used (not just searched)."""
+def get_skill_index() -> SkillIndex:
+    """Return the skill index.
+
+    The first call loads it synchronously. After the TTL the stale index keeps
+    being served while a single background refresh rebuilds it off the caller.
+    """
+    global _index_refreshing
+    if _index_loaded_at and time.monotonic() - _index_loaded_at < SKILL_INDEX_TTL_SEC:
+        return _index
+    with _index_lock:
+        if not _index_loaded_at:
+            rebuild_skill_index()
+            return _index
+        if _index_refreshing or time.monotonic() - _index_loaded_at < SKILL_INDEX_TTL_SEC:
+            return _index
+        _index_refreshing = True
+    _schedule_index_refresh()
+    return _index
+
+
+def _schedule_index_refresh() -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        threading.Thread(target=_refresh_skill_index, name="skill-index-refresh", daemon=True).start()
+        return
+    task = loop.create_task(asyncio.to_thread(_refresh_skill_index))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+def _refresh_skill_index() -> None:
+    global _index_loaded_at, _index_refreshing
+    try:
+        rebuild_skill_index()
+    except Exception as e:
+        # DB geçici olarak yok — eski index ile devam, bir TTL sonra tekrar dene
+        logger.warning(f"Skill index refresh failed, serving stale index: {e}")
+        _index_loaded_at = time.monotonic()
+    finally:
+        _index_refreshing = False
+
+
+def rebuild_skill_index() -> int:
+    """Seed builtins (once per process) and load all active skills into the index."""
+    global _index_loaded_at, _seeded
+    if not _seeded:
+        seed_builtin_skills()
+        _seeded = True
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT * FROM skills WHERE active = TRUE")
+            rows = cur.fetchall()
+    finally:
+        release_conn(conn)
+
+    _index.build(_index_doc(_row_to_dict(dict(r))) for r in rows)
+    _index_loaded_at = time.monotonic()
+    return len(_index)
+
+
+def _reindex_skill(skill_id: str) -> None:
+    """Re-read one skill row and upsert/remove it in the index."""
+    invalidate_skill_context(skill_id)
     try:
         conn = get_conn()
         try:
             with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE skills SET use_count = use_count + 1 WHERE id = %s",
-                    (skill_id,),
-                )
-            conn.commit()
+                cur.execute("SELECT * FROM skills WHERE id = %s", (skill_id,))
+                row = cur.fetchone()
         finally:
             release_conn(conn)
+        skill = _row_to_dict(dict(row)) if row else None
+        if skill and skill["active"]:
+            _index.upsert(_index_doc(skill))
+        else:
+            _index.remove(skill_id)
+    except Exception as e:
+        # Index bir sonraki TTL yenilemesinde düzelir
+        logger.warning(f"Skill index update failed for {skill_id}: {e}")
+
+
+def _index_doc(skill: dict[str, Any]) -> dict[str, Any]:
+    return {
+        k: skill.get(k)
+        for k in ("id", "name", "category", "description", "keywords", "source", "use_count")
+    }
+
+
+class _UseCountBuffer:
+    """Debounced use_count increments: one batched UPDATE per flush window."""
+
+    def __init__(self, flush_sec: float = SKILL_USE_FLUSH_SEC) -> None:
+        self._flush_sec = flush_sec
+        self._pending: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self.flushes = 0
+
+    def add(self, skill_id: str) -> None:
+        with self._lock:
+            self._pending[skill_id] += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self._flush_sec, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(self._pending.values())
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        if not pending:
+            return 0
+        try:
+            conn = get_conn()
+            try:
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        "UPDATE skills SET use_count = use_count + %s WHERE id = %s",
+                        [(n, sid) for sid, n in sorted(pending.items())],
+                    )
+                conn.commit()
+            finally:
+                release_conn(conn)
+            self.flushes += 1
+        except Exception as e:
+            logger.debug(f"Skill use_count flush failed ({len(pending)} skills): {e}")
+        return sum(pending.values())
+
+
+_use_counts = _UseCountBuffer()
+
+
+def _increment_use_count(skill_id: str) -> None:
+    """Increment use_count when a skill is actually used (not just searched)."""
+    try:
+        _use_counts.add(skill_id)
+        _index.bump_use_count(skill_id)
     except Exception:
         pass  # Never break skill usage for metrics
 
 
+def flush_skill_use_counts() -> int:
+    """Write buffered use_count increments now (shutdown / tests)."""
+    return _use_counts.flush()
+
+
 def get_skill_knowledge(skill_id: str) -> str | None:
     skill = get_skill(skill_id)
     if skill:
@@ -461,25 +631,50 @@ def load_skill_from_disk(skill_id: str) -> dict[str, Any] | None:
     }
 
 
-def get_full_skill_context(skill_id: str) -> str | None:
-    """
-    Get complete skill context for agent injection.
-    Loads SKILL.md knowledge + any reference files content.
-    Returns formatted string ready for system prompt injection.
-    """
+@dataclass
+class _SkillContextEntry:
+    fingerprint: tuple
+    context: str | None
+    loaded_at: float
+
+
+_context_cache: dict[str, _SkillContextEntry] = {}
+_context_lock = threading.Lock()
+_context_stats = {"hits": 0, "misses": 0}
+
+
+def _skill_files_fingerprint(skill_id: str) -> tuple:
+    """mtimes of SKILL.md + reference files — stat only, no reads."""
+    skill_dir = SKILLS_DIR / skill_id
+    try:
+        skill_md = (skill_dir / "SKILL.md").stat().st_mtime_ns
+    except OSError:
+        skill_md = None
+    refs: list[tuple[str, int, int]] = []
+    try:
+        with os.scandir(skill_dir / "references") as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(_REF_SUFFIXES):
+                    st = entry.stat()
+                    refs.append((entry.name, st.st_mtime_ns, st.st_size))
+    except OSError:
+        pass
+    return (skill_md, tuple(sorted(refs)))
+
+
+def _load_skill_context(skill_id: str) -> str | None:
     # Try DB first
     skill = get_skill(skill_id)
     knowledge = skill["knowledge"] if skill else None
 
     # Enrich with disk references if available
-    skill_dir = SKILLS_DIR / skill_id
-    refs_dir = skill_dir / "references"
+    refs_dir = SKILLS_DIR / skill_id / "references"
     ref_content = ""
     if refs_dir.exists():
         for ref_file in sorted(refs_dir.iterdir()):
-            if ref_file.is_file() and ref_file.suffix in (".md", ".txt", ".json"):
+            if ref_file.is_file() and ref_file.suffix in _REF_SUFFIXES:
                 try:
-                    text = ref_file.read_text(encoding="utf-8")[:5000]
+                    text = ref_file.read_text(encoding="utf-8")[:_REF_MAX_CHARS]
                     ref_content += f"\n\n## Reference: {ref_file.name}\n{text}"
                 except Exception:
                     pass
@@ -487,8 +682,6 @@ def get_full_skill_context(skill_id: str) -> str | None:
     if not knowledge and not ref_content:
         return None
 
-    _increment_use_count(skill_id)
-
     parts = []
     if knowledge:
         parts.append(knowledge)
@@ -497,6 +690,51 @@ def get_full_skill_context(skill_id: str) -> str | None:
     return "\n".join(parts)
 
 
+def get_full_skill_context(skill_id: str) -> str | None:
+    """
+    Get complete skill context for agent injection.
+    Loads SKILL.md knowledge + any reference files content.
+    Returns formatted string ready for system prompt injection.
+
+    Cached per skill; an entry is reused while SKILL.md / reference mtimes
+    are unchanged and it is younger than SKILL_CONTEXT_TTL_SEC.
+    """
+    fingerprint = _skill_files_fingerprint(skill_id)
+    now = time.monotonic()
+    with _context_lock:
+        entry = _context_cache.get(skill_id)
+    if entry and entry.fingerprint == fingerprint and now - entry.loaded_at < SKILL_CONTEXT_TTL_SEC:
+        _context_stats["hits"] += 1
+        context = entry.context
+    else:
+        _context_stats["misses"] += 1
+        context = _load_skill_context(skill_id)
+        with _context_lock:
+            _context_cache[skill_id] = _SkillContextEntry(fingerprint, context, now)
+
+    if context is not None:
+        _increment_use_count(skill_id)
+    return context
+
+
+def invalidate_skill_context(skill_id: str | None = None) -> None:
+    """Drop cached context for one skill (or all)."""
+    with _context_lock:
+        if skill_id is None:
+            _context_cache.clear()
+        else:
+            _context_cache.pop(skill_id, None)
+
+
+def get_skill_context_stats() -> dict[str, Any]:
+    return {
+        **_context_stats,
+        "cached": len(_context_cache),
+        "pending_use_counts": _use_counts.pending(),
+        "use_count_flushes": _use_counts.flushes,
+    }
+
+
 # ── Kiro Skill Format — Disk-based SKILL.md packages ────────────
 
 def create_skill_package(
@@ -0,0 +1,313 @@
+"""
+Content-addressed embedding cache — in-process LRU + on-disk SQLite tier.
+
+Keyed by (model, dimensions, input_type, sha256(text)), so identical strings are
+embedded once no matter which subsystem asks (memory recall, intent-pattern
+recall, RAG chunks across re-uploads, semantic response cache, ...).
+
+Vectors are stored as float32 blobs. Lookups are batched (one SELECT per call).
+The async API (aget_many/aput_many) answers memory hits inline and runs the
+SQLite tier in a worker thread so the event loop never waits on disk. The disk
+tier is pruned by age (EMBED_CACHE_TTL_DAYS) and row cap (EMBED_CACHE_MAX_ROWS).
+
+Usage:
+    from tools.embedding_cache import get_embedding_cache
+
+    cache = get_embedding_cache()
+    key = cache.make_key(model, 1024, "query", text)
+    hits = await cache.aget_many([key])
+    await cache.aput_many({key: vector})
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DB_PATH = DATA_DIR / "embedding_cache.db"
+
+EMBED_CACHE_MEMORY_ITEMS = int(os.getenv("EMBED_CACHE_MEMORY_ITEMS", "5000"))
+EMBED_CACHE_DISK_ENABLED = os.getenv("EMBED_CACHE_DISK_ENABLED", "true").lower() == "true"
+EMBED_CACHE_MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", "200000"))
+EMBED_CACHE_TTL_DAYS = float(os.getenv("EMBED_CACHE_TTL_DAYS", "30"))
+# Rows written between two prune passes
+EMBED_CACHE_PRUNE_EVERY = int(os.getenv("EMBED_CACHE_PRUNE_EVERY", "1000"))
+
+
+def _pack(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> list[float]:
+    arr = array("f")
+    arr.frombytes(blob)
+    return arr.tolist()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU → SQLite) cache of embedding vectors."""
+
+    def __init__(
+        self,
+        max_memory_items: int = EMBED_CACHE_MEMORY_ITEMS,
+        db_path: Path | None = DB_PATH if EMBED_CACHE_DISK_ENABLED else None,
+        max_rows: int = EMBED_CACHE_MAX_ROWS,
+        ttl_days: float = EMBED_CACHE_TTL_DAYS,
+    ) -> None:
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+        self._max_items = max(1, max_memory_items)
+        self._db_path = db_path
+        self._conn: sqlite3.Connection | None = None
+        self._max_rows = max(1, max_rows)
+        self._ttl_sec = ttl_days * 86400
+        # Memory tier lock is held only briefly on the event loop; SQLite has its own
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._since_prune = 0
+        self._pruned = 0
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._memory_bytes = 0
+
+    # ── Keys ─────────────────────────────────────────────────────
+
+    @staticmethod
+    def make_key(model: str, dimensions: int, input_type: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}|{dimensions}|{input_type}|{digest}"
+
+    # ── Disk tier ────────────────────────────────────────────────
+
+    def _get_conn(self) -> sqlite3.Connection | None:
+        """Return a reusable SQLite connection (WAL mode), or None if disabled/broken."""
+        if self._db_path is None:
+            return None
+        if self._conn is None:
+            try:
+                self._db_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self._db_path), check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        key         TEXT PRIMARY KEY,
+                        vector      BLOB NOT NULL,
+                        created_at  REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_created ON embeddings(created_at)")
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache disk tier disabled: {e}")
+                self._db_path = None
+                return None
+        return self._conn
+
+    def _disk_read(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        with self._db_lock:
+            conn = self._get_conn()
+            if conn is None:
+                return found
+            try:
+                for i in range(0, len(keys), 500):
+                    part = keys[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = _unpack(blob)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache read failed: {e}")
+        return found
+
+    def _disk_write(self, items: dict[str, list[float]]) -> None:
+        with self._db_lock:
+            conn = self._get_conn()
+            if conn is None:
+                return
+            try:
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    [(k, _pack(v), now) for k, v in items.items()],
+                )
+                conn.commit()
+                self._writes += len(items)
+                self._since_prune += len(items)
+                if self._since_prune >= EMBED_CACHE_PRUNE_EVERY:
+                    self._since_prune = 0
+                    self._prune(conn)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Drop rows older than the TTL, then the oldest rows beyond the row cap."""
+        cur = conn.execute("DELETE FROM embeddings WHERE created_at < ?", (time.time() - self._ttl_sec,))
+        removed = cur.rowcount
+        cur = conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_rows,),
+        )
+        removed += cur.rowcount
+        conn.commit()
+        if removed > 0:
+            self._pruned += removed
+            logger.info(f"Embedding cache pruned {removed} rows")
+
+    # ── Memory tier ──────────────────────────────────────────────
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        if key in self._lru:
+            self._lru.move_to_end(key)
+            return
+        self._lru[key] = vector
+        self._memory_bytes += len(vector) * 4
+        while len(self._lru) > self._max_items:
+            _, old = self._lru.popitem(last=False)
+            self._memory_bytes -= len(old) * 4
+
+    def _memory_lookup(self, keys: list[str]) -> tuple[dict[str, list[float]], list[str]]:
+        found: dict[str, list[float]] = {}
+        missing: list[str] = []
+        with self._lock:
+            for key in keys:
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vec
+                    self._memory_hits += 1
+                else:
+                    missing.append(key)
+        return found, missing
+
+    def _merge_disk_hits(
+        self, found: dict[str, list[float]], missing: list[str], disk: dict[str, list[float]]
+    ) -> dict[str, list[float]]:
+        with self._lock:
+            for key, vec in disk.items():
+                found[key] = vec
+                self._remember(key, vec)
+            self._disk_hits += len(disk)
+            self._misses += len(missing) - len(disk)
+        return found
+
+    def _remember_many(self, items: dict[str, list[float]]) -> None:
+        with self._lock:
+            for key, vec in items.items():
+                self._remember(key, vec)
+
+    # ── Public API ───────────────────────────────────────────────
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Return cached vectors for the given keys (missing keys are omitted)."""
+        found, missing = self._memory_lookup(keys)
+        disk = self._disk_read(missing) if missing and self._db_path is not None else {}
+        return self._merge_disk_hits(found, missing, disk)
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        """Store vectors in both tiers."""
+        if not items:
+            return
+        self._remember_many(items)
+        if self._db_path is not None:
+            self._disk_write(items)
+
+    async def aget_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """get_many for async callers: SQLite lookups run in a worker thread."""
+        found, missing = self._memory_lookup(keys)
+        disk: dict[str, list[float]] = {}
+        if missing and self._db_path is not None:
+            disk = await asyncio.to_thread(self._disk_read, missing)
+        return self._merge_disk_hits(found, missing, disk)
+
+    async def aput_many(self, items: dict[str, list[float]]) -> None:
+        """put_many for async callers: memory tier inline, SQLite write in a worker thread."""
+        if not items:
+            return
+        self._remember_many(items)
+        if self._db_path is not None:
+            await asyncio.to_thread(self._disk_write, items)
+
+    def clear(self) -> int:
+        """Clear both tiers. Returns number of in-memory entries dropped."""
+        with self._lock:
+            count = len(self._lru)
+            self._lru.clear()
+            self._memory_bytes = 0
+        with self._db_lock:
+            conn = self._get_conn()
+            if conn is not None:
+                conn.execute("DELETE FROM embeddings")
+                conn.commit()
+        return count
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss/bytes statistics."""
+        disk_entries = 0
+        disk_bytes = 0
+        with self._db_lock:
+            conn = self._get_conn()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+                    ).fetchone()
+                    disk_entries, disk_bytes = int(row[0]), int(row[1])
+                except sqlite3.Error:
+                    pass
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            total = hits + self._misses
+            return {
+                "memory_entries": len(self._lru),
+                "memory_max_entries": self._max_items,
+                "memory_bytes": self._memory_bytes,
+                "disk_enabled": self._db_path is not None,
+                "disk_entries": disk_entries,
+                "disk_bytes": disk_bytes,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "writes": self._writes,
+                "disk_pruned": self._pruned,
+                "hit_rate": round(hits / total, 4) if total > 0 else 0.0,
+            }
+
+    async def aclear(self) -> int:
+        """clear() for async callers: the SQLite delete runs in a worker thread."""
+        return await asyncio.to_thread(self.clear)
+
+    async def astats(self) -> dict[str, Any]:
+        """stats() for async callers: the SQLite aggregate runs in a worker thread."""
+        return await asyncio.to_thread(self.stats)
+
+
+# ── Module-level Singleton ───────────────────────────────────────
+
+_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide EmbeddingCache singleton."""
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
@@ -0,0 +1,291 @@
+"""
+Shared embedding client — pooled HTTP connection, batching and request coalescing.
+
+All embedding traffic (memory, RAG, ...) goes through one service per event loop:
+- one keep-alive ``httpx.AsyncClient`` instead of a new client (and TLS handshake) per call
+- ``embed_many`` splits inputs into batches for the list-accepting ``/embeddings`` endpoint
+  and runs a bounded number of batches in parallel
+- ``embed`` coalesces single requests that arrive within a few milliseconds into one batch
+- every lookup consults the content-addressed ``tools.embedding_cache`` first
+
+Failures keep the old contract: the affected inputs resolve to ``None``.
+
+Usage:
+    from tools.embedding_service import get_embedding_service
+
+    svc = get_embedding_service()
+    vec = await svc.embed("python nedir?")
+    vecs = await svc.embed_many(chunks, input_type="query")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import weakref
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from tools.embedding_cache import EmbeddingCache, get_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+EMBED_MODEL = "nvidia/llama-3.2-nv-embedqa-1b-v2"
+EMBED_DIMENSIONS = 1024  # Matryoshka: request 1024-dim from 2048-native model
+MAX_INPUT_CHARS = 8000
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_MAX_PARALLEL_BATCHES = int(os.getenv("EMBED_MAX_PARALLEL_BATCHES", "4"))
+EMBED_COALESCE_MS = float(os.getenv("EMBED_COALESCE_MS", "5"))
+
+
+@dataclass
+class _LoopState:
+    """Per-event-loop resources (httpx clients and futures are loop-bound)."""
+    client: httpx.AsyncClient
+    batch_sem: asyncio.Semaphore
+    pending: dict[str, list[tuple[str, asyncio.Future]]] = field(default_factory=dict)
+    flush_handles: dict[str, asyncio.TimerHandle] = field(default_factory=dict)
+
+
+class EmbeddingService:
+    """Batched, coalescing client for the NVIDIA ``/embeddings`` endpoint."""
+
+    def __init__(
+        self,
+        model: str = EMBED_MODEL,
+        dimensions: int = EMBED_DIMENSIONS,
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_parallel_batches: int = EMBED_MAX_PARALLEL_BATCHES,
+        coalesce_ms: float = EMBED_COALESCE_MS,
+        cache: EmbeddingCache | None = None,
+    ) -> None:
+        self.model = model
+        self.dimensions = dimensions
+        self._batch_size = max(1, batch_size)
+        self._max_parallel = max(1, max_parallel_batches)
+        self._coalesce_s = max(0.0, coalesce_ms) / 1000.0
+        self._states: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._requests = 0
+        self._batches = 0
+        self._inputs = 0
+        self._failures = 0
+        self._cache = cache
+        # Strong refs to in-flight _resolve tasks (the loop only keeps weak refs)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def cache(self) -> EmbeddingCache:
+        if self._cache is None:
+            self._cache = get_embedding_cache()
+        return self._cache
+
+    def _key(self, text: str, input_type: str) -> str:
+        return self.cache.make_key(self.model, self.dimensions, input_type, text)
+
+    # ── Loop-bound resources ─────────────────────────────────────
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None or state.client.is_closed:
+            state = _LoopState(
+                client=httpx.AsyncClient(
+                    timeout=30.0,
+                    limits=httpx.Limits(max_connections=self._max_parallel * 2, max_keepalive_connections=self._max_parallel),
+                ),
+                batch_sem=asyncio.Semaphore(self._max_parallel),
+            )
+            self._states[loop] = state
+        return state
+
+    # ── HTTP ─────────────────────────────────────────────────────
+
+    async def _post_batch(self, texts: list[str], input_type: str) -> list[list[float] | None]:
+        """Embed one batch (<= batch_size). Returns one vector (or None) per input."""
+        from config import NVIDIA_API_KEY, NVIDIA_BASE_URL
+        if not NVIDIA_API_KEY:
+            return [None] * len(texts)
+
+        state = self._state()
+        async with state.batch_sem:
+            self._batches += 1
+            self._inputs += len(texts)
+            try:
+                resp = await state.client.post(
+                    f"{NVIDIA_BASE_URL}/embeddings",
+                    headers={
+                        "Authorization": f"Bearer {NVIDIA_API_KEY}",
+                        "Content-Type": "application/json",
+                    },
+                    json={
+                        "model": self.model,
+                        "input": texts,
+                        "encoding_format": "float",
+                        "input_type": input_type,
+                        "truncate": "END",
+                        "dimensions": self.dimensions,
+                    },
+                )
+                resp.raise_for_status()
+                data = resp.json()["data"]
+            except Exception as e:
+                self._failures += 1
+                logger.warning(f"Embedding API failed ({len(texts)} inputs): {e}")
+                return [None] * len(texts)
+
+        out: list[list[float] | None] = [None] * len(texts)
+        for pos, item in enumerate(data):
+            idx = item.get("index", pos)
+            if 0 <= idx < len(texts):
+                out[idx] = item.get("embedding")
+        return out
+
+    # ── Public API ───────────────────────────────────────────────
+
+    async def embed_many(
+        self, texts: list[str], input_type: str = "query"
+    ) -> list[list[float] | None]:
+        """Embed many texts in parallel batches. Empty inputs map to None."""
+        results: list[list[float] | None] = [None] * len(texts)
+        todo = [
+            (i, (t or "").strip()[:MAX_INPUT_CHARS])
+            for i, t in enumerate(texts)
+            if (t or "").strip()
+        ]
+        if not todo:
+            return results
+        self._requests += len(todo)
+
+        keys = [self._key(t, input_type) for _, t in todo]
+        cached = await self.cache.aget_many(keys)
+        # Unique uncached texts only
+        misses: dict[str, str] = {}
+        for (i, t), key in zip(todo, keys):
+            vec = cached.get(key)
+            if vec is not None:
+                results[i] = vec
+            else:
+                misses.setdefault(t, key)
+        if not misses:
+            return results
+
+        texts = list(misses)
+        batches = [texts[i:i + self._batch_size] for i in range(0, len(texts), self._batch_size)]
+        vectors = await asyncio.gather(*(self._post_batch(b, input_type) for b in batches))
+        fresh: dict[str, list[float]] = {}
+        for batch, vecs in zip(batches, vectors):
+            for t, vec in zip(batch, vecs):
+                if vec is not None:
+                    fresh[misses[t]] = vec
+        await self.cache.aput_many(fresh)
+
+        for (i, t), key in zip(todo, keys):
+            if results[i] is None:
+                results[i] = fresh.get(key)
+        return results
+
+    async def embed(self, text: str, input_type: str = "query") -> list[float] | None:
+        """Embed one text; concurrent calls within the coalesce window share a batch."""
+        clean = (text or "").strip()[:MAX_INPUT_CHARS]
+        if not clean:
+            return None
+        self._requests += 1
+
+        key = self._key(clean, input_type)
+        cached = (await self.cache.aget_many([key])).get(key)
+        if cached is not None:
+            return cached
+
+        state = self._state()
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        queue = state.pending.setdefault(input_type, [])
+        queue.append((clean, fut))
+
+        if len(queue) >= self._batch_size:
+            self._flush(state, input_type)
+        elif input_type not in state.flush_handles:
+            state.flush_handles[input_type] = loop.call_later(
+                self._coalesce_s, self._flush, state, input_type
+            )
+        return await fut
+
+    def _flush(self, state: _LoopState, input_type: str) -> None:
+        handle = state.flush_handles.pop(input_type, None)
+        if handle is not None:
+            handle.cancel()
+        queue = state.pending.pop(input_type, [])
+        if queue:
+            task = asyncio.get_running_loop().create_task(self._resolve(queue, input_type))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, queue: list[tuple[str, asyncio.Future]], input_type: str) -> None:
+        # Identical texts in one window are sent once
+        unique: dict[str, int] = {}
+        for text, _ in queue:
+            unique.setdefault(text, len(unique))
+        try:
+            vectors = await self._post_batch(list(unique), input_type)
+        except Exception as e:
+            logger.warning(f"Embedding batch failed: {e}")
+            vectors = [None] * len(unique)
+        # Waiters are released before the (off-loop) cache write
+        for text, fut in queue:
+            if not fut.done():
+                fut.set_result(vectors[unique[text]])
+        await self.cache.aput_many({
+            self._key(text, input_type): vectors[idx]
+            for text, idx in unique.items()
+            if vectors[idx] is not None
+        })
+
+    async def aclose(self) -> None:
+        """Close the running loop's HTTP client.
+
+        Must be awaited before a short-lived loop (``asyncio.run`` in a sync
+        wrapper) ends, otherwise its connection pool and sockets leak.
+        """
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is None:
+            return
+        for handle in state.flush_handles.values():
+            handle.cancel()
+        await state.client.aclose()
+
+    def _client_stats(self) -> dict[str, Any]:
+        return {
+            "model": self.model,
+            "dimensions": self.dimensions,
+            "requests": self._requests,
+            "batches": self._batches,
+            "inputs_sent": self._inputs,
+            "failures": self._failures,
+            "avg_batch_size": round(self._inputs / self._batches, 2) if self._batches else 0.0,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._client_stats(), "cache": self.cache.stats()}
+
+    async def astats(self) -> dict[str, Any]:
+        """stats() for async callers: the cache's SQLite query runs off the loop."""
+        return {**self._client_stats(), "cache": await self.cache.astats()}
+
+
+# ── Module-level Singleton ───────────────────────────────────────
+
+_service: EmbeddingService | None = None
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the process-wide EmbeddingService singleton."""
+    global _service
+    if _service is None:
+        _service = EmbeddingService()
+    return _service
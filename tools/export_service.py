@@ -1,6 +1,11 @@
 """
 Export Service — Professional PDF & Markdown export with Turkish character support.
 Uses ReportLab for PDF generation with proper pagination, headers, and Unicode fonts.
+
+Long reports can be exported incrementally: markdown is parsed line by line
+into a small flowable window (``write_pdf`` / ``export_pdf_file``) and HTML is
+yielded in chunks (``iter_html``), so neither the flowable list nor the full
+HTML string is ever held in memory at once.
 """
 
 from __future__ import annotations
@@ -8,8 +13,10 @@ from __future__ import annotations
 import io
 import os
 import re
+import tempfile
+from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterable, Iterator
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -99,6 +106,17 @@ def _get_font_name(bold: bool = False) -> str:
 
 # ── PDF Styles ───────────────────────────────────────────────────
 
+_STYLES: dict[str, ParagraphStyle] | None = None
+
+
+def _get_styles() -> dict[str, ParagraphStyle]:
+    """Paragraph styles, built once per process (fonts are registered on first use)."""
+    global _STYLES
+    if _STYLES is None:
+        _STYLES = _build_styles()
+    return _STYLES
+
+
 def _build_styles() -> dict[str, ParagraphStyle]:
     """Build PDF paragraph styles with Turkish font support."""
     font = _get_font_name()
@@ -198,14 +216,36 @@ def _escape_xml(text: str) -> str:
     return text
 
 
+MarkdownSource = str | Iterable[str]
+
+
+def _iter_lines(source: MarkdownSource) -> Iterator[str]:
+    """Yield markdown lines from a string or from an iterable of text chunks."""
+    if isinstance(source, str):
+        for line in io.StringIO(source):
+            yield line.rstrip("\n")
+        if not source or source.endswith("\n"):
+            yield ""  # str.split("\n") semantiği
+        return
+    pending = ""
+    for chunk in source:
+        pending += chunk
+        *lines, pending = pending.split("\n")
+        yield from lines
+    yield pending
+
+
 def _md_to_flowables(markdown_text: str, styles: dict) -> list:
     """Convert markdown text to ReportLab flowable elements."""
-    flowables = []
-    lines = markdown_text.split("\n")
+    return list(_iter_md_flowables(markdown_text, styles))
+
+
+def _iter_md_flowables(markdown_text: MarkdownSource, styles: dict) -> Iterator[Any]:
+    """Convert markdown to ReportLab flowables one line at a time."""
     in_code_block = False
     code_buffer = []
 
-    for line in lines:
+    for line in _iter_lines(markdown_text):
         stripped = line.strip()
 
         # Code block toggle
@@ -214,8 +254,8 @@ def _md_to_flowables(markdown_text: str, styles: dict) -> list:
                 # End code block
                 code_text = _escape_xml("\n".join(code_buffer))
                 if code_text.strip():
-                    flowables.append(Paragraph(code_text.replace("\n", "<br/>"), styles["code"]))
-                    flowables.append(Spacer(1, 4))
+                    yield Paragraph(code_text.replace("\n", "<br/>"), styles["code"])
+                    yield Spacer(1, 4)
                 code_buffer = []
                 in_code_block = False
             else:
@@ -228,33 +268,33 @@ def _md_to_flowables(markdown_text: str, styles: dict) -> list:
 
         # Empty line
         if not stripped:
-            flowables.append(Spacer(1, 4))
+            yield Spacer(1, 4)
             continue
 
         # Horizontal rule
         if stripped in ("---", "***", "___"):
-            flowables.append(HRFlowable(width="100%", thickness=0.5, color=HexColor("#cccccc")))
-            flowables.append(Spacer(1, 6))
+            yield HRFlowable(width="100%", thickness=0.5, color=HexColor("#cccccc"))
+            yield Spacer(1, 6)
             continue
 
         # Headers
         if stripped.startswith("### "):
             text = _escape_xml(stripped[4:])
-            flowables.append(Paragraph(text, styles["h3"]))
+            yield Paragraph(text, styles["h3"])
             continue
         if stripped.startswith("## "):
             text = _escape_xml(stripped[3:])
-            flowables.append(Paragraph(text, styles["h2"]))
+            yield Paragraph(text, styles["h2"])
             continue
         if stripped.startswith("# "):
             text = _escape_xml(stripped[2:])
-            flowables.append(Paragraph(text, styles["h1"]))
+            yield Paragraph(text, styles["h1"])
             continue
 
         # Bullet points
         if stripped.startswith(("- ", "* ", "• ")):
             text = _escape_xml(stripped[2:])
-            flowables.append(Paragraph(f"• {text}", styles["bullet"]))
+            yield Paragraph(f"• {text}", styles["bullet"])
             continue
 
         # Numbered lists
@@ -262,7 +302,7 @@ def _md_to_flowables(markdown_text: str, styles: dict) -> list:
         if num_match:
             num, text = num_match.groups()
             text = _escape_xml(text)
-            flowables.append(Paragraph(f"{num}. {text}", styles["bullet"]))
+            yield Paragraph(f"{num}. {text}", styles["bullet"])
             continue
 
         # Checkbox items
@@ -270,7 +310,7 @@ def _md_to_flowables(markdown_text: str, styles: dict) -> list:
             checked = stripped[3] in ("x", "X")
             mark = "☑" if checked else "☐"
             text = _escape_xml(stripped[6:])
-            flowables.append(Paragraph(f"{mark} {text}", styles["bullet"]))
+            yield Paragraph(f"{mark} {text}", styles["bullet"])
             continue
 
         # Bold text inline
@@ -278,9 +318,7 @@ def _md_to_flowables(markdown_text: str, styles: dict) -> list:
         # Convert **bold** to <b>bold</b>
         text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
 
-        flowables.append(Paragraph(text, styles["body"]))
-
-    return flowables
+        yield Paragraph(text, styles["body"])
 
 
 # ── PDF Generation ───────────────────────────────────────────────
@@ -305,17 +343,59 @@ def _header_footer(canvas, doc):
     canvas.restoreState()
 
 
-def generate_pdf(markdown_content: str, title: str = "Rapor") -> bytes:
-    """
-    Generate a professional PDF from markdown content.
-    Returns PDF as bytes.
+_FLOWABLE_WINDOW = int(os.getenv("EXPORT_FLOWABLE_WINDOW", "64"))
+
+
+class _FlowableFeed(list):
+    """Flowable list that refills itself from a generator as ReportLab consumes it.
+
+    ``BaseDocTemplate.build`` pops from the front and checks ``len()`` every
+    step, so keeping a small look-ahead window (for keepWithNext/splitting) is
+    enough — laid-out pages are flushed to the canvas as we go.
     """
-    _register_fonts()
-    styles = _build_styles()
 
-    buffer = io.BytesIO()
+    def __init__(self, source: Iterator[Any], window: int = _FLOWABLE_WINDOW) -> None:
+        super().__init__()
+        self._source = source
+        self._window = max(2, window)
+        self._exhausted = False
+
+    def __len__(self) -> int:
+        if not self._exhausted and super().__len__() < self._window:
+            for f in self._source:
+                self.append(f)
+                if super().__len__() >= self._window * 2:
+                    break
+            else:
+                self._exhausted = True
+        return super().__len__()
+
+
+def _iter_pdf_flowables(markdown_content: MarkdownSource, title: str, styles: dict) -> Iterator[Any]:
+    # Title page elements
+    yield Spacer(1, 3 * cm)
+    yield Paragraph(_escape_xml(title), styles["title"])
+    yield Spacer(1, 0.5 * cm)
+
+    date_str = datetime.now().strftime("%d %B %Y, %H:%M")
+    yield Paragraph(f"Oluşturulma: {date_str}", styles["subtitle"])
+    yield Paragraph("Multi-Agent Ops Center", styles["subtitle"])
+    yield Spacer(1, 1 * cm)
+    yield HRFlowable(width="60%", thickness=1, color=HexColor("#0f3460"))
+    yield Spacer(1, 1 * cm)
+
+    # Content
+    yield from _iter_md_flowables(markdown_content, styles)
+
+
+def write_pdf(markdown_content: MarkdownSource, dest: str | Path | IO[bytes], title: str = "Rapor") -> None:
+    """
+    Render markdown (a string or an iterable of text chunks) to a PDF file or
+    binary stream without materialising the whole flowable list.
+    """
+    styles = _get_styles()
     doc = SimpleDocTemplate(
-        buffer,
+        str(dest) if isinstance(dest, Path) else dest,
         pagesize=A4,
         topMargin=2 * cm,
         bottomMargin=2.5 * cm,
@@ -324,156 +404,149 @@ def generate_pdf(markdown_content: str, title: str = "Rapor") -> bytes:
         title=title,
         author="Multi-Agent Ops Center",
     )
+    flowables = _FlowableFeed(_iter_pdf_flowables(markdown_content, title, styles))
+    doc.build(flowables, onFirstPage=_header_footer, onLaterPages=_header_footer)
 
-    flowables = []
-
-    # Title page elements
-    flowables.append(Spacer(1, 3 * cm))
-    flowables.append(Paragraph(_escape_xml(title), styles["title"]))
-    flowables.append(Spacer(1, 0.5 * cm))
-
-    from datetime import datetime
-    date_str = datetime.now().strftime("%d %B %Y, %H:%M")
-    flowables.append(Paragraph(f"Oluşturulma: {date_str}", styles["subtitle"]))
-    flowables.append(Paragraph("Multi-Agent Ops Center", styles["subtitle"]))
-    flowables.append(Spacer(1, 1 * cm))
-    flowables.append(HRFlowable(width="60%", thickness=1, color=HexColor("#0f3460")))
-    flowables.append(Spacer(1, 1 * cm))
-
-    # Content
-    content_flowables = _md_to_flowables(markdown_content, styles)
-    flowables.extend(content_flowables)
 
-    doc.build(flowables, onFirstPage=_header_footer, onLaterPages=_header_footer)
+def generate_pdf(markdown_content: str, title: str = "Rapor") -> bytes:
+    """
+    Generate a professional PDF from markdown content.
+    Returns PDF as bytes.
+    """
+    buffer = io.BytesIO()
+    write_pdf(markdown_content, buffer, title=title)
     return buffer.getvalue()
 
-def generate_html(markdown_content: str, title: str = "Rapor") -> str:
+
+def export_pdf_file(markdown_content: MarkdownSource, title: str = "Rapor") -> Path:
     """
-    Convert markdown content to a standalone, styled HTML report.
-    Supports Turkish characters, images, tables, and code blocks.
-    Returns HTML string (UTF-8).
+    Render the PDF into a temp file and return its path — for streaming large
+    reports back to the client. The caller deletes the file when done.
     """
-    import html as html_lib
-    from datetime import datetime
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=".pdf")
+    os.close(fd)
+    try:
+        write_pdf(markdown_content, Path(path), title=title)
+    except Exception:
+        os.unlink(path)
+        raise
+    return Path(path)
 
-    date_str = datetime.now().strftime("%d %B %Y, %H:%M")
 
-    def md_to_html(text: str) -> str:
-        lines = text.split("\n")
-        out = []
-        in_code = False
-        code_lang = ""
-        code_buf: list[str] = []
+def _iter_md_html(markdown_text: MarkdownSource) -> Iterator[str]:
+    """Convert markdown to HTML fragments one line at a time."""
+    import html as html_lib
+
+    in_code = False
+    code_lang = ""
+    code_buf: list[str] = []
+    in_table = False
+    table_buf: list[str] = []
+
+    def flush_table() -> str | None:
+        nonlocal in_table, table_buf
+        if not table_buf:
+            return None
+        rows = [r for r in table_buf if r.strip()]
+        html_rows = []
+        for i, row in enumerate(rows):
+            cells = [c.strip() for c in row.strip("|").split("|")]
+            if i == 1 and all(set(c.replace("-", "").replace(":", "").replace(" ", "")) == set() for c in cells):
+                continue  # separator row
+            tag = "th" if i == 0 else "td"
+            html_rows.append("<tr>" + "".join(f"<{tag}>{html_lib.escape(c)}</{tag}>" for c in cells) + "</tr>")
+        table_buf = []
         in_table = False
-        table_buf: list[str] = []
-
-        def flush_table():
-            nonlocal in_table, table_buf
-            if not table_buf:
-                return
-            rows = [r for r in table_buf if r.strip()]
-            html_rows = []
-            for i, row in enumerate(rows):
-                cells = [c.strip() for c in row.strip("|").split("|")]
-                if i == 1 and all(set(c.replace("-", "").replace(":", "").replace(" ", "")) == set() for c in cells):
-                    continue  # separator row
-                tag = "th" if i == 0 else "td"
-                html_rows.append("<tr>" + "".join(f"<{tag}>{html_lib.escape(c)}</{tag}>" for c in cells) + "</tr>")
-            out.append('<div class="table-wrap"><table>' + "".join(html_rows) + "</table></div>")
-            table_buf = []
-            in_table = False
-
-        for line in lines:
-            stripped = line.strip()
-
-            # Code block
-            if stripped.startswith("```"):
-                if in_code:
-                    code_text = html_lib.escape("\n".join(code_buf))
-                    out.append(f'<pre><code class="language-{html_lib.escape(code_lang)}">{code_text}</code></pre>')
-                    code_buf = []
-                    in_code = False
-                    code_lang = ""
-                else:
-                    if in_table:
-                        flush_table()
-                    in_code = True
-                    code_lang = stripped[3:].strip()
-                continue
+        return '<div class="table-wrap"><table>' + "".join(html_rows) + "</table></div>"
 
+    for line in _iter_lines(markdown_text):
+        stripped = line.strip()
+
+        # Code block
+        if stripped.startswith("```"):
             if in_code:
-                code_buf.append(line)
-                continue
+                code_text = html_lib.escape("\n".join(code_buf))
+                yield f'<pre><code class="language-{html_lib.escape(code_lang)}">{code_text}</code></pre>'
+                code_buf = []
+                in_code = False
+                code_lang = ""
+            else:
+                if in_table and (table := flush_table()):
+                    yield table
+                in_code = True
+                code_lang = stripped[3:].strip()
+            continue
 
-            # Table
-            if stripped.startswith("|"):
-                in_table = True
-                table_buf.append(stripped)
-                continue
-            elif in_table:
-                flush_table()
+        if in_code:
+            code_buf.append(line)
+            continue
 
-            if not stripped:
-                out.append("<br>")
-                continue
+        # Table
+        if stripped.startswith("|"):
+            in_table = True
+            table_buf.append(stripped)
+            continue
+        elif in_table and (table := flush_table()):
+            yield table
 
-            if stripped in ("---", "***", "___"):
-                out.append("<hr>")
-                continue
+        if not stripped:
+            yield "<br>"
+            continue
 
-            # Image: ![alt](url)
-            img_match = re.match(r"!\[([^\]]*)\]\(([^)]+)\)", stripped)
-            if img_match:
-                alt, src = img_match.groups()
-                out.append(f'<figure><img src="{html_lib.escape(src)}" alt="{html_lib.escape(alt)}" loading="lazy"><figcaption>{html_lib.escape(alt)}</figcaption></figure>')
-                continue
+        if stripped in ("---", "***", "___"):
+            yield "<hr>"
+            continue
 
-            def inline(t: str) -> str:
-                # Bold+italic
-                t = re.sub(r"\*\*\*(.+?)\*\*\*", r"<strong><em>\1</em></strong>", t)
-                # Bold
-                t = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", t)
-                t = re.sub(r"__(.+?)__", r"<strong>\1</strong>", t)
-                # Italic
-                t = re.sub(r"\*(.+?)\*", r"<em>\1</em>", t)
-                t = re.sub(r"_(.+?)_", r"<em>\1</em>", t)
-                # Inline code
-                t = re.sub(r"`([^`]+)`", lambda m: f"<code>{html_lib.escape(m.group(1))}</code>", t)
-                # Links
-                t = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r'<a href="\2" target="_blank">\1</a>', t)
-                return t
-
-            esc = html_lib.escape(stripped)
-
-            if stripped.startswith("#### "):
-                out.append(f"<h4>{inline(html_lib.escape(stripped[5:]))}</h4>")
-            elif stripped.startswith("### "):
-                out.append(f"<h3>{inline(html_lib.escape(stripped[4:]))}</h3>")
-            elif stripped.startswith("## "):
-                out.append(f"<h2>{inline(html_lib.escape(stripped[3:]))}</h2>")
-            elif stripped.startswith("# "):
-                out.append(f"<h1>{inline(html_lib.escape(stripped[2:]))}</h1>")
-            elif stripped.startswith(("- ", "* ", "• ")):
-                out.append(f"<li>{inline(html_lib.escape(stripped[2:]))}</li>")
-            elif re.match(r"^\d+\.\s", stripped):
-                m = re.match(r"^(\d+)\.\s+(.+)", stripped)
-                if m:
-                    out.append(f"<li>{inline(html_lib.escape(m.group(2)))}</li>")
-            elif stripped.startswith("> "):
-                out.append(f"<blockquote>{inline(html_lib.escape(stripped[2:]))}</blockquote>")
-            else:
-                out.append(f"<p>{inline(esc)}</p>")
+        # Image: ![alt](url)
+        img_match = re.match(r"!\[([^\]]*)\]\(([^)]+)\)", stripped)
+        if img_match:
+            alt, src = img_match.groups()
+            yield f'<figure><img src="{html_lib.escape(src)}" alt="{html_lib.escape(alt)}" loading="lazy"><figcaption>{html_lib.escape(alt)}</figcaption></figure>'
+            continue
 
-        if in_table:
-            flush_table()
-        if in_code and code_buf:
-            out.append(f'<pre><code>{html_lib.escape(chr(10).join(code_buf))}</code></pre>')
+        def inline(t: str) -> str:
+            # Bold+italic
+            t = re.sub(r"\*\*\*(.+?)\*\*\*", r"<strong><em>\1</em></strong>", t)
+            # Bold
+            t = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", t)
+            t = re.sub(r"__(.+?)__", r"<strong>\1</strong>", t)
+            # Italic
+            t = re.sub(r"\*(.+?)\*", r"<em>\1</em>", t)
+            t = re.sub(r"_(.+?)_", r"<em>\1</em>", t)
+            # Inline code
+            t = re.sub(r"`([^`]+)`", lambda m: f"<code>{html_lib.escape(m.group(1))}</code>", t)
+            # Links
+            t = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r'<a href="\2" target="_blank">\1</a>', t)
+            return t
+
+        esc = html_lib.escape(stripped)
+
+        if stripped.startswith("#### "):
+            yield f"<h4>{inline(html_lib.escape(stripped[5:]))}</h4>"
+        elif stripped.startswith("### "):
+            yield f"<h3>{inline(html_lib.escape(stripped[4:]))}</h3>"
+        elif stripped.startswith("## "):
+            yield f"<h2>{inline(html_lib.escape(stripped[3:]))}</h2>"
+        elif stripped.startswith("# "):
+            yield f"<h1>{inline(html_lib.escape(stripped[2:]))}</h1>"
+        elif stripped.startswith(("- ", "* ", "• ")):
+            yield f"<li>{inline(html_lib.escape(stripped[2:]))}</li>"
+        elif re.match(r"^\d+\.\s", stripped):
+            m = re.match(r"^(\d+)\.\s+(.+)", stripped)
+            if m:
+                yield f"<li>{inline(html_lib.escape(m.group(2)))}</li>"
+        elif stripped.startswith("> "):
+            yield f"<blockquote>{inline(html_lib.escape(stripped[2:]))}</blockquote>"
+        else:
+            yield f"<p>{inline(esc)}</p>"
 
-        return "\n".join(out)
+    if in_table and (table := flush_table()):
+        yield table
+    if in_code and code_buf:
+        yield f'<pre><code>{html_lib.escape(chr(10).join(code_buf))}</code></pre>'
 
-    body = md_to_html(markdown_content)
-    safe_title = html_lib.escape(title)
 
+def _html_head(safe_title: str, date_str: str) -> str:
     return f"""<!DOCTYPE html>
 <html lang="tr">
 <head>
@@ -536,14 +609,40 @@ def generate_html(markdown_content: str, title: str = "Rapor") -> str:
     <div class="meta">Oluşturulma: {date_str} &nbsp;|&nbsp; Multi-Agent Ops Center</div>
   </header>
   <div class="content">
-{body}
-  </div>
+"""
+
+
+def _html_tail() -> str:
+    return f"""  </div>
   <footer>Multi-Agent Ops Center &copy; {datetime.now().year}</footer>
 </div>
 </body>
 </html>"""
 
 
+def iter_html(markdown_content: MarkdownSource, title: str = "Rapor") -> Iterator[str]:
+    """
+    Stream a standalone, styled HTML report chunk by chunk (UTF-8 text).
+    ``markdown_content`` may be a string or an iterable of text chunks.
+    """
+    import html as html_lib
+
+    date_str = datetime.now().strftime("%d %B %Y, %H:%M")
+    yield _html_head(html_lib.escape(title), date_str)
+    for i, fragment in enumerate(_iter_md_html(markdown_content)):
+        yield f"\n{fragment}" if i else fragment
+    yield "\n" + _html_tail()
+
+
+def generate_html(markdown_content: str, title: str = "Rapor") -> str:
+    """
+    Convert markdown content to a standalone, styled HTML report.
+    Supports Turkish characters, images, tables, and code blocks.
+    Returns HTML string (UTF-8).
+    """
+    return "".join(iter_html(markdown_content, title))
+
+
 def generate_presentation_pdf(pptx_path: str, title: str = "Sunum") -> bytes:
     """
     Read a PPTX file and generate a professional PDF with slide content.
@@ -85,8 +85,12 @@ class HeartbeatScheduler:
         return delta >= self._interval_seconds(task.frequency)
 
     async def _execute(self, task: HeartbeatTask) -> None:
+        from tools.llm_admission import BACKGROUND, llm_lane
+
         try:
-            result = await task.handler()
+            # Heartbeat LLM çağrıları kullanıcı sohbetinin arkasında sıraya girer
+            with llm_lane(BACKGROUND):
+                result = await task.handler()
             task.last_run = datetime.now(_utc)
             task.run_count += 1
             event = {
@@ -381,7 +385,10 @@ async def register_heartbeat_as_scheduled_task(
 
     # Create a wrapper handler for scheduled_tasks
     async def heartbeat_wrapper(**kwargs) -> dict:
-        return await task.handler()
+        from tools.llm_admission import BACKGROUND, llm_lane
+
+        with llm_lane(BACKGROUND):
+            return await task.handler()
 
     # Register handler with unique name
     handler_name = f"heartbeat_{task_name}"
@@ -431,7 +438,10 @@ async def sync_heartbeat_to_scheduled_tasks() -> int:
 
         async def make_wrapper(t: HeartbeatTask) -> Callable[..., Awaitable[dict]]:
             async def wrapper(**kwargs) -> dict:
-                return await t.handler()
+                from tools.llm_admission import BACKGROUND, llm_lane
+
+                with llm_lane(BACKGROUND):
+                    return await t.handler()
             return wrapper
 
         register_handler(handler_name, await make_wrapper(task_ref))
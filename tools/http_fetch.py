@@ -0,0 +1,298 @@
+"""
+Shared HTTP fetch layer — pooled client, extracted-text cache, revalidation.
+
+web_fetch and presentation research used to open a new ``httpx.AsyncClient``
+per URL and re-extract the same page for every agent. All page fetches now
+go through one fetcher:
+
+- one keep-alive client per event loop (HTTP/2 when ``h2`` is installed)
+- global + per-host concurrency limits
+- concurrent fetches of the same URL share one request (single-flight)
+- extracted title/text cached in memory (LRU) and on disk (data/fetch_cache),
+  keyed by URL; fresh for FETCH_CACHE_TTL_SEC (or the page's max-age), then
+  revalidated with If-None-Match / If-Modified-Since — a 304 reuses the text
+- ``Cache-Control: no-store`` pages are never written to the cache
+
+Usage:
+    from tools.http_fetch import get_fetcher
+
+    page = await get_fetcher().fetch("https://example.com")
+    print(page.title, page.text[:200])
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from tools.cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+FETCH_CACHE_DIR = Path(os.getenv("FETCH_CACHE_DIR", str(DATA_DIR / "fetch_cache")))
+FETCH_CACHE_TTL_SEC = float(os.getenv("FETCH_CACHE_TTL_SEC", "600"))
+FETCH_CACHE_MAX_FILES = int(os.getenv("FETCH_CACHE_MAX_FILES", "2000"))
+FETCH_MEMORY_ENTRIES = int(os.getenv("FETCH_MEMORY_ENTRIES", "256"))
+FETCH_MAX_CONCURRENCY = int(os.getenv("FETCH_MAX_CONCURRENCY", "32"))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", "4"))
+FETCH_TIMEOUT_SEC = float(os.getenv("FETCH_TIMEOUT_SEC", "12"))
+
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)", re.I)
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9,tr;q=0.8",
+}
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    status: int
+    title: str
+    text: str
+    etag: str | None = None
+    last_modified: str | None = None
+    fresh_until: float = 0.0  # wall clock — disk cache survives restarts
+    cache: str = "miss"  # miss | hit | revalidated
+
+
+@dataclass
+class _FetchLoopState:
+    client: httpx.AsyncClient
+    slots: asyncio.Semaphore
+    host_slots: dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    # Holders + waiters per host; the slot is dropped when it reaches 0
+    host_users: dict[str, int] = field(default_factory=dict)
+
+
+class HttpFetcher:
+    """Pooled, cached, de-duplicating page fetcher."""
+
+    def __init__(
+        self,
+        cache_dir: Path | str = FETCH_CACHE_DIR,
+        ttl_sec: float = FETCH_CACHE_TTL_SEC,
+        max_concurrency: int = FETCH_MAX_CONCURRENCY,
+        max_per_host: int = FETCH_MAX_PER_HOST,
+        memory_entries: int = FETCH_MEMORY_ENTRIES,
+        max_files: int = FETCH_CACHE_MAX_FILES,
+    ) -> None:
+        self._dir = Path(cache_dir)
+        self._ttl = ttl_sec
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_per_host = max(1, max_per_host)
+        self._memory: OrderedDict[str, FetchedPage] = OrderedDict()
+        self._memory_max = max(1, memory_entries)
+        self._max_files = max(1, max_files)
+        self._writes = 0
+        self._states: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _FetchLoopState] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._flights = SingleFlight()
+        self._counters = {"requests": 0, "hits": 0, "revalidated": 0, "fetched": 0, "errors": 0}
+
+    def _state(self) -> _FetchLoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None or state.client.is_closed:
+            state = _FetchLoopState(
+                client=httpx.AsyncClient(
+                    timeout=FETCH_TIMEOUT_SEC,
+                    follow_redirects=True,
+                    max_redirects=5,
+                    http2=_HTTP2,
+                    headers=DEFAULT_HEADERS,
+                    limits=httpx.Limits(
+                        max_connections=self._max_concurrency,
+                        max_keepalive_connections=self._max_concurrency,
+                    ),
+                ),
+                slots=asyncio.Semaphore(self._max_concurrency),
+            )
+            self._states[loop] = state
+        return state
+
+    # ── Cache ────────────────────────────────────────────────────
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._dir / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, page: FetchedPage) -> None:
+        self._memory[key] = page
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_max:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> FetchedPage | None:
+        try:
+            data = json.loads(self._path(key).read_text(encoding="utf-8"))
+            return FetchedPage(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write_disk(self, key: str, page: FetchedPage) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(asdict(page), ensure_ascii=False), encoding="utf-8")
+            tmp.replace(path)
+        except OSError as e:
+            logger.debug(f"Fetch cache write failed for {page.url}: {e}")
+            return
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop the oldest files beyond FETCH_CACHE_MAX_FILES."""
+        try:
+            files = sorted(self._dir.glob("*/*.json"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for path in files[: max(0, len(files) - self._max_files)]:
+            path.unlink(missing_ok=True)
+
+    async def _cached(self, key: str) -> FetchedPage | None:
+        page = self._memory.get(key)
+        if page is None:
+            page = await asyncio.to_thread(self._read_disk, key)
+            if page is not None:
+                self._remember(key, page)
+        return page
+
+    async def _store(self, key: str, page: FetchedPage) -> None:
+        self._remember(key, page)
+        await asyncio.to_thread(self._write_disk, key, page)
+
+    # ── Fetch ────────────────────────────────────────────────────
+
+    async def fetch(self, url: str) -> FetchedPage:
+        """Return the extracted page. Raises httpx errors like a plain GET would."""
+        self._counters["requests"] += 1
+        key = self._key(url)
+        cached = await self._cached(key)
+        if cached is not None and cached.fresh_until > time.time():
+            self._counters["hits"] += 1
+            return _copy(cached, "hit")
+        page, shared = await self._flights.do(key, lambda: self._fetch(url, key, cached))
+        return _copy(page, page.cache) if shared else page
+
+    async def _fetch(self, url: str, key: str, cached: FetchedPage | None) -> FetchedPage:
+        headers: dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        state = self._state()
+        host = httpx.URL(url).host or url
+        host_slot = state.host_slots.get(host)
+        if host_slot is None:
+            host_slot = state.host_slots[host] = asyncio.Semaphore(self._max_per_host)
+        state.host_users[host] = state.host_users.get(host, 0) + 1
+        try:
+            async with host_slot, state.slots:
+                resp = await state.client.get(url, headers=headers)
+        except Exception:
+            self._counters["errors"] += 1
+            raise
+        finally:
+            state.host_users[host] -= 1
+            if not state.host_users[host]:
+                del state.host_users[host]
+                del state.host_slots[host]
+
+        fresh_until = time.time() + _fresh_seconds(resp, self._ttl)
+        if resp.status_code == 304 and cached is not None:
+            self._counters["revalidated"] += 1
+            page = _copy(cached, "revalidated")
+            page.fresh_until = fresh_until
+            page.etag = resp.headers.get("etag", cached.etag)
+            page.last_modified = resp.headers.get("last-modified", cached.last_modified)
+            await self._store(key, page)
+            return page
+
+        resp.raise_for_status()
+        self._counters["fetched"] += 1
+        from tools.web_fetch import _extract_title, _html_to_text
+
+        html = resp.text
+        page = FetchedPage(
+            url=str(resp.url),
+            status=resp.status_code,
+            title=_extract_title(html),
+            text=await asyncio.to_thread(_html_to_text, html),
+            etag=resp.headers.get("etag"),
+            last_modified=resp.headers.get("last-modified"),
+            fresh_until=fresh_until,
+        )
+        if resp.status_code == 200 and "no-store" not in resp.headers.get("cache-control", "").lower():
+            await self._store(key, page)
+        return page
+
+    async def aclose(self) -> None:
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._counters,
+            "http2": _HTTP2,
+            "memory_entries": len(self._memory),
+            "single_flight": self._flights.stats(),
+        }
+
+
+def _fresh_seconds(resp: httpx.Response, default_ttl: float) -> float:
+    cache_control = resp.headers.get("cache-control", "").lower()
+    if "no-cache" in cache_control:
+        return 0.0
+    m = _MAX_AGE_RE.search(cache_control)
+    return min(float(m.group(1)), default_ttl) if m else default_ttl
+
+
+def _copy(page: FetchedPage, cache: str) -> FetchedPage:
+    copy = FetchedPage(**asdict(page))
+    copy.cache = cache
+    return copy
+
+
+# ── Module-level Singleton ───────────────────────────────────────
+
+_fetcher: HttpFetcher | None = None
+
+
+def get_fetcher() -> HttpFetcher:
+    """Get or create the global page fetcher."""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = HttpFetcher()
+    return _fetcher
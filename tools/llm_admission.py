@@ -0,0 +1,502 @@
+"""
+LLM admission control — per provider/model concurrency and tokens-per-minute.
+
+Every ``chat.completions.create`` in BaseAgent (NVIDIA/DeepSeek client and the
+PI gateway client) goes through ``get_admission_controller().admit(...)``:
+
+- key = (base_url host, model); limits come from LLM_MAX_CONCURRENCY and
+  LLM_TPM_LIMIT, overridable per host or per "host|model" via
+  LLM_ADMISSION_LIMITS (JSON, e.g. ``{"integrate.api.nvidia.com": {"concurrency": 4, "tpm": 200000}}``)
+- tokens are reserved up front from an estimate (prompt chars/4 + max_tokens)
+  and corrected to the provider-reported usage when the call returns
+- waiters are served by lane: interactive chat first, background work
+  (heartbeat, benchmarks) after; background waiters are promoted after
+  LLM_ADMISSION_AGING_SEC so they cannot starve
+- a 429 pauses the key for Retry-After seconds instead of letting callers
+  (and tools.agent_retry) hammer the provider
+- LLM_ADMISSION_BACKEND=redis additionally gates on Redis counters so the
+  limits hold across uvicorn workers (fixed one-minute TPM buckets there)
+
+Usage:
+    from tools.llm_admission import get_admission_controller, llm_lane, BACKGROUND
+
+    with llm_lane(BACKGROUND):
+        async with get_admission_controller().admit(base_url, model, tokens) as ticket:
+            resp = await client.chat.completions.create(...)
+            ticket.record_usage(resp.usage.total_tokens)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "0"))  # 0 = no token-rate limit
+LLM_ADMISSION_TIMEOUT_SEC = float(os.getenv("LLM_ADMISSION_TIMEOUT_SEC", "120"))
+LLM_ADMISSION_AGING_SEC = float(os.getenv("LLM_ADMISSION_AGING_SEC", "30"))
+LLM_ADMISSION_BACKEND = os.getenv("LLM_ADMISSION_BACKEND", "memory").strip().lower()  # memory | redis
+LLM_RATE_LIMIT_COOLDOWN_SEC = float(os.getenv("LLM_RATE_LIMIT_COOLDOWN_SEC", "5"))
+# Redis gate: an in-flight entry older than this is treated as leaked (crashed worker)
+LLM_ADMISSION_LEASE_SEC = float(os.getenv("LLM_ADMISSION_LEASE_SEC", "600"))
+
+_WINDOW_SEC = 60.0
+
+# ── Priority Lanes ───────────────────────────────────────────────
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_LANE_RANK = {INTERACTIVE: 0, BACKGROUND: 1}
+
+_current_lane: ContextVar[str] = ContextVar("llm_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def llm_lane(lane: str) -> Iterator[None]:
+    """Run LLM calls made in this context (and tasks spawned from it) in ``lane``."""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+def estimate_tokens(messages: list[dict], max_tokens: int | None = 0) -> int:
+    """Rough request size: ~4 chars per prompt token plus the completion budget."""
+    chars = 0
+    for m in messages:
+        content = m.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            chars += sum(len(p.get("text") or "") for p in content if isinstance(p, dict))
+        if m.get("tool_calls"):
+            chars += len(str(m["tool_calls"]))
+    return chars // 4 + int(max_tokens or 0)
+
+
+class AdmissionTimeout(TimeoutError):
+    """Raised when a request waited longer than LLM_ADMISSION_TIMEOUT_SEC for a slot."""
+
+
+# ── State ────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class _Limits:
+    concurrency: int
+    tpm: int
+
+
+@dataclass
+class _Waiter:
+    lane: str
+    tokens: int
+    enqueued: float
+    seq: int
+    future: asyncio.Future
+
+
+@dataclass
+class _KeyState:
+    limits: _Limits
+    in_flight: int = 0
+    window: deque = field(default_factory=deque)  # [admitted_at, tokens] — mutable for usage correction
+    paused_until: float = 0.0
+    waiters: list[_Waiter] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+    admitted: int = 0
+    timeouts: int = 0
+    rate_limited: int = 0
+
+    def tokens_in_window(self, now: float) -> int:
+        while self.window and now - self.window[0][0] >= _WINDOW_SEC:
+            self.window.popleft()
+        return sum(entry[1] for entry in self.window)
+
+
+class AdmissionTicket:
+    """A granted slot; release exactly once (``admit`` does it for you)."""
+
+    def __init__(self, controller: AdmissionController, key: str, state: _KeyState,
+                 entry: list, lane: str, queued_ms: float) -> None:
+        self._controller = controller
+        self._state = state
+        self._entry = entry
+        self._reserved = entry[1]
+        self._actual: int | None = None
+        self._released = False
+        self.key = key
+        self.lane = lane
+        self.queued_ms = queued_ms
+        self.gate_member: str | None = None
+
+    def record_usage(self, total_tokens: int | None) -> None:
+        if total_tokens:
+            self._actual = int(total_tokens)
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._state.in_flight -= 1
+        correction = 0
+        if self._actual is not None:
+            correction = self._actual - self._reserved
+            self._entry[1] = self._actual
+        self._controller._on_release(self.key, self._state, correction, self.gate_member)
+
+
+class AdmissionController:
+    """Process-wide admission queue, one slot pool + token window per (provider, model)."""
+
+    def __init__(
+        self,
+        concurrency: int = LLM_MAX_CONCURRENCY,
+        tpm: int = LLM_TPM_LIMIT,
+        overrides: dict[str, dict[str, int]] | None = None,
+        timeout_sec: float = LLM_ADMISSION_TIMEOUT_SEC,
+        aging_sec: float = LLM_ADMISSION_AGING_SEC,
+        redis_gate: _RedisGate | None = None,
+    ) -> None:
+        self._default = _Limits(max(0, concurrency), max(0, tpm))
+        self._overrides = overrides or {}
+        self._timeout = timeout_sec
+        self._aging = aging_sec
+        self._gate = redis_gate
+        self._states: dict[str, _KeyState] = {}
+        self._seq = 0
+        self._queue_ms: dict[str, deque[float]] = {lane: deque(maxlen=500) for lane in _LANE_RANK}
+
+    @staticmethod
+    def key_for(base_url: Any, model: str) -> str:
+        host = httpx.URL(str(base_url)).host or str(base_url)
+        return f"{host}|{model}"
+
+    def _state(self, key: str) -> _KeyState:
+        state = self._states.get(key)
+        if state is None:
+            host = key.split("|", 1)[0]
+            raw = self._overrides.get(key) or self._overrides.get(host) or {}
+            limits = _Limits(
+                int(raw.get("concurrency", self._default.concurrency)),
+                int(raw.get("tpm", self._default.tpm)),
+            )
+            state = self._states[key] = _KeyState(limits)
+        return state
+
+    # ── Admission ────────────────────────────────────────────────
+
+    def _fits(self, state: _KeyState, tokens: int, now: float) -> bool:
+        if now < state.paused_until:
+            return False
+        if state.limits.concurrency and state.in_flight >= state.limits.concurrency:
+            return False
+        if state.limits.tpm:
+            used = state.tokens_in_window(now)
+            # Tek başına limiti aşan istek, pencere boşsa yine geçer (kilitlenmesin)
+            if used and used + tokens > state.limits.tpm:
+                return False
+        return True
+
+    def _take(self, state: _KeyState, tokens: int, now: float) -> list:
+        state.in_flight += 1
+        state.admitted += 1
+        entry = [now, tokens]
+        state.window.append(entry)
+        return entry
+
+    def _rank(self, waiter: _Waiter, now: float) -> tuple[int, int]:
+        rank = _LANE_RANK.get(waiter.lane, 0)
+        if now - waiter.enqueued >= self._aging:
+            rank = 0
+        return rank, waiter.seq
+
+    def _dispatch(self, state: _KeyState) -> None:
+        now = time.monotonic()
+        state.waiters = [w for w in state.waiters if not w.future.done()]
+        while state.waiters:
+            best = min(state.waiters, key=lambda w: self._rank(w, now))
+            if not self._fits(state, best.tokens, now):
+                break  # sıradaki en öncelikli istek beklerken arkadakiler öne geçmez
+            state.waiters.remove(best)
+            best.future.set_result(self._take(state, best.tokens, now))
+        if state.waiters:
+            self._schedule_wakeup(state, now)
+
+    def _schedule_wakeup(self, state: _KeyState, now: float) -> None:
+        """Re-run dispatch when a time-based block (pause / TPM window) lifts."""
+        wake_at = None
+        if now < state.paused_until:
+            wake_at = state.paused_until
+        elif state.limits.tpm and state.window:
+            wake_at = state.window[0][0] + _WINDOW_SEC
+        if wake_at is None:
+            return  # slot-bound: the next release dispatches
+        if state.timer is not None:
+            state.timer.cancel()
+        loop = state.waiters[0].future.get_loop()
+        state.timer = loop.call_later(max(0.0, wake_at - now) + 0.01, self._dispatch, state)
+
+    async def acquire(self, base_url: Any, model: str, tokens: int, lane: str | None = None) -> AdmissionTicket:
+        lane = lane or current_lane()
+        key = self.key_for(base_url, model)
+        state = self._state(key)
+        t0 = time.monotonic()
+        deadline = t0 + self._timeout
+
+        if not state.waiters and self._fits(state, tokens, t0):
+            entry = self._take(state, tokens, t0)
+        else:
+            self._seq += 1
+            fut = asyncio.get_running_loop().create_future()
+            state.waiters.append(_Waiter(lane, tokens, t0, self._seq, fut))
+            self._dispatch(state)
+            try:
+                entry = await asyncio.wait_for(fut, timeout=self._timeout)
+            except BaseException as e:
+                if fut.done() and not fut.cancelled():
+                    # Slot verildi ama çağıran iptal edildi — geri ver
+                    self._abandon(state, fut.result())
+                else:
+                    self._dispatch(state)
+                if isinstance(e, asyncio.TimeoutError):
+                    state.timeouts += 1
+                    raise AdmissionTimeout(
+                        f"LLM admission timed out after {self._timeout:.0f}s for {key} "
+                        f"(in_flight={state.in_flight}, waiting={len(state.waiters)})"
+                    ) from None
+                raise
+
+        gate_member = None
+        if self._gate is not None:
+            try:
+                gate_member = await self._gate.wait(key, tokens, state.limits, deadline)
+            except BaseException as e:
+                self._abandon(state, entry)
+                if isinstance(e, AdmissionTimeout):
+                    state.timeouts += 1
+                raise
+
+        ticket = AdmissionTicket(self, key, state, entry, lane, (time.monotonic() - t0) * 1000)
+        ticket.gate_member = gate_member
+        self._queue_ms.setdefault(lane, deque(maxlen=500)).append(ticket.queued_ms)
+        return ticket
+
+    def _abandon(self, state: _KeyState, entry: list) -> None:
+        """Give back a local slot that was granted but never used."""
+        state.in_flight -= 1
+        entry[1] = 0
+        self._dispatch(state)
+
+    @asynccontextmanager
+    async def admit(self, base_url: Any, model: str, tokens: int,
+                    lane: str | None = None) -> AsyncIterator[AdmissionTicket]:
+        ticket = await self.acquire(base_url, model, tokens, lane)
+        try:
+            yield ticket
+        except Exception as e:
+            self.note_error(base_url, model, e)
+            raise
+        finally:
+            ticket.release()
+
+    def note_error(self, base_url: Any, model: str, exc: BaseException) -> None:
+        """Feed a provider error back; 429s pause the key (Retry-After if given)."""
+        if _is_rate_limited(exc):
+            self.cooldown(base_url, model, _retry_after(exc))
+
+    def _on_release(self, key: str, state: _KeyState, correction: int, gate_member: str | None = None) -> None:
+        if self._gate is not None:
+            self._gate.release_soon(key, correction, gate_member)
+        self._dispatch(state)
+
+    def cooldown(self, base_url: Any, model: str, seconds: float | None = None) -> None:
+        """Pause admissions for a key after the provider answered 429."""
+        state = self._state(self.key_for(base_url, model))
+        state.rate_limited += 1
+        pause = seconds if seconds is not None else LLM_RATE_LIMIT_COOLDOWN_SEC
+        state.paused_until = max(state.paused_until, time.monotonic() + pause)
+        logger.warning(f"LLM rate limited on {self.key_for(base_url, model)} — pausing admissions {pause:.1f}s")
+
+    # ── Metrics ──────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        keys = {}
+        for key, s in self._states.items():
+            keys[key] = {
+                "limits": {"concurrency": s.limits.concurrency, "tpm": s.limits.tpm},
+                "in_flight": s.in_flight,
+                "waiting": {
+                    lane: sum(1 for w in s.waiters if w.lane == lane and not w.future.done())
+                    for lane in _LANE_RANK
+                },
+                "tokens_last_minute": s.tokens_in_window(now),
+                "paused_for_sec": round(max(0.0, s.paused_until - now), 2),
+                "admitted": s.admitted,
+                "timeouts": s.timeouts,
+                "rate_limited": s.rate_limited,
+            }
+        lanes = {}
+        for lane, samples in self._queue_ms.items():
+            ordered = sorted(samples)
+            lanes[lane] = {
+                "samples": len(ordered),
+                "queue_ms_p50": round(ordered[len(ordered) // 2], 1) if ordered else 0.0,
+                "queue_ms_p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1) if ordered else 0.0,
+                "queue_ms_max": round(ordered[-1], 1) if ordered else 0.0,
+            }
+        return {
+            "backend": "redis" if self._gate is not None else "memory",
+            "keys": keys,
+            "lanes": lanes,
+        }
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return min(float(headers.get("retry-after")), 120.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# ── Redis Gate (optional, cross-worker) ──────────────────────────
+
+class _RedisGate:
+    """Shared in-flight set + per-minute token bucket on tools.redis_client.
+
+    In-flight slots are members ``worker:ticket`` of a sorted set scored by
+    acquire time, so a crashed worker's slots age out after the lease instead
+    of pinning the shared limit forever.
+    """
+
+    def __init__(self, prefix: str = "llmadm:", lease_sec: float = LLM_ADMISSION_LEASE_SEC) -> None:
+        self._prefix = prefix
+        self._lease = lease_sec
+        self._worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._tickets = itertools.count(1)
+
+    def _keys(self, key: str) -> tuple[str, str]:
+        minute = int(time.time() // _WINDOW_SEC)
+        return f"{self._prefix}{key}:inflight", f"{self._prefix}{key}:tpm:{minute}"
+
+    @staticmethod
+    def _client():
+        from tools.redis_client import get_redis
+        return get_redis()
+
+    def _try_acquire(self, key: str, member: str, tokens: int, limits: _Limits) -> bool:
+        r = self._client()
+        if not hasattr(r, "zadd"):
+            return True  # in-memory fallback client — local limits already apply
+        inflight_key, tpm_key = self._keys(key)
+        now = time.time()
+        r.zremrangebyscore(inflight_key, 0, now - self._lease)  # ölen worker'ların slotları
+        r.zadd(inflight_key, {member: now})
+        r.expire(inflight_key, int(self._lease * 2))  # tamamen boşta kalan key silinsin
+        n = r.zcard(inflight_key)
+        if limits.concurrency and n > limits.concurrency:
+            r.zrem(inflight_key, member)
+            return False
+        if limits.tpm:
+            used = r.incrby(tpm_key, tokens)
+            r.expire(tpm_key, int(_WINDOW_SEC * 2))
+            if used > limits.tpm and used != tokens:
+                r.decrby(tpm_key, tokens)
+                r.zrem(inflight_key, member)
+                return False
+        return True
+
+    async def wait(self, key: str, tokens: int, limits: _Limits, deadline: float) -> str | None:
+        """Block until the shared limits admit us; returns the in-flight member to release."""
+        member = f"{self._worker}:{next(self._tickets)}"
+        delay = 0.05
+        while True:
+            try:
+                if await asyncio.to_thread(self._try_acquire, key, member, tokens, limits):
+                    return member
+            except Exception as e:
+                logger.warning(f"LLM admission redis gate failed, using local limits only: {e}")
+                return None
+            if time.monotonic() + delay > deadline:
+                raise AdmissionTimeout(f"LLM admission timed out waiting for shared capacity on {key}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def _release(self, key: str, correction: int, member: str | None) -> None:
+        r = self._client()
+        if not hasattr(r, "zadd"):
+            return
+        inflight_key, tpm_key = self._keys(key)
+        if member is not None:
+            r.zrem(inflight_key, member)
+        if correction:
+            r.incrby(tpm_key, correction)
+
+    def release_soon(self, key: str, correction: int, member: str | None = None) -> None:
+        def _run() -> None:
+            try:
+                self._release(key, correction, member)
+            except Exception as e:
+                logger.debug(f"LLM admission redis release failed: {e}")
+
+        try:
+            asyncio.get_running_loop().run_in_executor(None, _run)
+        except RuntimeError:
+            _run()
+
+
+# ── Module-level Singleton ───────────────────────────────────────
+
+_controller: AdmissionController | None = None
+
+
+def _load_overrides() -> dict[str, dict[str, int]]:
+    raw = os.getenv("LLM_ADMISSION_LIMITS", "").strip()
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+        return data if isinstance(data, dict) else {}
+    except ValueError:
+        logger.warning("LLM_ADMISSION_LIMITS is not valid JSON — ignoring")
+        return {}
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get or create the global LLM admission controller."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            overrides=_load_overrides(),
+            redis_gate=_RedisGate() if LLM_ADMISSION_BACKEND == "redis" else None,
+        )
+    return _controller
+
+
+def get_admission_stats() -> dict[str, Any]:
+    return get_admission_controller().stats()
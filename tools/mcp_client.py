@@ -7,7 +7,7 @@ Supports:
 - Server discovery from config
 - Tool listing per server
 - Tool execution with JSON-RPC
-- Connection pooling and retry
+- Connection pooling and retry (warm, multiplexed sessions via tools.mcp_session_pool)
 - Proper MCP lifecycle handshake (initialize → initialized → tools/list)
 """
 
@@ -20,9 +20,10 @@ import os
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, cast
+from typing import Any
 
-from tools.pg_connection import get_conn, release_conn, postgres_available
+from tools.mcp_session_pool import MCPServerConfig, MCPSessionClosed, get_mcp_session_pool
+from tools.pg_connection import afetch_one, get_conn, release_conn, postgres_available
 
 logger = logging.getLogger(__name__)
 
@@ -42,20 +43,6 @@ def _get_cached_tools_for_server(server_id: str) -> list[dict[str, Any]]:
     ]
 
 
-async def _read_stderr_excerpt(
-    proc: asyncio.subprocess.Process, limit: int = 600
-) -> str:
-    """Best-effort stderr snippet for diagnostics without blocking process lifecycle."""
-    try:
-        if proc.stderr is None:
-            return ""
-        chunk = await asyncio.wait_for(proc.stderr.read(limit), timeout=0.3)
-        text = chunk.decode(errors="ignore").strip()
-        return text[:limit]
-    except Exception:
-        return ""
-
-
 DATA_DIR = Path(__file__).parent.parent / "data"
 MCP_CONFIG_PATH = DATA_DIR / "mcp_servers.json"
 
@@ -120,100 +107,48 @@ def _ensure_tables() -> None:
 _ensure_tables()
 
 
-# ── MCP Protocol Handshake ───────────────────────────────────────
-
-MCP_PROTOCOL_VERSION = "2024-11-05"
-
-def _build_initialize_request() -> str:
-    """Build JSON-RPC initialize request per MCP spec."""
-    return json.dumps({
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "initialize",
-        "params": {
-            "protocolVersion": MCP_PROTOCOL_VERSION,
-            "capabilities": {},
-            "clientInfo": {
-                "name": "pi-mcp-client",
-                "version": "2.0.0",
-            },
-        },
-    }) + "\n"
-
-
-def _build_initialized_notification() -> str:
-    """Build JSON-RPC initialized notification per MCP spec."""
-    return json.dumps({
-        "jsonrpc": "2.0",
-        "method": "notifications/initialized",
-    }) + "\n"
-
-
-def _build_tools_list_request() -> str:
-    """Build JSON-RPC tools/list request."""
-    return json.dumps({
-        "jsonrpc": "2.0",
-        "id": 2,
-        "method": "tools/list",
-        "params": {},
-    }) + "\n"
-
-
-def _build_tool_call_request(tool_name: str, arguments: dict | None = None) -> str:
-    """Build JSON-RPC tools/call request."""
-    return json.dumps({
-        "jsonrpc": "2.0",
-        "id": 3,
-        "method": "tools/call",
-        "params": {
-            "name": tool_name,
-            "arguments": arguments or {},
-        },
-    }) + "\n"
-
-
-async def _read_json_response(
-    stdout: asyncio.StreamReader,
-    timeout: float = 15.0,
-) -> dict | None:
-    """Read a single JSON-RPC response line from stdout."""
-    try:
-        line = await asyncio.wait_for(stdout.readline(), timeout=timeout)
-        if not line:
-            return None
-        text = line.decode().strip()
-        if text.startswith("{"):
-            return json.loads(text)
-    except (asyncio.TimeoutError, json.JSONDecodeError):
-        pass
-    return None
+# ── Server Config Cache ──────────────────────────────────────────
 
+MCP_SERVER_CONFIG_TTL_SEC = float(os.getenv("MCP_SERVER_CONFIG_TTL_SEC", "30"))
 
-async def _mcp_handshake(
-    proc: asyncio.subprocess.Process,
-    stdout: asyncio.StreamReader,
-) -> bool:
-    """Perform MCP initialize → initialized handshake. Returns True on success."""
-    stdin = proc.stdin
-    if stdin is None:
-        return False
+# server_id → (loaded_at, config | None); register/remove/toggle invalidate
+_server_configs: dict[str, tuple[float, MCPServerConfig | None]] = {}
 
-    # Step 1: Send initialize request
-    stdin.write(_build_initialize_request().encode())
-    await stdin.drain()
 
-    # Step 2: Read initialize response
-    response = await _read_json_response(stdout, timeout=10.0)
-    if not response or "result" not in response:
-        return False
+def invalidate_server_config(server_id: str | None = None) -> None:
+    """Drop cached server launch configs (all, or one server)."""
+    if server_id is None:
+        _server_configs.clear()
+    else:
+        _server_configs.pop(server_id, None)
 
-    # Step 3: Send initialized notification
-    stdin.write(_build_initialized_notification().encode())
-    await stdin.drain()
 
-    # Small delay to let server process the notification
-    await asyncio.sleep(0.1)
-    return True
+def _config_from_row(server_id: str, row: dict[str, Any]) -> MCPServerConfig | None:
+    command = str(row.get("command") or "")
+    if not command:
+        return None
+    raw_args = row.get("args")
+    raw_env = row.get("env")
+    args = json.loads(raw_args or "[]") if isinstance(raw_args, str) else (raw_args or [])
+    env_vars = json.loads(raw_env or "{}") if isinstance(raw_env, str) else (raw_env or {})
+    return MCPServerConfig(server_id=server_id, command=command, args=tuple(args), env=dict(env_vars))
+
+
+async def _get_server_config(server_id: str) -> tuple[bool, MCPServerConfig | None]:
+    """Return (found_and_active, launch config) — cached for MCP_SERVER_CONFIG_TTL_SEC."""
+    cached = _server_configs.get(server_id)
+    if cached is not None and time.monotonic() - cached[0] < MCP_SERVER_CONFIG_TTL_SEC:
+        return True, cached[1]
+    row = await afetch_one(
+        "SELECT * FROM mcp_servers WHERE id = %s AND active = TRUE",
+        (server_id,),
+    )
+    if not row:
+        _server_configs.pop(server_id, None)
+        return False, None
+    config = _config_from_row(server_id, _row_to_dict(row))
+    _server_configs[server_id] = (time.monotonic(), config)
+    return True, config
 
 
 # ── Server Management ────────────────────────────────────────────
@@ -251,6 +186,7 @@ def register_server(
         conn.commit()
     finally:
         release_conn(conn)
+    invalidate_server_config(server_id)
     logger.info(f"MCP server registered: {server_id} ({name})")
     return {"id": server_id, "name": name, "command": command}
 
@@ -299,6 +235,7 @@ def remove_server(server_id: str) -> bool:
             )
             affected = cur.rowcount
         conn.commit()
+        invalidate_server_config(server_id)
         return affected > 0
     finally:
         release_conn(conn)
@@ -360,6 +297,7 @@ def load_servers_from_config(config_path: str | Path | None = None) -> int:
         conn.commit()
     finally:
         release_conn(conn)
+    invalidate_server_config()
 
     logger.info(f"Loaded {count} MCP servers from {path.name}")
     return count
@@ -370,94 +308,14 @@ def load_servers_from_config(config_path: str | Path | None = None) -> int:
 async def discover_tools(server_id: str) -> list[dict[str, Any]]:
     """
     Discover available tools from an MCP server via JSON-RPC.
-    Performs proper MCP lifecycle: initialize → initialized → tools/list.
+    Uses a warm pooled session (initialize → initialized already done) → tools/list.
     """
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT * FROM mcp_servers WHERE id = %s AND active = TRUE",
-                (server_id,),
-            )
-            server = _row_to_dict(cur.fetchone())
-    finally:
-        release_conn(conn)
-
-    if not server:
-        return []
-
-    command = str(server.get("command") or "")
-    args_value = server.get("args")
-    env_value = server.get("env")
-    args = json.loads(args_value) if isinstance(args_value, str) else (args_value or [])
-    env_vars = (
-        json.loads(env_value) if isinstance(env_value, str) else (env_value or {})
-    )
-    if not command:
+    found, config = await _get_server_config(server_id)
+    if not found or config is None:
         return []
 
     try:
-        env = {**os.environ, **{k: v for k, v in env_vars.items() if v}}
-
-        proc = await asyncio.create_subprocess_exec(
-            command, *args,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
-        )
-        stdout = proc.stdout
-
-        # Perform MCP handshake
-        if stdout is None:
-            return []
-        handshake_ok = await _mcp_handshake(proc, stdout)
-        if not handshake_ok:
-            stderr_excerpt = await _read_stderr_excerpt(proc)
-            logger.warning(
-                "MCP handshake failed for %s, trying direct tools/list%s",
-                server_id,
-                f" | stderr={stderr_excerpt}" if stderr_excerpt else "",
-            )
-            # Fallback: some older servers might not need handshake
-            # Kill and restart for clean state
-            try:
-                proc.kill()
-                await proc.wait()
-            except Exception:
-                pass
-            proc = await asyncio.create_subprocess_exec(
-                command, *args,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                env=env,
-            )
-            stdin = proc.stdin
-            stdout = proc.stdout
-            if stdin is None or stdout is None:
-                return []
-            # Try direct tools/list (legacy fallback)
-            stdin.write(_build_tools_list_request().encode())
-            await stdin.drain()
-            response = await _read_json_response(stdout, timeout=10.0)
-        else:
-            stdin = proc.stdin
-            if stdin is None:
-                return []
-            # Send tools/list after successful handshake
-            stdin.write(_build_tools_list_request().encode())
-            await stdin.drain()
-            response = await _read_json_response(stdout, timeout=10.0)
-
-        # Clean up process
-        try:
-            if stdin is not None:
-                stdin.close()
-            proc.kill()
-            await proc.wait()
-        except Exception:
-            pass
+        response = await get_mcp_session_pool().request(config, "tools/list", timeout=10.0)
 
         if not response or "result" not in response:
             logger.warning(f"No tools response from MCP server: {server_id}")
@@ -551,34 +409,14 @@ async def call_mcp_tool(
 ) -> dict[str, Any]:
     """
     Execute a tool on an MCP server via JSON-RPC.
-    Performs proper MCP lifecycle: initialize → initialized → tools/call.
+    The request goes over a warm pooled session (spawned + handshaken once).
     """
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT * FROM mcp_servers WHERE id = %s AND active = TRUE",
-                (server_id,),
-            )
-            server = cur.fetchone()
-    finally:
-        release_conn(conn)
+    found, config = await _get_server_config(server_id)
 
-    if not server:
+    if not found:
         return {"success": False, "error": f"Server '{server_id}' not found or inactive"}
 
-    server_row: dict[str, Any] = _row_to_dict(server)
-    raw_args = server_row.get("args")
-    raw_env = server_row.get("env")
-    command = str(server_row.get("command") or "")
-    args = (
-        json.loads(raw_args or "[]") if isinstance(raw_args, str) else (raw_args or [])
-    )
-    env_vars = (
-        json.loads(raw_env or "{}") if isinstance(raw_env, str) else (raw_env or {})
-    )
-
-    if not command:
+    if config is None:
         return {
             "success": False,
             "error": f"Server '{server_id}' has no command configured",
@@ -586,45 +424,12 @@ async def call_mcp_tool(
 
     t0 = time.monotonic()
     try:
-        env = {**os.environ, **{k: v for k, v in env_vars.items() if v}}
-
-        proc = await asyncio.create_subprocess_exec(
-            command, *args,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
+        response = await get_mcp_session_pool().request(
+            config,
+            "tools/call",
+            {"name": tool_name, "arguments": arguments or {}},
+            timeout=timeout,
         )
-        stdin = proc.stdin
-        stdout = proc.stdout
-
-        if stdin is None or stdout is None:
-            return {
-                "success": False,
-                "error": f"Server '{server_id}' did not expose stdio pipes",
-            }
-
-        writer = cast(asyncio.StreamWriter, stdin)
-        reader = cast(asyncio.StreamReader, stdout)
-
-        # Perform MCP handshake
-        handshake_ok = await _mcp_handshake(proc, reader)
-        if not handshake_ok:
-            logger.warning(f"MCP handshake failed for {server_id}, trying direct call")
-
-        # Send tool call
-        writer.write(_build_tool_call_request(tool_name, arguments).encode())
-        await writer.drain()
-
-        response = await _read_json_response(reader, timeout=timeout)
-
-        # Clean up
-        try:
-            writer.close()
-            proc.kill()
-            await proc.wait()
-        except Exception:
-            pass
 
         latency_ms = (time.monotonic() - t0) * 1000
 
@@ -657,6 +462,11 @@ async def call_mcp_tool(
         _log_call(server_id, tool_name, arguments, "TIMEOUT", False, latency_ms)
         return {"success": False, "error": f"Timeout after {timeout}s", "server": server_id}
 
+    except MCPSessionClosed as e:
+        latency_ms = (time.monotonic() - t0) * 1000
+        _log_call(server_id, tool_name, arguments, str(e), False, latency_ms)
+        return {"success": False, "error": f"Server process exited: {e}", "server": server_id}
+
     except Exception as e:
         latency_ms = (time.monotonic() - t0) * 1000
         _log_call(server_id, tool_name, arguments, str(e), False, latency_ms)
@@ -0,0 +1,461 @@
+"""
+MCP session pool — long-lived, warm MCP server processes.
+
+Instead of spawning a server per tool call (process start + initialize
+handshake + one request + kill), each server keeps up to
+MCP_SESSIONS_PER_SERVER processes alive. Requests are multiplexed over the
+same stdio pipes by JSON-RPC id, so concurrent calls share one warm process.
+
+- Crashed processes are detected (stdout EOF) and respawned on next use
+- Idle sessions are evicted after MCP_SESSION_IDLE_TTL_SEC
+- A changed server config (command/args/env) recycles its sessions
+- stderr is drained continuously (a full pipe would block the server)
+
+Usage:
+    from tools.mcp_session_pool import MCPServerConfig, get_mcp_session_pool
+
+    pool = get_mcp_session_pool()
+    cfg = MCPServerConfig("fetch", "uvx", ["mcp-server-fetch"])
+    response = await pool.request(cfg, "tools/call", {"name": "fetch", "arguments": {...}})
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+MCP_PROTOCOL_VERSION = "2024-11-05"
+
+MCP_SESSIONS_PER_SERVER = int(os.getenv("MCP_SESSIONS_PER_SERVER", "1"))
+MCP_SESSION_IDLE_TTL_SEC = float(os.getenv("MCP_SESSION_IDLE_TTL_SEC", "300"))
+MCP_HANDSHAKE_TIMEOUT_SEC = float(os.getenv("MCP_HANDSHAKE_TIMEOUT_SEC", "10"))
+MCP_STDIO_LIMIT = 16 * 1024 * 1024  # büyük tool çıktıları tek satırda gelebilir
+_STDERR_TAIL = 2000
+
+
+class MCPSessionClosed(ConnectionError):
+    """The server process exited (or its pipes closed) before answering."""
+
+
+@dataclass(frozen=True)
+class MCPServerConfig:
+    """Launch configuration of one MCP server (stdio transport)."""
+    server_id: str
+    command: str
+    args: tuple[str, ...] | list[str] = ()
+    env: dict[str, str] = field(default_factory=dict, hash=False, compare=False)
+
+    @property
+    def signature(self) -> str:
+        return json.dumps([self.command, list(self.args), sorted(self.env.items())])
+
+
+class MCPSession:
+    """One warm MCP server process; JSON-RPC requests are multiplexed by id."""
+
+    def __init__(self, config: MCPServerConfig) -> None:
+        self.config = config
+        self.proc: asyncio.subprocess.Process | None = None
+        self.handshake_ok = False
+        self.started_at = 0.0
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+        self.requests = 0
+        self._ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._write_lock = asyncio.Lock()
+        self._reader_task: asyncio.Task | None = None
+        self._stderr_task: asyncio.Task | None = None
+        self._stderr_tail = ""
+        self._closed = False
+
+    @property
+    def alive(self) -> bool:
+        return (
+            not self._closed
+            and self.proc is not None
+            and self.proc.returncode is None
+            and self._reader_task is not None
+            and not self._reader_task.done()
+        )
+
+    @property
+    def stderr_tail(self) -> str:
+        return self._stderr_tail
+
+    # ── Lifecycle ────────────────────────────────────────────────
+
+    async def start(self, handshake_timeout: float = MCP_HANDSHAKE_TIMEOUT_SEC) -> None:
+        """Spawn the process and run initialize → notifications/initialized."""
+        env = {**os.environ, **{k: v for k, v in self.config.env.items() if v}}
+        self.proc = await asyncio.create_subprocess_exec(
+            self.config.command, *self.config.args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+            limit=MCP_STDIO_LIMIT,
+        )
+        self.started_at = time.monotonic()
+        self._reader_task = asyncio.create_task(self._read_loop())
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+        try:
+            response = await self.request(
+                "initialize",
+                {
+                    "protocolVersion": MCP_PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "pi-mcp-client", "version": "2.0.0"},
+                },
+                timeout=handshake_timeout,
+            )
+            self.handshake_ok = "result" in response
+        except asyncio.TimeoutError:
+            self.handshake_ok = False
+
+        if self.handshake_ok:
+            await self.notify("notifications/initialized")
+        elif not self.alive:
+            raise MCPSessionClosed(
+                f"MCP server '{self.config.server_id}' exited during startup"
+                + (f" | stderr={self._stderr_tail[-600:]}" if self._stderr_tail else "")
+            )
+        else:
+            # Eski sunucular handshake'siz de çalışabiliyor — oturumu yine kullan
+            logger.warning("MCP handshake failed for %s, continuing without it", self.config.server_id)
+
+    async def close(self) -> None:
+        self._closed = True
+        proc = self.proc
+        if proc is not None and proc.returncode is None:
+            try:
+                if proc.stdin is not None:
+                    proc.stdin.close()
+                proc.terminate()
+                await asyncio.wait_for(proc.wait(), timeout=2.0)
+            except (asyncio.TimeoutError, ProcessLookupError):
+                try:
+                    proc.kill()
+                    await proc.wait()
+                except ProcessLookupError:
+                    pass
+            except Exception:
+                pass
+        for task in (self._reader_task, self._stderr_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._fail_pending(MCPSessionClosed(f"MCP session '{self.config.server_id}' closed"))
+
+    # ── JSON-RPC ─────────────────────────────────────────────────
+
+    async def request(
+        self,
+        method: str,
+        params: dict[str, Any] | None = None,
+        timeout: float = 30.0,
+    ) -> dict[str, Any]:
+        """Send a request and wait for the response with the same id."""
+        if self._closed or self.proc is None or self.proc.stdin is None:
+            raise MCPSessionClosed(f"MCP session '{self.config.server_id}' is not running")
+        request_id = next(self._ids)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.in_flight += 1
+        self.requests += 1
+        self.last_used = time.monotonic()
+        try:
+            await self._write({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.pop(request_id, None)
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+
+    async def notify(self, method: str, params: dict[str, Any] | None = None) -> None:
+        message: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._write(message)
+
+    async def _write(self, message: dict[str, Any]) -> None:
+        assert self.proc is not None and self.proc.stdin is not None
+        data = (json.dumps(message) + "\n").encode()
+        try:
+            async with self._write_lock:
+                self.proc.stdin.write(data)
+                await self.proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise MCPSessionClosed(f"MCP session '{self.config.server_id}' pipe closed: {e}") from e
+
+    async def _read_loop(self) -> None:
+        assert self.proc is not None and self.proc.stdout is not None
+        stdout = self.proc.stdout
+        try:
+            while True:
+                line = await stdout.readline()
+                if not line:
+                    break
+                text = line.decode(errors="ignore").strip()
+                if not text.startswith("{"):
+                    continue  # stdout'a log basan sunucular
+                try:
+                    message = json.loads(text)
+                except json.JSONDecodeError:
+                    continue
+                await self._dispatch(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("MCP session %s reader stopped: %s", self.config.server_id, e)
+        finally:
+            self._fail_pending(MCPSessionClosed(
+                f"MCP server '{self.config.server_id}' closed stdout"
+                + (f" | stderr={self._stderr_tail[-600:]}" if self._stderr_tail else "")
+            ))
+
+    async def _dispatch(self, message: dict[str, Any]) -> None:
+        msg_id = message.get("id")
+        if "method" in message:
+            # Server → client request (ping, roots/list, ...) — minimal yanıt
+            if msg_id is not None:
+                if message["method"] == "ping":
+                    reply: dict[str, Any] = {"jsonrpc": "2.0", "id": msg_id, "result": {}}
+                else:
+                    reply = {"jsonrpc": "2.0", "id": msg_id,
+                             "error": {"code": -32601, "message": "Method not found"}}
+                try:
+                    await self._write(reply)
+                except MCPSessionClosed:
+                    pass
+            return
+        future = self._pending.get(msg_id) if isinstance(msg_id, int) else None
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    async def _drain_stderr(self) -> None:
+        assert self.proc is not None
+        stderr = self.proc.stderr
+        if stderr is None:
+            return
+        try:
+            while True:
+                chunk = await stderr.read(4096)
+                if not chunk:
+                    return
+                self._stderr_tail = (self._stderr_tail + chunk.decode(errors="ignore"))[-_STDERR_TAIL:]
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return
+
+    def _fail_pending(self, error: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "pid": self.proc.pid if self.proc is not None else None,
+            "alive": self.alive,
+            "handshake_ok": self.handshake_ok,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "age_sec": round(now - self.started_at, 1) if self.started_at else 0.0,
+            "idle_sec": round(now - self.last_used, 1),
+        }
+
+
+@dataclass
+class _ServerSlot:
+    signature: str
+    sessions: list[MCPSession] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    spawns: int = 0
+    restarts: int = 0
+    evictions: int = 0
+    failures: int = 0
+
+
+class MCPSessionPool:
+    """Keeps warm MCP sessions per server and routes requests to the least busy one."""
+
+    def __init__(
+        self,
+        sessions_per_server: int = MCP_SESSIONS_PER_SERVER,
+        idle_ttl_sec: float = MCP_SESSION_IDLE_TTL_SEC,
+        handshake_timeout: float = MCP_HANDSHAKE_TIMEOUT_SEC,
+    ) -> None:
+        self._per_server = max(1, sessions_per_server)
+        self._idle_ttl = idle_ttl_sec
+        self._handshake_timeout = handshake_timeout
+        self._slots: dict[str, _ServerSlot] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._reaper: asyncio.Task | None = None
+
+    # ── Acquire ──────────────────────────────────────────────────
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Subprocess transport'ları loop'a bağlı; eski loop'un oturumları kullanılamaz
+            self._slots.clear()
+            self._reaper = None
+            self._loop = loop
+        if self._idle_ttl > 0 and (self._reaper is None or self._reaper.done()):
+            self._reaper = loop.create_task(self._reap_loop())
+
+    async def acquire(self, config: MCPServerConfig) -> MCPSession:
+        """Return a warm session for the server, spawning/restarting one if needed."""
+        self._bind_loop()
+        slot = self._slots.get(config.server_id)
+        if slot is None:
+            slot = self._slots[config.server_id] = _ServerSlot(signature=config.signature)
+
+        async with slot.lock:
+            if slot.signature != config.signature:
+                stale, slot.sessions = slot.sessions, []
+                slot.signature = config.signature
+                for session in stale:
+                    await session.close()
+
+            dead = [s for s in slot.sessions if not s.alive]
+            if dead:
+                slot.restarts += len(dead)
+                slot.sessions = [s for s in slot.sessions if s.alive]
+                for session in dead:
+                    logger.warning(
+                        "MCP server %s session exited (code=%s), restarting",
+                        config.server_id, session.proc.returncode if session.proc else None,
+                    )
+                    await session.close()
+
+            idle = min(slot.sessions, key=lambda s: s.in_flight, default=None)
+            if idle is not None and (idle.in_flight == 0 or len(slot.sessions) >= self._per_server):
+                return idle
+
+            session = MCPSession(config)
+            try:
+                await session.start(self._handshake_timeout)
+            except BaseException:
+                slot.failures += 1
+                await session.close()
+                raise
+            slot.spawns += 1
+            slot.sessions.append(session)
+            return session
+
+    async def request(
+        self,
+        config: MCPServerConfig,
+        method: str,
+        params: dict[str, Any] | None = None,
+        timeout: float = 30.0,
+    ) -> dict[str, Any]:
+        """Send one JSON-RPC request through a pooled session.
+
+        Read-only methods (tools/list) are retried once on a fresh process if the
+        session dies mid-request; tools/call is not, since it may have side effects.
+        """
+        attempts = 2 if method == "tools/list" else 1
+        for attempt in range(attempts):
+            session = await self.acquire(config)
+            try:
+                return await session.request(method, params, timeout=timeout)
+            except MCPSessionClosed:
+                if attempt == attempts - 1:
+                    raise
+        raise MCPSessionClosed(f"MCP server '{config.server_id}' unavailable")
+
+    # ── Eviction / Shutdown ──────────────────────────────────────
+
+    async def evict_idle(self) -> int:
+        """Close sessions idle for longer than the TTL. Returns how many were closed."""
+        now = time.monotonic()
+        closed = 0
+        for slot in list(self._slots.values()):
+            async with slot.lock:
+                keep: list[MCPSession] = []
+                for session in slot.sessions:
+                    if session.in_flight == 0 and now - session.last_used >= self._idle_ttl:
+                        await session.close()
+                        slot.evictions += 1
+                        closed += 1
+                    else:
+                        keep.append(session)
+                slot.sessions = keep
+        return closed
+
+    async def _reap_loop(self) -> None:
+        interval = max(1.0, min(60.0, self._idle_ttl / 4))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                closed = await self.evict_idle()
+                if closed:
+                    logger.info("Evicted %d idle MCP session(s)", closed)
+            except Exception as e:
+                logger.warning("MCP idle eviction failed: %s", e)
+
+    async def close_server(self, server_id: str) -> int:
+        """Close every session of one server (e.g. after it is disabled)."""
+        slot = self._slots.pop(server_id, None)
+        if slot is None:
+            return 0
+        for session in slot.sessions:
+            await session.close()
+        return len(slot.sessions)
+
+    async def close_all(self) -> None:
+        if self._reaper is not None and not self._reaper.done():
+            self._reaper.cancel()
+        self._reaper = None
+        for server_id in list(self._slots):
+            await self.close_server(server_id)
+
+    # ── Stats ────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        servers = {
+            server_id: {
+                "sessions": [s.stats() for s in slot.sessions],
+                "spawns": slot.spawns,
+                "restarts": slot.restarts,
+                "evictions": slot.evictions,
+                "spawn_failures": slot.failures,
+            }
+            for server_id, slot in self._slots.items()
+        }
+        return {
+            "sessions_per_server": self._per_server,
+            "idle_ttl_sec": self._idle_ttl,
+            "live_sessions": sum(
+                1 for slot in self._slots.values() for s in slot.sessions if s.alive
+            ),
+            "in_flight": sum(
+                s.in_flight for slot in self._slots.values() for s in slot.sessions
+            ),
+            "servers": servers,
+        }
+
+
+# ── Module-level Singleton ───────────────────────────────────────
+
+_pool: MCPSessionPool | None = None
+
+
+def get_mcp_session_pool() -> MCPSessionPool:
+    """Get or create the global MCP session pool."""
+    global _pool
+    if _pool is None:
+        _pool = MCPSessionPool()
+    return _pool
@@ -1,7 +1,7 @@
 """
 Agent Memory — PostgreSQL + pgvector powered persistent knowledge store.
 Layered memory: working (TTL) / episodic (task results) / semantic (permanent).
-Uses NVIDIA nv-embedqa-e5-v5 for semantic vector search via pgvector.
+Uses NVIDIA embeddings (tools.embedding_service) for semantic vector search via pgvector.
 """
 
 from __future__ import annotations
@@ -15,52 +15,43 @@ from collections.abc import Mapping
 from datetime import datetime, timezone
 from typing import Any
 
-import httpx
-
-from tools.pg_connection import get_conn, release_conn
+from tools.embedding_service import EMBED_DIMENSIONS, EMBED_MODEL, get_embedding_service
+from tools.pg_connection import afetch_all, async_db_conn, get_conn, release_conn
 
 logger = logging.getLogger(__name__)
 
-_EMBED_MODEL = "nvidia/llama-3.2-nv-embedqa-1b-v2"
-_EMBED_DIMENSIONS = 1024  # Matryoshka: request 1024-dim from 2048-native model
+_EMBED_MODEL = EMBED_MODEL
+_EMBED_DIMENSIONS = EMBED_DIMENSIONS
 
 
 # ── Embedding ────────────────────────────────────────────────────
 
 async def _get_embedding_async(text: str) -> list[float] | None:
-    """Get embedding vector from NVIDIA API asynchronously. Returns None on failure."""
+    """Get embedding vector via the shared batching client. Returns None on failure."""
     try:
-        from config import NVIDIA_API_KEY, NVIDIA_BASE_URL
-        if not NVIDIA_API_KEY:
-            return None
-
-        clean = (text or "").strip()
-        if not clean:
-            return None
-
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(
-                f"{NVIDIA_BASE_URL}/embeddings",
-                headers={
-                    "Authorization": f"Bearer {NVIDIA_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": _EMBED_MODEL,
-                    "input": [clean[:8000]],
-                    "encoding_format": "float",
-                    "input_type": "query",
-                    "truncate": "END",
-                    "dimensions": _EMBED_DIMENSIONS,
-                },
-            )
-        resp.raise_for_status()
-        return resp.json()["data"][0]["embedding"]
+        return await get_embedding_service().embed(text)
     except Exception as e:
         logger.warning(f"Embedding API failed: {e}")
         return None
 
 
+async def _get_embeddings_async(texts: list[str]) -> list[list[float] | None]:
+    """Embed many texts in batched requests. Failed/empty inputs map to None."""
+    try:
+        return await get_embedding_service().embed_many(texts)
+    except Exception as e:
+        logger.warning(f"Embedding API failed: {e}")
+        return [None] * len(texts)
+
+
+async def _get_embedding_once(text: str) -> list[float] | None:
+    """Embed on a throwaway loop, closing that loop's HTTP client before it ends."""
+    try:
+        return await _get_embedding_async(text)
+    finally:
+        await get_embedding_service().aclose()
+
+
 def _get_embedding(text: str) -> list[float] | None:
     """Sync wrapper for async embedding function using thread executor."""
     import asyncio
@@ -69,11 +60,11 @@ def _get_embedding(text: str) -> list[float] | None:
         # If we're in an event loop, run in executor to avoid nested loop issues
         import concurrent.futures
         with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(asyncio.run, _get_embedding_async(text))
+            future = executor.submit(asyncio.run, _get_embedding_once(text))
             return future.result(timeout=30.0)
     except RuntimeError:
         # No event loop running, safe to use asyncio.run
-        return asyncio.run(_get_embedding_async(text))
+        return asyncio.run(_get_embedding_once(text))
 
 
 def _cosine_similarity(a: list[float], b: list[float]) -> float:
@@ -162,6 +153,42 @@ def _insert_memory(
         release_conn(conn)
 
 
+async def _ainsert_memory(
+    content: str,
+    category: str,
+    memory_layer: str,
+    tags: list[str],
+    source_agent: str | None,
+    ttl_hours: int | None = None,
+    embedding: list[float] | None = None,
+) -> dict[str, Any]:
+    """Async twin of _insert_memory — async embedding + async pool (no loop blocking)."""
+    tags_json = json.dumps(tags, ensure_ascii=False)
+    if embedding is None:
+        embedding = await _get_embedding_async(content)
+    emb_str = str(embedding) if embedding else None
+
+    async with async_db_conn() as db:
+        row = await db.fetch_one(
+            """INSERT INTO memories
+               (content, category, memory_layer, tags, source_agent, embedding, ttl_hours)
+               VALUES (%s, %s, %s, %s, %s, %s::vector, %s)
+               RETURNING id, created_at""",
+            (content, category, memory_layer, tags_json, source_agent, emb_str, ttl_hours),
+        ) or {}
+    backend = "pgvector" if embedding else "keyword-only"
+    logger.info(f"Memory saved [{memory_layer}/{backend}]: {content[:50]}")
+    return {
+        "id": row.get("id"),
+        "content": content,
+        "category": category,
+        "memory_layer": memory_layer,
+        "tags": tags,
+        "source_agent": source_agent,
+        "created_at": str(row.get("created_at", "")),
+    }
+
+
 # ── Public API — Core ────────────────────────────────────────────
 
 def save_memory(
@@ -185,7 +212,7 @@ async def recall_memory(
         results = await _pgvector_recall(embedding, category, max_results)
         if results:
             return results
-    return _keyword_recall(query, category, max_results)
+    return await _keyword_recall(query, category, max_results)
 
 
 async def list_memories(
@@ -194,52 +221,40 @@ async def list_memories(
     limit: int = 20,
 ) -> list[dict[str, Any]]:
     """List recent memories, optionally filtered by category and/or memory layer."""
-    conn = get_conn()
-    try:
-        conditions = []
-        params: list[Any] = []
-
-        if category:
-            conditions.append("category = %s")
-            params.append(category)
-        if layer:
-            conditions.append("memory_layer = %s")
-            params.append(layer)
-
-        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
-
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""SELECT id, content, category, memory_layer, tags, source_agent,
-                          access_count, created_at
-                   FROM memories {where}
-                   ORDER BY created_at DESC LIMIT %s""",
-                params + [limit],
-            )
-            return [_row_to_dict(_as_row_dict(r)) for r in cur.fetchall()]
-    finally:
-        release_conn(conn)
+    conditions = []
+    params: list[Any] = []
+
+    if category:
+        conditions.append("category = %s")
+        params.append(category)
+    if layer:
+        conditions.append("memory_layer = %s")
+        params.append(layer)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    async with async_db_conn() as db:
+        rows = await db.fetch_all(
+            f"""SELECT id, content, category, memory_layer, tags, source_agent,
+                      access_count, created_at
+               FROM memories {where}
+               ORDER BY created_at DESC LIMIT %s""",
+            params + [limit],
+        )
+    return [_row_to_dict(r) for r in rows]
 
 
 async def delete_memory(memory_id: int) -> bool:
     """Delete a memory by ID."""
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("DELETE FROM memories WHERE id = %s", (memory_id,))
-            deleted = cur.rowcount > 0
-        conn.commit()
-        return deleted
-    finally:
-        release_conn(conn)
+    async with async_db_conn() as db:
+        deleted = await db.execute("DELETE FROM memories WHERE id = %s", (memory_id,))
+    return deleted > 0
 
 
 async def get_memory_stats() -> dict[str, Any]:
     """Get memory usage statistics."""
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
+    async with async_db_conn() as db:
+        row = await db.fetch_one("""
                 SELECT
                     COUNT(*) AS total,
                     COUNT(DISTINCT category) AS categories,
@@ -250,23 +265,20 @@ async def get_memory_stats() -> dict[str, Any]:
                     COUNT(*) FILTER (WHERE memory_layer = 'episodic') AS episodic_count,
                     COUNT(*) FILTER (WHERE memory_layer = 'semantic') AS semantic_count
                 FROM memories
-            """)
-            row = _as_row_dict(cur.fetchone())
-        return {
-            "total_memories": row.get("total", 0),
-            "categories": row.get("categories", 0),
-            "with_embeddings": row.get("with_embeddings", 0),
-            "total_accesses": row.get("total_accesses") or 0,
-            "last_saved": str(row.get("last_saved")) if row.get("last_saved") else None,
-            "layers": {
-                "working": row.get("working_count", 0),
-                "episodic": row.get("episodic_count", 0),
-                "semantic": row.get("semantic_count", 0),
-            },
-            "backend": "PostgreSQL + pgvector",
-        }
-    finally:
-        release_conn(conn)
+            """) or {}
+    return {
+        "total_memories": row.get("total", 0),
+        "categories": row.get("categories", 0),
+        "with_embeddings": row.get("with_embeddings", 0),
+        "total_accesses": row.get("total_accesses") or 0,
+        "last_saved": str(row.get("last_saved")) if row.get("last_saved") else None,
+        "layers": {
+            "working": row.get("working_count", 0),
+            "episodic": row.get("episodic_count", 0),
+            "semantic": row.get("semantic_count", 0),
+        },
+        "backend": "PostgreSQL + pgvector",
+    }
 
 
 def format_recall_results(results: list[dict]) -> str:
@@ -296,7 +308,7 @@ async def save_working_memory(
     ttl_hours: int = 24,
 ) -> dict[str, Any]:
     """Short-term working memory with TTL (auto-expires)."""
-    return _insert_memory(content, "working", "working", [], source_agent, ttl_hours)
+    return await _ainsert_memory(content, "working", "working", [], source_agent, ttl_hours)
 
 
 async def save_episodic_memory(
@@ -306,7 +318,7 @@ async def save_episodic_memory(
     source_agent: str | None = None,
 ) -> dict[str, Any]:
     """Episodic memory — task results, interactions."""
-    return _insert_memory(content, category, "episodic", tags or [], source_agent)
+    return await _ainsert_memory(content, category, "episodic", tags or [], source_agent)
 
 
 async def save_semantic_memory(
@@ -316,7 +328,7 @@ async def save_semantic_memory(
     source_agent: str | None = None,
 ) -> dict[str, Any]:
     """Semantic memory — permanent knowledge, facts."""
-    return _insert_memory(content, category, "semantic", tags or [], source_agent)
+    return await _ainsert_memory(content, category, "semantic", tags or [], source_agent)
 
 
 async def recall_layered(
@@ -333,48 +345,41 @@ async def recall_layered(
 
     result: dict[str, list[dict]] = {layer: [] for layer in target_layers}
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            for layer in target_layers:
-                if embedding:
-                    cur.execute(
-                        """SELECT id, content, category, memory_layer, tags, source_agent,
-                                  access_count, created_at,
-                                  1 - (embedding <=> %s::vector) AS similarity
-                           FROM memories
-                           WHERE memory_layer = %s AND embedding IS NOT NULL
-                           ORDER BY embedding <=> %s::vector
-                           LIMIT %s""",
-                        (str(embedding), layer, str(embedding), max_results),
-                    )
-                    rows = cur.fetchall()
-                    if rows:
-                        result[layer] = [_row_to_dict(_as_row_dict(r)) for r in rows]
-                        continue
-
-                # keyword fallback per layer
-                cur.execute(
+    async with async_db_conn() as db:
+        for layer in target_layers:
+            if embedding:
+                rows = await db.fetch_all(
                     """SELECT id, content, category, memory_layer, tags, source_agent,
-                              access_count, created_at
+                              access_count, created_at,
+                              1 - (embedding <=> %s::vector) AS similarity
                        FROM memories
-                       WHERE memory_layer = %s AND LOWER(content) LIKE %s
-                       ORDER BY created_at DESC LIMIT %s""",
-                    (layer, f"%{query.lower()[:50]}%", max_results),
+                       WHERE memory_layer = %s AND embedding IS NOT NULL
+                       ORDER BY embedding <=> %s::vector
+                       LIMIT %s""",
+                    (str(embedding), layer, str(embedding), max_results),
                 )
-                result[layer] = [_row_to_dict(_as_row_dict(r)) for r in cur.fetchall()]
+                if rows:
+                    result[layer] = [_row_to_dict(r) for r in rows]
+                    continue
+
+            # keyword fallback per layer
+            rows = await db.fetch_all(
+                """SELECT id, content, category, memory_layer, tags, source_agent,
+                          access_count, created_at
+                   FROM memories
+                   WHERE memory_layer = %s AND LOWER(content) LIKE %s
+                   ORDER BY created_at DESC LIMIT %s""",
+                (layer, f"%{query.lower()[:50]}%", max_results),
+            )
+            result[layer] = [_row_to_dict(r) for r in rows]
 
         # Update access counts for all returned memories
         all_ids = [m["id"] for layer_mems in result.values() for m in layer_mems]
         if all_ids:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE memories SET access_count = access_count + 1 WHERE id = ANY(%s)",
-                    (all_ids,),
-                )
-            conn.commit()
-    finally:
-        release_conn(conn)
+            await db.execute(
+                "UPDATE memories SET access_count = access_count + 1 WHERE id = ANY(%s)",
+                (all_ids,),
+            )
 
     return result
 
@@ -411,111 +416,106 @@ async def correlate_memories_optimized(
     Returns clusters of related memories with correlation scores.
     """
     embedding = await _get_embedding_async(query)
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            time_filter = ""
-            params: list[Any] = []
-
-            if time_window_hours:
-                time_filter = "AND created_at > now() - (%s * interval '1 hour')"
-                params.append(time_window_hours)
-
-            if embedding:
-                cur.execute(
-                    f"""SELECT id, content, category, memory_layer, tags, source_agent,
-                               access_count, created_at,
-                               1 - (embedding <=> %s::vector) AS similarity
-                        FROM memories
-                        WHERE embedding IS NOT NULL
-                          AND 1 - (embedding <=> %s::vector) > 0.25
-                          {time_filter}
-                        ORDER BY embedding <=> %s::vector
-                        LIMIT %s""",
-                    [str(embedding), str(embedding)] + params + [str(embedding), max_results * 2],
-                )
-            else:
-                words = [w for w in query.lower().split() if len(w) > 2][:5]
-                like_parts = " OR ".join(f"LOWER(content) LIKE %s" for _ in words) if words else "TRUE"
-                word_params = [f"%{w}%" for w in words]
-                cur.execute(
-                    f"""SELECT id, content, category, memory_layer, tags, source_agent,
-                               access_count, created_at
-                        FROM memories
-                        WHERE ({like_parts}) {time_filter}
-                        ORDER BY created_at DESC
-                        LIMIT %s""",
-                    word_params + params + [max_results * 2],
-                )
-
-            rows = [_row_to_dict(_as_row_dict(r)) for r in cur.fetchall()]
-
-        if not rows:
-            return {"clusters": [], "total_found": 0}
-
-        # O(n) grouping by category and source_agent using defaultdict
-        category_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
-        agent_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
-        other_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
-
-        for mem in rows:
-            category = mem.get("category")
-            source_agent = mem.get("source_agent")
-            
-            if category and category != "general":
-                category_groups[category].append(mem)
-            elif source_agent:
-                agent_groups[source_agent].append(mem)
-            else:
-                other_groups[f"memory:{mem.get('id')}"].append(mem)
+    time_filter = ""
+    params: list[Any] = []
 
-        # Combine all groups
-        all_groups = list(category_groups.values()) + list(agent_groups.values()) + list(other_groups.values())
+    if time_window_hours:
+        time_filter = "AND created_at > now() - (%s * interval '1 hour')"
+        params.append(time_window_hours)
 
-        # Apply high similarity clustering within each group
-        clusters: list[dict[str, Any]] = []
-        for group in all_groups:
-            if len(group) == 1:
-                # Single item group
-                primary = group[0]
+    async with async_db_conn() as db:
+        if embedding:
+            raw = await db.fetch_all(
+                f"""SELECT id, content, category, memory_layer, tags, source_agent,
+                           access_count, created_at,
+                           1 - (embedding <=> %s::vector) AS similarity
+                    FROM memories
+                    WHERE embedding IS NOT NULL
+                      AND 1 - (embedding <=> %s::vector) > 0.25
+                      {time_filter}
+                    ORDER BY embedding <=> %s::vector
+                    LIMIT %s""",
+                [str(embedding), str(embedding)] + params + [str(embedding), max_results * 2],
+            )
+        else:
+            words = [w for w in query.lower().split() if len(w) > 2][:5]
+            like_parts = " OR ".join(f"LOWER(content) LIKE %s" for _ in words) if words else "TRUE"
+            word_params = [f"%{w}%" for w in words]
+            raw = await db.fetch_all(
+                f"""SELECT id, content, category, memory_layer, tags, source_agent,
+                           access_count, created_at
+                    FROM memories
+                    WHERE ({like_parts}) {time_filter}
+                    ORDER BY created_at DESC
+                    LIMIT %s""",
+                word_params + params + [max_results * 2],
+            )
+    rows = [_row_to_dict(r) for r in raw]
+
+    if not rows:
+        return {"clusters": [], "total_found": 0}
+
+    # O(n) grouping by category and source_agent using defaultdict
+    category_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+    agent_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+    other_groups: defaultdict[str, list[dict[str, Any]]] = defaultdict(list)
+
+    for mem in rows:
+        category = mem.get("category")
+        source_agent = mem.get("source_agent")
+        
+        if category and category != "general":
+            category_groups[category].append(mem)
+        elif source_agent:
+            agent_groups[source_agent].append(mem)
+        else:
+            other_groups[f"memory:{mem.get('id')}"].append(mem)
+
+    # Combine all groups
+    all_groups = list(category_groups.values()) + list(agent_groups.values()) + list(other_groups.values())
+
+    # Apply high similarity clustering within each group
+    clusters: list[dict[str, Any]] = []
+    for group in all_groups:
+        if len(group) == 1:
+            # Single item group
+            primary = group[0]
+            clusters.append({
+                "members": group[:max_results],
+                "size": 1,
+                "primary_category": primary.get("category"),
+                "primary_agent": primary.get("source_agent"),
+                "avg_similarity": primary.get("similarity", 0),
+            })
+        else:
+            # Multiple items - check for high similarity connections
+            high_sim_items = [item for item in group if (item.get("similarity") or 0) > 0.5]
+            if high_sim_items:
+                # Group items with high similarity
+                avg_sim = sum(item.get("similarity") or 0 for item in high_sim_items) / len(high_sim_items)
                 clusters.append({
-                    "members": group[:max_results],
-                    "size": 1,
-                    "primary_category": primary.get("category"),
-                    "primary_agent": primary.get("source_agent"),
-                    "avg_similarity": primary.get("similarity", 0),
+                    "members": high_sim_items[:max_results],
+                    "size": len(high_sim_items),
+                    "primary_category": group[0].get("category"),
+                    "primary_agent": group[0].get("source_agent"),
+                    "avg_similarity": round(avg_sim, 3),
                 })
             else:
-                # Multiple items - check for high similarity connections
-                high_sim_items = [item for item in group if (item.get("similarity") or 0) > 0.5]
-                if high_sim_items:
-                    # Group items with high similarity
-                    avg_sim = sum(item.get("similarity") or 0 for item in high_sim_items) / len(high_sim_items)
+                # Keep as separate clusters if no high similarity
+                for item in group:
                     clusters.append({
-                        "members": high_sim_items[:max_results],
-                        "size": len(high_sim_items),
-                        "primary_category": group[0].get("category"),
-                        "primary_agent": group[0].get("source_agent"),
-                        "avg_similarity": round(avg_sim, 3),
+                        "members": [item],
+                        "size": 1,
+                        "primary_category": item.get("category"),
+                        "primary_agent": item.get("source_agent"),
+                        "avg_similarity": item.get("similarity", 0),
                     })
-                else:
-                    # Keep as separate clusters if no high similarity
-                    for item in group:
-                        clusters.append({
-                            "members": [item],
-                            "size": 1,
-                            "primary_category": item.get("category"),
-                            "primary_agent": item.get("source_agent"),
-                            "avg_similarity": item.get("similarity", 0),
-                        })
-
-        clusters.sort(key=lambda c: c["avg_similarity"], reverse=True)
-        return {
-            "clusters": clusters[:5],
-            "total_found": len(rows),
-        }
-    finally:
-        release_conn(conn)
+
+    clusters.sort(key=lambda c: c["avg_similarity"], reverse=True)
+    return {
+        "clusters": clusters[:5],
+        "total_found": len(rows),
+    }
 
 
 async def correlate_memories(
@@ -595,25 +595,20 @@ async def find_related_memories_optimized(
     Uses the source memory's embedding for similarity search,
     falls back to category + tag matching with pre-fetched embeddings cache.
     """
-    conn = get_conn()
-    try:
-        # Fetch the source memory and related memory embeddings in one query
-        with conn.cursor() as cur:
-            # First get the source memory to avoid repeated subqueries
-            cur.execute("""
-                SELECT id, content, category, memory_layer, tags, source_agent, embedding
-                FROM memories WHERE id = %s
-            """, (memory_id,))
-            source_row = cur.fetchone()
-            if not source_row:
-                return []
-            
-            source_mem = _as_row_dict(source_row)
-            source_embedding = source_mem.get('embedding')
-            
-            if source_embedding:
-                # Use the source embedding for similarity search
-                cur.execute("""
+    async with async_db_conn() as db:
+        # First get the source memory to avoid repeated subqueries
+        source_mem = await db.fetch_one("""
+            SELECT id, content, category, memory_layer, tags, source_agent, embedding
+            FROM memories WHERE id = %s
+        """, (memory_id,))
+        if not source_mem:
+            return []
+
+        source_embedding = source_mem.get('embedding')
+
+        if source_embedding:
+            # Use the source embedding for similarity search
+            rows = await db.fetch_all("""
                     SELECT id, content, category, memory_layer, tags, source_agent,
                            1 - (embedding <=> %s::vector) AS similarity
                     FROM memories
@@ -621,21 +616,18 @@ async def find_related_memories_optimized(
                       AND 1 - (embedding <=> %s::vector) > 0.3
                     ORDER BY embedding <=> %s::vector
                     LIMIT %s
-                """, (str(source_embedding), memory_id, str(source_embedding), str(source_embedding), max_results))
-            else:
-                # Fallback to category-based search if no embedding
-                cur.execute("""
+            """, (str(source_embedding), memory_id, str(source_embedding), str(source_embedding), max_results))
+        else:
+            # Fallback to category-based search if no embedding
+            rows = await db.fetch_all("""
                     SELECT id, content, category, memory_layer, tags, source_agent, 0.0 as similarity
                     FROM memories
                     WHERE id != %s AND category = %s
                     ORDER BY created_at DESC
                     LIMIT %s
-                """, (memory_id, source_mem.get('category', ''), max_results))
-            
-            rows = cur.fetchall()
-            return [_row_to_dict(_as_row_dict(r)) for r in rows]
-    finally:
-        release_conn(conn)
+            """, (memory_id, source_mem.get('category', ''), max_results))
+
+    return [_row_to_dict(r) for r in rows]
 
 
 async def find_related_memories(
@@ -654,11 +646,9 @@ async def _pgvector_recall(
     max_results: int,
 ) -> list[dict[str, Any]]:
     """pgvector cosine similarity search with optimized batch updates."""
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            if category:
-                cur.execute(
+    async with async_db_conn() as db:
+        if category:
+            rows = await db.fetch_all(
                     """SELECT id, content, category, memory_layer, tags, source_agent,
                               access_count, created_at,
                               1 - (embedding <=> %s::vector) AS similarity
@@ -669,8 +659,8 @@ async def _pgvector_recall(
                        LIMIT %s""",
                     (str(embedding), category, str(embedding), str(embedding), max_results),
                 )
-            else:
-                cur.execute(
+        else:
+            rows = await db.fetch_all(
                     """SELECT id, content, category, memory_layer, tags, source_agent,
                               access_count, created_at,
                               1 - (embedding <=> %s::vector) AS similarity
@@ -681,25 +671,20 @@ async def _pgvector_recall(
                        LIMIT %s""",
                     (str(embedding), str(embedding), str(embedding), max_results),
                 )
-            rows = cur.fetchall()
 
         if not rows:
             return []
 
-        results = [_row_to_dict(_as_row_dict(r)) for r in rows]
+        results = [_row_to_dict(r) for r in rows]
         ids = [r["id"] for r in results]
-        with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE memories SET access_count = access_count + 1 WHERE id = ANY(%s)",
-                (ids,),
-            )
-        conn.commit()
-        return results
-    finally:
-        release_conn(conn)
+        await db.execute(
+            "UPDATE memories SET access_count = access_count + 1 WHERE id = ANY(%s)",
+            (ids,),
+        )
+    return results
 
 
-def _keyword_recall(
+async def _keyword_recall(
     query: str,
     category: str | None,
     max_results: int,
@@ -709,37 +694,33 @@ def _keyword_recall(
     if not words:
         words = [query.lower()]
 
-    conn = get_conn()
-    try:
-        conditions = ["1=1"]
-        params: list[Any] = []
+    conditions = ["1=1"]
+    params: list[Any] = []
 
-        if category:
-            conditions.append("category = %s")
-            params.append(category)
+    if category:
+        conditions.append("category = %s")
+        params.append(category)
 
-        like_parts = [f"LOWER(content) LIKE %s" for _ in words[:10]]
-        params.extend(f"%{w}%" for w in words[:10])
-        conditions.append(f"({' OR '.join(like_parts)})")
+    like_parts = [f"LOWER(content) LIKE %s" for _ in words[:10]]
+    params.extend(f"%{w}%" for w in words[:10])
+    conditions.append(f"({' OR '.join(like_parts)})")
 
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""SELECT id, content, category, memory_layer, tags, source_agent,
-                           access_count, created_at
-                    FROM memories
-                    WHERE {' AND '.join(conditions)}
-                    ORDER BY created_at DESC LIMIT %s""",
-                params + [max_results * 5],
-            )
-            rows = cur.fetchall()
+    async with async_db_conn() as db:
+        rows = await db.fetch_all(
+            f"""SELECT id, content, category, memory_layer, tags, source_agent,
+                       access_count, created_at
+                FROM memories
+                WHERE {' AND '.join(conditions)}
+                ORDER BY created_at DESC LIMIT %s""",
+            params + [max_results * 5],
+        )
 
         if not rows:
             return []
 
         query_lower = query.lower()
         scored = []
-        for row in rows:
-            d = _as_row_dict(row)
+        for d in rows:
             score = sum(2.0 for w in words if w in d["content"].lower())
             if query_lower in d["content"].lower():
                 score += 5.0
@@ -751,16 +732,12 @@ def _keyword_recall(
 
         if results:
             ids = [r["id"] for r in results]
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE memories SET access_count = access_count + 1 WHERE id = ANY(%s)",
-                    (ids,),
-                )
-            conn.commit()
+            await db.execute(
+                "UPDATE memories SET access_count = access_count + 1 WHERE id = ANY(%s)",
+                (ids,),
+            )
 
-        return results
-    finally:
-        release_conn(conn)
+    return results
 
 # ── Advanced Recall ──────────────────────────────────────────────
 
@@ -780,71 +757,66 @@ async def advanced_recall(
 
     embedding = await _get_embedding_async(query)
 
-    conn = get_conn()
-    try:
-        if embedding:
-            emb_str = str(embedding)
-            conditions: list[str] = [
-                f"1 - (embedding <=> %s::vector) >= %s",
-            ]
-            params: list[Any] = [emb_str, similarity_threshold]
-
-            if tags:
-                conditions.append("tags::jsonb ?& %s")
-                params.append(tags)
-            if date_from:
-                conditions.append("created_at >= %s::timestamptz")
-                params.append(date_from)
-            if date_to:
-                conditions.append("created_at <= %s::timestamptz")
-                params.append(date_to)
-            if memory_type:
-                conditions.append("memory_layer = %s")
-                params.append(memory_type)
-
-            where = " AND ".join(conditions)
-            params.append(limit)
-
-            with conn.cursor() as cur:
-                cur.execute(
-                    f"""SELECT id AS memory_id, content, tags,
-                               1 - (embedding <=> %s::vector) AS similarity_score,
-                               created_at
-                        FROM memories
-                        WHERE {where}
-                        ORDER BY similarity_score DESC
-                        LIMIT %s""",
-                    [emb_str] + params,
-                )
-                rows = cur.fetchall()
-
-            return [
-                {
-                    "memory_id": _as_row_dict(r).get("memory_id"),
-                    "content": _as_row_dict(r).get("content"),
-                    "tags": json.loads(_as_row_dict(r).get("tags", "[]"))
-                    if isinstance(_as_row_dict(r).get("tags"), str)
-                    else _as_row_dict(r).get("tags", []),
-                    "similarity_score": round(float(_as_row_dict(r).get("similarity_score", 0)), 4),
-                    "created_at": str(_as_row_dict(r).get("created_at", "")),
-                }
-                for r in rows
-            ]
-        else:
-            # Fallback: keyword search
-            results = _keyword_recall(query, None, limit)
-            return [
-                {
-                    "memory_id": r.get("id"),
-                    "content": r.get("content"),
-                    "tags": r.get("tags", []),
-                    "similarity_score": 0.0,
-                    "created_at": str(r.get("created_at", "")),
-                }
-                for r in results
-            ]
-    finally:
-        release_conn(conn)
+    if embedding:
+        emb_str = str(embedding)
+        conditions: list[str] = [
+            f"1 - (embedding <=> %s::vector) >= %s",
+        ]
+        params: list[Any] = [emb_str, similarity_threshold]
+
+        if tags:
+            conditions.append("tags::jsonb ?& %s")
+            params.append(tags)
+        if date_from:
+            conditions.append("created_at >= %s::timestamptz")
+            params.append(date_from)
+        if date_to:
+            conditions.append("created_at <= %s::timestamptz")
+            params.append(date_to)
+        if memory_type:
+            conditions.append("memory_layer = %s")
+            params.append(memory_type)
+
+        where = " AND ".join(conditions)
+        params.append(limit)
+
+        async with async_db_conn() as db:
+            rows = await db.fetch_all(
+                f"""SELECT id AS memory_id, content, tags,
+                           1 - (embedding <=> %s::vector) AS similarity_score,
+                           created_at
+                    FROM memories
+                    WHERE {where}
+                    ORDER BY similarity_score DESC
+                    LIMIT %s""",
+                [emb_str] + params,
+            )
+
+        return [
+            {
+                "memory_id": r.get("memory_id"),
+                "content": r.get("content"),
+                "tags": json.loads(r.get("tags", "[]"))
+                if isinstance(r.get("tags"), str)
+                else r.get("tags", []),
+                "similarity_score": round(float(r.get("similarity_score", 0)), 4),
+                "created_at": str(r.get("created_at", "")),
+            }
+            for r in rows
+        ]
+
+    # Fallback: keyword search
+    results = await _keyword_recall(query, None, limit)
+    return [
+        {
+            "memory_id": r.get("id"),
+            "content": r.get("content"),
+            "tags": r.get("tags", []),
+            "similarity_score": 0.0,
+            "created_at": str(r.get("created_at", "")),
+        }
+        for r in results
+    ]
 
 
 # ── Tag Management ───────────────────────────────────────────────
@@ -852,90 +824,64 @@ async def advanced_recall(
 
 async def add_tags(memory_id: int, tags: list[str]) -> dict[str, Any]:
     """Merge new tags into an existing memory (no duplicates)."""
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT id, tags FROM memories WHERE id = %s", (memory_id,)
-            )
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Memory not found")
+    async with async_db_conn() as db:
+        d = await db.fetch_one(
+            "SELECT id, tags FROM memories WHERE id = %s FOR UPDATE", (memory_id,)
+        )
+        if not d:
+            raise ValueError("Memory not found")
 
-            d = _as_row_dict(row)
-            existing = json.loads(d["tags"]) if isinstance(d["tags"], str) else (d["tags"] or [])
-            merged = list(dict.fromkeys(existing + tags))  # preserve order, no dupes
+        existing = json.loads(d["tags"]) if isinstance(d["tags"], str) else (d["tags"] or [])
+        merged = list(dict.fromkeys(existing + tags))  # preserve order, no dupes
 
-            cur.execute(
-                "UPDATE memories SET tags = %s, updated_at = now() WHERE id = %s RETURNING id, tags, updated_at",
-                (json.dumps(merged, ensure_ascii=False), memory_id),
-            )
-            updated = _as_row_dict(cur.fetchone())
-        conn.commit()
+        updated = await db.fetch_one(
+            "UPDATE memories SET tags = %s, updated_at = now() WHERE id = %s RETURNING id, tags, updated_at",
+            (json.dumps(merged, ensure_ascii=False), memory_id),
+        ) or {}
 
-        return {
-            "memory_id": updated.get("id"),
-            "tags": merged,
-            "updated_at": str(updated.get("updated_at", "")),
-        }
-    finally:
-        release_conn(conn)
+    return {
+        "memory_id": updated.get("id"),
+        "tags": merged,
+        "updated_at": str(updated.get("updated_at", "")),
+    }
 
 
 async def remove_tags(memory_id: int, tags: list[str]) -> dict[str, Any]:
     """Remove specified tags from an existing memory."""
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT id, tags FROM memories WHERE id = %s", (memory_id,)
-            )
-            row = cur.fetchone()
-            if not row:
-                raise ValueError("Memory not found")
+    async with async_db_conn() as db:
+        d = await db.fetch_one(
+            "SELECT id, tags FROM memories WHERE id = %s FOR UPDATE", (memory_id,)
+        )
+        if not d:
+            raise ValueError("Memory not found")
 
-            d = _as_row_dict(row)
-            existing = json.loads(d["tags"]) if isinstance(d["tags"], str) else (d["tags"] or [])
-            remaining = [t for t in existing if t not in tags]
+        existing = json.loads(d["tags"]) if isinstance(d["tags"], str) else (d["tags"] or [])
+        remaining = [t for t in existing if t not in tags]
 
-            cur.execute(
-                "UPDATE memories SET tags = %s, updated_at = now() WHERE id = %s RETURNING id, tags, updated_at",
-                (json.dumps(remaining, ensure_ascii=False), memory_id),
-            )
-            updated = _as_row_dict(cur.fetchone())
-        conn.commit()
+        updated = await db.fetch_one(
+            "UPDATE memories SET tags = %s, updated_at = now() WHERE id = %s RETURNING id, tags, updated_at",
+            (json.dumps(remaining, ensure_ascii=False), memory_id),
+        ) or {}
 
-        return {
-            "memory_id": updated.get("id"),
-            "tags": remaining,
-            "updated_at": str(updated.get("updated_at", "")),
-        }
-    finally:
-        release_conn(conn)
+    return {
+        "memory_id": updated.get("id"),
+        "tags": remaining,
+        "updated_at": str(updated.get("updated_at", "")),
+    }
 
 
 async def list_all_tags() -> list[dict[str, Any]]:
     """Return every unique tag with its usage count, sorted by count DESC."""
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """SELECT tag, COUNT(*) AS count
-                   FROM (
-                       SELECT jsonb_array_elements_text(tags::jsonb) AS tag
-                       FROM memories
-                   ) sub
-                   GROUP BY tag
-                   ORDER BY count DESC"""
-            )
-            rows = cur.fetchall()
-
-        return [
-            {"tag": _as_row_dict(r).get("tag"), "count": _as_row_dict(r).get("count", 0)}
-            for r in rows
-        ]
-    finally:
-        release_conn(conn)
+    rows = await afetch_all(
+        """SELECT tag, COUNT(*) AS count
+           FROM (
+               SELECT jsonb_array_elements_text(tags::jsonb) AS tag
+               FROM memories
+           ) sub
+           GROUP BY tag
+           ORDER BY count DESC"""
+    )
+    return [{"tag": r.get("tag"), "count": r.get("count", 0)} for r in rows]
 
 
 # ── Deduplication-Aware Save ─────────────────────────────────────
@@ -958,32 +904,28 @@ async def save_memory_with_dedup(
     tags = tags or []
 
     if not dedup:
-        result = _insert_memory(content, category, "episodic", tags, source_agent)
+        result = await _ainsert_memory(content, category, "episodic", tags, source_agent)
         return {"action": "inserted", "memory_id": result["id"]}
 
     embedding = await _get_embedding_async(content)
     if not embedding:
         logger.warning("save_memory_with_dedup: embedding generation failed, inserting without dedup check")
-        result = _insert_memory(content, category, "episodic", tags, source_agent)
+        result = await _ainsert_memory(content, category, "episodic", tags, source_agent)
         return {"action": "inserted_no_dedup", "memory_id": result["id"], "reason": "embedding_failed"}
 
     emb_str = str(embedding)
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                """SELECT id, content,
-                          1 - (embedding <=> %s::vector) AS similarity
-                   FROM memories
-                   WHERE embedding IS NOT NULL
-                   ORDER BY embedding <=> %s::vector
-                   LIMIT 1""",
-                (emb_str, emb_str),
-            )
-            row = cur.fetchone()
+    async with async_db_conn() as db:
+        d = await db.fetch_one(
+            """SELECT id, content,
+                      1 - (embedding <=> %s::vector) AS similarity
+               FROM memories
+               WHERE embedding IS NOT NULL
+               ORDER BY embedding <=> %s::vector
+               LIMIT 1""",
+            (emb_str, emb_str),
+        )
 
-        if row:
-            d = _as_row_dict(row)
+        if d:
             sim = float(d.get("similarity", 0))
             existing_id = d.get("id")
 
@@ -992,20 +934,16 @@ async def save_memory_with_dedup(
 
             if sim >= 0.70:
                 tags_json = json.dumps(tags, ensure_ascii=False)
-                with conn.cursor() as cur:
-                    cur.execute(
-                        """UPDATE memories
-                           SET content = %s, category = %s, tags = %s,
-                               source_agent = %s, embedding = %s::vector,
-                               updated_at = now()
-                           WHERE id = %s""",
-                        (content, category, tags_json, source_agent, emb_str, existing_id),
-                    )
-                conn.commit()
+                await db.execute(
+                    """UPDATE memories
+                       SET content = %s, category = %s, tags = %s,
+                           source_agent = %s, embedding = %s::vector,
+                           updated_at = now()
+                       WHERE id = %s""",
+                    (content, category, tags_json, source_agent, emb_str, existing_id),
+                )
                 return {"action": "updated", "memory_id": existing_id}
 
-        # similarity < 0.70 or no existing memories
-        result = _insert_memory(content, category, "episodic", tags, source_agent)
-        return {"action": "inserted", "memory_id": result["id"]}
-    finally:
-        release_conn(conn)
+    # similarity < 0.70 or no existing memories — embedding already computed, reuse it
+    result = await _ainsert_memory(content, category, "episodic", tags, source_agent, embedding=embedding)
+    return {"action": "inserted", "memory_id": result["id"]}
@@ -5,15 +5,20 @@ Single module for all DB access across memory, rag, teachability, skills.
 Pool sizing: maxconn=30 supports 5-6 concurrent agents + performance_collector
 + heartbeat + analytics + observability without exhaustion.
 Retry logic: 3 attempts with exponential backoff on pool exhaustion.
+
+async def kod yolları için async_db_conn() (psycopg3 AsyncConnectionPool,
+yoksa psycopg2 + thread offload) — bkz. "Async Pool" bölümü.
 """
 
 from __future__ import annotations
 
+import abc
+import asyncio
 import logging
 import os
 import time
-from contextlib import contextmanager
-from typing import Any, Generator, Mapping, TypeAlias
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncGenerator, Generator, Mapping, Sequence, TypeAlias
 
 import psycopg2
 import psycopg2.extras
@@ -161,6 +166,262 @@ def db_conn() -> Generator[psycopg2.extensions.connection, None, None]:
         release_conn(conn)
 
 
+# ── Async Pool ───────────────────────────────────────────────────
+# async def kod yolları (memory, rag, scheduler, webhooks) senkron get_conn()
+# çağırınca event loop tüm WebSocket oturumları için durur. async_db_conn():
+#   - psycopg3 kuruluysa: psycopg_pool.AsyncConnectionPool (gerçek async I/O,
+#     prepare_threshold ile otomatik server-side prepared statement)
+#   - değilse: psycopg2 havuzu + asyncio.to_thread (loop yine bloklanmaz)
+# Her iki yolda da statement_timeout transaction'a SET LOCAL ile uygulanır.
+
+_ASYNC_MAX_CONN = int(os.getenv("PG_ASYNC_MAX_CONN", "20"))
+_ASYNC_MIN_CONN = int(os.getenv("PG_ASYNC_MIN_CONN", "1"))
+_STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "15000"))
+_PREPARE_THRESHOLD = int(os.getenv("PG_PREPARE_THRESHOLD", "2"))
+_ASYNC_DRIVER = os.getenv("PG_ASYNC_DRIVER", "auto").strip().lower()  # auto | psycopg | thread
+
+try:
+    from psycopg.rows import dict_row as _dict_row
+    from psycopg_pool import AsyncConnectionPool as _AsyncConnectionPool
+    _HAS_PSYCOPG3 = True
+except ImportError:  # psycopg[pool] opsiyonel
+    _AsyncConnectionPool = None  # type: ignore[assignment,misc]
+    _dict_row = None  # type: ignore[assignment]
+    _HAS_PSYCOPG3 = False
+
+_async_pool: Any = None
+_async_pool_loop: asyncio.AbstractEventLoop | None = None
+_async_pool_lock: asyncio.Lock | None = None
+
+
+class AsyncDBSession(abc.ABC):
+    """Minimal async query surface shared by both drivers (rows are dicts)."""
+
+    @abc.abstractmethod
+    async def fetch_all(self, sql: str, params: Sequence[Any] | None = None) -> list[dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    async def fetch_one(self, sql: str, params: Sequence[Any] | None = None) -> dict[str, Any] | None:
+        ...
+
+    @abc.abstractmethod
+    async def execute(self, sql: str, params: Sequence[Any] | None = None) -> int:
+        """Run a statement and return its rowcount."""
+
+    @abc.abstractmethod
+    async def execute_many(self, sql: str, params_seq: Sequence[Sequence[Any]]) -> int:
+        ...
+
+
+class _PsycopgSession(AsyncDBSession):
+    def __init__(self, conn: Any) -> None:
+        self._conn = conn
+
+    async def fetch_all(self, sql: str, params: Sequence[Any] | None = None) -> list[dict[str, Any]]:
+        async with self._conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return list(await cur.fetchall())
+
+    async def fetch_one(self, sql: str, params: Sequence[Any] | None = None) -> dict[str, Any] | None:
+        async with self._conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchone()
+
+    async def execute(self, sql: str, params: Sequence[Any] | None = None) -> int:
+        async with self._conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return cur.rowcount
+
+    async def execute_many(self, sql: str, params_seq: Sequence[Sequence[Any]]) -> int:
+        if not params_seq:
+            return 0
+        async with self._conn.cursor() as cur:
+            await cur.executemany(sql, params_seq)
+            return cur.rowcount
+
+
+class _ThreadedSession(AsyncDBSession):
+    """psycopg2 connection driven from a worker thread, one call at a time."""
+
+    def __init__(self, conn: psycopg2.extensions.connection) -> None:
+        self._conn = conn
+
+    def _run(self, sql: str, params: Sequence[Any] | None, fetch: str | None) -> Any:
+        with self._conn.cursor() as cur:
+            cur.execute(sql, params)
+            if fetch == "all":
+                return [dict(r) for r in cur.fetchall()]
+            if fetch == "one":
+                row = cur.fetchone()
+                return dict(row) if row is not None else None
+            return cur.rowcount
+
+    def _run_many(self, sql: str, params_seq: Sequence[Sequence[Any]]) -> int:
+        with self._conn.cursor() as cur:
+            psycopg2.extras.execute_batch(cur, sql, params_seq)
+            return cur.rowcount
+
+    async def fetch_all(self, sql: str, params: Sequence[Any] | None = None) -> list[dict[str, Any]]:
+        return await asyncio.to_thread(self._run, sql, params, "all")
+
+    async def fetch_one(self, sql: str, params: Sequence[Any] | None = None) -> dict[str, Any] | None:
+        return await asyncio.to_thread(self._run, sql, params, "one")
+
+    async def execute(self, sql: str, params: Sequence[Any] | None = None) -> int:
+        return await asyncio.to_thread(self._run, sql, params, None)
+
+    async def execute_many(self, sql: str, params_seq: Sequence[Sequence[Any]]) -> int:
+        if not params_seq:
+            return 0
+        return await asyncio.to_thread(self._run_many, sql, params_seq)
+
+
+def _use_psycopg3() -> bool:
+    if _ASYNC_DRIVER == "thread":
+        return False
+    return _HAS_PSYCOPG3
+
+
+async def _get_async_pool() -> Any | None:
+    """Return the loop-bound psycopg3 pool, or None to use the threaded fallback."""
+    global _async_pool, _async_pool_loop, _async_pool_lock
+    if not _use_psycopg3():
+        return None
+    loop = asyncio.get_running_loop()
+    if _async_pool is not None:
+        # Havuz oluşturulduğu loop'a bağlı; başka loop'tan (ör. test, thread) thread yoluna düş
+        return _async_pool if _async_pool_loop is loop else None
+
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        if _async_pool is None:
+            pool = _AsyncConnectionPool(
+                conninfo=DATABASE_URL,
+                min_size=_ASYNC_MIN_CONN,
+                max_size=_ASYNC_MAX_CONN,
+                kwargs={
+                    "row_factory": _dict_row,
+                    "prepare_threshold": _PREPARE_THRESHOLD,
+                    "connect_timeout": _CONNECT_TIMEOUT_SEC,
+                },
+                open=False,
+            )
+            try:
+                await pool.open(wait=True, timeout=_CONNECT_TIMEOUT_SEC + 1)
+            except Exception as e:
+                try:
+                    await pool.close()
+                except Exception:
+                    pass
+                _mark_postgres_unavailable(str(e))
+                raise psycopg2.OperationalError(str(e)) from e
+            _async_pool = pool
+            _async_pool_loop = loop
+            logger.info(
+                "PostgreSQL async pool initialized (psycopg3, max=%d, prepare_threshold=%d)",
+                _ASYNC_MAX_CONN, _PREPARE_THRESHOLD,
+            )
+    return _async_pool
+
+
+async def _apply_timeout(session: AsyncDBSession, timeout_ms: int) -> None:
+    if timeout_ms > 0:
+        await session.execute(
+            "SELECT set_config('statement_timeout', %s, true)", (str(int(timeout_ms)),)
+        )
+
+
+@asynccontextmanager
+async def async_db_conn(
+    statement_timeout_ms: int | None = None,
+) -> AsyncGenerator[AsyncDBSession, None]:
+    """
+    Async counterpart of db_conn(): yields an AsyncDBSession inside one transaction.
+
+    Commits on clean exit, rolls back on error. statement_timeout applies to
+    this transaction only (default PG_STATEMENT_TIMEOUT_MS, 0 = no limit).
+    """
+    if not _can_attempt_postgres():
+        raise psycopg2.OperationalError("postgres disabled/unavailable")
+    timeout_ms = _STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+
+    pool = await _get_async_pool()
+    if pool is not None:
+        async with pool.connection() as conn:
+            # pool.connection(): temiz çıkışta commit, exception'da rollback
+            session = _PsycopgSession(conn)
+            await _apply_timeout(session, timeout_ms)
+            yield session
+        return
+
+    conn = await asyncio.to_thread(get_conn)
+    session = _ThreadedSession(conn)
+    try:
+        await _apply_timeout(session, timeout_ms)
+        yield session
+        await asyncio.to_thread(conn.commit)
+    except BaseException:
+        try:
+            await asyncio.to_thread(conn.rollback)
+        except Exception:
+            pass
+        raise
+    finally:
+        release_conn(conn)
+
+
+async def afetch_all(
+    sql: str, params: Sequence[Any] | None = None, statement_timeout_ms: int | None = None,
+) -> list[dict[str, Any]]:
+    """One-shot async SELECT returning all rows."""
+    async with async_db_conn(statement_timeout_ms) as db:
+        return await db.fetch_all(sql, params)
+
+
+async def afetch_one(
+    sql: str, params: Sequence[Any] | None = None, statement_timeout_ms: int | None = None,
+) -> dict[str, Any] | None:
+    """One-shot async SELECT returning the first row (or None)."""
+    async with async_db_conn(statement_timeout_ms) as db:
+        return await db.fetch_one(sql, params)
+
+
+async def aexecute(
+    sql: str, params: Sequence[Any] | None = None, statement_timeout_ms: int | None = None,
+) -> int:
+    """One-shot async statement; returns rowcount."""
+    async with async_db_conn(statement_timeout_ms) as db:
+        return await db.execute(sql, params)
+
+
+async def close_async_pool() -> None:
+    """Close the psycopg3 pool (app shutdown)."""
+    global _async_pool, _async_pool_loop, _async_pool_lock
+    pool, _async_pool, _async_pool_loop, _async_pool_lock = _async_pool, None, None, None
+    if pool is not None:
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.warning("Failed to close async pool: %s", e)
+
+
+def async_pool_stats() -> dict[str, Any]:
+    """Driver + pool statistics for monitoring."""
+    stats: dict[str, Any] = {
+        "driver": "psycopg3" if _async_pool is not None else ("thread" if not _use_psycopg3() else "psycopg3 (idle)"),
+        "statement_timeout_ms": _STATEMENT_TIMEOUT_MS,
+        "prepare_threshold": _PREPARE_THRESHOLD if _use_psycopg3() else None,
+    }
+    if _async_pool is not None:
+        try:
+            stats.update(_async_pool.get_stats())
+        except Exception:
+            pass
+    return stats
+
+
 # ── Schema ───────────────────────────────────────────────────────
 
 _SCHEMA_SQL = """
@@ -244,6 +505,18 @@ CREATE INDEX IF NOT EXISTS idx_docs_hash ON documents(doc_hash);
 CREATE INDEX IF NOT EXISTS idx_docs_user ON documents(user_id);
 """
 
+# Teachings full-text search: generated tsvector ('simple' — TR/EN mixed text, no stemming)
+_TEACHING_SEARCH_SQL = """
+ALTER TABLE teachings ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', instruction || ' ' || trigger_text)) STORED;
+CREATE INDEX IF NOT EXISTS idx_teach_tsv ON teachings USING gin(search_tsv);
+"""
+
+_TRIGRAM_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_teach_trgm ON teachings USING gin(instruction gin_trgm_ops)",
+]
+
 # Vector indexes — separated because ivfflat requires rows to exist.
 # HNSW works on empty tables, so prefer it for initial creation.
 _VECTOR_INDEXES = [
@@ -262,8 +535,21 @@ def init_database() -> None:
             # Migration: add user_id to documents if missing (e.g. tables created before this column existed)
             cur.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS user_id TEXT")
             cur.execute(_SCHEMA_DOC_INDEXES)
+            # Migration: full-text column for teachability retrieval
+            cur.execute(_TEACHING_SEARCH_SQL)
         conn.commit()
 
+    # pg_trgm is optional (needs extension privileges) — teachability checks pg_extension
+    for trgm_sql in _TRIGRAM_INDEXES:
+        try:
+            with db_conn() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(trgm_sql)
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"pg_trgm setup skipped (teachings use full-text only): {e}")
+            break
+
     # Vector indexes may fail on empty tables (ivfflat needs rows).
     # Create them separately so table creation is never blocked.
     for idx_sql in _VECTOR_INDEXES:
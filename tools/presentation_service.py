@@ -10,11 +10,15 @@ and advanced slide types (quote, data highlight, two-column).
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import io
 import json
+import os
 import re
 import tempfile
+import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Literal
 
@@ -39,6 +43,7 @@ MODE_CONFIG: dict[PresentationMode, dict[str, Any]] = {
         "default_slides": 6,
         "research_queries": 3,
         "research_depth": 2,       # top N pages to fetch full content (reduced for faster response)
+        "research_char_budget": 2400,  # prompt chars of page content after which the fetch tail is dropped
         "label": "MINI",
         "emoji": "⚡",
         "description_tr": "Özet sunum — ana noktalar ve temel veriler",
@@ -49,6 +54,7 @@ MODE_CONFIG: dict[PresentationMode, dict[str, Any]] = {
         "default_slides": 12,
         "research_queries": 5,
         "research_depth": 3,
+        "research_char_budget": 3600,
         "label": "MIDI",
         "emoji": "📊",
         "description_tr": "Standart sunum — detaylı analiz, örnekler ve veriler",
@@ -59,6 +65,7 @@ MODE_CONFIG: dict[PresentationMode, dict[str, Any]] = {
         "default_slides": 25,
         "research_queries": 10,
         "research_depth": 6,
+        "research_char_budget": 7200,
         "label": "MAXI",
         "emoji": "🎯",
         "description_tr": "Kapsamlı sunum — derinlemesine araştırma, vaka çalışmaları, karşılaştırmalar",
@@ -117,74 +124,137 @@ POLLINATIONS_BASE = "https://gen.pollinations.ai/image"
 POLLINATIONS_MODEL = "zimage"
 _POLLINATIONS_API_KEY_DEFAULT = ""  # loaded from .env via POLLINATIONS_API_KEY
 
+# Slayt görselleri paralel çekilir; (prompt, width, height) ile diske cache'lenir
+PRESENTATION_IMAGE_CONCURRENCY = int(os.getenv("PRESENTATION_IMAGE_CONCURRENCY", "4"))
+IMAGE_CACHE_DIR = Path(os.getenv(
+    "PRESENTATION_IMAGE_CACHE_DIR", str(Path(__file__).parent.parent / "data" / "image_cache"),
+))
+IMAGE_CACHE_MAX_FILES = int(os.getenv("PRESENTATION_IMAGE_CACHE_MAX_FILES", "1000"))
+_SLIDE_IMAGE_SIZE = (1280, 960)
+_image_cache_writes = 0
+
 
 # ── Deep Research for Presentations ──────────────────────────────
 
+_PROMPT_CHARS_PER_SOURCE = 1500  # format_research_for_prompt kaynak başına bu kadarını kullanır
+_FETCH_CANDIDATE_FACTOR = 2  # başarısız sayfaların yerine geçecek yedek URL'ler
+RESEARCH_FETCH_WORKERS = int(os.getenv("RESEARCH_FETCH_WORKERS", "4"))
+RESEARCH_FETCH_TAIL_SEC = float(os.getenv("RESEARCH_FETCH_TAIL_SEC", "8"))
+
+
 async def deep_research_for_presentation(
     topic: str,
     language: str = "tr",
     max_queries: int = 5,
     mode: PresentationMode = "midi",
+    char_budget: int | None = None,
 ) -> dict[str, Any]:
     """
     Perform multi-query deep research on a topic using Whoogle.
     Research depth scales with mode: MINI=light, MIDI=standard, MAXI=deep.
     Returns structured research data: key_facts, statistics, sources, subtopics.
+
+    Streaming: each search result set feeds a bounded fetch worker pool as
+    soon as it arrives (URLs de-duplicated across queries). Fetching stops
+    once ``research_depth`` pages or ``char_budget`` prompt characters are
+    collected — the slowest pages are not awaited.
     """
     from tools.search import web_search
 
+    t0 = time.monotonic()
     cfg = MODE_CONFIG[mode]
     effective_queries = cfg["research_queries"]
     depth = cfg["research_depth"]
+    budget = char_budget if char_budget is not None else cfg["research_char_budget"]
 
     # Generate diverse search queries for comprehensive coverage
     queries = _generate_research_queries(topic, language, mode)[:effective_queries]
 
-    # Run all searches in parallel (fewer results per query for faster MINI/MIDI)
     results_per_query = 4 if mode == "mini" else 5 if mode == "midi" else 10
-    tasks = [web_search(q, max_results=results_per_query) for q in queries]
-    all_results = await asyncio.gather(*tasks, return_exceptions=True)
+    max_content_chars = 2000 if mode == "mini" else 3000 if mode == "midi" else 5000
 
-    # Aggregate and deduplicate
     seen_urls: set[str] = set()
     facts: list[str] = []
     sources: list[dict[str, str]] = []
-    all_snippets: list[str] = []
-
-    for result_set in all_results:
-        if isinstance(result_set, Exception) or not isinstance(result_set, list):
-            continue
-        for item in result_set:
-            url = item.get("url", "")
-            if url in seen_urls or not url:
-                continue
-            seen_urls.add(url)
-            snippet = item.get("snippet", "").strip()
-            if snippet and len(snippet) > 30:
-                facts.append(snippet)
-                all_snippets.append(snippet)
-                sources.append({
-                    "title": item.get("title", ""),
-                    "url": url,
-                })
-
-    # Try to fetch detailed content from top sources (depth scales with mode)
     detailed_content: list[str] = []
-    top_urls = [s["url"] for s in sources[:depth]]
-    max_content_chars = 2000 if mode == "mini" else 3000 if mode == "midi" else 5000
-    fetch_tasks = [_fetch_page_content(url, max_chars=max_content_chars) for url in top_urls]
-    fetch_results = await asyncio.gather(*fetch_tasks, return_exceptions=True)
-    for content in fetch_results:
-        if isinstance(content, str) and len(content) > 100:
-            detailed_content.append(content[:max_content_chars])
+    content_chars = 0
+    queued = 0
+    fetch_queue: asyncio.Queue[str] = asyncio.Queue()
+    enough = asyncio.Event()
+
+    async def fetch_worker() -> None:
+        nonlocal content_chars
+        while True:
+            url = await fetch_queue.get()
+            try:
+                if enough.is_set():
+                    continue
+                content = await _fetch_page_content(url, max_chars=max_content_chars)
+                if len(content) > 100 and not enough.is_set():
+                    detailed_content.append(content[:max_content_chars])
+                    content_chars += min(len(content), _PROMPT_CHARS_PER_SOURCE)
+                    if len(detailed_content) >= depth or content_chars >= budget:
+                        enough.set()
+            except Exception:
+                pass
+            finally:
+                fetch_queue.task_done()
+
+    workers = [
+        asyncio.create_task(fetch_worker())
+        for _ in range(max(1, min(RESEARCH_FETCH_WORKERS, depth)))
+    ]
+    # Run all searches in parallel; consume each as soon as it completes
+    searches = [asyncio.create_task(web_search(q, max_results=results_per_query)) for q in queries]
+    try:
+        for next_done in asyncio.as_completed(searches):
+            try:
+                result_set = await next_done
+            except Exception:
+                continue
+            if not isinstance(result_set, list):
+                continue
+            for item in result_set:
+                url = item.get("url", "")
+                if url in seen_urls or not url:
+                    continue
+                seen_urls.add(url)
+                snippet = item.get("snippet", "").strip()
+                if snippet and len(snippet) > 30:
+                    facts.append(snippet)
+                    sources.append({
+                        "title": item.get("title", ""),
+                        "url": url,
+                    })
+                    if queued < depth * _FETCH_CANDIDATE_FACTOR and not enough.is_set():
+                        fetch_queue.put_nowait(url)
+                        queued += 1
+
+        # Searches done — wait for the fetch budget, the queue to drain, or the tail deadline
+        drained = asyncio.create_task(fetch_queue.join())
+        satisfied = asyncio.create_task(enough.wait())
+        await asyncio.wait({drained, satisfied}, timeout=RESEARCH_FETCH_TAIL_SEC,
+                           return_when=asyncio.FIRST_COMPLETED)
+        for t in (drained, satisfied):
+            t.cancel()
+    finally:
+        for t in [*workers, *searches]:
+            if not t.done():
+                t.cancel()
 
     return {
         "queries_used": queries,
         "facts": facts[:30 if mode == "mini" else 50 if mode == "midi" else 80],
         "sources": sources[:15 if mode == "mini" else 25 if mode == "midi" else 40],
-        "detailed_content": detailed_content,
+        "detailed_content": list(detailed_content),
         "total_sources": len(sources),
         "mode": mode,
+        "fetch_stats": {
+            "queued": queued,
+            "used": len(detailed_content),
+            "budget_met": enough.is_set(),
+            "elapsed_ms": round((time.monotonic() - t0) * 1000, 1),
+        },
     }
 
 
@@ -241,22 +311,22 @@ def _generate_research_queries(topic: str, language: str = "tr",
 
 
 async def _fetch_page_content(url: str, max_chars: int = 3000) -> str:
-    """Fetch and extract text content from a URL."""
+    """Fetch and extract text content from a URL (shared cached fetcher)."""
+    from tools.http_fetch import get_fetcher
     try:
-        async with httpx.AsyncClient(timeout=8.0, follow_redirects=True) as client:
-            resp = await client.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            if resp.status_code != 200:
-                return ""
-            # Simple HTML text extraction
-            text = re.sub(r"<script[^>]*>.*?</script>", "", resp.text, flags=re.DOTALL)
-            text = re.sub(r"<style[^>]*>.*?</style>", "", text, flags=re.DOTALL)
-            text = re.sub(r"<[^>]+>", " ", text)
-            text = re.sub(r"\s+", " ", text).strip()
-            return text[:max_chars]
+        page = await asyncio.wait_for(get_fetcher().fetch(url), timeout=8.0)
+        if page.status != 200:
+            return ""
+        # Büyük sayfalarda regex event loop'u bloklamasın
+        return await asyncio.to_thread(_collapse_whitespace, page.text, max_chars)
     except Exception:
         return ""
 
 
+def _collapse_whitespace(text: str, max_chars: int) -> str:
+    return re.sub(r"\s+", " ", text).strip()[:max_chars]
+
+
 def format_research_for_prompt(research: dict[str, Any]) -> str:
     """Format research results into a structured context block for the LLM."""
     parts = ["<deep_research>"]
@@ -270,7 +340,7 @@ def format_research_for_prompt(research: dict[str, Any]) -> str:
         parts.append("\n## Detaylı İçerik:")
         for i, content in enumerate(research["detailed_content"], 1):
             parts.append(f"  --- Kaynak {i} ---")
-            parts.append(f"  {content[:1500]}")
+            parts.append(f"  {content[:_PROMPT_CHARS_PER_SOURCE]}")
 
     if research.get("sources"):
         parts.append("\n## Kaynaklar:")
@@ -305,11 +375,56 @@ def _build_image_url(prompt: str, width: int, height: int) -> str:
     return f"{POLLINATIONS_BASE}/{encoded}?{qs}"
 
 
+def _image_cache_path(prompt: str, width: int, height: int) -> Path:
+    key = hashlib.sha256(f"{POLLINATIONS_MODEL}|{width}x{height}|{prompt}".encode("utf-8")).hexdigest()
+    return IMAGE_CACHE_DIR / key[:2] / f"{key}.img"
+
+
+def _read_cached_image(prompt: str, width: int, height: int) -> bytes | None:
+    try:
+        return _image_cache_path(prompt, width, height).read_bytes()
+    except OSError:
+        return None
+
+
+def _write_cached_image(prompt: str, width: int, height: int, data: bytes) -> None:
+    global _image_cache_writes
+    path = _image_cache_path(prompt, width, height)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+    except OSError as e:
+        print(f"[PresentationService] Image cache write failed: {e}")
+        return
+    _image_cache_writes += 1
+    if _image_cache_writes % 50 == 0:
+        try:
+            files = sorted(IMAGE_CACHE_DIR.glob("*/*.img"), key=lambda f: f.stat().st_mtime)
+            for old in files[: max(0, len(files) - IMAGE_CACHE_MAX_FILES)]:
+                old.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
 async def generate_image(prompt: str, width: int = 1280, height: int = 720) -> bytes | None:
     """
     Generate an image using Pollinations gen API (zimage model) with retry and fallback.
-    Returns image bytes or None on failure.
+    Returns image bytes or None on failure. Cached on disk by (prompt, width, height);
+    images from the simplified fallback prompts are returned but not cached.
     """
+    cached = await asyncio.to_thread(_read_cached_image, prompt, width, height)
+    if cached:
+        return cached
+    image, used_original_prompt = await _download_image(prompt, width, height)
+    if image and used_original_prompt:
+        await asyncio.to_thread(_write_cached_image, prompt, width, height, image)
+    return image
+
+
+async def _download_image(prompt: str, width: int, height: int) -> tuple[bytes | None, bool]:
+    """Returns (image bytes or None, whether the original prompt produced them)."""
     token = _get_pollinations_token()
     headers = {"Authorization": f"Bearer {token}"} if token else {}
 
@@ -319,7 +434,7 @@ async def generate_image(prompt: str, width: int = 1280, height: int = 720) -> b
             async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
                 resp = await client.get(url, headers=headers)
                 if resp.status_code == 200 and len(resp.content) > 1000:
-                    return resp.content
+                    return resp.content, attempt == 0
                 print(f"[PresentationService] Image attempt {attempt+1}: status={resp.status_code}, size={len(resp.content)}")
         except Exception as e:
             print(f"[PresentationService] Image attempt {attempt+1} failed: {e}")
@@ -335,15 +450,18 @@ async def generate_image(prompt: str, width: int = 1280, height: int = 720) -> b
         async with httpx.AsyncClient(timeout=45.0, follow_redirects=True) as client:
             resp = await client.get(fallback_url, headers=headers)
             if resp.status_code == 200 and len(resp.content) > 1000:
-                return resp.content
+                return resp.content, False
     except Exception:
         pass
 
-    return None
+    return None, False
 
 
 def _generate_image_sync(prompt: str, width: int = 1280, height: int = 720) -> bytes | None:
     """Sync version of image generation with retry."""
+    cached = _read_cached_image(prompt, width, height)
+    if cached:
+        return cached
     token = _get_pollinations_token()
     headers = {"Authorization": f"Bearer {token}"} if token else {}
     for attempt in range(2):
@@ -352,6 +470,8 @@ def _generate_image_sync(prompt: str, width: int = 1280, height: int = 720) -> b
             with httpx.Client(timeout=60.0, follow_redirects=True) as client:
                 resp = client.get(url, headers=headers)
                 if resp.status_code == 200 and len(resp.content) > 1000:
+                    if attempt == 0:  # fallback prompt'un görseli orijinal anahtara yazılmaz
+                        _write_cached_image(prompt, width, height, resp.content)
                     return resp.content
                 print(f"[PresentationService] Sync image attempt {attempt+1}: status={resp.status_code}")
         except Exception as e:
@@ -361,6 +481,42 @@ def _generate_image_sync(prompt: str, width: int = 1280, height: int = 720) -> b
     return None
 
 
+def _slide_image_prompt(slide_data: dict[str, Any]) -> str | None:
+    if slide_data.get("is_section") or not slide_data.get("image_prompt"):
+        return None
+    return (
+        f"Professional presentation visual, clean modern style, "
+        f"corporate design: {slide_data['image_prompt']}"
+    )
+
+
+def prefetch_slide_images(
+    slides_data: list[dict[str, Any]],
+    concurrency: int = PRESENTATION_IMAGE_CONCURRENCY,
+) -> dict[int, asyncio.Task]:
+    """
+    Start image generation for every slide at once (bounded by ``concurrency``).
+    Returns {slide_number: task}; slides with the same prompt share one task.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    width, height = _SLIDE_IMAGE_SIZE
+
+    async def _one(prompt: str) -> bytes | None:
+        async with sem:
+            return await generate_image(prompt, width=width, height=height)
+
+    tasks: dict[int, asyncio.Task] = {}
+    by_prompt: dict[str, asyncio.Task] = {}
+    for i, slide_data in enumerate(slides_data, 1):
+        prompt = _slide_image_prompt(slide_data)
+        if prompt is None:
+            continue
+        if prompt not in by_prompt:
+            by_prompt[prompt] = asyncio.create_task(_one(prompt))
+        tasks[i] = by_prompt[prompt]
+    return tasks
+
+
 # ── Slide Builders ───────────────────────────────────────────────
 
 def _set_slide_bg(slide, color: RGBColor):
@@ -1131,55 +1287,25 @@ async def generate_presentation(
 
     total_slides = len(slides_data) + 2  # +title +closing
 
-    # Title slide
-    _build_title_slide(prs, title, subtitle, colors=colors)
-
-    # Content slides
-    for i, slide_data in enumerate(slides_data, 1):
-        if slide_data.get("is_section"):
-            _build_section_slide(prs, slide_data["title"], i, total_slides, colors=colors)
-            continue
-
-        # Generate image if requested
-        image_bytes = None
-        if with_images and slide_data.get("image_prompt"):
-            prompt = (
-                f"Professional presentation visual, clean modern style, "
-                f"corporate design: {slide_data['image_prompt']}"
-            )
-            image_bytes = await generate_image(prompt, width=1280, height=960)
-
-        # Check for special slide types
-        has_quote = slide_data.get("quote")
-        has_data = slide_data.get("data_highlights")
-
-        if has_quote:
-            _build_quote_slide(
-                prs, slide_data["title"],
-                quote_text=has_quote["text"],
-                quote_author=has_quote["author"],
-                bullets=slide_data.get("bullets", []),
-                slide_num=i, total_slides=total_slides,
-                image_bytes=image_bytes, colors=colors,
-            )
-        elif has_data:
-            _build_data_slide(
-                prs, slide_data["title"],
-                data_highlights=has_data,
-                bullets=slide_data.get("bullets", []),
-                slide_num=i, total_slides=total_slides,
-                image_bytes=image_bytes, colors=colors,
-            )
-        else:
-            _build_content_slide(
-                prs,
-                title=slide_data["title"],
-                bullets=slide_data.get("bullets", []),
-                slide_num=i,
-                total_slides=total_slides,
-                image_bytes=image_bytes,
-                colors=colors,
-            )
+    # Start every image download now; slides are still built in order and each
+    # one only waits for its own image while the rest keep downloading
+    image_tasks = prefetch_slide_images(slides_data) if with_images else {}
+    try:
+        # Title slide
+        _build_title_slide(prs, title, subtitle, colors=colors)
+
+        # Content slides
+        for i, slide_data in enumerate(slides_data, 1):
+            image_bytes = None
+            if i in image_tasks:
+                try:
+                    image_bytes = await image_tasks[i]
+                except Exception as e:
+                    print(f"[PresentationService] Slide {i} image failed: {e}")
+            _build_slide(prs, slide_data, i, total_slides, image_bytes, colors)
+    finally:
+        for task in image_tasks.values():
+            task.cancel()
 
     # Closing slide
     _build_closing_slide(prs, colors=colors)
@@ -1204,52 +1330,25 @@ def generate_presentation_sync(
     prs.slide_height = Inches(7.5)
 
     total_slides = len(slides_data) + 2
-
-    _build_title_slide(prs, title, subtitle, colors=colors)
-
-    for i, slide_data in enumerate(slides_data, 1):
-        if slide_data.get("is_section"):
-            _build_section_slide(prs, slide_data["title"], i, total_slides, colors=colors)
-            continue
-
-        image_bytes = None
-        if with_images and slide_data.get("image_prompt"):
-            prompt = (
-                f"Professional presentation visual, clean modern style, "
-                f"corporate design: {slide_data['image_prompt']}"
-            )
-            image_bytes = _generate_image_sync(prompt, width=1280, height=960)
-
-        has_quote = slide_data.get("quote")
-        has_data = slide_data.get("data_highlights")
-
-        if has_quote:
-            _build_quote_slide(
-                prs, slide_data["title"],
-                quote_text=has_quote["text"],
-                quote_author=has_quote["author"],
-                bullets=slide_data.get("bullets", []),
-                slide_num=i, total_slides=total_slides,
-                image_bytes=image_bytes, colors=colors,
-            )
-        elif has_data:
-            _build_data_slide(
-                prs, slide_data["title"],
-                data_highlights=has_data,
-                bullets=slide_data.get("bullets", []),
-                slide_num=i, total_slides=total_slides,
-                image_bytes=image_bytes, colors=colors,
-            )
-        else:
-            _build_content_slide(
-                prs,
-                title=slide_data["title"],
-                bullets=slide_data.get("bullets", []),
-                slide_num=i,
-                total_slides=total_slides,
-                image_bytes=image_bytes,
-                colors=colors,
-            )
+    width, height = _SLIDE_IMAGE_SIZE
+
+    with ThreadPoolExecutor(max_workers=max(1, PRESENTATION_IMAGE_CONCURRENCY)) as pool:
+        futures = {}
+        by_prompt = {}
+        if with_images:
+            for i, slide_data in enumerate(slides_data, 1):
+                prompt = _slide_image_prompt(slide_data)
+                if prompt is None:
+                    continue
+                if prompt not in by_prompt:
+                    by_prompt[prompt] = pool.submit(_generate_image_sync, prompt, width, height)
+                futures[i] = by_prompt[prompt]
+
+        _build_title_slide(prs, title, subtitle, colors=colors)
+
+        for i, slide_data in enumerate(slides_data, 1):
+            image_bytes = futures[i].result() if i in futures else None
+            _build_slide(prs, slide_data, i, total_slides, image_bytes, colors)
 
     _build_closing_slide(prs, colors=colors)
 
@@ -1258,6 +1357,52 @@ def generate_presentation_sync(
     return buffer.getvalue()
 
 
+def _build_slide(
+    prs: Any,
+    slide_data: dict[str, Any],
+    i: int,
+    total_slides: int,
+    image_bytes: bytes | None,
+    colors: dict[str, RGBColor],
+) -> None:
+    """Pick the slide layout (section / quote / data / content) for one slide."""
+    if slide_data.get("is_section"):
+        _build_section_slide(prs, slide_data["title"], i, total_slides, colors=colors)
+        return
+
+    # Check for special slide types
+    has_quote = slide_data.get("quote")
+    has_data = slide_data.get("data_highlights")
+
+    if has_quote:
+        _build_quote_slide(
+            prs, slide_data["title"],
+            quote_text=has_quote["text"],
+            quote_author=has_quote["author"],
+            bullets=slide_data.get("bullets", []),
+            slide_num=i, total_slides=total_slides,
+            image_bytes=image_bytes, colors=colors,
+        )
+    elif has_data:
+        _build_data_slide(
+            prs, slide_data["title"],
+            data_highlights=has_data,
+            bullets=slide_data.get("bullets", []),
+            slide_num=i, total_slides=total_slides,
+            image_bytes=image_bytes, colors=colors,
+        )
+    else:
+        _build_content_slide(
+            prs,
+            title=slide_data["title"],
+            bullets=slide_data.get("bullets", []),
+            slide_num=i,
+            total_slides=total_slides,
+            image_bytes=image_bytes,
+            colors=colors,
+        )
+
+
 # ── Prompt Builder for Agent ─────────────────────────────────────
 
 def build_presentation_prompt(
@@ -0,0 +1,133 @@
+"""
+Prompt prefix memo + provider prompt-cache accounting.
+
+DeepSeek and NIM (vLLM prefix caching) reuse KV blocks only for a byte-identical
+prompt prefix. BaseAgent.build_context therefore orders segments from most static
+to most volatile (identity → agent prompt → integrity/visual rules → skills/strategy)
+and pushes the timestamp and per-request data into the final user turn.
+
+The static part is memoized per agent role so every call sends exactly the same
+string; `record_prompt_usage` counts cached prompt tokens reported in `usage`
+so hit ratios can be checked from /api/llm/prompt-cache/stats.
+
+Usage:
+    from tools.prompt_cache import get_prompt_prefix_cache, record_prompt_usage
+
+    prefix = get_prompt_prefix_cache().get_or_build("thinker", build_fn)
+    record_prompt_usage(model_id, usage_norm["tokens_prompt"], usage_norm["tokens_cached"])
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable
+
+PROMPT_PREFIX_TTL_SEC = float(os.getenv("PROMPT_PREFIX_TTL_SEC", "300"))
+
+
+def cached_prompt_tokens(usage: Any) -> int | None:
+    """Cached prompt tokens from an OpenAI-compatible usage payload, if reported.
+
+    OpenAI/vLLM: usage.prompt_tokens_details.cached_tokens
+    DeepSeek:    usage.prompt_cache_hit_tokens
+    """
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    else:
+        cached = getattr(details, "cached_tokens", None)
+    if cached is None:
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    try:
+        return int(cached) if cached is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class PromptPrefixCache:
+    """Per-role memo of the static system-prompt prefix (TTL + explicit invalidation)."""
+
+    def __init__(self, ttl_sec: float = PROMPT_PREFIX_TTL_SEC) -> None:
+        self._ttl = ttl_sec
+        self._entries: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get_or_build(self, role: str, build: Callable[[], str]) -> str:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(role)
+            if entry and now - entry[0] < self._ttl:
+                return entry[1]
+        prefix = build()
+        with self._lock:
+            self._entries[role] = (now, prefix)
+            self.builds += 1
+        return prefix
+
+    def invalidate(self, role: str | None = None) -> None:
+        with self._lock:
+            if role is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(role, None)
+
+
+class PromptCacheStats:
+    """Process-wide prompt vs. cached prompt tokens per model."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._models: dict[str, dict[str, int]] = {}
+
+    def record(self, model: str, prompt_tokens: int | None, cached_tokens: int | None) -> None:
+        if not prompt_tokens:
+            return
+        with self._lock:
+            m = self._models.setdefault(
+                model, {"calls": 0, "calls_reporting_cache": 0, "prompt_tokens": 0, "cached_tokens": 0}
+            )
+            m["calls"] += 1
+            m["prompt_tokens"] += int(prompt_tokens)
+            if cached_tokens is not None:
+                m["calls_reporting_cache"] += 1
+                m["cached_tokens"] += int(cached_tokens)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            models = {
+                name: {
+                    **m,
+                    "hit_ratio": round(m["cached_tokens"] / m["prompt_tokens"], 4) if m["prompt_tokens"] else 0.0,
+                }
+                for name, m in self._models.items()
+            }
+        prompt = sum(m["prompt_tokens"] for m in models.values())
+        cached = sum(m["cached_tokens"] for m in models.values())
+        return {
+            "models": models,
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "hit_ratio": round(cached / prompt, 4) if prompt else 0.0,
+            "prefix_builds": _prefix_cache.builds,
+        }
+
+
+_prefix_cache = PromptPrefixCache()
+_stats = PromptCacheStats()
+
+
+def get_prompt_prefix_cache() -> PromptPrefixCache:
+    return _prefix_cache
+
+
+def record_prompt_usage(model: str, prompt_tokens: int | None, cached_tokens: int | None) -> None:
+    _stats.record(model, prompt_tokens, cached_tokens)
+
+
+def get_prompt_cache_stats() -> dict[str, Any]:
+    return _stats.stats()
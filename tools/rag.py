@@ -13,7 +13,7 @@ from collections.abc import Mapping
 from pathlib import Path
 from typing import Any
 
-from tools.pg_connection import get_conn, release_conn
+from tools.pg_connection import afetch_all, afetch_one, async_db_conn, get_conn, release_conn
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +48,16 @@ async def _get_embedding_async(text: str) -> list[float] | None:
         return None
 
 
+async def _get_embeddings_async(texts: list[str]) -> list[list[float] | None]:
+    try:
+        from tools.memory import _get_embeddings_async as mem_embed_many_async
+
+        return await mem_embed_many_async(texts)
+    except Exception as e:
+        logger.warning(f"RAG embedding failed: {e}")
+        return [None] * len(texts)
+
+
 def _get_embedding(text: str) -> list[float] | None:
     """Sync wrapper for async embedding function using thread executor."""
     import asyncio
@@ -55,7 +65,8 @@ def _get_embedding(text: str) -> list[float] | None:
         # Use the async version through thread executor to avoid blocking
         import concurrent.futures
         with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(asyncio.run, _get_embedding_async(text))
+            from tools.memory import _get_embedding_once
+            future = executor.submit(asyncio.run, _get_embedding_once(text))
             return future.result(timeout=30.0)
     except Exception as e:
         logger.warning(f"RAG embedding failed: {e}")
@@ -139,60 +150,55 @@ async def ingest_document(
         return {"success": False, "error": "Empty content"}
 
     doc_hash = hashlib.sha256(content.encode()).hexdigest()[:32]
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                "SELECT id, title FROM documents WHERE doc_hash = %s AND (user_id = %s OR user_id IS NULL)",
-                (doc_hash, user_id),
-            )
-            existing = _as_row_dict(cur.fetchone())
-            if existing:
-                return {
-                    "success": False,
-                    "error": f"Document already exists: '{existing.get('title')}' (id={existing.get('id')})",
-                }
-
-            chunks = chunk_text(content)
-
-            cur.execute(
-                """INSERT INTO documents (title, source, source_type, content, doc_hash, chunk_count, user_id)
-                   VALUES (%s, %s, %s, %s, %s, %s, %s)
-                   RETURNING id""",
-                (title, source, source_type, content[:10000], doc_hash, len(chunks), user_id),
-            )
-            inserted = _as_row_dict(cur.fetchone())
-            doc_id = inserted.get("id")
-            if doc_id is None:
-                return {"success": False, "error": "Failed to create document record"}
-
-            # Batch insert chunks for better performance
-            chunk_data = []
-            for i, chunk in enumerate(chunks):
-                embedding = await _get_embedding_async(chunk)
-                emb_str = str(embedding) if embedding else None
-                chunk_data.append((doc_id, i, chunk, emb_str))
-
-            # Bulk insert all chunks at once
-            cur.executemany(
-                """INSERT INTO chunks (doc_id, chunk_index, content, embedding)
-                   VALUES (%s, %s, %s, %s::vector)""",
-                chunk_data
-            )
-
-        conn.commit()
-        embedded_count = sum(1 for _, _, _, emb in chunk_data if emb is not None)
-        logger.info(f"RAG: Ingested '{title}' — {len(chunks)} chunks, {embedded_count} embedded")
+    existing = await afetch_one(
+        "SELECT id, title FROM documents WHERE doc_hash = %s AND (user_id = %s OR user_id IS NULL)",
+        (doc_hash, user_id),
+    )
+    if existing:
         return {
-            "success": True,
-            "doc_id": doc_id,
-            "title": title,
-            "chunks": len(chunks),
-            "embedded": embedded_count,
-            "source_type": source_type,
+            "success": False,
+            "error": f"Document already exists: '{existing.get('title')}' (id={existing.get('id')})",
         }
-    finally:
-        release_conn(conn)
+
+    chunks = chunk_text(content)
+
+    # Embed all chunks in batched requests (N/batch round-trips, not N) —
+    # before taking a connection, so the pool is not held during HTTP calls
+    embeddings = await _get_embeddings_async(chunks)
+
+    async with async_db_conn() as db:
+        inserted = await db.fetch_one(
+            """INSERT INTO documents (title, source, source_type, content, doc_hash, chunk_count, user_id)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)
+               RETURNING id""",
+            (title, source, source_type, content[:10000], doc_hash, len(chunks), user_id),
+        ) or {}
+        doc_id = inserted.get("id")
+        if doc_id is None:
+            return {"success": False, "error": "Failed to create document record"}
+
+        chunk_data = [
+            (doc_id, i, chunk, str(embedding) if embedding else None)
+            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+        ]
+
+        # Bulk insert all chunks at once
+        await db.execute_many(
+            """INSERT INTO chunks (doc_id, chunk_index, content, embedding)
+               VALUES (%s, %s, %s, %s::vector)""",
+            chunk_data,
+        )
+
+    embedded_count = sum(1 for _, _, _, emb in chunk_data if emb is not None)
+    logger.info(f"RAG: Ingested '{title}' — {len(chunks)} chunks, {embedded_count} embedded")
+    return {
+        "success": True,
+        "doc_id": doc_id,
+        "title": title,
+        "chunks": len(chunks),
+        "embedded": embedded_count,
+        "source_type": source_type,
+    }
 
 
 def ingest_file(filepath: str, title: str | None = None, user_id: str | None = None) -> dict[str, Any]:
@@ -205,16 +211,22 @@ def ingest_file(filepath: str, title: str | None = None, user_id: str | None = N
     if not content:
         return {"success": False, "error": f"Could not extract text from {filepath}"}
 
-    try:
-        return asyncio.run(
-            ingest_document(
+    async def _ingest_once() -> dict[str, Any]:
+        try:
+            return await ingest_document(
                 content=content,
                 title=title or path.name,
                 source=str(path),
                 source_type=source_type,
                 user_id=user_id,
             )
-        )
+        finally:
+            # asyncio.run's loop is discarded — close its embedding HTTP client
+            from tools.embedding_service import get_embedding_service
+            await get_embedding_service().aclose()
+
+    try:
+        return asyncio.run(_ingest_once())
     except RuntimeError:
         return {
             "success": False,
@@ -231,54 +243,47 @@ async def query_documents(
     """Semantic search across all ingested documents via pgvector."""
     embedding = await _get_embedding_async(query)
     if not embedding:
-        return _keyword_search(query, max_results, user_id=user_id)
+        return await _keyword_search(query, max_results, user_id=user_id)
 
     emb_str = str(embedding)
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            user_filter = "AND (d.user_id = %s OR d.user_id IS NULL)" if user_id else ""
-            params: list[Any] = [emb_str, emb_str, min_similarity, emb_str]
-            if user_id:
-                params.append(user_id)
-            params.append(max_results)
-
-            cur.execute(
-                f"""SELECT c.id, c.doc_id, c.chunk_index, c.content,
-                          1 - (c.embedding <=> %s::vector) AS similarity,
-                          d.title, d.source
-                   FROM chunks c
-                   JOIN documents d ON c.doc_id = d.id
-                   WHERE c.embedding IS NOT NULL
-                     AND 1 - (c.embedding <=> %s::vector) >= %s
-                     {user_filter}
-                   ORDER BY c.embedding <=> %s::vector
-                   LIMIT %s""",
-                params,
-            )
-            rows = cur.fetchall()
-
-        if not rows:
-            return _keyword_search(query, max_results, user_id=user_id)
-
-        return [
-            {
-                "chunk_id": rd.get("id"),
-                "doc_id": rd.get("doc_id"),
-                "doc_title": rd.get("title"),
-                "source": rd.get("source"),
-                "chunk_index": rd.get("chunk_index"),
-                "content": rd.get("content", ""),
-                "similarity": round(float(rd.get("similarity", 0.0)), 3),
-            }
-            for r in rows
-            for rd in [_as_row_dict(r)]
-        ]
-    finally:
-        release_conn(conn)
+    user_filter = "AND (d.user_id = %s OR d.user_id IS NULL)" if user_id else ""
+    params: list[Any] = [emb_str, emb_str, min_similarity, emb_str]
+    if user_id:
+        params.append(user_id)
+    params.append(max_results)
+
+    rows = await afetch_all(
+        f"""SELECT c.id, c.doc_id, c.chunk_index, c.content,
+                  1 - (c.embedding <=> %s::vector) AS similarity,
+                  d.title, d.source
+           FROM chunks c
+           JOIN documents d ON c.doc_id = d.id
+           WHERE c.embedding IS NOT NULL
+             AND 1 - (c.embedding <=> %s::vector) >= %s
+             {user_filter}
+           ORDER BY c.embedding <=> %s::vector
+           LIMIT %s""",
+        params,
+    )
+
+    if not rows:
+        return await _keyword_search(query, max_results, user_id=user_id)
+
+    return [
+        {
+            "chunk_id": rd.get("id"),
+            "doc_id": rd.get("doc_id"),
+            "doc_title": rd.get("title"),
+            "source": rd.get("source"),
+            "chunk_index": rd.get("chunk_index"),
+            "content": rd.get("content", ""),
+            "similarity": round(float(rd.get("similarity", 0.0)), 3),
+        }
+        for rd in rows
+    ]
 
 
-def _keyword_search(query: str, max_results: int = 5, user_id: str | None = None) -> list[dict[str, Any]]:
+async def _keyword_search(query: str, max_results: int = 5, user_id: str | None = None) -> list[dict[str, Any]]:
     """Fallback keyword search."""
     words = [w for w in query.lower().split() if len(w) > 2]
     if not words:
@@ -291,36 +296,29 @@ def _keyword_search(query: str, max_results: int = 5, user_id: str | None = None
     if user_id:
         params.append(user_id)
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute(
-                f"""SELECT c.id, c.doc_id, c.chunk_index, c.content, d.title, d.source
-                    FROM chunks c
-                    JOIN documents d ON c.doc_id = d.id
-                    WHERE {' OR '.join(like_parts)}
-                    {user_filter}
-                    ORDER BY c.created_at DESC
-                    LIMIT %s""",
-                params + [max_results],
-            )
-            rows = cur.fetchall()
-
-        return [
-            {
-                "chunk_id": rd.get("id"),
-                "doc_id": rd.get("doc_id"),
-                "doc_title": rd.get("title"),
-                "source": rd.get("source"),
-                "chunk_index": rd.get("chunk_index"),
-                "content": rd.get("content", ""),
-                "similarity": None,
-            }
-            for r in rows
-            for rd in [_as_row_dict(r)]
-        ]
-    finally:
-        release_conn(conn)
+    rows = await afetch_all(
+        f"""SELECT c.id, c.doc_id, c.chunk_index, c.content, d.title, d.source
+            FROM chunks c
+            JOIN documents d ON c.doc_id = d.id
+            WHERE ({' OR '.join(like_parts)})
+            {user_filter}
+            ORDER BY c.created_at DESC
+            LIMIT %s""",
+        params + [max_results],
+    )
+
+    return [
+        {
+            "chunk_id": rd.get("id"),
+            "doc_id": rd.get("doc_id"),
+            "doc_title": rd.get("title"),
+            "source": rd.get("source"),
+            "chunk_index": rd.get("chunk_index"),
+            "content": rd.get("content", ""),
+            "similarity": None,
+        }
+        for rd in rows
+    ]
 
 
 def list_documents(limit: int = 20, user_id: str | None = None) -> list[dict[str, Any]]:
@@ -20,6 +20,7 @@ Usage:
 
 from __future__ import annotations
 
+import fnmatch
 import json
 import logging
 import os
@@ -225,6 +226,10 @@ class _MemoryFallback:
     def pubsub(self):
         return _MemoryPubSub()
 
+    def scan_iter(self, match: str | None = None, count: int | None = None):
+        keys = list(self._store)
+        return iter([k for k in keys if match is None or fnmatch.fnmatchcase(k, match)])
+
     def incr(self, key: str) -> int:
         val = int(self._store.get(key, 0)) + 1
         self._store[key] = val
@@ -2006,6 +2006,10 @@ ORCHESTRATOR_TOOLS = [
                         "items": {
                             "type": "object",
                             "properties": {
+                                "id": {
+                                    "type": "string",
+                                    "description": "Short label other sub-tasks can reference in depends_on (e.g. 'research')",
+                                },
                                 "description": {
                                     "type": "string",
                                     "description": "What this sub-task should accomplish",
@@ -2028,7 +2032,7 @@ ORCHESTRATOR_TOOLS = [
                                 "depends_on": {
                                     "type": "array",
                                     "items": {"type": "string"},
-                                    "description": "IDs of sub-tasks this depends on",
+                                    "description": "Labels (or 1-based positions) of sub-tasks whose output this one needs; those run first and only their outputs are passed in",
                                 },
                                 "skills": {
                                     "type": "array",
@@ -2047,8 +2051,9 @@ ORCHESTRATOR_TOOLS = [
                             "consensus",
                             "iterative",
                             "deep_research",
+                            "dag",
                         ],
-                        "description": "With 2+ sub-tasks they always run in parallel (same time). Use 'parallel' or 'deep_research' for multi-agent work.",
+                        "description": "With 2+ sub-tasks they always run in parallel (same time). Use 'parallel' or 'deep_research' for multi-agent work; when some sub-tasks need others' output, set depends_on and use 'dag'.",
                     },
                     "reasoning": {
                         "type": "string",
@@ -19,7 +19,7 @@ from typing import Any, Callable, Awaitable
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from tools.pg_connection import get_conn, release_conn
+from tools.pg_connection import async_db_conn
 
 logger = logging.getLogger(__name__)
 
@@ -180,7 +180,7 @@ class ScheduledTaskScheduler:
         logger.info("[ScheduledTasks] APScheduler started")
 
         # Ensure persistence tables exist before any DB reads.
-        self._ensure_tables()
+        await self._ensure_tables()
 
         # Load existing tasks from DB
         await self._load_tasks_from_db()
@@ -205,12 +205,10 @@ class ScheduledTaskScheduler:
         self._started = False
         logger.info("[ScheduledTasks] Scheduler stopped")
 
-    def _ensure_tables(self) -> None:
+    async def _ensure_tables(self) -> None:
         """Create tables if they don't exist."""
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute("""
+        async with async_db_conn() as db:
+            await db.execute("""
                 CREATE TABLE IF NOT EXISTS scheduled_tasks (
                     id           TEXT PRIMARY KEY,
                     name         TEXT NOT NULL,
@@ -230,7 +228,7 @@ class ScheduledTaskScheduler:
                     tags         TEXT NOT NULL DEFAULT '[]'
                 )
             """)
-            cur.execute("""
+            await db.execute("""
                 CREATE TABLE IF NOT EXISTS task_executions (
                     id           TEXT PRIMARY KEY,
                     task_id      TEXT NOT NULL REFERENCES scheduled_tasks(id) ON DELETE CASCADE,
@@ -243,28 +241,20 @@ class ScheduledTaskScheduler:
                     retry_count  INTEGER DEFAULT 0
                 )
             """)
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_st_user ON scheduled_tasks(user_id)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_st_enabled ON scheduled_tasks(enabled)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_te_task ON task_executions(task_id)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_te_started ON task_executions(started_at DESC)")
-            conn.commit()
-        finally:
-            release_conn(conn)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_st_user ON scheduled_tasks(user_id)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_st_enabled ON scheduled_tasks(enabled)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_te_task ON task_executions(task_id)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_te_started ON task_executions(started_at DESC)")
 
     async def _load_tasks_from_db(self) -> None:
         """Load enabled tasks from DB and schedule them."""
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM scheduled_tasks WHERE enabled = TRUE")
-            rows = cur.fetchall()
-            for row in rows:
-                task = self._row_to_task(_row_dict(row))
-                self._task_cache[task.id] = task
-                self._schedule_task(task)
-            logger.info("[ScheduledTasks] Loaded %d tasks from DB", len(rows))
-        finally:
-            release_conn(conn)
+        async with async_db_conn() as db:
+            rows = await db.fetch_all("SELECT * FROM scheduled_tasks WHERE enabled = TRUE")
+        for row in rows:
+            task = self._row_to_task(_row_dict(row))
+            self._task_cache[task.id] = task
+            self._schedule_task(task)
+        logger.info("[ScheduledTasks] Loaded %d tasks from DB", len(rows))
 
     def _row_to_task(self, row: Any) -> ScheduledTask:
         """Convert DB row to ScheduledTask."""
@@ -398,10 +388,8 @@ class ScheduledTaskScheduler:
         )
 
         # Persist to DB
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute(
+        async with async_db_conn() as db:
+            await db.execute(
                 """INSERT INTO scheduled_tasks
                    (id, name, task_type, cron_expr, handler_ref, params, enabled, user_id, created_at, updated_at, tags)
                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
@@ -411,9 +399,6 @@ class ScheduledTaskScheduler:
                     task.user_id, now, now, json.dumps(task.tags),
                 ),
             )
-            conn.commit()
-        finally:
-            release_conn(conn)
 
         self._task_cache[task.id] = task
 
@@ -430,18 +415,13 @@ class ScheduledTaskScheduler:
             return self._task_cache[task_id]
 
         # Load from DB
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute("SELECT * FROM scheduled_tasks WHERE id = %s", (task_id,))
-            row = cur.fetchone()
-            if row:
-                task = self._row_to_task(_row_dict(row))
-                self._task_cache[task.id] = task
-                return task
-            return None
-        finally:
-            release_conn(conn)
+        async with async_db_conn() as db:
+            row = await db.fetch_one("SELECT * FROM scheduled_tasks WHERE id = %s", (task_id,))
+        if row:
+            task = self._row_to_task(_row_dict(row))
+            self._task_cache[task.id] = task
+            return task
+        return None
 
     async def list_tasks(
         self,
@@ -465,14 +445,9 @@ class ScheduledTaskScheduler:
 
         query += " ORDER BY created_at DESC"
 
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute(query, params)
-            rows = cur.fetchall()
-            return [self._row_to_task(_row_dict(row)) for row in rows]
-        finally:
-            release_conn(conn)
+        async with async_db_conn() as db:
+            rows = await db.fetch_all(query, params)
+        return [self._row_to_task(_row_dict(row)) for row in rows]
 
     async def update_task(
         self,
@@ -526,16 +501,11 @@ class ScheduledTaskScheduler:
         task.updated_at = now
         values.append(task_id)
 
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute(
+        async with async_db_conn() as db:
+            await db.execute(
                 f"UPDATE scheduled_tasks SET {', '.join(updates)} WHERE id = %s",
                 values,
             )
-            conn.commit()
-        finally:
-            release_conn(conn)
 
         # Reschedule if needed
         self._unschedule_task(task_id)
@@ -551,14 +521,8 @@ class ScheduledTaskScheduler:
         self._unschedule_task(task_id)
         self._task_cache.pop(task_id, None)
 
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM scheduled_tasks WHERE id = %s", (task_id,))
-            conn.commit()
-            deleted = cur.rowcount > 0
-        finally:
-            release_conn(conn)
+        async with async_db_conn() as db:
+            deleted = await db.execute("DELETE FROM scheduled_tasks WHERE id = %s", (task_id,)) > 0
 
         if deleted:
             logger.info("[ScheduledTasks] Deleted task '%s'", task_id)
@@ -634,43 +598,38 @@ class ScheduledTaskScheduler:
         limit: int = 100,
     ) -> list[dict]:
         """Get execution history from DB."""
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
+        async with async_db_conn() as db:
             if task_id:
-                cur.execute(
+                rows = await db.fetch_all(
                     "SELECT * FROM task_executions WHERE task_id = %s ORDER BY started_at DESC LIMIT %s",
                     (task_id, limit),
                 )
             else:
-                cur.execute(
+                rows = await db.fetch_all(
                     "SELECT * FROM task_executions ORDER BY started_at DESC LIMIT %s",
                     (limit,),
                 )
-            rows = cur.fetchall()
-            executions: list[dict[str, Any]] = []
-            for row in rows:
-                row_data = _row_dict(row)
-                started_at = row_data.get("started_at")
-                finished_at = row_data.get("finished_at")
-                executions.append(
-                    {
-                        "id": row_data.get("id"),
-                        "task_id": row_data.get("task_id"),
-                        "status": row_data.get("status"),
-                        "started_at": started_at.isoformat() if started_at else None,
-                        "finished_at": finished_at.isoformat() if finished_at else None,
-                        "duration_ms": row_data.get("duration_ms"),
-                        "result": json.loads(row_data["result"])
-                        if row_data.get("result")
-                        else None,
-                        "error": row_data.get("error"),
-                        "retry_count": int(row_data.get("retry_count", 0) or 0),
-                    }
-                )
-            return executions
-        finally:
-            release_conn(conn)
+        executions: list[dict[str, Any]] = []
+        for row in rows:
+            row_data = _row_dict(row)
+            started_at = row_data.get("started_at")
+            finished_at = row_data.get("finished_at")
+            executions.append(
+                {
+                    "id": row_data.get("id"),
+                    "task_id": row_data.get("task_id"),
+                    "status": row_data.get("status"),
+                    "started_at": started_at.isoformat() if started_at else None,
+                    "finished_at": finished_at.isoformat() if finished_at else None,
+                    "duration_ms": row_data.get("duration_ms"),
+                    "result": json.loads(row_data["result"])
+                    if row_data.get("result")
+                    else None,
+                    "error": row_data.get("error"),
+                    "retry_count": int(row_data.get("retry_count", 0) or 0),
+                }
+            )
+        return executions
 
 
 # ── Task Execution ───────────────────────────────────────────────
@@ -695,17 +654,12 @@ async def _execute_task_internal(task: ScheduledTask) -> dict:
     error: str | None = None
 
     # Record execution start
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
+    async with async_db_conn() as db:
+        await db.execute(
             """INSERT INTO task_executions (id, task_id, status, started_at)
                VALUES (%s, %s, %s, %s)""",
             (execution_id, task.id, status.value, started_at),
         )
-        conn.commit()
-    finally:
-        release_conn(conn)
 
     try:
         # Execute based on task type
@@ -801,11 +755,9 @@ async def _execute_task_internal(task: ScheduledTask) -> dict:
         finished_at = datetime.now(_utc)
         duration_ms = int((finished_at - started_at).total_seconds() * 1000)
 
-        # Update task stats
-        conn = get_conn()
-        try:
-            cur = conn.cursor()
-            cur.execute(
+        # Update task stats + execution record in one transaction
+        async with async_db_conn() as db:
+            await db.execute(
                 """UPDATE scheduled_tasks
                    SET last_run = %s, last_status = %s, last_result = %s,
                        run_count = run_count + 1, error_count = error_count + %s
@@ -818,8 +770,7 @@ async def _execute_task_internal(task: ScheduledTask) -> dict:
                 ),
             )
 
-            # Update execution record
-            cur.execute(
+            await db.execute(
                 """UPDATE task_executions
                    SET finished_at = %s, status = %s, duration_ms = %s, result = %s, error = %s
                    WHERE id = %s""",
@@ -829,9 +780,6 @@ async def _execute_task_internal(task: ScheduledTask) -> dict:
                     error, execution_id,
                 ),
             )
-            conn.commit()
-        finally:
-            release_conn(conn)
 
         # Add to in-memory history
         execution = TaskExecution(
@@ -895,17 +843,11 @@ async def shutdown_scheduled_tasks() -> None:
 
 async def _cleanup_old_executions() -> dict:
     """Clean up old task execution records (keep last 30 days)."""
-    conn = get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
+    async with async_db_conn() as db:
+        deleted = await db.execute(
             "DELETE FROM task_executions WHERE started_at < NOW() - INTERVAL '30 days'"
         )
-        deleted = cur.rowcount
-        conn.commit()
-        return {"deleted_executions": deleted}
-    finally:
-        release_conn(conn)
+    return {"deleted_executions": deleted}
 
 
 async def _health_check() -> dict:
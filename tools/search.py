@@ -1,6 +1,14 @@
 """
 Web search tool — Tavily (primary) → Exa (secondary) → Whoogle JSON (fallback).
 Priority chain based on API key availability and result quality.
+
+- Results are cached per normalized query + max_results (TTL; news-like
+  queries get a shorter TTL) and concurrent identical searches share one
+  provider call (single-flight).
+- Each provider keeps a pooled keep-alive client per event loop.
+- Hedged mode (SEARCH_HEDGE_ENABLED): if Tavily has not answered within its
+  observed latency percentile, the Exa/Whoogle race starts in parallel and
+  the first non-empty result wins.
 """
 
 from __future__ import annotations
@@ -9,7 +17,10 @@ import asyncio
 import logging
 import os
 import re
-from typing import Any
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Any, Awaitable
 
 import httpx
 
@@ -18,9 +29,22 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config import WHOOGLE_URL
+from tools.cache import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+SEARCH_CACHE_TTL_SEC = float(os.getenv("SEARCH_CACHE_TTL_SEC", "900"))
+SEARCH_CACHE_NEWS_TTL_SEC = float(os.getenv("SEARCH_CACHE_NEWS_TTL_SEC", "120"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+
+# Hedging ücretli API çağrısını artırabilir — varsayılan kapalı
+SEARCH_HEDGE_ENABLED = os.getenv("SEARCH_HEDGE_ENABLED", "false").lower() == "true"
+SEARCH_HEDGE_PERCENTILE = float(os.getenv("SEARCH_HEDGE_PERCENTILE", "0.9"))
+SEARCH_HEDGE_MIN_DELAY_SEC = float(os.getenv("SEARCH_HEDGE_MIN_DELAY_SEC", "0.8"))
+SEARCH_HEDGE_DEFAULT_DELAY_SEC = float(os.getenv("SEARCH_HEDGE_DEFAULT_DELAY_SEC", "3.0"))
+_HEDGE_MIN_SAMPLES = 10
+_LATENCY_WINDOW = 100
+
 NO_RESULTS_MESSAGE = (
     "Arama 0 sonuç döndürdü. Olası nedenler: "
     "Arama servisleri erişilemiyor veya sonuç vermedi. "
@@ -50,6 +74,124 @@ def _is_news_like_query(query: str) -> bool:
     return any(t in q for t in news_terms)
 
 
+# ── Result Cache ─────────────────────────────────────────────────
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class _SearchCache:
+    """In-process LRU of search results with per-entry expiry."""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES) -> None:
+        self._max = max(1, max_entries)
+        self._entries: OrderedDict[str, tuple[float, list[dict[str, str]]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, max_results: int) -> str:
+        return f"{max_results}:{_WHITESPACE_RE.sub(' ', (query or '').strip().lower())}"
+
+    def get(self, key: str) -> list[dict[str, str]] | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return [dict(r) for r in entry[1]]  # çağıran listeyi değiştirse de cache bozulmasın
+
+    def set(self, key: str, results: list[dict[str, str]], ttl: float) -> None:
+        if ttl <= 0 or not results:
+            return
+        self._entries[key] = (time.monotonic() + ttl, [dict(r) for r in results])
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ── Provider Clients + Latency ───────────────────────────────────
+
+class _ProviderLatency:
+    """Rolling window of successful call latencies for hedge timing."""
+
+    def __init__(self) -> None:
+        self._samples: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.calls += 1
+        if ok:
+            self._samples.append(seconds)
+        else:
+            self.failures += 1
+
+    def percentile(self, q: float) -> float | None:
+        if len(self._samples) < _HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def stats(self) -> dict[str, Any]:
+        p50, p90 = self.percentile(0.5), self.percentile(0.9)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p90_ms": round(p90 * 1000, 1) if p90 is not None else None,
+        }
+
+
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, Any]] = weakref.WeakKeyDictionary()
+_latency: dict[str, _ProviderLatency] = {
+    "tavily": _ProviderLatency(), "exa": _ProviderLatency(), "whoogle": _ProviderLatency(),
+}
+_search_cache = _SearchCache()
+_flights = SingleFlight()
+_hedge_counters = {"hedged": 0, "backup_won": 0}
+
+
+def _http_client(provider: str, **kwargs: Any) -> httpx.AsyncClient:
+    """Pooled keep-alive client per provider (clients are event-loop bound)."""
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(provider)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=15, limits=httpx.Limits(max_connections=20, max_keepalive_connections=10), **kwargs,
+        )
+        clients[provider] = client
+    return client
+
+
+async def close_search_clients() -> None:
+    """Close pooled provider clients of the running loop (app shutdown)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for name, client in clients.items():
+        # AsyncExa keeps its own lazily created httpx client in ._client
+        http = client if isinstance(client, httpx.AsyncClient) else getattr(client, "_client", None)
+        if isinstance(http, httpx.AsyncClient) and not http.is_closed:
+            try:
+                await http.aclose()
+            except Exception as exc:
+                logger.debug("Closing search client %s failed: %s", name, exc.__class__.__name__)
+
+
+async def _timed(provider: str, call: Awaitable[list[dict[str, str]]]) -> list[dict[str, str]]:
+    t0 = time.monotonic()
+    results = await call
+    _latency[provider].record(time.monotonic() - t0, bool(results))
+    return results
+
+
 # ── Tavily (Primary) ─────────────────────────────────────────────
 
 async def _search_tavily(
@@ -72,12 +214,11 @@ async def _search_tavily(
         if is_news:
             payload["topic"] = "news"
 
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.post(
-                "https://api.tavily.com/search", json=payload
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await _http_client("tavily").post(
+            "https://api.tavily.com/search", json=payload
+        )
+        resp.raise_for_status()
+        data = resp.json()
 
         results: list[dict[str, str]] = []
         for r in data.get("results", []):
@@ -110,7 +251,10 @@ async def _search_exa(
     try:
         from exa_py import AsyncExa
 
-        exa = AsyncExa(api_key=api_key)
+        clients = _clients.setdefault(asyncio.get_running_loop(), {})
+        exa = clients.get(f"exa:{api_key}")
+        if exa is None:
+            exa = clients[f"exa:{api_key}"] = AsyncExa(api_key=api_key)
         search_result = await exa.search(
             query,
             num_results=max_results,
@@ -148,17 +292,30 @@ async def _search_whoogle(
         return []
 
     try:
-        async with httpx.AsyncClient(timeout=15, follow_redirects=True) as client:
-            # Step 1: get session cookie
-            await client.get(WHOOGLE_URL)
+        client = _http_client("whoogle", follow_redirects=True)
+        data = None
+        for attempt in range(2):
+            # Step 1: get session cookie (pooled client keeps it)
+            if not client.cookies:
+                await client.get(WHOOGLE_URL)
 
             # Step 2: search with format=json
             resp = await client.get(
                 f"{WHOOGLE_URL}/search",
                 params={"q": query, "format": "json"},
             )
+            try:
+                data = resp.json() if resp.is_success and not resp.history else None
+            except ValueError:
+                data = None
+            if data is not None:
+                break
+            if attempt == 0 and (resp.is_success or resp.is_redirect or resp.is_client_error):
+                # Expired session: Whoogle redirects home / answers 4xx or HTML → new cookie, one retry
+                client.cookies.clear()
+                continue
             resp.raise_for_status()
-            data = resp.json()
+            raise ValueError(f"Whoogle returned non-JSON response (status {resp.status_code})")
 
         results: list[dict[str, str]] = []
         for r in data.get("results", [])[:max_results]:
@@ -185,30 +342,88 @@ async def web_search(query: str, max_results: int = 5) -> list[dict[str, str]]:
     Search chain: Tavily → Exa → Whoogle.
     Returns first provider that yields results.
     Falls back to parallel mode if primary fails fast.
+    Cached per normalized query; concurrent identical searches share one call.
     """
+    key = _SearchCache.key(query, max_results)
+    cached = _search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    results, shared = await _flights.do(key, lambda: _search_providers(query, max_results))
+    if shared:
+        return [dict(r) for r in results]
+    ttl = SEARCH_CACHE_NEWS_TTL_SEC if _is_news_like_query(query) else SEARCH_CACHE_TTL_SEC
+    _search_cache.set(key, results, ttl)
+    return results
+
+
+async def _search_providers(query: str, max_results: int) -> list[dict[str, str]]:
+    def backups() -> list[asyncio.Task]:
+        return [
+            asyncio.create_task(_timed("exa", _search_exa(query, max_results))),
+            asyncio.create_task(_timed("whoogle", _search_whoogle(query, max_results))),
+        ]
+
     # 1) Tavily (primary — fastest, most reliable)
-    results = await _search_tavily(query, max_results)
+    primary = asyncio.create_task(_timed("tavily", _search_tavily(query, max_results)))
+    delay = _hedge_delay() if SEARCH_HEDGE_ENABLED and os.getenv("TAVILY_API_KEY", "").strip() else None
+    if delay is not None:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if not done:
+            # Primary yavaş — yedekleri paralel başlat, ilk dolu sonuç kazanır
+            _hedge_counters["hedged"] += 1
+            results, winner = await _first_non_empty([primary, *backups()])
+            if results and winner is not primary:
+                _hedge_counters["backup_won"] += 1
+            if not results:
+                logger.warning("All search providers returned 0 results for: %s", query[:80])
+            return results
+
+    results = await primary
     if results:
         return results
 
     # 2) Parallel fallback: Exa + Whoogle simultaneously
-    exa_task = asyncio.create_task(_search_exa(query, max_results))
-    whoogle_task = asyncio.create_task(_search_whoogle(query, max_results))
-
-    for coro in asyncio.as_completed([exa_task, whoogle_task]):
-        try:
-            result = await coro
-            if result:
-                # Cancel the other task
-                for t in [exa_task, whoogle_task]:
-                    if not t.done():
-                        t.cancel()
-                return result
-        except Exception:
-            continue
-
-    logger.warning("All search providers returned 0 results for: %s", query[:80])
-    return []
+    results, _ = await _first_non_empty(backups())
+    if not results:
+        logger.warning("All search providers returned 0 results for: %s", query[:80])
+    return results
+
+
+def _hedge_delay() -> float:
+    observed = _latency["tavily"].percentile(SEARCH_HEDGE_PERCENTILE)
+    if observed is None:
+        return SEARCH_HEDGE_DEFAULT_DELAY_SEC
+    return max(SEARCH_HEDGE_MIN_DELAY_SEC, observed)
+
+
+async def _first_non_empty(
+    tasks: list[asyncio.Task],
+) -> tuple[list[dict[str, str]], asyncio.Task | None]:
+    """Wait for tasks as they finish; return the first non-empty result (and its
+    task), cancelling the rest."""
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result():
+                    return task.result(), task
+        return [], None
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+def get_search_stats() -> dict[str, Any]:
+    """Cache / hedging / provider latency stats for monitoring."""
+    return {
+        "cache": {"entries": len(_search_cache), "hits": _search_cache.hits, "misses": _search_cache.misses},
+        "single_flight": _flights.stats(),
+        "hedge": {"enabled": SEARCH_HEDGE_ENABLED, **_hedge_counters},
+        "providers": {name: lat.stats() for name, lat in _latency.items()},
+    }
 
 
 def format_search_results(results: list[dict[str, str]]) -> str:
@@ -445,36 +445,26 @@ SKILL_REGISTRY: list[dict[str, Any]] = [
 ]
 
 
-def find_skills(query: str, max_results: int = 3) -> list[dict]:
-    """
-    Search skill registry by keyword matching.
-    Returns top matching skills with their knowledge.
-    """
-    query_lower = query.lower()
-    query_words = set(query_lower.split())
-
-    scored: list[tuple[float, dict]] = []
-    for skill in SKILL_REGISTRY:
-        score = 0.0
-        # Check keywords
-        for kw in skill["keywords"]:
-            kw_lower = kw.lower()
-            if kw_lower in query_lower:
-                score += 3.0
-            elif any(w in kw_lower for w in query_words):
-                score += 1.5
+_SKILLS_BY_ID: dict[str, dict[str, Any]] = {s["id"]: s for s in SKILL_REGISTRY}
+_registry_index = None
 
-        # Check name and description
-        if any(w in skill["name"].lower() for w in query_words):
-            score += 2.0
-        if any(w in skill["description"].lower() for w in query_words):
-            score += 1.0
 
-        if score > 0:
-            scored.append((score, skill))
+def _get_registry_index():
+    """BM25 index over SKILL_REGISTRY — built once, registry is static."""
+    global _registry_index
+    if _registry_index is None:
+        from tools.skill_index import SkillIndex
+        index = SkillIndex()
+        index.build(SKILL_REGISTRY)
+        _registry_index = index
+    return _registry_index
 
-    scored.sort(key=lambda x: x[0], reverse=True)
 
+def find_skills(query: str, max_results: int = 3) -> list[dict]:
+    """
+    Search skill registry via the in-memory BM25 index.
+    Returns top matching skills with their knowledge.
+    """
     return [
         {
             "id": s["id"],
@@ -483,16 +473,14 @@ def find_skills(query: str, max_results: int = 3) -> list[dict]:
             "description": s["description"],
             "relevance_score": round(sc, 1),
         }
-        for sc, s in scored[:max_results]
+        for sc, s in _get_registry_index().search(query, max_results=max_results)
     ]
 
 
 def get_skill_knowledge(skill_id: str) -> str | None:
     """Get the full knowledge/instructions for a skill by ID."""
-    for skill in SKILL_REGISTRY:
-        if skill["id"] == skill_id:
-            return skill["knowledge"]
-    return None
+    skill = _SKILLS_BY_ID.get(skill_id)
+    return skill["knowledge"] if skill else None
 
 
 def format_skill_results(skills: list[dict]) -> str:
@@ -0,0 +1,268 @@
+"""
+Skill Index — in-memory inverted index with BM25 scoring for skill discovery.
+
+Skill search used to load every active skill row and run substring loops per
+query. The index keeps postings (term → skill id → field-weighted tf) in
+memory, so a lookup touches only the skills that share a term with the query.
+
+- BM25 over name / keywords / description with per-field boosts
+- prefix expansion for query terms (``araştır`` → ``araştırma``) at a discount,
+  which keeps the old substring matching behaviour for word stems
+- multi-word keywords found verbatim in the query get a phrase bonus
+- optional blend with embedding cosine similarity when vectors are present
+- incremental ``upsert`` / ``remove`` — no full rebuild on skill CRUD
+
+Usage:
+    from tools.skill_index import SkillIndex
+
+    index = SkillIndex()
+    index.build(skills)
+    hits = index.search("derin araştırma raporu", max_results=3)
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+SKILL_INDEX_SEMANTIC_WEIGHT = float(os.getenv("SKILL_INDEX_SEMANTIC_WEIGHT", "0.3"))
+
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+_FIELD_BOOSTS = {"name": 2.0, "keywords": 3.0, "description": 1.0}
+_PREFIX_MIN_LEN = 3
+_PREFIX_DISCOUNT = 0.5
+_PHRASE_BONUS = 1.5
+_POPULARITY_WEIGHT = 0.1
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset({
+    "ve", "veya", "için", "bir", "bu", "şu", "ile", "da", "de", "mi", "mı", "ne",
+    "the", "and", "or", "for", "with", "a", "an", "of", "to", "in", "on", "is",
+})
+
+
+def normalize(text: str) -> str:
+    # "İ".lower() → "i̇" (combining dot) — noktayı at ki "İnceleme" == "inceleme"
+    return text.lower().replace("̇", "")
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(normalize(text)) if t not in _STOPWORDS and len(t) > 1]
+
+
+class SkillIndex:
+    """Thread-safe inverted index over skill dicts (id, name, description, keywords, ...)."""
+
+    def __init__(self, semantic_weight: float = SKILL_INDEX_SEMANTIC_WEIGHT) -> None:
+        self._lock = threading.RLock()
+        self._semantic_weight = semantic_weight
+        self._docs: dict[str, dict[str, Any]] = {}
+        self._doc_terms: dict[str, Counter[str]] = {}
+        self._doc_len: dict[str, float] = {}
+        self._phrases: dict[str, list[str]] = {}
+        self._vectors: dict[str, list[float]] = {}
+        self._postings: dict[str, dict[str, float]] = {}
+        self._sorted_terms: list[str] | None = None
+        self._total_len = 0.0
+        self.built_at = 0.0
+        self._counters = {"searches": 0, "upserts": 0, "removes": 0, "builds": 0}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, skill_id: str) -> bool:
+        return skill_id in self._docs
+
+    # ── Mutations ────────────────────────────────────────────────
+
+    def build(self, skills: Iterable[dict[str, Any]]) -> None:
+        """Replace the whole index (startup / periodic refresh)."""
+        with self._lock:
+            vectors = self._vectors
+            self._docs.clear()
+            self._doc_terms.clear()
+            self._doc_len.clear()
+            self._phrases.clear()
+            self._postings.clear()
+            self._vectors = {}
+            self._total_len = 0.0
+            for skill in skills:
+                self._add(skill)
+                if skill["id"] in vectors:
+                    self._vectors[skill["id"]] = vectors[skill["id"]]
+            self._sorted_terms = None
+            self.built_at = time.time()
+            self._counters["builds"] += 1
+
+    def upsert(self, skill: dict[str, Any]) -> None:
+        with self._lock:
+            old = self._docs.get(skill["id"])
+            if old is not None and not _same_text(old, skill):
+                self._vectors.pop(skill["id"], None)  # metin değişti → vektör bayat
+            self._discard(skill["id"])
+            self._add(skill)
+            self._sorted_terms = None
+            self._counters["upserts"] += 1
+
+    def remove(self, skill_id: str) -> bool:
+        with self._lock:
+            removed = self._discard(skill_id)
+            self._vectors.pop(skill_id, None)
+            if removed:
+                self._sorted_terms = None
+                self._counters["removes"] += 1
+            return removed
+
+    def bump_use_count(self, skill_id: str, delta: int = 1) -> None:
+        with self._lock:
+            doc = self._docs.get(skill_id)
+            if doc is not None:
+                doc["use_count"] = int(doc.get("use_count") or 0) + delta
+
+    def set_vector(self, skill_id: str, vector: list[float] | None) -> None:
+        with self._lock:
+            if vector and skill_id in self._docs:
+                self._vectors[skill_id] = vector
+
+    def missing_vectors(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [doc for sid, doc in self._docs.items() if sid not in self._vectors]
+
+    def _add(self, skill: dict[str, Any]) -> None:
+        sid = skill["id"]
+        keywords = [str(k) for k in (skill.get("keywords") or [])]
+        fields = {
+            "name": f"{skill.get('name', '')} {sid.replace('-', ' ')}",
+            "keywords": " ".join(keywords),
+            "description": skill.get("description", "") or "",
+        }
+        terms: Counter[str] = Counter()
+        length = 0.0
+        for field_name, text in fields.items():
+            boost = _FIELD_BOOSTS[field_name]
+            for token in tokenize(text):
+                terms[token] += boost
+                length += boost
+        self._docs[sid] = dict(skill)
+        self._doc_terms[sid] = terms
+        self._doc_len[sid] = length
+        self._total_len += length
+        self._phrases[sid] = [p for p in (normalize(k).strip() for k in keywords) if " " in p]
+        for term, weight in terms.items():
+            self._postings.setdefault(term, {})[sid] = weight
+
+    def _discard(self, skill_id: str) -> bool:
+        terms = self._doc_terms.pop(skill_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(skill_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(skill_id, 0.0)
+        self._phrases.pop(skill_id, None)
+        self._docs.pop(skill_id, None)
+        return True
+
+    # ── Search ───────────────────────────────────────────────────
+
+    def _expand(self, token: str) -> list[tuple[str, float]]:
+        """Exact term plus (for longer tokens) index terms starting with it."""
+        matches = [(token, 1.0)] if token in self._postings else []
+        if len(token) < _PREFIX_MIN_LEN:
+            return matches
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        i = bisect.bisect_left(terms, token)
+        while i < len(terms) and terms[i].startswith(token):
+            if terms[i] != token:
+                matches.append((terms[i], _PREFIX_DISCOUNT))
+            i += 1
+        return matches
+
+    def search(
+        self,
+        query: str,
+        max_results: int = 3,
+        query_vector: list[float] | None = None,
+    ) -> list[tuple[float, dict[str, Any]]]:
+        """Return ``(score, skill)`` pairs, best first. Skills with no lexical
+        or semantic match are not returned."""
+        with self._lock:
+            self._counters["searches"] += 1
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            avg_len = self._total_len / n_docs or 1.0
+            scores: dict[str, float] = {}
+
+            for token in set(tokenize(query)):
+                for term, factor in self._expand(token):
+                    posting = self._postings[term]
+                    idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for sid, tf in posting.items():
+                        norm = tf + _BM25_K1 * (1 - _BM25_B + _BM25_B * self._doc_len[sid] / avg_len)
+                        scores[sid] = scores.get(sid, 0.0) + factor * idf * tf * (_BM25_K1 + 1) / norm
+
+            query_norm = normalize(query)
+            for sid, phrases in self._phrases.items():
+                for phrase in phrases:
+                    if phrase in query_norm:
+                        scores[sid] = scores.get(sid, 0.0) + _PHRASE_BONUS
+
+            if query_vector and self._vectors and self._semantic_weight > 0:
+                lexical_max = max(scores.values(), default=0.0) or 1.0
+                for sid, vector in self._vectors.items():
+                    sim = _cosine(query_vector, vector)
+                    if sim > 0:
+                        # BM25 ölçeğine oturt: en iyi lexical skora göre ağırlıklandır
+                        scores[sid] = scores.get(sid, 0.0) + self._semantic_weight * sim * lexical_max
+
+            ranked = sorted(
+                (
+                    (score + _POPULARITY_WEIGHT * math.log1p(int(self._docs[sid].get("use_count") or 0)), sid)
+                    for sid, score in scores.items() if score > 0
+                ),
+                key=lambda x: (-x[0], x[1]),
+            )
+            return [(score, self._docs[sid]) for score, sid in ranked[:max_results]]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "skills": len(self._docs),
+                "terms": len(self._postings),
+                "vectors": len(self._vectors),
+                "built_at": self.built_at,
+                **self._counters,
+            }
+
+
+def _same_text(a: dict[str, Any], b: dict[str, Any]) -> bool:
+    return all(a.get(k) == b.get(k) for k in ("name", "description", "keywords"))
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def skill_vector_text(skill: dict[str, Any]) -> str:
+    """Text embedded for a skill's semantic vector."""
+    keywords = ", ".join(str(k) for k in (skill.get("keywords") or []))
+    return f"{skill.get('name', '')}. {skill.get('description', '')}. {keywords}"
@@ -85,6 +85,11 @@ async def run_subagent(
     if cfg.get("extra_body"):
         kwargs["extra_body"] = cfg["extra_body"]
 
-    response = await client.chat.completions.create(**kwargs)
+    from tools.llm_admission import estimate_tokens, get_admission_controller
+
+    tokens = estimate_tokens(kwargs["messages"], kwargs["max_tokens"])
+    async with get_admission_controller().admit(client.base_url, kwargs["model"], tokens) as ticket:
+        response = await client.chat.completions.create(**kwargs)
+        ticket.record_usage(getattr(response.usage, "total_tokens", None))
     content = (response.choices[0].message.content or "").strip()
     return content
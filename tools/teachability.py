@@ -1,19 +1,44 @@
 """
 Teachability — Agents learn from user corrections and preferences.
 PostgreSQL backend. Same public API as SQLite version.
+
+Retrieval is index-backed: Postgres uses the generated ``search_tsv``
+column (GIN) plus ``pg_trgm`` word similarity when the extension exists;
+without Postgres the local SQLite FTS5 store (tools.teachability_local) is
+used. Both return ranked candidates that share one re-ranking step
+(category boost, popularity, recency).
 """
 
 from __future__ import annotations
 
 import logging
+import math
 import re
 from datetime import datetime, timezone
 from typing import Any, Mapping
 
-from tools.pg_connection import get_conn, release_conn
+from tools.pg_connection import get_conn, postgres_available, release_conn
+from tools.teachability_local import get_local_teaching_store
 
 logger = logging.getLogger(__name__)
 
+_MAX_QUERY_TOKENS = 16
+_CANDIDATE_FACTOR = 4  # SQL'den max_results * 4 aday çekilip yeniden sıralanır
+_CATEGORY_BOOST = {"correction": 1.3, "rule": 1.2}
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_trgm_available: bool | None = None
+
+_SEARCH_SQL = """
+SELECT t.*, ts_rank_cd(t.search_tsv, q.tsq, 32) * 10{trgm_score} AS text_score
+FROM teachings t, to_tsquery('simple', %(tsq)s) AS q(tsq)
+WHERE t.active = TRUE AND (t.search_tsv @@ q.tsq{trgm_match})
+ORDER BY text_score DESC
+LIMIT %(limit)s
+"""
+_TRGM_SCORE = " + word_similarity(%(raw)s, t.instruction) * 3"
+_TRGM_MATCH = " OR %(raw)s <%% t.instruction"
+
 TEACHING_PATTERNS = re.compile(
     r"(böyle yapma|şöyle yap|bunu değiştir|her zaman|asla|unutma|"
     r"don'?t do|always|never|remember|instead of|yerine|"
@@ -40,6 +65,16 @@ def save_teaching(
     context: str | None = None,
 ) -> dict[str, Any]:
     """Save a user teaching/preference."""
+    if not postgres_available():
+        row_dict = get_local_teaching_store().save(category, trigger_text[:500], instruction[:2000], context)
+        logger.info(f"Teaching saved locally: [{category}] {instruction[:60]}")
+        return {
+            "id": row_dict["id"],
+            "instruction": instruction,
+            "category": category,
+            "created_at": row_dict["created_at"],
+        }
+
     conn = get_conn()
     try:
         with conn.cursor() as cur:
@@ -66,13 +101,29 @@ def save_teaching(
 def get_relevant_teachings(
     query: str,
     max_results: int = 5,
+    count_use: bool = True,
 ) -> list[dict[str, Any]]:
-    """Find teachings relevant to current query via keyword matching."""
+    """Find teachings relevant to current query via full-text / trigram search.
+
+    count_use=False leaves use_count alone (speculative lookups); the caller
+    then calls record_teaching_use() for the teachings it actually injected.
+    """
+    tokens = _query_tokens(query)
+    candidates_limit = max(max_results * _CANDIDATE_FACTOR, 20)
+
+    if not postgres_available():
+        store = get_local_teaching_store()
+        if not tokens:
+            return [_row_to_dict(r) for r in store.top_used(max_results)]
+        results = _rerank(store.search(tokens, candidates_limit), max_results)
+        if count_use:
+            store.increment_use([r["id"] for r in results])
+        return results
+
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            query_words = set(w for w in query.lower().split() if len(w) > 2)
-            if not query_words:
+            if not tokens:
                 cur.execute(
                     """SELECT * FROM teachings WHERE active = TRUE
                        ORDER BY use_count DESC, created_at DESC LIMIT %s""",
@@ -81,63 +132,22 @@ def get_relevant_teachings(
                 rows = cur.fetchall()
                 return [_row_to_dict(_as_row_dict(r)) for r in rows]
 
+            trgm = _has_trgm(cur)
             cur.execute(
-                "SELECT * FROM teachings WHERE active = TRUE ORDER BY created_at DESC LIMIT 100"
+                _SEARCH_SQL.format(
+                    trgm_score=_TRGM_SCORE if trgm else "",
+                    trgm_match=_TRGM_MATCH if trgm else "",
+                ),
+                {"tsq": " | ".join(f"{t}:*" for t in tokens), "raw": query[:500], "limit": candidates_limit},
             )
-            rows = cur.fetchall()
-
-        # Build query bigrams for phrase matching
-        query_bigrams = set()
-        qw_list = query.lower().split()
-        for i in range(len(qw_list) - 1):
-            query_bigrams.add(f"{qw_list[i]} {qw_list[i+1]}")
-
-        scored = []
-        for row in rows:
-            d = _as_row_dict(row)
-            instruction = str(d.get("instruction", "")).lower()
-            trigger = str(d.get("trigger_text", "")).lower()
-            text = instruction + " " + trigger
-            text_words = set(w for w in text.split() if len(w) > 2)
-
-            # Word overlap score
-            overlap = query_words & text_words
-            score = len(overlap) * 1.5
-
-            # Bigram match bonus (phrase-level matching)
-            for bg in query_bigrams:
-                if bg in text:
-                    score += 3.0
-
-            # Partial substring match for compound words
-            for qw in query_words:
-                if any(qw in tw or tw in qw for tw in text_words if len(tw) > 3):
-                    score += 0.5
-
-            # Category boost: corrections > preferences
-            cat = d.get("category", "")
-            if cat == "correction":
-                score *= 1.3
-            elif cat == "rule":
-                score *= 1.2
-
-            # Usage popularity
-            score += float(d.get("use_count", 0)) * 0.1
-
-            # Recency boost (newer teachings slightly preferred)
-            created = str(d.get("created_at", ""))
-            if "2026" in created:
-                score += 0.3
-            elif "2025" in created:
-                score += 0.1
-
-            if score > 0:
-                scored.append((score, d))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        results = [_row_to_dict(d) for _, d in scored[:max_results]]
-
-        if results:
+            candidates = [
+                (float(d.get("text_score") or 0.0), d)
+                for d in (_as_row_dict(r) for r in cur.fetchall())
+            ]
+
+        results = _rerank(candidates, max_results)
+
+        if results and count_use:
             ids = [r["id"] for r in results]
             with conn.cursor() as cur:
                 cur.execute(
@@ -151,8 +161,28 @@ def get_relevant_teachings(
         release_conn(conn)
 
 
+def record_teaching_use(teaching_ids: list[int]) -> None:
+    """Increment use_count for teachings that were injected into a prompt."""
+    ids = [i for i in teaching_ids if i is not None]
+    if not ids:
+        return
+    if not postgres_available():
+        get_local_teaching_store().increment_use(ids)
+        return
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE teachings SET use_count = use_count + 1 WHERE id = ANY(%s)", (ids,))
+        conn.commit()
+    finally:
+        release_conn(conn)
+
+
 def get_all_teachings(active_only: bool = True) -> list[dict[str, Any]]:
     """List all teachings."""
+    if not postgres_available():
+        return [_row_to_dict(r) for r in get_local_teaching_store().list_all(active_only)]
+
     conn = get_conn()
     try:
         with conn.cursor() as cur:
@@ -170,6 +200,9 @@ def get_all_teachings(active_only: bool = True) -> list[dict[str, Any]]:
 
 def deactivate_teaching(teaching_id: int) -> bool:
     """Soft-delete a teaching."""
+    if not postgres_available():
+        return get_local_teaching_store().deactivate(teaching_id)
+
     conn = get_conn()
     try:
         with conn.cursor() as cur:
@@ -184,6 +217,53 @@ def deactivate_teaching(teaching_id: int) -> bool:
         release_conn(conn)
 
 
+# ── Ranking ──────────────────────────────────────────────────────
+
+def _query_tokens(query: str) -> list[str]:
+    seen: dict[str, None] = {}
+    for token in _TOKEN_RE.findall(query.lower()):
+        if len(token) > 2:
+            seen.setdefault(token, None)
+    return list(seen)[:_MAX_QUERY_TOKENS]
+
+
+def _has_trgm(cur: Any) -> bool:
+    """pg_trgm kurulu mu — process başına bir kez kontrol edilir."""
+    global _trgm_available
+    if _trgm_available is None:
+        cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        _trgm_available = cur.fetchone() is not None
+    return _trgm_available
+
+
+def _recency_boost(created_at: Any) -> float:
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            return 0.0
+    if not isinstance(created_at, datetime):
+        return 0.0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age_days = max((datetime.now(timezone.utc) - created_at).total_seconds() / 86400, 0.0)
+    return 0.3 * math.exp(-age_days / 365)
+
+
+def _rerank(candidates: list[tuple[float, dict[str, Any]]], max_results: int) -> list[dict[str, Any]]:
+    """Category boost (corrections > rules > preferences) + popularity + recency."""
+    scored = []
+    for text_score, d in candidates:
+        if text_score <= 0:
+            continue
+        score = text_score * _CATEGORY_BOOST.get(str(d.get("category", "")), 1.0)
+        score += math.log1p(float(d.get("use_count") or 0)) * 0.1
+        score += _recency_boost(d.get("created_at"))
+        scored.append((score, d))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [_row_to_dict(d) for _, d in scored[:max_results]]
+
+
 def format_teachings_for_context(teachings: list[dict]) -> str:
     """Format teachings for injection into agent system prompt."""
     if not teachings:
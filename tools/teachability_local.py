@@ -0,0 +1,197 @@
+"""
+Local teaching store — SQLite + FTS5 fallback for tools.teachability.
+
+Used when PostgreSQL is unavailable (DB-less mode). The table layout matches
+the legacy ``data/teachings.db`` so ``pg_connection.migrate_from_sqlite``
+can still copy these rows into Postgres later.
+
+Search uses an external-content FTS5 table (unicode61, diacritics kept so
+Turkish ``ş/ı/ğ`` stay distinct) with prefix queries and bm25 ranking; if the
+SQLite build lacks FTS5 it degrades to a LIKE scan.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DB_PATH = DATA_DIR / "teachings.db"
+
+_SCHEMA_VERSION = 1
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS teachings (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    category     TEXT NOT NULL DEFAULT 'preference',
+    trigger_text TEXT NOT NULL DEFAULT '',
+    instruction  TEXT NOT NULL,
+    context      TEXT,
+    use_count    INTEGER NOT NULL DEFAULT 0,
+    active       INTEGER NOT NULL DEFAULT 1,
+    created_at   TEXT NOT NULL,
+    updated_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_teach_active ON teachings(active);
+"""
+
+_FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS teachings_fts USING fts5(
+    instruction, trigger_text,
+    content='teachings', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS teachings_fts_ai AFTER INSERT ON teachings BEGIN
+    INSERT INTO teachings_fts(rowid, instruction, trigger_text)
+    VALUES (new.id, new.instruction, new.trigger_text);
+END;
+CREATE TRIGGER IF NOT EXISTS teachings_fts_ad AFTER DELETE ON teachings BEGIN
+    INSERT INTO teachings_fts(teachings_fts, rowid, instruction, trigger_text)
+    VALUES ('delete', old.id, old.instruction, old.trigger_text);
+END;
+CREATE TRIGGER IF NOT EXISTS teachings_fts_au AFTER UPDATE OF instruction, trigger_text ON teachings BEGIN
+    INSERT INTO teachings_fts(teachings_fts, rowid, instruction, trigger_text)
+    VALUES ('delete', old.id, old.instruction, old.trigger_text);
+    INSERT INTO teachings_fts(rowid, instruction, trigger_text)
+    VALUES (new.id, new.instruction, new.trigger_text);
+END;
+"""
+
+
+class LocalTeachingStore:
+    """SQLite teachings table with an FTS5 index; thread-safe via one lock."""
+
+    def __init__(self, db_path: Path | str = DB_PATH) -> None:
+        self._path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.fts = False
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA_SQL)
+            try:
+                conn.executescript(_FTS_SQL)
+                self.fts = True
+                if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                    # Eski teachings.db — mevcut satırları FTS'e bir kez yükle
+                    conn.execute("INSERT INTO teachings_fts(teachings_fts) VALUES ('rebuild')")
+                    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite FTS5 unavailable, teaching search falls back to LIKE: {e}")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def save(self, category: str, trigger_text: str, instruction: str, context: str | None) -> dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            conn = self._get_conn()
+            cur = conn.execute(
+                """INSERT INTO teachings (category, trigger_text, instruction, context, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (category, trigger_text, instruction, context, now, now),
+            )
+            conn.commit()
+            return {"id": cur.lastrowid, "created_at": now}
+
+    def save_many(self, rows: list[tuple[str, str, str, str | None]]) -> None:
+        """Bulk insert (category, trigger_text, instruction, context) — imports / tests."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            conn = self._get_conn()
+            conn.executemany(
+                """INSERT INTO teachings (category, trigger_text, instruction, context, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [(*r, now, now) for r in rows],
+            )
+            conn.commit()
+
+    def search(self, tokens: list[str], limit: int) -> list[tuple[float, dict[str, Any]]]:
+        """Candidates as ``(text_score, row)``, best text match first."""
+        with self._lock:
+            conn = self._get_conn()
+            if self.fts:
+                match = " OR ".join(f'"{t}"*' for t in tokens)
+                rows = conn.execute(
+                    """SELECT t.*, -bm25(teachings_fts, 2.0, 1.0) AS text_score
+                       FROM teachings_fts JOIN teachings t ON t.id = teachings_fts.rowid
+                       WHERE teachings_fts MATCH ? AND t.active = 1
+                       ORDER BY bm25(teachings_fts, 2.0, 1.0) LIMIT ?""",
+                    (match, limit),
+                ).fetchall()
+            else:
+                where = " OR ".join("lower(instruction || ' ' || trigger_text) LIKE ?" for _ in tokens)
+                score = " + ".join("(lower(instruction || ' ' || trigger_text) LIKE ?)" for _ in tokens)
+                likes = [f"%{t}%" for t in tokens]
+                rows = conn.execute(
+                    f"""SELECT *, ({score}) AS text_score FROM teachings
+                        WHERE active = 1 AND ({where})
+                        ORDER BY text_score DESC, id DESC LIMIT ?""",
+                    (*likes, *likes, limit),
+                ).fetchall()
+        return [(float(r["text_score"]), dict(r)) for r in rows]
+
+    def top_used(self, limit: int) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._get_conn().execute(
+                """SELECT * FROM teachings WHERE active = 1
+                   ORDER BY use_count DESC, created_at DESC LIMIT ?""",
+                (limit,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def list_all(self, active_only: bool = True) -> list[dict[str, Any]]:
+        sql = (
+            "SELECT * FROM teachings WHERE active = 1 ORDER BY use_count DESC, created_at DESC"
+            if active_only else "SELECT * FROM teachings ORDER BY created_at DESC"
+        )
+        with self._lock:
+            return [dict(r) for r in self._get_conn().execute(sql).fetchall()]
+
+    def increment_use(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        with self._lock:
+            conn = self._get_conn()
+            conn.executemany("UPDATE teachings SET use_count = use_count + 1 WHERE id = ?", [(i,) for i in ids])
+            conn.commit()
+
+    def deactivate(self, teaching_id: int) -> bool:
+        with self._lock:
+            conn = self._get_conn()
+            cur = conn.execute(
+                "UPDATE teachings SET active = 0, updated_at = ? WHERE id = ?",
+                (datetime.now(timezone.utc).isoformat(), teaching_id),
+            )
+            conn.commit()
+            return cur.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ── Module-level Singleton ───────────────────────────────────────
+
+_store: LocalTeachingStore | None = None
+
+
+def get_local_teaching_store() -> LocalTeachingStore:
+    """Get or create the global local teaching store."""
+    global _store
+    if _store is None:
+        _store = LocalTeachingStore()
+    return _store
@@ -1,6 +1,7 @@
 """
 Web Fetch tool — fetch and extract text content from URLs.
 Available to all agents for retrieving web page content.
+Requests go through the shared cached fetcher (tools.http_fetch).
 """
 
 from __future__ import annotations
@@ -15,38 +16,21 @@ async def web_fetch(url: str, max_chars: int = 8000) -> dict:
     Fetch a URL and return cleaned text content.
     Returns dict with url, title, content, status.
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        ),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9,tr;q=0.8",
-    }
+    from tools.http_fetch import get_fetcher
 
     try:
-        async with httpx.AsyncClient(
-            timeout=12.0,
-            follow_redirects=True,
-            max_redirects=5,
-        ) as client:
-            resp = await client.get(url, headers=headers)
-            resp.raise_for_status()
-            html = resp.text
-
-        title = _extract_title(html)
-        text = _html_to_text(html)
+        page = await get_fetcher().fetch(url)
+        text = page.text
 
         # Truncate to max_chars
         if len(text) > max_chars:
             text = text[:max_chars] + "\n\n[... truncated]"
 
         return {
-            "url": str(resp.url),
-            "title": title,
+            "url": page.url,
+            "title": page.title,
             "content": text,
-            "status": resp.status_code,
+            "status": page.status,
             "content_length": len(text),
         }
 
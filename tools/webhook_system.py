@@ -7,24 +7,34 @@ Features:
 - Event subscription system with PostgreSQL persistence
 - Delivery logging and status tracking
 - Support for multiple event types and filters
+- In-memory subscription index, bounded concurrent delivery pool and
+  group-committed delivery status writes
+- Durable outbound queue (webhook_deliveries rows) drained by background
+  workers with exponential backoff, per-subscription rate limits and
+  circuit breaking
 """
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import hmac
 import json
 import logging
+import os
+import random
 import time
 import uuid
+import weakref
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Mapping, cast
+from typing import Any, Callable, Mapping, cast
 
 import httpx
 
-from tools.pg_connection import DBRow, db_conn, get_conn, release_conn
+from tools.circuit_breaker import CircuitBreaker
+from tools.pg_connection import DBRow, async_db_conn, db_conn, get_conn, release_conn
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +44,28 @@ WEBHOOK_TIMEOUT = 30  # seconds
 MAX_RETRIES = 3
 RETRY_DELAYS = [1, 5, 15]  # exponential backoff in seconds
 
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "16"))
+WEBHOOK_MAX_PER_HOST = int(os.getenv("WEBHOOK_MAX_PER_HOST", "4"))
+WEBHOOK_INDEX_TTL_SEC = float(os.getenv("WEBHOOK_INDEX_TTL_SEC", "60"))  # 0 = sadece invalidate
+WEBHOOK_STATUS_FLUSH_MS = float(os.getenv("WEBHOOK_STATUS_FLUSH_MS", "50"))
+WEBHOOK_STATUS_BATCH_SIZE = int(os.getenv("WEBHOOK_STATUS_BATCH_SIZE", "200"))
+# Failed pending-row inserts are re-buffered and retried with exponential backoff
+WEBHOOK_STATUS_RETRY_BASE_SEC = float(os.getenv("WEBHOOK_STATUS_RETRY_BASE_SEC", "0.5"))
+WEBHOOK_STATUS_RETRY_MAX_SEC = float(os.getenv("WEBHOOK_STATUS_RETRY_MAX_SEC", "30"))
+
+# Durable queue (background workers)
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "6"))
+WEBHOOK_BACKOFF_BASE_SEC = float(os.getenv("WEBHOOK_BACKOFF_BASE_SEC", "5"))
+WEBHOOK_BACKOFF_MAX_SEC = float(os.getenv("WEBHOOK_BACKOFF_MAX_SEC", "3600"))
+WEBHOOK_QUEUE_POLL_SEC = float(os.getenv("WEBHOOK_QUEUE_POLL_SEC", "2"))
+WEBHOOK_LEASE_SEC = float(os.getenv("WEBHOOK_LEASE_SEC", str(WEBHOOK_TIMEOUT * 2)))
+WEBHOOK_RATE_PER_SEC = float(os.getenv("WEBHOOK_RATE_PER_SEC", "5"))  # per subscription
+WEBHOOK_RATE_BURST = int(os.getenv("WEBHOOK_RATE_BURST", "10"))
+WEBHOOK_RATE_MAX_WAIT_SEC = 1.0  # daha uzun beklemeler worker tutmaz, satır ertelenir
+WEBHOOK_BREAKER_FAILURES = int(os.getenv("WEBHOOK_BREAKER_FAILURES", "5"))
+WEBHOOK_BREAKER_RECOVERY_SEC = float(os.getenv("WEBHOOK_BREAKER_RECOVERY_SEC", "60"))
+
 # ── Enums ──────────────────────────────────────────────────────────
 
 
@@ -132,6 +164,8 @@ class WebhookDelivery:
     attempt_count: int = 1
     delivered_at: str | None = None
     created_at: str = ""
+    source: str = "system"
+    next_attempt_at: str | None = None  # queue: next scheduled attempt
     
     def to_dict(self) -> dict:
         return {
@@ -146,6 +180,8 @@ class WebhookDelivery:
             "attempt_count": self.attempt_count,
             "delivered_at": self.delivered_at,
             "created_at": self.created_at,
+            "source": self.source,
+            "next_attempt_at": self.next_attempt_at,
         }
 
 
@@ -189,6 +225,13 @@ CREATE INDEX IF NOT EXISTS idx_webhook_del_sub ON webhook_deliveries(subscriptio
 CREATE INDEX IF NOT EXISTS idx_webhook_del_status ON webhook_deliveries(status);
 CREATE INDEX IF NOT EXISTS idx_webhook_del_created ON webhook_deliveries(created_at DESC);
 
+-- Delivery queue columns (pending/retrying rows are the durable outbound queue)
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS source TEXT;
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMPTZ;
+ALTER TABLE webhook_deliveries ADD COLUMN IF NOT EXISTS locked_until TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_webhook_del_queue ON webhook_deliveries(next_attempt_at)
+    WHERE status IN ('pending', 'retrying');
+
 -- Incoming webhook log
 CREATE TABLE IF NOT EXISTS webhook_incoming (
     id            TEXT PRIMARY KEY,
@@ -262,6 +305,7 @@ async def send_webhook(
     headers: dict[str, str] | None = None,
     timeout: float = WEBHOOK_TIMEOUT,
     max_retries: int = MAX_RETRIES,
+    client: httpx.AsyncClient | None = None,
 ) -> dict[str, Any]:
     """
     Send a webhook POST request with signature verification header.
@@ -273,6 +317,7 @@ async def send_webhook(
         headers: Additional headers
         timeout: Request timeout in seconds
         max_retries: Maximum retry attempts
+        client: Shared client (keep-alive reuse); a one-off client is used if omitted
     
     Returns:
         Dict with success status, response code, and delivery info
@@ -295,26 +340,27 @@ async def send_webhook(
     
     for attempt in range(max_retries):
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
+            if client is not None:
                 response = await client.post(
-                    url,
-                    content=payload_str,
-                    headers=request_headers,
+                    url, content=payload_str, headers=request_headers, timeout=timeout,
                 )
-                response_code = response.status_code
-                response_body = response.text[:1000]  # Truncate for storage
-                
-                if 200 <= response_code < 300:
-                    return {
-                        "success": True,
-                        "status": WebhookStatus.DELIVERED.value,
-                        "response_code": response_code,
-                        "response_body": response_body,
-                        "attempts": attempt + 1,
-                    }
-                
-                # Non-2xx response
-                last_error = f"HTTP {response_code}: {response.text[:200]}"
+            else:
+                async with httpx.AsyncClient(timeout=timeout) as one_off:
+                    response = await one_off.post(url, content=payload_str, headers=request_headers)
+            response_code = response.status_code
+            response_body = response.text[:1000]  # Truncate for storage
+            
+            if 200 <= response_code < 300:
+                return {
+                    "success": True,
+                    "status": WebhookStatus.DELIVERED.value,
+                    "response_code": response_code,
+                    "response_body": response_body,
+                    "attempts": attempt + 1,
+                }
+            
+            # Non-2xx response
+            last_error = f"HTTP {response_code}: {response.text[:200]}"
                 
         except httpx.TimeoutException:
             last_error = "Request timed out"
@@ -342,10 +388,6 @@ async def send_webhook(
     }
 
 
-# Need asyncio for async sleep
-import asyncio
-
-
 # ── Webhook Receiver ────────────────────────────────────────────────
 
 def receive_webhook(
@@ -549,6 +591,7 @@ def create_subscription(
             )
         conn.commit()
     
+    invalidate_subscription_index()
     logger.info("Created webhook subscription '%s' (id=%s) for events: %s", name, sub_id, events)
     return subscription
 
@@ -569,27 +612,44 @@ def list_subscriptions(
     event_type: str | None = None,
 ) -> list[WebhookSubscription]:
     """List all subscriptions with optional filters."""
+    query, params = _subscription_query(status, event_type)
     with db_conn() as conn:
         with conn.cursor() as cur:
-            conditions = []
-            params: list = []
-            
-            if status:
-                conditions.append("status = %s")
-                params.append(status.value)
-            if event_type:
-                conditions.append("events::jsonb ? %s")
-                params.append(event_type)
-            
-            where_clause = " AND ".join(conditions) if conditions else "TRUE"
-            query = f"SELECT * FROM webhook_subscriptions WHERE {where_clause} ORDER BY created_at DESC"
-            
             cur.execute(query, params)
             rows = cur.fetchall()
 
             return [_row_to_subscription(cast(Mapping[str, Any], r)) for r in rows]
 
 
+async def alist_subscriptions(
+    status: SubscriptionStatus | None = None,
+    event_type: str | None = None,
+) -> list[WebhookSubscription]:
+    """Async list_subscriptions (event-loop safe, used by dispatch_event)."""
+    query, params = _subscription_query(status, event_type)
+    async with async_db_conn() as db:
+        rows = await db.fetch_all(query, params)
+    return [_row_to_subscription(r) for r in rows]
+
+
+def _subscription_query(
+    status: SubscriptionStatus | None,
+    event_type: str | None,
+) -> tuple[str, list[Any]]:
+    conditions = []
+    params: list = []
+
+    if status:
+        conditions.append("status = %s")
+        params.append(status.value)
+    if event_type:
+        conditions.append("events::jsonb ? %s")
+        params.append(event_type)
+
+    where_clause = " AND ".join(conditions) if conditions else "TRUE"
+    return f"SELECT * FROM webhook_subscriptions WHERE {where_clause} ORDER BY created_at DESC", params
+
+
 def update_subscription(
     subscription_id: str,
     name: str | None = None,
@@ -641,6 +701,7 @@ def update_subscription(
             )
             conn.commit()
     
+    invalidate_subscription_index()
     return get_subscription(subscription_id)
 
 
@@ -653,6 +714,7 @@ def delete_subscription(subscription_id: str) -> bool:
             deleted = cur.rowcount > 0
     
     if deleted:
+        invalidate_subscription_index()
         logger.info("Deleted webhook subscription %s", subscription_id)
     return deleted
 
@@ -691,6 +753,666 @@ def _row_to_subscription(row: Mapping[str, Any] | DBRow) -> WebhookSubscription:
     )
 
 
+# ── Subscription Index ─────────────────────────────────────────────
+
+class _SubscriptionIndex:
+    """
+    In-memory event_type → active subscriptions map used by dispatch_event.
+
+    Subscription CRUD calls invalidate(); the TTL is a safety net for changes
+    made by other workers/processes. Subscriptions keep the DB order
+    (created_at DESC), "*" subscriptions match every event.
+    """
+
+    def __init__(self, ttl_sec: float = WEBHOOK_INDEX_TTL_SEC) -> None:
+        self._ttl = ttl_sec
+        self._by_event: dict[str, list[tuple[int, WebhookSubscription]]] = {}
+        self._wildcard: list[tuple[int, WebhookSubscription]] = []
+        self._loaded_at: float | None = None
+        self._version = 0
+        self._reloads = 0
+        self._locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._loaded_at = None
+
+    def _fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self._ttl <= 0 or time.monotonic() - self._loaded_at < self._ttl
+
+    async def match(self, event_type: str) -> list[WebhookSubscription]:
+        if not self._fresh():
+            await self._reload()
+        hits = sorted(self._by_event.get(event_type, []) + self._wildcard, key=lambda h: h[0])
+        seen: set[str] = set()
+        matched: list[WebhookSubscription] = []
+        for _, sub in hits:
+            if sub.id not in seen:
+                seen.add(sub.id)
+                matched.append(sub)
+        return matched
+
+    async def _reload(self) -> None:
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        async with lock:
+            if self._fresh():  # eşzamanlı bekleyen başka bir çağrı zaten yükledi
+                return
+            version = self._version
+            subscriptions = await alist_subscriptions(status=SubscriptionStatus.ACTIVE)
+            by_event: dict[str, list[tuple[int, WebhookSubscription]]] = {}
+            wildcard: list[tuple[int, WebhookSubscription]] = []
+            for pos, sub in enumerate(subscriptions):
+                for event in set(sub.events):
+                    if event == "*":
+                        wildcard.append((pos, sub))
+                    else:
+                        by_event.setdefault(event, []).append((pos, sub))
+            self._by_event, self._wildcard = by_event, wildcard
+            self._reloads += 1
+            # Yükleme sırasında invalidate geldiyse taze sayma; sonraki match yeniden yükler
+            if self._version == version:
+                self._loaded_at = time.monotonic()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "event_types": len(self._by_event),
+            "wildcard_subscriptions": len(self._wildcard),
+            "reloads": self._reloads,
+            "version": self._version,
+            "age_sec": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+        }
+
+
+_subscription_index = _SubscriptionIndex()
+
+
+def invalidate_subscription_index() -> None:
+    """Drop the cached subscription index (called after subscription CRUD)."""
+    _subscription_index.invalidate()
+
+
+# ── Delivery Pool ──────────────────────────────────────────────────
+
+@dataclass
+class _DeliveryLoopState:
+    """Per-event-loop delivery resources (httpx clients and semaphores are loop-bound)."""
+    client: httpx.AsyncClient
+    slots: asyncio.Semaphore
+    host_slots: dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+class _DeliveryPool:
+    """
+    Bounded concurrent webhook sender.
+
+    One keep-alive httpx client per event loop (httpx pools connections per
+    origin, so repeat deliveries to a host reuse TCP/TLS), a global
+    concurrency limit and a per-host limit so one slow receiver cannot take
+    every slot.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = WEBHOOK_MAX_CONCURRENCY,
+        max_per_host: int = WEBHOOK_MAX_PER_HOST,
+    ) -> None:
+        self._max_concurrency = max(1, max_concurrency)
+        self._max_per_host = max(1, max_per_host)
+        self._states: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _DeliveryLoopState] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._in_flight = 0
+        self._sent = 0
+
+    def _state(self) -> _DeliveryLoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None or state.client.is_closed:
+            state = _DeliveryLoopState(
+                client=httpx.AsyncClient(
+                    timeout=WEBHOOK_TIMEOUT,
+                    limits=httpx.Limits(
+                        max_connections=self._max_concurrency,
+                        max_keepalive_connections=self._max_concurrency,
+                    ),
+                ),
+                slots=asyncio.Semaphore(self._max_concurrency),
+            )
+            self._states[loop] = state
+        return state
+
+    async def send(
+        self,
+        subscription: WebhookSubscription,
+        payload: dict[str, Any],
+        max_retries: int = MAX_RETRIES,
+    ) -> dict[str, Any]:
+        state = self._state()
+        try:
+            host = httpx.URL(subscription.url).host or subscription.url
+        except Exception:
+            host = subscription.url
+        host_slot = state.host_slots.get(host)
+        if host_slot is None:
+            host_slot = state.host_slots[host] = asyncio.Semaphore(self._max_per_host)
+        # Önce host slotu: meşgul bir host'u bekleyen teslimat global slot tutmasın
+        async with host_slot, state.slots:
+            self._in_flight += 1
+            try:
+                return await send_webhook(
+                    url=subscription.url,
+                    payload=payload,
+                    secret=subscription.secret,
+                    headers=subscription.headers,
+                    max_retries=max_retries,
+                    client=state.client,
+                )
+            finally:
+                self._in_flight -= 1
+                self._sent += 1
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        state = self._states.pop(loop, None)
+        if state is not None:
+            await state.client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self._max_concurrency,
+            "max_per_host": self._max_per_host,
+            "in_flight": self._in_flight,
+            "sent": self._sent,
+        }
+
+
+_delivery_pool = _DeliveryPool()
+
+
+# ── Delivery Status Writer ─────────────────────────────────────────
+
+@dataclass
+class _WriterLoopState:
+    inserts: list[WebhookDelivery] = field(default_factory=list)
+    updates: list[tuple[WebhookDelivery, bool | None]] = field(default_factory=list)
+    waiters: list[asyncio.Future] = field(default_factory=list)
+    handle: asyncio.TimerHandle | None = None
+    retry_delay: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class _DeliveryStatusWriter:
+    """
+    Group-commit writer for delivery rows and subscription counters.
+
+    Pending-row inserts flush immediately and the caller waits for the commit;
+    result updates wait until their batch is committed. Everything queued
+    within WEBHOOK_STATUS_FLUSH_MS (or up to WEBHOOK_STATUS_BATCH_SIZE rows)
+    goes out in one transaction with executemany — inserts before updates,
+    flushes serialized per loop. If a write fails, its inserts are put back
+    in the buffer and retried with exponential backoff, so a queued delivery
+    is not lost to a transient DB error.
+    ``on_inserted`` runs after new rows are committed (wakes the queue).
+    An update outcome of None (rescheduled) does not touch the counters.
+    """
+
+    def __init__(
+        self,
+        flush_ms: float = WEBHOOK_STATUS_FLUSH_MS,
+        batch_size: int = WEBHOOK_STATUS_BATCH_SIZE,
+        on_inserted: Callable[[], None] | None = None,
+        retry_base_sec: float = WEBHOOK_STATUS_RETRY_BASE_SEC,
+        retry_max_sec: float = WEBHOOK_STATUS_RETRY_MAX_SEC,
+    ) -> None:
+        self._flush_s = max(0.0, flush_ms) / 1000.0
+        self._batch_size = max(1, batch_size)
+        self._retry_base = max(0.001, retry_base_sec)
+        self._retry_max = max(self._retry_base, retry_max_sec)
+        self._on_inserted = on_inserted
+        self._states: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _WriterLoopState] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._tasks: set[asyncio.Task] = set()
+        self._flushes = 0
+        self._rows = 0
+        self._failures = 0
+        self._requeued = 0
+
+    def _state(self) -> _WriterLoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _WriterLoopState()
+        return state
+
+    async def insert_pending(self, deliveries: list[WebhookDelivery]) -> bool:
+        """Write new delivery rows now (one batched INSERT); True once committed.
+
+        On failure the rows stay buffered and are retried in the background.
+        """
+        if not deliveries:
+            return True
+        state = self._state()
+        waiter = asyncio.get_running_loop().create_future()
+        state.inserts.extend(deliveries)
+        state.waiters.append(waiter)
+        if state.handle is not None:
+            state.handle.cancel()
+        self._spawn_flush(state)
+        return bool(await waiter)
+
+    async def write_result(self, delivery: WebhookDelivery, success: bool | None) -> None:
+        state = self._state()
+        waiter = asyncio.get_running_loop().create_future()
+        state.updates.append((delivery, success))
+        state.waiters.append(waiter)
+        self._schedule(state)
+        await waiter
+
+    async def flush(self) -> None:
+        state = self._state()
+        if state.handle is not None:
+            state.handle.cancel()
+            state.handle = None
+        await self._flush(state)
+
+    def _schedule(self, state: _WriterLoopState) -> None:
+        if len(state.inserts) + len(state.updates) >= self._batch_size:
+            if state.handle is not None:
+                state.handle.cancel()
+            self._spawn_flush(state)
+        elif state.handle is None:
+            state.handle = asyncio.get_running_loop().call_later(self._flush_s, self._spawn_flush, state)
+
+    def _spawn_flush(self, state: _WriterLoopState) -> None:
+        state.handle = None
+        task = asyncio.get_running_loop().create_task(self._flush(state))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, state: _WriterLoopState) -> None:
+        async with state.lock:
+            inserts, updates, waiters = state.inserts, state.updates, state.waiters
+            if not inserts and not updates:
+                return
+            state.inserts, state.updates, state.waiters = [], [], []
+            committed = False
+            try:
+                await self._write(inserts, updates)
+                committed = True
+                state.retry_delay = 0.0
+                self._rows += len(inserts) + len(updates)
+                if inserts and self._on_inserted is not None:
+                    self._on_inserted()
+            except Exception as e:
+                self._failures += 1
+                logger.error(
+                    "Failed to write %d webhook delivery row(s): %s", len(inserts) + len(updates), e
+                )
+                if inserts:
+                    self._requeue(state, inserts)
+            finally:
+                self._flushes += 1
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(committed)
+
+    def _requeue(self, state: _WriterLoopState, inserts: list[WebhookDelivery]) -> None:
+        """Put failed inserts back at the head of the buffer and retry after a backoff."""
+        state.inserts[:0] = inserts
+        self._requeued += len(inserts)
+        state.retry_delay = min(self._retry_max, state.retry_delay * 2 or self._retry_base)
+        if state.handle is not None:
+            state.handle.cancel()
+        state.handle = asyncio.get_running_loop().call_later(state.retry_delay, self._spawn_flush, state)
+        logger.warning("Retrying %d webhook delivery insert(s) in %.1fs", len(state.inserts), state.retry_delay)
+
+    async def _write(
+        self,
+        inserts: list[WebhookDelivery],
+        updates: list[tuple[WebhookDelivery, bool | None]],
+    ) -> None:
+        async with async_db_conn() as db:
+            if inserts:
+                await db.execute_many(_STORE_DELIVERY_SQL, [_store_delivery_params(d) for d in inserts])
+            if updates:
+                await db.execute_many(_UPDATE_DELIVERY_SQL, [_update_delivery_params(d) for d, _ in updates])
+                stats_params = _batch_subscription_stats_params(updates)
+                if stats_params:
+                    await db.execute_many(_BATCH_SUBSCRIPTION_STATS_SQL, stats_params)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "flushes": self._flushes,
+            "rows": self._rows,
+            "failures": self._failures,
+            "requeued_inserts": self._requeued,
+            "avg_rows_per_flush": round(self._rows / self._flushes, 1) if self._flushes else 0.0,
+        }
+
+
+_status_writer = _DeliveryStatusWriter(on_inserted=lambda: _delivery_queue.wake())
+
+
+# ── Delivery Queue ─────────────────────────────────────────────────
+
+class _TokenBucket:
+    """Per-subscription send rate limit (reservation style, tokens may go negative)."""
+
+    __slots__ = ("_rate", "_burst", "_tokens", "_updated")
+
+    def __init__(self, rate_per_sec: float, burst: int) -> None:
+        self._rate = max(0.001, rate_per_sec)
+        self._burst = float(max(1, burst))
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take one token; returns how long the caller must wait before sending."""
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+        self._tokens -= 1.0
+        return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+    def refund(self) -> None:
+        self._tokens = min(self._burst, self._tokens + 1.0)
+
+
+@dataclass
+class _QueuedDelivery:
+    delivery: WebhookDelivery
+    subscription: WebhookSubscription
+
+
+class WebhookDeliveryQueue:
+    """
+    Durable outbound webhook queue on top of ``webhook_deliveries``.
+
+    Pending/retrying rows whose ``next_attempt_at`` is due are leased with
+    ``FOR UPDATE SKIP LOCKED`` (safe with several processes) and handed to a
+    pool of worker coroutines. Each attempt is a single HTTP call; failures
+    are rescheduled with exponential backoff + jitter until
+    WEBHOOK_MAX_ATTEMPTS. Per-subscription token buckets limit the send
+    rate and a CircuitBreaker (keyed by subscription id) pauses endpoints
+    that keep failing.
+    """
+
+    def __init__(
+        self,
+        workers: int = WEBHOOK_WORKERS,
+        max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+        backoff_base_sec: float = WEBHOOK_BACKOFF_BASE_SEC,
+        backoff_max_sec: float = WEBHOOK_BACKOFF_MAX_SEC,
+        poll_sec: float = WEBHOOK_QUEUE_POLL_SEC,
+        lease_sec: float = WEBHOOK_LEASE_SEC,
+        rate_per_sec: float = WEBHOOK_RATE_PER_SEC,
+        rate_burst: int = WEBHOOK_RATE_BURST,
+        breaker_failures: int = WEBHOOK_BREAKER_FAILURES,
+        breaker_recovery_sec: float = WEBHOOK_BREAKER_RECOVERY_SEC,
+    ) -> None:
+        self._workers = max(1, workers)
+        self._max_attempts = max(1, max_attempts)
+        self._backoff_base = max(0.0, backoff_base_sec)
+        self._backoff_max = max(self._backoff_base, backoff_max_sec)
+        self._poll_sec = max(0.05, poll_sec)
+        self._lease_sec = max(1.0, lease_sec)
+        self._rate_per_sec = rate_per_sec
+        self._rate_burst = rate_burst
+        self._breaker_recovery = breaker_recovery_sec
+        self.breaker = CircuitBreaker(
+            failure_threshold=breaker_failures,
+            recovery_timeout=breaker_recovery_sec,
+        )
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._jobs: asyncio.Queue[_QueuedDelivery] | None = None
+        self._wake_event: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._busy = 0
+        self._counters = {
+            "claimed": 0,
+            "delivered": 0,
+            "failed": 0,
+            "retried": 0,
+            "rate_limited": 0,
+            "circuit_open": 0,
+            "claim_errors": 0,
+        }
+
+    # ── Lifecycle ────────────────────────────────────────────────
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and not all(t.done() for t in self._tasks)
+
+    def start(self) -> None:
+        """Start the claim loop and workers on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+        self._loop = loop
+        self._jobs = asyncio.Queue()
+        self._wake_event = asyncio.Event()
+        self._tasks = [loop.create_task(self._claim_loop(), name="webhook-queue-claim")]
+        self._tasks += [
+            loop.create_task(self._worker(), name=f"webhook-queue-worker-{i}")
+            for i in range(self._workers)
+        ]
+        logger.info("Webhook delivery queue started (%d workers)", self._workers)
+
+    def ensure_started(self) -> None:
+        if not self.running or self._loop is not asyncio.get_running_loop():
+            self.start()
+
+    async def stop(self) -> None:
+        """Cancel workers; leased-but-unsent rows are re-claimed after their lease expires."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks and self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def wake(self) -> None:
+        """Nudge the claim loop (new rows committed or a worker became free)."""
+        if self._wake_event is None:
+            return
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                self._wake_event.set()
+        except RuntimeError:
+            pass
+
+    # ── Claim / Work ─────────────────────────────────────────────
+
+    async def _claim_loop(self) -> None:
+        assert self._jobs is not None and self._wake_event is not None
+        while True:
+            self._wake_event.clear()
+            capacity = self._workers - self._busy - self._jobs.qsize()
+            if capacity > 0:
+                try:
+                    jobs = await self._claim(capacity)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._counters["claim_errors"] += 1
+                    logger.warning("Webhook queue claim failed: %s", e)
+                    jobs = []
+                for job in jobs:
+                    self._jobs.put_nowait(job)
+                self._counters["claimed"] += len(jobs)
+                if len(jobs) == capacity:
+                    continue  # backlog var — kapasite açılınca tekrar claim
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=self._poll_sec)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, limit: int) -> list[_QueuedDelivery]:
+        async with async_db_conn() as db:
+            rows = await db.fetch_all(_CLAIM_DELIVERIES_SQL, (self._lease_sec, limit))
+        return [_row_to_queued_delivery(row) for row in rows]
+
+    async def _worker(self) -> None:
+        assert self._jobs is not None
+        while True:
+            job = await self._jobs.get()
+            self._busy += 1
+            try:
+                await self.process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Lease dolunca satır yeniden claim edilir
+                logger.error("Webhook delivery %s crashed: %s", job.delivery.id, e)
+            finally:
+                self._busy -= 1
+                self._jobs.task_done()
+                self.wake()
+
+    async def process(self, job: _QueuedDelivery) -> None:
+        """Run one delivery attempt and persist the outcome."""
+        delivery, sub = job.delivery, job.subscription
+
+        if sub.status != SubscriptionStatus.ACTIVE:
+            delivery.status = WebhookStatus.FAILED
+            delivery.error_message = f"Subscription is {sub.status.value}"
+            delivery.next_attempt_at = None
+            await _status_writer.write_result(delivery, None)
+            return
+
+        if not self.breaker.is_available(sub.id):
+            self._counters["circuit_open"] += 1
+            await self._defer(delivery, self._breaker_recovery)
+            return
+
+        bucket = self._buckets.get(sub.id)
+        if bucket is None:
+            bucket = self._buckets[sub.id] = _TokenBucket(self._rate_per_sec, self._rate_burst)
+        wait = bucket.reserve()
+        if wait > WEBHOOK_RATE_MAX_WAIT_SEC:
+            bucket.refund()
+            self._counters["rate_limited"] += 1
+            await self._defer(delivery, wait)
+            return
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        result = await _delivery_pool.send(sub, {
+            "id": delivery.id,
+            "event": delivery.event_type,
+            "source": delivery.source,
+            "timestamp": delivery.created_at,
+            "data": delivery.payload,
+            "attempt": delivery.attempt_count + 1,
+        }, max_retries=1)
+
+        now = datetime.now(timezone.utc)
+        delivery.attempt_count += 1
+        delivery.response_code = result.get("response_code")
+        delivery.response_body = result.get("response_body")
+        delivery.error_message = result.get("error_message")
+
+        outcome: bool | None
+        if result["success"]:
+            self.breaker.record_success(sub.id)
+            self._counters["delivered"] += 1
+            delivery.status = WebhookStatus.DELIVERED
+            delivery.delivered_at = now.isoformat()
+            delivery.next_attempt_at = None
+            outcome = True
+        else:
+            self.breaker.record_failure(sub.id, delivery.error_message or "")
+            if delivery.attempt_count >= self._max_attempts:
+                self._counters["failed"] += 1
+                delivery.status = WebhookStatus.FAILED
+                delivery.next_attempt_at = None
+                outcome = False
+            else:
+                self._counters["retried"] += 1
+                delivery.status = WebhookStatus.RETRYING
+                delivery.next_attempt_at = _after(self.backoff(delivery.attempt_count))
+                outcome = None
+        await _status_writer.write_result(delivery, outcome)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before the next attempt: base * 2^(attempt-1), capped, ±20% jitter."""
+        delay = min(self._backoff_max, self._backoff_base * (2 ** max(0, attempt - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _defer(self, delivery: WebhookDelivery, delay_sec: float) -> None:
+        """Reschedule without spending an attempt (rate limit / open circuit)."""
+        delivery.next_attempt_at = _after(delay_sec)
+        await _status_writer.write_result(delivery, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "workers": self._workers,
+            "busy": self._busy,
+            "buffered": self._jobs.qsize() if self._jobs is not None else 0,
+            **self._counters,
+            "open_circuits": [
+                sub_id for sub_id, info in self.breaker.status().items()
+                if info.get("state") == "open"
+            ],
+        }
+
+
+def _after(delay_sec: float) -> str:
+    return datetime.fromtimestamp(time.time() + delay_sec, timezone.utc).isoformat()
+
+
+def _row_to_queued_delivery(row: Mapping[str, Any] | DBRow) -> _QueuedDelivery:
+    row_dict = _normalize_row(row)
+    subscription = WebhookSubscription(
+        id=row_dict["subscription_id"],
+        name="",
+        url=row_dict["sub_url"],
+        secret=row_dict["sub_secret"],
+        events=[],
+        headers=json.loads(row_dict["sub_headers"]) if row_dict["sub_headers"] else {},
+        status=SubscriptionStatus(row_dict["sub_status"])
+        if row_dict["sub_status"]
+        else SubscriptionStatus.ACTIVE,
+    )
+    return _QueuedDelivery(delivery=_row_to_delivery(row_dict), subscription=subscription)
+
+
+_delivery_queue = WebhookDeliveryQueue()
+
+
+def get_dispatch_stats() -> dict[str, Any]:
+    """Subscription index, delivery pool, status writer and queue counters."""
+    return {
+        "index": _subscription_index.stats(),
+        "pool": _delivery_pool.stats(),
+        "writer": _status_writer.stats(),
+        "queue": _delivery_queue.stats(),
+    }
+
+
+async def start_webhook_queue() -> None:
+    """Ensure webhook tables exist and start the background delivery workers."""
+    await asyncio.to_thread(init_webhook_tables)
+    _delivery_queue.start()
+
+
+async def close_webhook_dispatch() -> None:
+    """Stop queue workers, flush pending status writes and close the HTTP client."""
+    await _delivery_queue.stop()
+    await _status_writer.flush()
+    await _delivery_pool.aclose()
+
+
 # ── Event Dispatch ─────────────────────────────────────────────────
 
 async def dispatch_event(
@@ -699,7 +1421,13 @@ async def dispatch_event(
     source: str = "system",
 ) -> list[dict[str, Any]]:
     """
-    Dispatch an event to all matching subscriptions.
+    Queue an event for every matching subscription and return immediately.
+    
+    Matching comes from the in-memory subscription index; the PENDING rows
+    are written to webhook_deliveries in one batched INSERT before this
+    returns, then sent by the background queue workers (retries, rate limits
+    and circuit breaking happen there). If that INSERT fails the rows stay
+    buffered and are retried with backoff (``persisted`` is False).
     
     Args:
         event_type: Event type (e.g., 'agent.task.complete')
@@ -707,73 +1435,45 @@ async def dispatch_event(
         source: Source identifier
     
     Returns:
-        List of delivery results for each subscription
+        List of queued deliveries (subscription_id, delivery_id, status)
     """
-    # Find matching subscriptions
-    subscriptions = list_subscriptions(status=SubscriptionStatus.ACTIVE)
-    matching = [s for s in subscriptions if event_type in s.events or "*" in s.events]
+    matching = [
+        sub for sub in await _subscription_index.match(event_type)
+        if _matches_filters(payload, sub.filters)
+    ]
     
     if not matching:
         logger.debug("No subscriptions match event type: %s", event_type)
         return []
     
-    results = []
+    _delivery_queue.ensure_started()
     now = datetime.now(timezone.utc).isoformat()
-    
+    deliveries = []
     for sub in matching:
-        # Apply filters if any
-        if not _matches_filters(payload, sub.filters):
-            continue
-        
-        # Create delivery record
-        delivery_id = f"del-{uuid.uuid4().hex[:12]}"
-        delivery = WebhookDelivery(
-            id=delivery_id,
+        deliveries.append(WebhookDelivery(
+            id=f"del-{uuid.uuid4().hex[:12]}",
             subscription_id=sub.id,
             event_type=event_type,
             payload=payload,
             status=WebhookStatus.PENDING,
+            attempt_count=0,
             created_at=now,
-        )
-        
-        # Store delivery record
-        _store_delivery(delivery)
-        
-        # Send webhook
-        result = await send_webhook(
-            url=sub.url,
-            payload={
-                "id": delivery_id,
-                "event": event_type,
-                "source": source,
-                "timestamp": now,
-                "data": payload,
-            },
-            secret=sub.secret,
-            headers=sub.headers,
-        )
-        
-        # Update delivery status
-        delivery.status = WebhookStatus.DELIVERED if result["success"] else WebhookStatus.FAILED
-        delivery.response_code = result.get("response_code")
-        delivery.response_body = result.get("response_body")
-        delivery.error_message = result.get("error_message")
-        delivery.attempt_count = result.get("attempts", 1)
-        delivery.delivered_at = now if result["success"] else None
-        
-        _update_delivery(delivery)
-        _update_subscription_stats(sub.id, result["success"])
-        
-        results.append({
-            "subscription_id": sub.id,
-            "delivery_id": delivery_id,
-            "success": result["success"],
+            source=source,
+            next_attempt_at=now,
+        ))
+    persisted = await _status_writer.insert_pending(deliveries)
+    results = [
+        {
+            "subscription_id": delivery.subscription_id,
+            "delivery_id": delivery.id,
             "status": delivery.status.value,
-            "response_code": delivery.response_code,
-            "error": delivery.error_message,
-        })
+            "queued": True,
+            "persisted": persisted,
+        }
+        for delivery in deliveries
+    ]
     
-    logger.info("Dispatched event %s to %d subscription(s)", event_type, len(results))
+    logger.debug("Queued event %s for %d subscription(s)", event_type, len(results))
     return results
 
 
@@ -795,82 +1495,86 @@ def _matches_filters(payload: dict[str, Any], filters: dict[str, Any]) -> bool:
     return True
 
 
-def _store_delivery(delivery: WebhookDelivery) -> None:
-    """Store a delivery record in the database."""
-    try:
-        with db_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """INSERT INTO webhook_deliveries
-                       (id, subscription_id, event_type, payload, status, created_at)
-                       VALUES (%s, %s, %s, %s, %s, %s)""",
-                    (
-                        delivery.id,
-                        delivery.subscription_id,
-                        delivery.event_type,
-                        json.dumps(delivery.payload, ensure_ascii=False),
-                        delivery.status.value,
-                        delivery.created_at,
-                    ),
-                )
-            conn.commit()
-    except Exception as e:
-        logger.error("Failed to store delivery: %s", e)
+_STORE_DELIVERY_SQL = """INSERT INTO webhook_deliveries
+    (id, subscription_id, event_type, payload, status, attempt_count, source, next_attempt_at, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+_UPDATE_DELIVERY_SQL = """UPDATE webhook_deliveries
+    SET status = %s, response_code = %s, response_body = %s,
+        error_message = %s, attempt_count = %s, delivered_at = %s,
+        next_attempt_at = %s, locked_until = NULL
+    WHERE id = %s"""
+
+# Due rows are leased (locked_until) rather than held in a transaction: a
+# crashed worker's rows become claimable again once the lease expires.
+_CLAIM_DELIVERIES_SQL = """UPDATE webhook_deliveries d
+    SET locked_until = now() + make_interval(secs => %s)
+    FROM webhook_subscriptions s
+    WHERE s.id = d.subscription_id
+      AND d.id IN (
+        SELECT id FROM webhook_deliveries
+        WHERE status IN ('pending', 'retrying')
+          AND next_attempt_at <= now()
+          AND (locked_until IS NULL OR locked_until < now())
+        ORDER BY next_attempt_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+      )
+    RETURNING d.*, s.url AS sub_url, s.secret AS sub_secret,
+              s.headers AS sub_headers, s.status AS sub_status"""
+
+
+def _store_delivery_params(delivery: WebhookDelivery) -> tuple:
+    return (
+        delivery.id,
+        delivery.subscription_id,
+        delivery.event_type,
+        json.dumps(delivery.payload, ensure_ascii=False),
+        delivery.status.value,
+        delivery.attempt_count,
+        delivery.source,
+        delivery.next_attempt_at,
+        delivery.created_at,
+    )
 
 
-def _update_delivery(delivery: WebhookDelivery) -> None:
-    """Update delivery status in the database."""
-    try:
-        with db_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """UPDATE webhook_deliveries
-                       SET status = %s, response_code = %s, response_body = %s,
-                           error_message = %s, attempt_count = %s, delivered_at = %s
-                       WHERE id = %s""",
-                    (
-                        delivery.status.value,
-                        delivery.response_code,
-                        delivery.response_body,
-                        delivery.error_message,
-                        delivery.attempt_count,
-                        delivery.delivered_at,
-                        delivery.id,
-                    ),
-                )
-            conn.commit()
-    except Exception as e:
-        logger.error("Failed to update delivery: %s", e)
+def _update_delivery_params(delivery: WebhookDelivery) -> tuple:
+    return (
+        delivery.status.value,
+        delivery.response_code,
+        delivery.response_body,
+        delivery.error_message,
+        delivery.attempt_count,
+        delivery.delivered_at,
+        delivery.next_attempt_at,
+        delivery.id,
+    )
 
 
-def _update_subscription_stats(subscription_id: str, success: bool) -> None:
-    """Update subscription statistics."""
-    now = datetime.now(timezone.utc).isoformat()
-    try:
-        with db_conn() as conn:
-            with conn.cursor() as cur:
-                if success:
-                    cur.execute(
-                        """UPDATE webhook_subscriptions
-                           SET delivery_count = delivery_count + 1,
-                               last_triggered = %s,
-                               updated_at = %s
-                           WHERE id = %s""",
-                        (now, now, subscription_id),
-                    )
-                else:
-                    cur.execute(
-                        """UPDATE webhook_subscriptions
-                           SET failure_count = failure_count + 1,
-                               updated_at = %s
-                           WHERE id = %s""",
-                        (now, subscription_id),
-                    )
-            conn.commit()
-    except Exception as e:
-        logger.error("Failed to update subscription stats: %s", e)
+
+# Bir flush'taki sonuçlar abonelik başına toplanır: subscription başına tek UPDATE
+_BATCH_SUBSCRIPTION_STATS_SQL = """UPDATE webhook_subscriptions
+    SET delivery_count = delivery_count + %s,
+        failure_count = failure_count + %s,
+        last_triggered = CASE WHEN %s::int > 0 THEN %s::timestamptz ELSE last_triggered END,
+        updated_at = %s
+    WHERE id = %s"""
 
 
+def _batch_subscription_stats_params(updates: list[tuple[WebhookDelivery, bool | None]]) -> list[tuple]:
+    counts: dict[str, list[int]] = {}
+    for delivery, success in updates:
+        if success is None:
+            continue
+        delivered_failed = counts.setdefault(delivery.subscription_id, [0, 0])
+        delivered_failed[0 if success else 1] += 1
+    now = datetime.now(timezone.utc).isoformat()
+    # Sabit sıra: eşzamanlı flush'lar satır kilitlerini aynı sırayla alır (deadlock yok)
+    return [
+        (delivered, failed, delivered, now, now, sub_id)
+        for sub_id, (delivered, failed) in sorted(counts.items())
+    ]
+
 # ── Delivery History ───────────────────────────────────────────────
 
 def get_delivery_history(
@@ -922,7 +1626,7 @@ def get_delivery(delivery_id: str) -> WebhookDelivery | None:
 
 
 def retry_delivery(delivery_id: str) -> dict[str, Any]:
-    """Retry a failed webhook delivery."""
+    """Re-queue a failed webhook delivery (sent by the background queue workers)."""
     delivery = get_delivery(delivery_id)
     if not delivery:
         return {"success": False, "error": "Delivery not found"}
@@ -937,39 +1641,29 @@ def retry_delivery(delivery_id: str) -> dict[str, Any]:
     if subscription.status != SubscriptionStatus.ACTIVE:
         return {"success": False, "error": "Subscription is not active"}
     
-    # Retry send
-    import asyncio
-    result = asyncio.run(send_webhook(
-        url=subscription.url,
-        payload={
-            "id": delivery.id,
-            "event": delivery.event_type,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "data": delivery.payload,
-            "retry": True,
-        },
-        secret=subscription.secret,
-        headers=subscription.headers,
-    ))
-    
-    # Update delivery
-    delivery.status = WebhookStatus.DELIVERED if result["success"] else WebhookStatus.FAILED
-    delivery.response_code = result.get("response_code")
-    delivery.response_body = result.get("response_body")
-    delivery.error_message = result.get("error_message")
-    delivery.attempt_count += 1
-    if result["success"]:
-        delivery.delivered_at = datetime.now(timezone.utc).isoformat()
-    
-    _update_delivery(delivery)
-    _update_subscription_stats(subscription.id, result["success"])
+    # Manual retry = one more attempt, even if max attempts were exhausted
+    with db_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """UPDATE webhook_deliveries
+                   SET status = %s, next_attempt_at = %s, locked_until = NULL,
+                       attempt_count = LEAST(attempt_count, %s)
+                   WHERE id = %s""",
+                (
+                    WebhookStatus.RETRYING.value,
+                    datetime.now(timezone.utc).isoformat(),
+                    max(0, WEBHOOK_MAX_ATTEMPTS - 1),
+                    delivery_id,
+                ),
+            )
+        conn.commit()
     
     return {
-        "success": result["success"],
+        "success": True,
         "delivery_id": delivery_id,
-        "status": delivery.status.value,
+        "status": WebhookStatus.RETRYING.value,
+        "queued": True,
         "attempts": delivery.attempt_count,
-        "error": delivery.error_message,
     }
 
 
@@ -987,11 +1681,15 @@ def _row_to_delivery(row: Mapping[str, Any] | DBRow) -> WebhookDelivery:
         response_code=row_dict["response_code"],
         response_body=row_dict["response_body"],
         error_message=row_dict["error_message"],
-        attempt_count=row_dict["attempt_count"] or 1,
+        attempt_count=row_dict["attempt_count"] if row_dict["attempt_count"] is not None else 1,
         delivered_at=row_dict["delivered_at"].isoformat()
         if row_dict["delivered_at"]
         else None,
         created_at=row_dict["created_at"].isoformat() if row_dict["created_at"] else "",
+        source=row_dict.get("source") or "system",
+        next_attempt_at=row_dict["next_attempt_at"].isoformat()
+        if row_dict.get("next_attempt_at")
+        else None,
     )
 
 
@@ -1033,6 +1731,9 @@ def get_webhook_stats() -> dict[str, Any]:
             cur.execute("SELECT COUNT(*) as pending FROM webhook_deliveries WHERE status = 'pending'")
             pending = _count_from_row(cur.fetchone(), "pending")
 
+            cur.execute("SELECT COUNT(*) as retrying FROM webhook_deliveries WHERE status = 'retrying'")
+            retrying = _count_from_row(cur.fetchone(), "retrying")
+
             # Incoming webhook stats
             cur.execute("SELECT COUNT(*) as total FROM webhook_incoming")
             total_incoming = _count_from_row(cur.fetchone(), "total")
@@ -1054,6 +1755,7 @@ def get_webhook_stats() -> dict[str, Any]:
                     "delivered": delivered,
                     "failed": failed,
                     "pending": pending,
+                    "retrying": retrying,
                     "success_rate": round(delivered / total_deliveries * 100, 2) if total_deliveries > 0 else 0,
                 },
                 "incoming": {